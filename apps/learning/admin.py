@@ -17,7 +17,7 @@ class WordLearningStageAdmin(admin.ModelAdmin):
     ordering = ('-updated_at',)
     
     def get_word(self, obj):
-        return obj.book_word.word_basic.word if obj.book_word and obj.book_word.word_basic else "Unknown Word"
+        return obj.book_word.word_basic.word
     get_word.short_description = '单词'
     
     def get_plan_id(self, obj):
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+学习进度延续
+
+学生从上一本教材换到下一本（如七上 -> 七下）时，把上一个学习计划中已经学过的单词带到新计划：
+- known：把两本书共有、在旧计划中达到 min_stage 的单词标记为已认识（known_words.bulk_mark）
+- advance：在新计划中直接为这些单词建立学习阶段，阶段取旧计划中的阶段，
+  一条 INSERT ... SELECT ... ON CONFLICT 完成，新计划中阶段更高的记录不会被降低
+单词按 word_basic_id 对应，覆盖词书与基础词书合并。
+"""
+
+import logging
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.vocabulary.book_overlap import get_overlaps
+from apps.vocabulary.known_words import WordSelection, bulk_mark
+from apps.vocabulary.models import BookWord
+
+from .models import LearningPlan, WordLearningStage
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+MASTERED_STAGE = 6
+
+CARRYOVER_MODES = ('known', 'advance')
+
+# 各模式默认延续的最低阶段：标记已认识只取已掌握的单词，推进阶段取学过的单词
+DEFAULT_MIN_STAGE = {'known': MASTERED_STAGE, 'advance': 1}
+
+_ADVANCE_SQL = """
+    WITH target AS ({target_sql}),
+    source AS (
+        SELECT bw.word_basic_id, max(ws.current_stage) AS stage, max(ws.last_reviewed_at) AS last_reviewed_at
+        FROM word_learning_stages ws
+        JOIN book_words bw ON bw.id = ws.book_word_id
+        WHERE ws.learning_plan_id = %s AND ws.current_stage >= %s
+        GROUP BY bw.word_basic_id
+    ),
+    upserted AS (
+        INSERT INTO word_learning_stages
+            (learning_plan_id, book_word_id, current_stage, start_date, last_reviewed_at, next_review_date,
+             created_at, updated_at)
+        SELECT %s, target.id, source.stage, %s, COALESCE(source.last_reviewed_at, now()),
+            CASE WHEN source.stage >= %s THEN NULL
+                 ELSE %s::date + (%s::int[])[source.stage + 1] END,
+            now(), now()
+        FROM target
+        JOIN source ON source.word_basic_id = target.word_basic_id
+        ON CONFLICT (learning_plan_id, book_word_id) DO UPDATE SET
+            current_stage = EXCLUDED.current_stage,
+            last_reviewed_at = EXCLUDED.last_reviewed_at,
+            next_review_date = EXCLUDED.next_review_date,
+            updated_at = EXCLUDED.updated_at
+        WHERE word_learning_stages.current_stage < EXCLUDED.current_stage
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+
+class CarryoverError(Exception):
+    """无法延续学习进度（不是同一个学生、没有可用的旧计划等）"""
+
+
+def find_source_plan(plan):
+    """
+    未指定旧计划时，选择同一学生的其他计划中，词书与新计划共有单词最多的一个
+    （重叠索引过期时 get_overlaps 即时重算，不依赖定时任务是否已运行）
+    """
+    candidates = {
+        candidate.vocabulary_book_id: candidate
+        for candidate in LearningPlan.objects.filter(student_id=plan.student_id).exclude(pk=plan.pk).order_by(
+            'created_at'
+        )
+    }
+    if not candidates:
+        return None
+    for overlap in get_overlaps(plan.vocabulary_book):
+        if overlap['book_id'] in candidates:
+            return candidates[overlap['book_id']]
+    return None
+
+
+def carry_over(plan, source_plan, mode, min_stage=None):
+    """
+    把 source_plan 中的学习进度延续到 plan
+
+    Returns:
+        dict: known 模式为 {"matched", "changed"}；advance 模式为 {"created", "advanced"}
+    """
+    if mode not in CARRYOVER_MODES:
+        raise CarryoverError(f"不支持的延续方式，可选: {', '.join(CARRYOVER_MODES)}")
+    if source_plan.pk == plan.pk:
+        raise CarryoverError("旧计划不能是当前计划本身")
+    if source_plan.student_id != plan.student_id:
+        raise CarryoverError("只能延续同一个学生的学习计划")
+    if min_stage is None:
+        min_stage = DEFAULT_MIN_STAGE[mode]
+
+    if mode == 'known':
+        selection = WordSelection.intersection(
+            WordSelection.by_stage(
+                plan.student_id, range(min_stage, MASTERED_STAGE + 1), plan_id=source_plan.pk
+            ),
+            WordSelection.by_book_range(plan.vocabulary_book_id),
+        )
+        result = bulk_mark(plan.student_id, selection)
+    else:
+        target_sql, target_params = BookWord.objects.for_book(plan.vocabulary_book).values(
+            'id', 'word_basic_id'
+        ).query.sql_with_params()
+        today = timezone.now().date()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                _ADVANCE_SQL.format(target_sql=target_sql),
+                list(target_params) + [
+                    source_plan.pk, max(min_stage, 1),
+                    plan.pk, today, MASTERED_STAGE, today, WordLearningStage.STAGE_INTERVALS,
+                ]
+            )
+            created, advanced = cursor.fetchone()
+        result = {'created': created, 'advanced': advanced}
+
+    logger.info(f"学习计划 {source_plan.pk} -> {plan.pk} 延续学习进度({mode}, 阶段>={min_stage}): {result}")
+    return result
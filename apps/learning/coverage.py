@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+文章词汇覆盖分析
+
+老师粘贴一篇阅读文章，按学习计划所属的学生和词书标出每个单词的状态：
+- known：学生已标记认识，或在任一学习计划中已掌握
+- learning：在学习计划中学习中（阶段未到掌握）
+- in_book：在本计划的词书中，但还没有开始学习
+- unseen：词库中有这个单词，但学生从未接触过
+- unmatched：词库中没有（人名、拼写错误等）
+
+分词和规范化在内存中完成，单词通过 word_forms 词形索引（含屈折形式）对应到 WordBasic，
+学生状态只用几条按ID集合的批量查询取回，之后全部是集合运算。
+"""
+
+import re
+
+from django.db.models import Max
+
+from apps.vocabulary.models import BookWord, StudentKnownWord, WordForm
+from apps.vocabulary.word_forms import normalize_form
+
+from .carryover import MASTERED_STAGE
+from .models import WordLearningStage
+
+# 文章最大长度（字符数）
+MAX_TEXT_CHARS = 100000
+
+# 单次词形查询的数量
+FORM_BATCH_SIZE = 5000
+
+STATUSES = ('known', 'learning', 'in_book', 'unseen', 'unmatched')
+
+# 一个词形对应多个单词时（如 leaves -> leave / leaf），取排序靠前的状态
+_STATUS_RANK = {status: rank for rank, status in enumerate(STATUSES)}
+
+_TOKEN = re.compile(r"[A-Za-z]+(?:['’][A-Za-z]+)*")
+
+# 缩写：去掉后缀后按原形查找
+_CONTRACTIONS = {"can't": 'can', "won't": 'will', "shan't": 'shall', "ain't": 'be'}
+_CLITIC_SUFFIXES = ("n't", "'s", "'re", "'ve", "'ll", "'d", "'m")
+
+
+class CoverageError(Exception):
+    """文本为空或过长"""
+
+
+def normalize_token(token):
+    """单词规范化：小写、统一撇号，缩写还原为原形（don't -> do，it's -> it）"""
+    form = normalize_form(token.replace('’', "'"))
+    if form in _CONTRACTIONS:
+        return _CONTRACTIONS[form]
+    for suffix in _CLITIC_SUFFIXES:
+        if form.endswith(suffix) and len(form) > len(suffix):
+            return form[:-len(suffix)]
+    return form
+
+
+def tokenize(text):
+    """
+    Returns:
+        list[(start, end, form)]
+    """
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        form = normalize_token(match.group(0))
+        if form:
+            tokens.append((match.start(), match.end(), form))
+    return tokens
+
+
+def _resolve_forms(forms):
+    """
+    词形 -> 候选单词：原形匹配优先，没有原形匹配时使用屈折形式匹配
+
+    Returns:
+        dict: {form: {word_basic_id: word}}
+    """
+    exact = {}
+    inflection = {}
+    forms = list(forms)
+    for offset in range(0, len(forms), FORM_BATCH_SIZE):
+        for form, kind, word_id, word in WordForm.objects.filter(
+            form__in=forms[offset:offset + FORM_BATCH_SIZE]
+        ).values_list('form', 'kind', 'word_basic_id', 'word_basic__word'):
+            target = exact if kind == 'exact' else inflection
+            target.setdefault(form, {})[word_id] = word
+    resolved = dict(inflection)
+    resolved.update(exact)
+    return resolved
+
+
+def _student_word_state(student_id, book, word_ids):
+    """
+    三条批量查询：已认识、学习阶段（取所有计划中的最高阶段）、词书成员
+
+    Returns:
+        (known_ids, stages, book_ids)
+    """
+    known_ids = set(StudentKnownWord.objects.filter(
+        student_id=student_id, word_id__in=word_ids
+    ).values_list('word_id', flat=True))
+    stages = dict(WordLearningStage.objects.filter(
+        learning_plan__student_id=student_id, book_word__word_basic_id__in=word_ids
+    ).values('book_word__word_basic_id').annotate(stage=Max('current_stage')).values_list(
+        'book_word__word_basic_id', 'stage'
+    ))
+    book_ids = set(BookWord.objects.for_book(book).filter(
+        word_basic_id__in=word_ids
+    ).values_list('word_basic_id', flat=True))
+    return known_ids, stages, book_ids
+
+
+def _word_status(word_id, known_ids, stages, book_ids):
+    stage = stages.get(word_id)
+    if word_id in known_ids or (stage is not None and stage >= MASTERED_STAGE):
+        return 'known'
+    if stage is not None:
+        return 'learning'
+    if word_id in book_ids:
+        return 'in_book'
+    return 'unseen'
+
+
+def analyze_coverage(text, plan):
+    """
+    分析文章对学习计划所属学生的词汇覆盖情况
+
+    Returns:
+        dict:
+            stats: 各状态的词次（tokens）与不同单词数（words），以及覆盖率
+            words: 不同词形的列表 [{form, word, word_id, status, stage, count}]
+            tokens: [[start, end, words中的下标]]，按原文位置排列，用于高亮
+
+    Raises:
+        CoverageError
+    """
+    if not text or not text.strip():
+        raise CoverageError("文本不能为空")
+    if len(text) > MAX_TEXT_CHARS:
+        raise CoverageError(f"文本过长，最多 {MAX_TEXT_CHARS} 个字符")
+
+    tokens = tokenize(text)
+    counts = {}
+    for _, _, form in tokens:
+        counts[form] = counts.get(form, 0) + 1
+
+    resolved = _resolve_forms(counts)
+    word_ids = {word_id for candidates in resolved.values() for word_id in candidates}
+    known_ids, stages, book_ids = _student_word_state(plan.student_id, plan.vocabulary_book, word_ids)
+
+    words = []
+    form_index = {}
+    token_stats = dict.fromkeys(STATUSES, 0)
+    word_stats = dict.fromkeys(STATUSES, 0)
+    for form, count in counts.items():
+        status, word_id, word = 'unmatched', None, None
+        for candidate_id, candidate_word in sorted(resolved.get(form, {}).items()):
+            candidate_status = _word_status(candidate_id, known_ids, stages, book_ids)
+            if word_id is None or _STATUS_RANK[candidate_status] < _STATUS_RANK[status]:
+                status, word_id, word = candidate_status, candidate_id, candidate_word
+        form_index[form] = len(words)
+        words.append({
+            'form': form,
+            'word': word,
+            'word_id': word_id,
+            'status': status,
+            'stage': stages.get(word_id),
+            'count': count,
+        })
+        token_stats[status] += count
+        word_stats[status] += 1
+
+    matched_tokens = len(tokens) - token_stats['unmatched']
+    return {
+        'stats': {
+            'total_tokens': len(tokens),
+            'distinct_words': len(words),
+            'tokens': token_stats,
+            'words': word_stats,
+            # 覆盖率按词次计算，不含词库中没有的单词
+            'known_ratio': round(token_stats['known'] / matched_tokens, 4) if matched_tokens else 0,
+            'familiar_ratio': round(
+                (token_stats['known'] + token_stats['learning']) / matched_tokens, 4
+            ) if matched_tokens else 0,
+        },
+        'words': words,
+        'tokens': [[start, end, form_index[form]] for start, end, form in tokens],
+    }
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+from apps.vocabulary.book_stats import schedule_stats_refresh
 from apps.vocabulary.models import VocabularyBook, BookWord
 from apps.accounts.models import Student, Teacher
 
@@ -25,6 +28,14 @@ class LearningPlan(models.Model):
             models.Index(fields=['teacher'], name='idx_teacher'),
         ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记下读取时的词汇书，保存时判断是否换书，不用再查询
+        if 'vocabulary_book_id' in instance.__dict__:
+            instance._loaded_book_id = instance.vocabulary_book_id
+        return instance
+    
     def __str__(self):
         teacher_info = f" supervised by {self.teacher.user.username}" if self.teacher else ""
         return f"{self.student.user.username}'s plan for {self.vocabulary_book.name}{teacher_info}"
@@ -55,7 +66,7 @@ class WordLearningStage(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.book_word.word_basic.word if self.book_word.word_basic else 'Unknown Word'} - Stage {self.current_stage} in {self.learning_plan}"
+        return f"{self.book_word.word_basic.word} - Stage {self.current_stage} in {self.learning_plan}"
     
     def advance_stage(self):
         """将单词推进到下一个学习阶段"""
@@ -106,7 +117,7 @@ class WordLearningStage(models.Model):
     def create_for_plan(cls, learning_plan, book_words=None):
         """为学习计划创建单词学习阶段记录（批量创建优化）"""
         if book_words is None:
-            book_words = learning_plan.vocabulary_book.words.all()
+            book_words = BookWord.objects.for_book(learning_plan.vocabulary_book)
         
         # 使用当前日期作为新学开始日期，避免因学习计划创建过早导致单词立即进入复习阶段
         start_date = timezone.now().date()
@@ -135,4 +146,46 @@ class WordLearningStage(models.Model):
             print(f"批量创建了 {len(created_stages)} 个单词学习阶段记录")
             return created_stages
         
-        return []
\ No newline at end of file
+        return []
+
+
+# 影响词书计划数和学生数的字段
+_PLAN_STATS_FIELDS = {'vocabulary_book', 'vocabulary_book_id', 'is_active', 'student', 'student_id'}
+
+
+def _saves_any(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(pre_save, sender=LearningPlan)
+def remember_plan_book(sender, instance, update_fields=None, **kwargs):
+    """
+    记下修改前的词汇书，计划换书时两本书的计划数都要刷新；
+    使用读取时的快照，只有不是从数据库读取的实例才查询，不更新词汇书的保存直接跳过
+    """
+    instance._previous_book_id = None
+    if instance.pk is None or not _saves_any(update_fields, {'vocabulary_book', 'vocabulary_book_id'}):
+        return
+    if hasattr(instance, '_loaded_book_id'):
+        instance._previous_book_id = instance._loaded_book_id
+    else:
+        instance._previous_book_id = LearningPlan.objects.filter(pk=instance.pk).values_list(
+            'vocabulary_book_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=LearningPlan)
+def refresh_plan_stats_on_save(sender, instance, created=False, update_fields=None, **kwargs):
+    """学习计划新建、启用/停用或换书后刷新词书的计划数和学生数；只更新其他字段的保存不刷新"""
+    if created or _saves_any(update_fields, _PLAN_STATS_FIELDS):
+        for book_id in {instance.vocabulary_book_id, getattr(instance, '_previous_book_id', None)}:
+            schedule_stats_refresh(book_id, words=False, plans=True)
+    instance._loaded_book_id = instance.vocabulary_book_id
+
+
+@receiver(post_delete, sender=LearningPlan)
+def refresh_plan_stats_on_delete(sender, instance, origin=None, **kwargs):
+    """删除学习计划后刷新词书的计划数和学生数；整本书删除时不处理"""
+    if isinstance(origin, VocabularyBook) or getattr(origin, 'model', None) is VocabularyBook:
+        return
+    schedule_stats_refresh(instance.vocabulary_book_id, words=False, plans=True)
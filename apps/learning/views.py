@@ -7,6 +7,8 @@ from django.db import transaction
 import threading
 from django.db.models import Q, Prefetch
 from datetime import timedelta
+from .carryover import CARRYOVER_MODES, CarryoverError, carry_over, find_source_plan
+from .coverage import CoverageError, analyze_coverage
 from .models import LearningPlan, WordLearningStage
 from .serializers import (
     LearningPlanSerializer,
@@ -133,9 +135,8 @@ class LearningPlanViewSet(viewsets.ModelViewSet):
                 from apps.vocabulary.models import BookWord
                 
                 # 获取指定的单词
-                book_words = BookWord.objects.filter(
-                    id__in=book_word_ids,
-                    vocabulary_book=learning_plan.vocabulary_book
+                book_words = BookWord.objects.for_book(learning_plan.vocabulary_book).filter(
+                    id__in=book_word_ids
                 )
                 
                 if not book_words.exists():
@@ -197,9 +198,9 @@ class LearningPlanViewSet(viewsets.ModelViewSet):
 
         # 获取词汇书中的所有单词（用于计算总数）
         from apps.vocabulary.models import BookWord
-        all_words_query = BookWord.objects.filter(
-            vocabulary_book=learning_plan.vocabulary_book
-        ).select_related('word_basic').order_by('word_order', 'id')
+        all_words_query = BookWord.objects.for_book(
+            learning_plan.vocabulary_book
+        ).select_related('word_basic', 'meaning_set').order_by('word_order', 'id')
         
         # 计算总数
         total_count = all_words_query.count()
@@ -229,14 +230,13 @@ class LearningPlanViewSet(viewsets.ModelViewSet):
                 'meaning': word.effective_meanings,
                 'phonetic': word.effective_phonetic,
                 'word_order': word.word_order,
-                'word_basic_id': word.word_basic.id if word.word_basic else None,  # 添加word_basic_id字段
+                'word_basic_id': word.word_basic_id,
                 'has_stage': False,  # 筛选后的单词都没有学习记录
                 'is_known': False    # 筛选后的单词都不是已知单词
             }
             words_data.append(word_data)
         
-        known_in_book_count = BookWord.objects.filter(
-            vocabulary_book=learning_plan.vocabulary_book, 
+        known_in_book_count = BookWord.objects.for_book(learning_plan.vocabulary_book).filter(
             word_basic_id__in=known_word_basic_ids
         ).count()
 
@@ -302,7 +302,7 @@ class LearningPlanViewSet(viewsets.ModelViewSet):
         # 获取所有单词阶段（包括刚刚更新的）
         word_stages = WordLearningStage.objects.filter(
             learning_plan=learning_plan
-        ).select_related('book_word').order_by('book_word__word_order', 'book_word__id')
+        ).select_related('book_word', 'book_word__meaning_set').order_by('book_word__word_order', 'book_word__id')
         
         # 序列化数据
         serializer = WordStageSerializer(word_stages, many=True)
@@ -407,4 +407,73 @@ class LearningPlanViewSet(viewsets.ModelViewSet):
 
 
 
- 
\ No newline at end of file
+ 
+
+    @action(detail=True, methods=['post'])
+    def carryover(self, request, pk=None):
+        """
+        把同一学生上一个学习计划中学过的单词延续到当前计划
+
+        请求体:
+            source_plan_id: 旧计划ID（可选，默认取词书重叠最多的计划）
+            mode: known（标记为已认识）/ advance（在当前计划中直接推进到旧计划的阶段），默认 advance
+            min_stage: 只延续旧计划中达到该阶段的单词（可选）
+        """
+        learning_plan = self.get_object()
+        mode = request.data.get('mode', 'advance')
+        if mode not in CARRYOVER_MODES:
+            return Response(
+                {'error': f"mode 可选: {', '.join(CARRYOVER_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        min_stage = request.data.get('min_stage')
+        if min_stage is not None:
+            try:
+                min_stage = int(min_stage)
+            except (TypeError, ValueError):
+                return Response({'error': 'min_stage 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        source_plan_id = request.data.get('source_plan_id')
+        if source_plan_id:
+            source_plan = self.get_queryset().filter(pk=source_plan_id).first()
+            if source_plan is None:
+                return Response({'error': '未找到旧学习计划'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            source_plan = find_source_plan(learning_plan)
+            if source_plan is None:
+                return Response(
+                    {'error': '没有与当前词书有共同单词的旧学习计划'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+        try:
+            result = carry_over(learning_plan, source_plan, mode, min_stage)
+        except CarryoverError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'success': True,
+            'source_plan_id': source_plan.id,
+            'mode': mode,
+            **result,
+        })
+
+    @action(detail=True, methods=['post'])
+    def coverage(self, request, pk=None):
+        """
+        分析一篇文章中每个单词对该计划学生的状态（已认识/学习中/在词书中未学/未接触/词库中没有）
+
+        请求体:
+            text: 文章内容
+        """
+        learning_plan = self.get_object()
+        text = request.data.get('text')
+        if not isinstance(text, str):
+            return Response({'error': 'text 必须是字符串'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = analyze_coverage(text, learning_plan)
+        except CoverageError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'plan_id': learning_plan.id, **result})
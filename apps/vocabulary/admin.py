@@ -1,13 +1,16 @@
+from django import forms
 from django.contrib import admin
 from django.urls import path
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.utils.html import format_html
-from django.db.models import Max, Q
-import csv
-import io
+from django.db.models import Q
+from .importing import open_csv_reader
+from .import_jobs import create_import_job, create_staged_import_job
+from .import_staging import duplicate_warning, existing_warning, has_warnings, stage_rows
 from .models import (
-    VocabularyBook, BookWord, WordBasic, StudentKnownWord
+    VocabularyBook, BookWord, WordBasic, StudentKnownWord, PronunciationPrefetchStatus, ImportJob,
+    ImportStagingBatch
 )
 
 
@@ -61,7 +64,7 @@ class BookWordInline(admin.TabularInline):
         """限制查询集，只显示前20个单词，按word_order排序"""
         qs = super().get_queryset(request)
         # 不能在这里使用切片，因为Django admin会在后面继续过滤
-        return qs.select_related('word_basic').order_by('word_order')
+        return qs.select_related('word_basic', 'meaning_set').order_by('word_order')
     
     def get_max_num(self, request, obj=None, **kwargs):
         """动态设置最大显示数量"""
@@ -88,7 +91,9 @@ class VocabularyBookAdmin(admin.ModelAdmin):
     list_filter = ('is_system_preset',)
     search_fields = ('name', 'id')
     ordering = ('name',)
-    readonly_fields = ('created_at', 'updated_at', 'view_all_words_link')
+    # 词汇量由词书统计维护，不允许手工修改
+    readonly_fields = ('word_count', 'created_at', 'updated_at', 'view_all_words_link')
+    actions = ['prefetch_pronunciations', 'safe_delete_books']
     # 移除内联显示，提升页面加载速度
     # inlines = [BookWordInline]
     
@@ -116,101 +121,79 @@ class VocabularyBookAdmin(admin.ModelAdmin):
     
     # 移除get_form方法，因为不再需要内联显示提示
     
-    def delete_model(self, request, obj):
-        """优化单个书籍删除性能"""
-        from django.db import transaction, connection
-        from apps.learning.models import LearningPlan, WordLearningStage
-        import time
-        
-        start_time = time.time()
-        
-        with transaction.atomic():
-            # 使用原生SQL批量删除，避免ORM的逐条删除 - 使用PostgreSQL兼容的语法
-            with connection.cursor() as cursor:
-                # 1. 删除单词学习阶段（通过学习计划关联）
-                cursor.execute("""
-                    DELETE FROM word_learning_stages 
-                    WHERE learning_plan_id IN (
-                        SELECT id FROM learning_plans WHERE vocabulary_book_id = %s
-                    )
-                """, [obj.id])
-                stages_deleted = cursor.rowcount
-                
-                # 2. 删除学习计划
-                cursor.execute("""
-                    DELETE FROM learning_plans WHERE vocabulary_book_id = %s
-                """, [obj.id])
-                plans_deleted = cursor.rowcount
-                
-                # 3. 删除书籍单词
-                cursor.execute("""
-                    DELETE FROM book_words WHERE vocabulary_book_id = %s
-                """, [obj.id])
-                words_deleted = cursor.rowcount
-                
-                # 4. 删除书籍本身
-                cursor.execute("""
-                    DELETE FROM vocabulary_books WHERE id = %s
-                """, [obj.id])
-        
-        end_time = time.time()
-        duration = end_time - start_time
+    def prefetch_pronunciations(self, request, queryset):
+        """后台预取所选书籍的发音音频"""
+        from .pronunciation_prefetch import prefetch_books_in_background
         
+        book_ids = list(queryset.values_list('id', flat=True))
+        prefetch_books_in_background(book_ids)
         self.message_user(
-            request, 
-            f"成功删除书籍 '{obj.name}' 及其相关数据！"
-            f"删除了 {words_deleted} 个单词，{plans_deleted} 个学习计划，{stages_deleted} 个学习阶段。"
-            f"耗时: {duration:.2f} 秒",
+            request,
+            f"已提交 {len(book_ids)} 本书籍的发音预取任务，将在后台执行。可在“发音预取状态”中查看结果。",
             level=messages.SUCCESS
         )
+    prefetch_pronunciations.short_description = '预取所选书籍的发音音频'
+    
+    def get_deleted_objects(self, objs, request):
+        """删除确认页不逐条列出书籍下的单词和学习记录（大书籍收集关联对象本身就很慢）"""
+        to_delete = [str(obj) for obj in objs]
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return to_delete, {self.opts.verbose_name_plural: len(to_delete)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        """立即隐藏书籍，学习阶段、学习计划和单词在后台分批删除，不长时间锁表"""
+        self._safe_delete(request, [obj])
     
     def delete_queryset(self, request, queryset):
-        """优化批量删除性能"""
-        from django.db import transaction, connection
-        import time
-        
-        start_time = time.time()
-        book_names = [book.name for book in queryset]
-        book_ids = [book.id for book in queryset]
-        
-        with transaction.atomic():
-            with connection.cursor() as cursor:
-                # 批量删除所有相关数据 - 使用PostgreSQL兼容的语法
-                cursor.execute("""
-                    DELETE FROM word_learning_stages 
-                    WHERE learning_plan_id IN (
-                        SELECT id FROM learning_plans WHERE vocabulary_book_id IN %s
-                    )
-                """, [tuple(book_ids)])
-                stages_deleted = cursor.rowcount
-                
-                cursor.execute("""
-                    DELETE FROM learning_plans WHERE vocabulary_book_id IN %s
-                """, [tuple(book_ids)])
-                plans_deleted = cursor.rowcount
-                
-                cursor.execute("""
-                    DELETE FROM book_words WHERE vocabulary_book_id IN %s
-                """, [tuple(book_ids)])
-                words_deleted = cursor.rowcount
-                
-                cursor.execute("""
-                    DELETE FROM vocabulary_books WHERE id IN %s
-                """, [tuple(book_ids)])
-        
-        end_time = time.time()
-        duration = end_time - start_time
-        
-        self.message_user(
-            request,
-            f"成功批量删除 {len(queryset)} 本书籍：{', '.join(book_names)}！"
-            f"删除了 {words_deleted} 个单词，{plans_deleted} 个学习计划，{stages_deleted} 个学习阶段。"
-            f"耗时: {duration:.2f} 秒",
-            level=messages.SUCCESS
-        )
+        """批量删除同样先隐藏，再在后台分批清理"""
+        self._safe_delete(request, list(queryset))
+
+    def safe_delete_books(self, request, queryset):
+        """安全删除所选书籍"""
+        self._safe_delete(request, list(queryset))
+    safe_delete_books.short_description = '安全删除所选书籍（后台分批清理）'
+
+    def _safe_delete(self, request, books):
+        from .book_deletion import BookDeletionError, schedule_purge, soft_delete_book
+
+        deleted_names = []
+        for book in books:
+            try:
+                soft_delete_book(book)
+            except BookDeletionError as e:
+                self.message_user(request, str(e), level=messages.ERROR)
+                continue
+            schedule_purge(book.id)
+            deleted_names.append(book.name)
+
+        if deleted_names:
+            self.message_user(
+                request,
+                f"已删除 {len(deleted_names)} 本书籍：{', '.join(deleted_names)}。"
+                f"书籍已立即隐藏，相关单词和学习记录将在后台分批清理。",
+                level=messages.SUCCESS
+            )
+
+class BookWordAdminForm(forms.ModelForm):
+    """基础释义去重存储在 meaning_sets 中，表单中仍按JSON编辑"""
+    meanings = forms.JSONField(required=False, label='词性及中文释义JSON')
+
+    class Meta:
+        model = BookWord
+        exclude = ('meaning_set',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['meanings'].initial = self.instance.meanings
+
+    def save(self, commit=True):
+        self.instance.meanings = self.cleaned_data.get('meanings') or []
+        return super().save(commit=commit)
+
 
 @admin.register(BookWord)
 class BookWordAdmin(admin.ModelAdmin):
+    form = BookWordAdminForm
     list_display = ('get_word', 'get_book_info', 'word_order', 'is_customized')
     list_filter = ('vocabulary_book', CustomizedFilter)
     search_fields = ('word_basic__word', 'custom_word', 'example_sentence', 'vocabulary_book__id')
@@ -267,251 +250,32 @@ class BookWordAdmin(admin.ModelAdmin):
             book_id = request.POST.get('vocabulary_book')
             
             if not csv_file or not book_id:
-                self.message_user(request, "请提供CSV文件和选择词汇书", level=messages.ERROR)
+                self.message_user(request, "请提供CSV/PDF文件和选择词汇书", level=messages.ERROR)
                 return redirect('..')
             
             try:
                 book = VocabularyBook.objects.get(id=book_id)
-                try:
-                    decoded_file = csv_file.read().decode('utf-8')
-                except UnicodeDecodeError:
-                    # 尝试其他编码，如果UTF-8不成功
-                    try:
-                        decoded_file = csv_file.read().decode('gb2312')
-                    except UnicodeDecodeError:
-                        decoded_file = csv_file.read().decode('gbk')
-                
-                io_string = io.StringIO(decoded_file)
-                reader = csv.DictReader(io_string)
-                
-                # 预处理数据以检查重复单词
-                rows = list(reader)
-                word_list = [row.get('word', '').strip() for row in rows if 'word' in row]
-                duplicates = set([word for word in word_list if word_list.count(word) > 1])
+                if csv_file.name.lower().endswith('.pdf'):
+                    # PDF/扫描件：提取（多进程、可能OCR）耗时较长，作为后台导入任务执行，不占用请求
+                    job = create_import_job(
+                        book, csv_file, user=request.user, source='admin', mode='append', file_format='pdf'
+                    )
+                    self.message_user(request, f"PDF已提交为后台导入任务 #{job.id}，提取和导入进度可在此查看")
+                    return redirect('admin:vocabulary_importjob_change', job.id)
                 
-                if duplicates:
-                    duplicate_words = ', '.join(duplicates)
-                    # 不再自动拒绝导入，而是记录下来作为警告
-                    duplicate_warning = f"CSV文件中存在重复单词: {duplicate_words}。这些单词将作为独立记录导入。"
-                    # 在会话中保存这个警告，以便在确认页面显示
-                    request.session['duplicate_warning'] = duplicate_warning
-                    # 在会话中保存当前的导入状态
-                    import_data = {
-                        'book_id': book_id,
-                        'csv_content': decoded_file
-                    }
-                    request.session['import_data'] = import_data
-                    # 重定向到确认页面
-                    return redirect('admin:vocabulary_bookword_confirm-import')
+                # 与接口导入相同的CSV解析：自动识别编码（UTF-8/GBK/GB2312）并校验表头
+                reader = open_csv_reader(csv_file)
                 
-                # 检查这些单词是否已经存在于当前词汇书中
-                existing_words = []
-                for word in word_list:
-                    word_basic = WordBasic.objects.filter(word=word).first()
-                    if word_basic and BookWord.objects.filter(vocabulary_book=book, word_basic=word_basic).exists():
-                        existing_words.append(word)
+                # 只解析一次，写入暂存表，并在暂存表上计算预览
+                batch = stage_rows(book, reader, user=request.user, filename=csv_file.name)
                 
-                if existing_words:
-                    # 不再自动更新，而是提示用户确认
-                    existing_warning = f"以下单词已存在于词汇书中: {', '.join(existing_words)}。这些单词将作为新记录导入。"
-                    # 在会话中保存这个警告
-                    request.session['existing_warning'] = existing_warning
-                    # 在会话中保存当前的导入状态
-                    import_data = {
-                        'book_id': book_id,
-                        'csv_content': decoded_file
-                    }
-                    request.session['import_data'] = import_data
-                    # 重定向到确认页面
+                if has_warnings(batch.preview):
+                    # 不再自动拒绝或更新，而是在确认页面显示差异表；session中只保存令牌
+                    request.session['import_token'] = str(batch.token)
                     return redirect('admin:vocabulary_bookword_confirm-import')
                 
-                word_count = 0
-                # 获取当前词汇书中最大的word_order
-                max_order = BookWord.objects.filter(vocabulary_book=book).aggregate(
-                    Max('word_order')
-                ).get('word_order__max') or 0
-                
-                for row in rows:
-                    # 确保CSV文件包含所需字段
-                    if 'word' not in row:
-                        raise Exception("CSV文件格式错误。必须包含'word'列")
-                    
-                    # 创建或获取WordBasic
-                    word_basic, word_basic_created = WordBasic.objects.get_or_create(
-                        word=row['word'],
-                        defaults={
-                            'phonetic_symbol': row.get('phonetic_symbol', ''),
-                            'uk_pronunciation': row.get('uk_pronunciation', ''),
-                            'us_pronunciation': row.get('us_pronunciation', '')
-                        }
-                    )
-                    
-                    # 创建或更新单词
-                    max_order += 1
-                    
-                    # 处理词性和释义，转换为JSON格式
-                    part_of_speech = row.get('part_of_speech', '')
-                    chinese_meaning = row.get('chinese_meaning', '')
-                    
-                    # 获取已存在的单词记录
-                    existing_word = BookWord.objects.filter(
-                        vocabulary_book=book,
-                        word_basic=word_basic
-                    ).first()
-                    
-                    # 初始化词义列表
-                    if existing_word:
-                        meanings = existing_word.meanings or []
-                    else:
-                        meanings = []
-                    
-                    # 处理可能的多个词性和释义（用分号分隔）
-                    if part_of_speech and chinese_meaning:
-                        pos_list = [pos.strip() for pos in part_of_speech.split(';') if pos.strip()]
-                        
-                        # 检查是否有使用方括号标记的复合释义 [释义1,释义2]
-                        has_complex_meanings = '[' in chinese_meaning and ']' in chinese_meaning
-                        
-                        if has_complex_meanings:
-                            # 复杂模式：支持一个词性对应多个释义
-                            # 解析格式为: "普通释义;[复合释义1,复合释义2];普通释义"
-                            raw_meanings = []
-                            current_pos = 0
-                            in_brackets = False
-                            temp_meaning = ""
-                            
-                            # 解析复杂的释义格式
-                            for char in chinese_meaning:
-                                if char == '[':
-                                    in_brackets = True
-                                    temp_meaning += char
-                                elif char == ']':
-                                    in_brackets = False
-                                    temp_meaning += char
-                                elif char == ';' and not in_brackets:
-                                    raw_meanings.append(temp_meaning.strip())
-                                    temp_meaning = ""
-                                else:
-                                    temp_meaning += char
-                            
-                            # 添加最后一个释义
-                            if temp_meaning:
-                                raw_meanings.append(temp_meaning.strip())
-                            
-                            # 确保解析后的释义数量与词性数量匹配
-                            if len(raw_meanings) == len(pos_list):
-                                for i in range(len(pos_list)):
-                                    pos = pos_list[i]
-                                    raw_meaning = raw_meanings[i]
-                                    
-                                    # 检查是否是复合释义 [释义1,释义2]
-                                    if raw_meaning.startswith('[') and raw_meaning.endswith(']'):
-                                        # 提取方括号中的多个释义
-                                        compound_meanings = raw_meaning[1:-1].split(',')
-                                        final_meaning = '; '.join([m.strip() for m in compound_meanings])
-                                    else:
-                                        final_meaning = raw_meaning
-                                    
-                                    new_meaning = {'pos': pos, 'meaning': final_meaning}
-                                    
-                                    # 更新或添加释义
-                                    pos_exists = False
-                                    for j, meaning in enumerate(meanings):
-                                        if meaning.get('pos') == new_meaning['pos']:
-                                            meanings[j]['meaning'] = new_meaning['meaning']
-                                            pos_exists = True
-                                            break
-                                    
-                                    if not pos_exists:
-                                        meanings.append(new_meaning)
-                            else:
-                                # 如果解析后的释义数量与词性数量不匹配，回退到简单处理
-                                raise Exception(f"词性数量({len(pos_list)})与解析后的释义数量({len(raw_meanings)})不匹配")
-                        else:
-                            # 简单模式：使用分号分隔的普通释义
-                            meaning_list = [mean.strip() for mean in chinese_meaning.split(';') if mean.strip()]
-                            
-                            # 确保词性和释义列表长度匹配
-                            if len(pos_list) == len(meaning_list):
-                                for i in range(len(pos_list)):
-                                    new_meaning = {'pos': pos_list[i], 'meaning': meaning_list[i]}
-                                    
-                                    # 检查是否已存在相同词性
-                                    pos_exists = False
-                                    for j, meaning in enumerate(meanings):
-                                        if meaning.get('pos') == new_meaning['pos']:
-                                            # 更新已存在词性的释义
-                                            meanings[j]['meaning'] = new_meaning['meaning']
-                                            pos_exists = True
-                                            break
-                                    
-                                    # 如果不存在该词性，添加新的词性和释义
-                                    if not pos_exists:
-                                        meanings.append(new_meaning)
-                            elif len(pos_list) > 1 and len(meaning_list) == 1:
-                                # 如果有多个词性但只有一个释义，将同一个释义应用到所有词性
-                                for pos in pos_list:
-                                    new_meaning = {'pos': pos, 'meaning': meaning_list[0]}
-                                    
-                                    # 检查是否已存在相同词性
-                                    pos_exists = False
-                                    for j, meaning in enumerate(meanings):
-                                        if meaning.get('pos') == new_meaning['pos']:
-                                            meanings[j]['meaning'] = new_meaning['meaning']
-                                            pos_exists = True
-                                            break
-                                    
-                                    if not pos_exists:
-                                        meanings.append(new_meaning)
-                            elif len(pos_list) == 1 and len(meaning_list) > 0:
-                                # 如果只有一个词性但有多个释义，将所有释义合并
-                                combined_meaning = '; '.join(meaning_list)
-                                new_meaning = {'pos': pos_list[0], 'meaning': combined_meaning}
-                                
-                                # 更新或添加这个词性的释义
-                                pos_exists = False
-                                for j, meaning in enumerate(meanings):
-                                    if meaning.get('pos') == new_meaning['pos']:
-                                        meanings[j]['meaning'] = new_meaning['meaning']
-                                        pos_exists = True
-                                        break
-                                
-                                if not pos_exists:
-                                    meanings.append(new_meaning)
-                            else:
-                                # 添加单个词性和释义
-                                new_meaning = {'pos': part_of_speech, 'meaning': chinese_meaning}
-                                
-                                # 检查是否已存在相同词性
-                                pos_exists = False
-                                for j, meaning in enumerate(meanings):
-                                    if meaning.get('pos') == new_meaning['pos']:
-                                        meanings[j]['meaning'] = new_meaning['meaning']
-                                        pos_exists = True
-                                        break
-                                
-                                if not pos_exists:
-                                    meanings.append(new_meaning)
-                    
-                    # 更新或创建单词记录
-                    word, created = BookWord.objects.update_or_create(
-                        vocabulary_book=book,
-                        word_basic=word_basic,
-                        defaults={
-                            'word_order': max_order,  # 总是使用当前的max_order确保顺序连贯
-                            'meanings': meanings,
-                            'example_sentence': row.get('example_sentence', '')
-                        }
-                    )
-                    word_count += 1
-                
-                # 更新词汇书的词汇量
-                total_words = BookWord.objects.filter(vocabulary_book=book).count()
-                book.word_count = total_words
-                book.save()
-                
-                self.message_user(request, f"成功导入 {word_count} 个单词到词汇书 '{book.name}'")
-                return redirect('..')
+                # 没有重复和已存在的单词：全部都是新记录，由后台导入任务从暂存表写入
+                return self._start_staged_import(request, batch)
             except Exception as e:
                 self.message_user(request, f"导入失败: {str(e)}", level=messages.ERROR)
                 return redirect('..')
@@ -525,18 +289,38 @@ class BookWordAdmin(admin.ModelAdmin):
         }
         return render(request, 'admin/vocabulary/bookword/import_words.html', context)
 
+    def _start_staged_import(self, request, batch):
+        """暂存批次交给后台导入任务写入，跳转到任务页面查看进度和结果"""
+        job = create_staged_import_job(batch, user=request.user)
+        message = f"已提交为后台导入任务 #{job.id}，将 {batch.staged_rows} 行写入词汇书 '{batch.vocabulary_book.name}'"
+        if batch.error_count:
+            message += f"（{batch.error_count} 行数据无效已跳过，明细见任务页面）"
+        self.message_user(request, message)
+        return redirect('admin:vocabulary_importjob_change', job.id)
+
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['show_import_button'] = True
         return super().changelist_view(request, extra_context=extra_context)
 
+    def _get_staging_batch(self, request):
+        """根据session中的导入令牌取回暂存批次"""
+        token = request.session.get('import_token')
+        if not token:
+            return None
+        return ImportStagingBatch.objects.filter(token=token).select_related('vocabulary_book').first()
+
     def confirm_import_view(self, request):
-        """确认导入视图，显示警告并询问用户是否继续"""
+        """确认导入视图，显示警告和差异表并询问用户是否继续"""
+        batch = self._get_staging_batch(request)
+        preview = batch.preview if batch else None
         context = {
             'title': '确认导入单词',
             'opts': self.model._meta,
-            'duplicate_warning': request.session.get('duplicate_warning', None),
-            'existing_warning': request.session.get('existing_warning', None),
+            'duplicate_warning': duplicate_warning(preview) if preview else None,
+            'existing_warning': existing_warning(preview) if preview else None,
+            'preview': preview,
+            'book': batch.vocabulary_book if batch else None,
         }
         return render(request, 'admin/vocabulary/bookword/confirm_import.html', context)
         
@@ -545,97 +329,56 @@ class BookWordAdmin(admin.ModelAdmin):
         if request.method != 'POST':
             return redirect('admin:vocabulary_bookword_changelist')
             
-        # 从会话中获取导入数据
-        import_data = request.session.get('import_data', None)
-        if not import_data:
+        # 从会话中的令牌获取暂存批次
+        batch = self._get_staging_batch(request)
+        if batch is None:
             self.message_user(request, "导入会话已过期，请重新上传文件。", level=messages.ERROR)
             return redirect('admin:vocabulary_bookword_changelist')
-            
-        book_id = import_data.get('book_id')
-        csv_content = import_data.get('csv_content')
+        
+        if batch.import_jobs.exists():
+            request.session.pop('import_token', None)
+            self.message_user(request, "该文件已经提交导入，请勿重复提交。", level=messages.WARNING)
+            return redirect('admin:vocabulary_bookword_changelist')
         
         try:
-            book = VocabularyBook.objects.get(id=book_id)
-            io_string = io.StringIO(csv_content)
-            reader = csv.DictReader(io_string)
-            rows = list(reader)
-            
-            word_count = 0
-            # 获取当前词汇书中最大的word_order
-            max_order = BookWord.objects.filter(vocabulary_book=book).aggregate(
-                Max('word_order')
-            ).get('word_order__max') or 0
+            # 确认导入：每一行都作为独立记录新建，即使单词在该书中已存在（后台导入任务执行）
+            response = self._start_staged_import(request, batch)
             
-            for row in rows:
-                # 确保CSV文件包含所需字段
-                if 'word' not in row:
-                    raise Exception("CSV文件格式错误。必须包含'word'列")
-                
-                # 创建或获取WordBasic
-                word_basic, word_basic_created = WordBasic.objects.get_or_create(
-                    word=row['word'],
-                    defaults={
-                        'phonetic_symbol': row.get('phonetic_symbol', ''),
-                        'uk_pronunciation': row.get('uk_pronunciation', ''),
-                        'us_pronunciation': row.get('us_pronunciation', '')
-                    }
-                )
-                
-                # 创建新单词记录，即使单词在该书中已存在
-                max_order += 1
-                
-                # 处理词性和释义，转换为JSON格式
-                part_of_speech = row.get('part_of_speech', '')
-                chinese_meaning = row.get('chinese_meaning', '')
-                
-                # 处理复合释义格式
-                meanings = []
-                if part_of_speech and chinese_meaning:
-                    # 这里可以保留之前复合释义的处理逻辑
-                    # 但我们简化为基本处理，因为现在每个导入的单词都是独立记录
-                    pos_list = [pos.strip() for pos in part_of_speech.split(';') if pos.strip()]
-                    meaning_list = [mean.strip() for mean in chinese_meaning.split(';') if mean.strip()]
-                    
-                    if len(pos_list) == len(meaning_list):
-                        for i in range(len(pos_list)):
-                            meanings.append({'pos': pos_list[i], 'meaning': meaning_list[i]})
-                    elif len(pos_list) > 0 and len(meaning_list) == 1:
-                        for pos in pos_list:
-                            meanings.append({'pos': pos, 'meaning': meaning_list[0]})
-                    else:
-                        meanings = [{'pos': part_of_speech, 'meaning': chinese_meaning}]
-                
-                # 创建新的单词记录，不检查是否已存在
-                word = BookWord.objects.create(
-                    vocabulary_book=book,
-                    word_basic=word_basic,
-                    word_order=max_order,
-                    meanings=meanings,
-                    example_sentence=row.get('example_sentence', '')
-                )
-                word_count += 1
-            
-            # 更新词汇书的词汇量
-            total_words = BookWord.objects.filter(vocabulary_book=book).count()
-            book.word_count = total_words
-            book.save()
-            
-            # 清除会话中的导入数据
-            if 'import_data' in request.session:
-                del request.session['import_data']
-            if 'duplicate_warning' in request.session:
-                del request.session['duplicate_warning']
-            if 'existing_warning' in request.session:
-                del request.session['existing_warning']
-            
-            self.message_user(request, f"成功导入 {word_count} 个单词到词汇书 '{book.name}'")
-            return redirect('admin:vocabulary_bookword_changelist')
+            # 清除会话中的导入令牌
+            request.session.pop('import_token', None)
+            return response
         except Exception as e:
             self.message_user(request, f"导入失败: {str(e)}", level=messages.ERROR)
             return redirect('admin:vocabulary_bookword_changelist')
 
 
 
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'vocabulary_book', 'source', 'file_format', 'mode', 'status', 'get_progress',
+                    'created_count', 'updated_count', 'error_count', 'created_by', 'created_at')
+    list_filter = ('status', 'source', 'file_format', 'mode')
+    search_fields = ('vocabulary_book__name', 'original_filename')
+    raw_id_fields = ('vocabulary_book', 'created_by')
+    readonly_fields = [field.name for field in ImportJob._meta.fields] + ['get_progress', 'get_eta']
+    
+    def get_progress(self, obj):
+        """显示进度百分比"""
+        if obj.total_rows is None:
+            return '-'
+        return f"{obj.progress}% ({obj.rows_done}/{obj.total_rows})"
+    get_progress.short_description = '进度'
+    
+    def get_eta(self, obj):
+        """显示预计剩余时间"""
+        eta = obj.eta_seconds
+        return '-' if eta is None else f"约 {int(eta)} 秒"
+    get_eta.short_description = '预计剩余时间'
+    
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(StudentKnownWord)
 class StudentKnownWordAdmin(admin.ModelAdmin):
     list_display = ('student', 'get_word', 'marked_at')
@@ -646,4 +389,12 @@ class StudentKnownWordAdmin(admin.ModelAdmin):
     def get_word(self, obj):
         """返回关联单词的拼写"""
         return obj.word.word if obj.word else "未知单词"
-    get_word.short_description = '单词' 
\ No newline at end of file
+    get_word.short_description = '单词' 
+
+
+@admin.register(PronunciationPrefetchStatus)
+class PronunciationPrefetchStatusAdmin(admin.ModelAdmin):
+    list_display = ('word', 'status', 'attempts', 'last_error', 'fetched_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('word',)
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+分批删除词汇书
+
+删除分两步：
+1. soft_delete_book：只写 deleted_at，词汇书立即从接口和admin中隐藏，相关学习计划停用
+2. purge_book：按 学习阶段 -> 学习计划 -> 释义词条 -> 书籍单词 的顺序，每批删除 batch_size 行并立即提交，
+   批次之间暂停，避免长事务长时间锁住热点表；最后删除词汇书本身
+
+清理可以中断后重复执行（已删除的行不会再出现）；后台线程中断或失败时，由定时任务
+purge_deleted_books（django_crontab，见 settings.CRONJOBS，每10分钟）接管未清理完的词汇书。
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import VocabularyBook
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_PAUSE = 0.05
+
+# 同一本书同时只允许一个清理过程
+_LOCK_NAMESPACE = 3402
+
+# 后台清理线程池
+_purge_executor = ThreadPoolExecutor(max_workers=1)
+
+
+class BookDeletionError(Exception):
+    """词汇书当前不能删除（例如仍被覆盖词书引用）"""
+
+
+# (名称, 统计SQL, 分批删除SQL)；删除SQL每次最多删除 %(limit)s 行
+_PURGE_STEPS = [
+    (
+        'word_learning_stages',
+        """
+        SELECT count(*) FROM word_learning_stages
+        WHERE learning_plan_id IN (SELECT id FROM learning_plans WHERE vocabulary_book_id = %(book)s)
+        """,
+        """
+        DELETE FROM word_learning_stages WHERE id IN (
+            SELECT id FROM word_learning_stages
+            WHERE learning_plan_id IN (SELECT id FROM learning_plans WHERE vocabulary_book_id = %(book)s)
+            LIMIT %(limit)s
+        )
+        """,
+    ),
+    (
+        # 其他学习计划中引用了本书单词的学习阶段
+        'word_learning_stages',
+        """
+        SELECT count(*) FROM word_learning_stages
+        WHERE book_word_id IN (SELECT id FROM book_words WHERE vocabulary_book_id = %(book)s)
+        """,
+        """
+        DELETE FROM word_learning_stages WHERE id IN (
+            SELECT id FROM word_learning_stages
+            WHERE book_word_id IN (SELECT id FROM book_words WHERE vocabulary_book_id = %(book)s)
+            LIMIT %(limit)s
+        )
+        """,
+    ),
+    (
+        'learning_plans',
+        "SELECT count(*) FROM learning_plans WHERE vocabulary_book_id = %(book)s",
+        """
+        DELETE FROM learning_plans WHERE id IN (
+            SELECT id FROM learning_plans WHERE vocabulary_book_id = %(book)s LIMIT %(limit)s
+        )
+        """,
+    ),
+    (
+        # 释义词条引用书籍单词，必须先于书籍单词删除
+        'meaning_terms',
+        """
+        SELECT count(*) FROM meaning_terms
+        WHERE book_word_id IN (SELECT id FROM book_words WHERE vocabulary_book_id = %(book)s)
+        """,
+        """
+        DELETE FROM meaning_terms WHERE id IN (
+            SELECT id FROM meaning_terms
+            WHERE book_word_id IN (SELECT id FROM book_words WHERE vocabulary_book_id = %(book)s)
+            LIMIT %(limit)s
+        )
+        """,
+    ),
+    (
+        'book_words',
+        "SELECT count(*) FROM book_words WHERE vocabulary_book_id = %(book)s",
+        """
+        DELETE FROM book_words WHERE id IN (
+            SELECT id FROM book_words WHERE vocabulary_book_id = %(book)s LIMIT %(limit)s
+        )
+        """,
+    ),
+]
+
+
+def soft_delete_book(book):
+    """
+    隐藏词汇书并停用相关学习计划，实际数据由 purge_book 分批清理
+
+    Raises:
+        BookDeletionError: 仍有覆盖词书引用该词汇书
+    """
+    from apps.learning.models import LearningPlan
+
+    if VocabularyBook.all_objects.filter(base_book_id=book.id).exists():
+        raise BookDeletionError(f"词汇书 '{book.name}' 是其他覆盖词书的基础词书，请先删除覆盖词书")
+    with transaction.atomic():
+        book.deleted_at = timezone.now()
+        VocabularyBook.all_objects.filter(pk=book.pk).update(deleted_at=book.deleted_at)
+        LearningPlan.objects.filter(vocabulary_book_id=book.pk, is_active=True).update(is_active=False)
+    logger.info(f"词汇书 {book.id} '{book.name}' 已隐藏，等待分批清理")
+
+
+def purge_book(book_id, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_PAUSE, progress=None):
+    """
+    分批删除已隐藏词汇书的全部数据，每批单独提交
+
+    Args:
+        progress: progress(表名, 已删除行数, 开始时的总行数) 每批之后调用
+
+    Returns:
+        dict | None: 各表删除的行数；词汇书不存在、未隐藏或正由其他进程清理时返回None
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [_LOCK_NAMESPACE, book_id])
+        if not cursor.fetchone()[0]:
+            logger.info(f"词汇书 {book_id} 正在由其他进程清理，跳过")
+            return None
+    try:
+        if not VocabularyBook.all_objects.filter(pk=book_id, deleted_at__isnull=False).exists():
+            return None
+
+        deleted = {}
+        for name, count_sql, delete_sql in _PURGE_STEPS:
+            with connection.cursor() as cursor:
+                cursor.execute(count_sql, {'book': book_id})
+                total = cursor.fetchone()[0]
+            done = 0
+            while True:
+                # 每批一个短事务
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(delete_sql, {'book': book_id, 'limit': batch_size})
+                    rowcount = cursor.rowcount
+                if not rowcount:
+                    break
+                done += rowcount
+                if progress is not None:
+                    progress(name, done, total)
+                if pause:
+                    time.sleep(pause)
+            deleted[name] = deleted.get(name, 0) + done
+
+        # 剩余的少量关联数据（导入任务、暂存批次）随词汇书一起级联删除
+        VocabularyBook.all_objects.filter(pk=book_id).delete()
+        logger.info(f"词汇书 {book_id} 清理完成: {deleted}")
+        return deleted
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [_LOCK_NAMESPACE, book_id])
+
+
+def _purge_in_thread(book_id):
+    try:
+        purge_book(book_id)
+    except Exception as e:
+        logger.error(f"词汇书 {book_id} 后台清理失败: {e}")
+    finally:
+        # 后台线程使用独立的数据库连接，结束时关闭
+        connection.close()
+
+
+def schedule_purge(book_id):
+    """事务提交后在后台线程中分批清理"""
+    transaction.on_commit(lambda: _purge_executor.submit(_purge_in_thread, book_id))
+
+
+def purge_deleted_books():
+    """
+    清理所有已隐藏但尚未清理完的词汇书（settings.CRONJOBS 每10分钟执行，接管中断的清理）
+    """
+    book_ids = list(VocabularyBook.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at').values_list(
+        'id', flat=True
+    ))
+    for book_id in book_ids:
+        purge_book(book_id)
+    return book_ids
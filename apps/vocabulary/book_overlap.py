@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+词书重叠索引
+
+按 word_basic_id 去重后，一本书与其他所有词书共有的单词数一条语句算出，写入 vocabulary_book_overlaps；
+每本书另存一行 (book, book) 作为计算标记，记录计算时的内容版本。
+读取时双方内容版本都没有变化、且未超过 MAX_AGE 才使用缓存，否则重新计算这本书的全部重叠。
+覆盖词书只作为计算对象，不出现在其他书的重叠列表中（它的单词大多来自基础词书）。
+系统预设词书由定时任务 refresh_preset_overlaps（django_crontab，见 settings.CRONJOBS）每天预先计算，
+这只是预热：定时任务没有运行时，读取到过期数据也会即时重算，结果不受影响。
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .known_words import WordSelection
+from .models import BookOverlap, VocabularyBook
+from .word_forms import book_content_version
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 新建的词书不会使已有的重叠行失效，超过该时间后重新计算
+MAX_AGE = timedelta(days=1)
+
+_REFRESH_SQL = """
+    WITH target AS ({target_sql}),
+    shared AS (
+        SELECT bw.vocabulary_book_id AS other_id, count(DISTINCT bw.word_basic_id) AS shared_words
+        FROM book_words bw
+        JOIN target t ON t.word_id = bw.word_basic_id
+        JOIN vocabulary_books vb ON vb.id = bw.vocabulary_book_id
+        WHERE NOT bw.is_removed AND bw.vocabulary_book_id <> %s
+          AND vb.deleted_at IS NULL AND vb.base_book_id IS NULL
+        GROUP BY bw.vocabulary_book_id
+    ),
+    other_sizes AS (
+        SELECT bw.vocabulary_book_id AS other_id, count(DISTINCT bw.word_basic_id) AS words
+        FROM book_words bw
+        WHERE bw.vocabulary_book_id IN (SELECT other_id FROM shared) AND NOT bw.is_removed
+        GROUP BY bw.vocabulary_book_id
+    ),
+    rows AS (
+        SELECT %s AS book_id, s.other_id, s.shared_words, o.words AS other_words, vb.content_version AS other_version
+        FROM shared s
+        JOIN other_sizes o ON o.other_id = s.other_id
+        JOIN vocabulary_books vb ON vb.id = s.other_id
+        UNION ALL
+        SELECT %s, %s, (SELECT count(*) FROM target), (SELECT count(*) FROM target), %s
+    ),
+    upserted AS (
+        INSERT INTO vocabulary_book_overlaps
+            (book_id, other_book_id, shared_words, book_words, other_words, book_version, other_version, computed_at)
+        SELECT book_id, other_id, shared_words, (SELECT count(*) FROM target), other_words, %s, other_version, %s
+        FROM rows
+        ON CONFLICT (book_id, other_book_id) DO UPDATE SET
+            shared_words = EXCLUDED.shared_words,
+            book_words = EXCLUDED.book_words,
+            other_words = EXCLUDED.other_words,
+            book_version = EXCLUDED.book_version,
+            other_version = EXCLUDED.other_version,
+            computed_at = EXCLUDED.computed_at
+        RETURNING other_book_id
+    )
+    DELETE FROM vocabulary_book_overlaps
+    WHERE book_id = %s AND other_book_id NOT IN (SELECT other_book_id FROM upserted)
+"""
+
+_PAIR_SQL = """
+    SELECT count(*) FROM ({book_sql}) a WHERE a.word_id IN ({other_sql})
+"""
+
+
+def overlap_version(book):
+    """
+    词书内容版本的整数形式：覆盖词书为自身与基础词书版本之和（两者都只增不减，任一变化和都会变化）
+    """
+    version = book_content_version(book)
+    if isinstance(version, tuple):
+        return sum(part or 0 for part in version)
+    return version
+
+
+def refresh_overlaps(book):
+    """
+    重新计算 book 与其他所有词书的重叠（一条语句），不再重叠的旧行同时删除
+
+    Returns:
+        int: 有重叠的词书数量
+    """
+    selection = WordSelection.by_book_range(book.id)
+    version = overlap_version(book)
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            _REFRESH_SQL.format(target_sql=selection.sql),
+            selection.params + [book.id, book.id, book.id, book.id, version, version, now, book.id]
+        )
+    count = BookOverlap.objects.filter(book_id=book.id).exclude(other_book_id=book.id).count()
+    logger.info(f"词汇书 {book.id} 重叠索引已更新，与 {count} 本词书有共同单词")
+    return count
+
+
+def _is_fresh(book):
+    marker = BookOverlap.objects.filter(book_id=book.id, other_book_id=book.id).first()
+    if marker is None or marker.book_version != overlap_version(book):
+        return False
+    if timezone.now() - marker.computed_at > MAX_AGE:
+        return False
+    # 任一重叠词书内容变化（或已删除）都需要重新计算
+    return not BookOverlap.objects.filter(book_id=book.id).exclude(other_book_id=book.id).exclude(
+        other_book__content_version=F('other_version'),
+        other_book__deleted_at__isnull=True,
+    ).exists()
+
+
+def get_overlaps(book, limit=None):
+    """
+    与 book 有共同单词的词书，按共有单词数从多到少
+
+    Returns:
+        list[dict]: book_id, name, shared_words, book_words, other_words, ratio（共有单词占本书的比例）
+    """
+    if not _is_fresh(book):
+        refresh_overlaps(book)
+    queryset = BookOverlap.objects.filter(book_id=book.id).exclude(other_book_id=book.id).filter(
+        other_book__deleted_at__isnull=True
+    ).select_related('other_book').order_by('-shared_words', 'other_book_id')
+    if limit is not None:
+        queryset = queryset[:limit]
+    return [
+        {
+            'book_id': overlap.other_book_id,
+            'name': overlap.other_book.name,
+            'shared_words': overlap.shared_words,
+            'book_words': overlap.book_words,
+            'other_words': overlap.other_words,
+            'ratio': round(overlap.shared_words / overlap.book_words, 4) if overlap.book_words else 0,
+        }
+        for overlap in queryset
+    ]
+
+
+def shared_word_count(book, other):
+    """
+    两本书共有的单词数：使用重叠索引，other 是覆盖词书（不在索引中）时直接计算
+    """
+    if other.base_book_id is None:
+        for overlap in get_overlaps(book):
+            if overlap['book_id'] == other.id:
+                return overlap['shared_words']
+        return 0
+    book_selection = WordSelection.by_book_range(book.id)
+    other_selection = WordSelection.by_book_range(other.id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _PAIR_SQL.format(book_sql=book_selection.sql, other_sql=other_selection.sql),
+            book_selection.params + other_selection.params
+        )
+        return cursor.fetchone()[0]
+
+
+def refresh_preset_overlaps():
+    """预先计算所有系统预设词书的重叠索引（settings.CRONJOBS 每天凌晨4点执行）"""
+    books = list(VocabularyBook.objects.filter(is_system_preset=True).order_by('id'))
+    for book in books:
+        refresh_overlaps(book)
+    return [book.id for book in books]
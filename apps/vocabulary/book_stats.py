@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+词书统计（vocabulary_book_stats）
+
+词汇量、自定义单词数、词性分布、正在学习的计划数和学生数按词书物化保存，
+词书列表直接读取，不在请求中聚合：
+- 单词的写入路径（单个保存/删除的信号、批量导入、排序等）原本就会递增词书内容版本，
+  递增版本时同时登记刷新，在事务提交后执行；统计中记录了统计时的内容版本，
+  同一事务中多次登记或版本未变化时不会重复统计
+- 覆盖词书的单词来自基础词书，基础词书变化时它的覆盖词书一起刷新
+- 学习计划增删改时只刷新计划数和学生数
+- 统计默认在后台线程中执行，同一本书排队中的刷新合并为一次
+- 后台线程随进程重启丢失的刷新由定时任务补上（refresh_stale_book_stats，见 settings.CRONJOBS）：
+  统计缺失、内容版本落后或计划数与实际不一致的词书重新统计
+刷新以词书为单位，一次重新统计一本书的全部单词（几千个单词只需几毫秒），
+不按单行增减维护，避免覆盖词书合并规则下的增量计算与 for_book 不一致。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+
+from .example_search import book_filter_sql
+from .models import BookWord, VocabularyBook, VocabularyBookStats
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 后台统计线程池；已在排队的词书不重复提交
+_stats_executor = ThreadPoolExecutor(max_workers=1)
+_pending = set()
+_pending_lock = threading.Lock()
+
+_STATS_FIELDS = [
+    'word_count', 'customized_count', 'pos_distribution', 'active_plan_count', 'learner_count',
+    'content_version', 'base_content_version', 'refreshed_at',
+]
+
+# 有效释义（自定义优先）中每个词性对应的单词数
+_POS_SQL = """
+    SELECT btrim(m.value ->> 'pos'), count(DISTINCT bw.id)
+    FROM book_words bw
+    LEFT JOIN meaning_sets ms ON ms.id = bw.meaning_set_id
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(COALESCE(NULLIF(bw.custom_meanings, '[]'::jsonb), ms.meanings)) = 'array'
+             THEN COALESCE(NULLIF(bw.custom_meanings, '[]'::jsonb), ms.meanings)
+             ELSE '[]'::jsonb END
+    ) AS m(value)
+    WHERE jsonb_typeof(m.value) = 'object' {book_filter}
+    GROUP BY 1
+"""
+
+_PLAN_COUNTS_SQL = """
+    SELECT vocabulary_book_id, count(*) FILTER (WHERE is_active), count(DISTINCT student_id)
+    FROM learning_plans
+    WHERE vocabulary_book_id = ANY(%s)
+    GROUP BY vocabulary_book_id
+"""
+
+
+# 统计缺失或内容版本落后于词书（或基础词书）的词书
+_STALE_WORD_STATS_SQL = """
+    SELECT b.id
+    FROM vocabulary_books b
+    LEFT JOIN vocabulary_book_stats s ON s.vocabulary_book_id = b.id
+    LEFT JOIN vocabulary_books base ON base.id = b.base_book_id
+    WHERE b.deleted_at IS NULL
+      AND (s.vocabulary_book_id IS NULL
+           OR s.content_version <> b.content_version
+           OR s.base_content_version IS DISTINCT FROM base.content_version)
+    ORDER BY b.id
+"""
+
+# 计划数/学生数与 learning_plans 不一致的词书（一次聚合）
+_STALE_PLAN_STATS_SQL = """
+    SELECT s.vocabulary_book_id
+    FROM vocabulary_book_stats s
+    JOIN vocabulary_books b ON b.id = s.vocabulary_book_id
+    LEFT JOIN (
+        SELECT vocabulary_book_id, count(*) FILTER (WHERE is_active) AS active, count(DISTINCT student_id) AS learners
+        FROM learning_plans
+        GROUP BY vocabulary_book_id
+    ) p ON p.vocabulary_book_id = s.vocabulary_book_id
+    WHERE b.deleted_at IS NULL
+      AND (s.active_plan_count, s.learner_count) IS DISTINCT FROM (COALESCE(p.active, 0), COALESCE(p.learners, 0))
+    ORDER BY s.vocabulary_book_id
+"""
+
+# 定时任务每次调用 refresh_book_stats 处理的词书数
+STALE_BATCH_SIZE = 100
+
+
+def _customized_filter(book):
+    """有自定义拼写/音标/释义的单词，以及覆盖词书中修改过的基础单词"""
+    return (
+        Q(custom_word__gt='')
+        | Q(custom_phonetic__gt='')
+        | (Q(custom_meanings__isnull=False) & ~Q(custom_meanings=[]))
+        | Q(vocabulary_book_id=book.id, base_word__isnull=False)
+    )
+
+
+def _word_stats(book):
+    """
+    Returns:
+        (word_count, customized_count, pos_distribution)
+    """
+    counts = BookWord.objects.for_book(book).aggregate(
+        word_count=Count('id'),
+        customized_count=Count('id', filter=_customized_filter(book)),
+    )
+    params = {}
+    with connection.cursor() as cursor:
+        cursor.execute(_POS_SQL.format(book_filter=book_filter_sql(book, params)), params)
+        pos_distribution = dict(sorted(cursor.fetchall(), key=lambda item: (-item[1], item[0] or '')))
+    return counts['word_count'], counts['customized_count'], pos_distribution
+
+
+def _plan_counts(book_ids):
+    """{book_id: (正在学习的计划数, 学生数)}"""
+    with connection.cursor() as cursor:
+        cursor.execute(_PLAN_COUNTS_SQL, [list(book_ids)])
+        return {book_id: (active, learners) for book_id, active, learners in cursor.fetchall()}
+
+
+def refresh_book_stats(book_ids, words=True, plans=True, force=False):
+    """
+    重新统计词书（包括以它们为基础词书的覆盖词书）
+
+    Args:
+        words: 统计单词（内容版本未变化时跳过，除非 force）
+        plans: 统计学习计划数和学生数
+        没有统计记录的词书总是全部统计
+
+    Returns:
+        int: 写入的统计记录数
+    """
+    book_ids = set(book_ids) - {None}
+    if not book_ids:
+        return 0
+    book_filter = Q(id__in=book_ids)
+    if words:
+        book_filter |= Q(base_book_id__in=book_ids)
+    books = list(VocabularyBook.objects.filter(book_filter).annotate(
+        base_content_version=F('base_book__content_version')
+    ))
+    if not books:
+        return 0
+    current = {stats.vocabulary_book_id: stats for stats in VocabularyBookStats.objects.filter(
+        vocabulary_book_id__in=[book.id for book in books]
+    )}
+
+    changed = {}
+    plan_books = []
+    for book in books:
+        stats = current.get(book.id)
+        is_new = stats is None
+        if is_new:
+            stats = VocabularyBookStats(vocabulary_book=book)
+        version = (book.content_version, book.base_content_version)
+        if is_new or (words and (force or (stats.content_version, stats.base_content_version) != version)):
+            # 先记下版本再统计：统计期间又有写入时，版本不一致，下一次刷新会重新统计
+            stats.content_version, stats.base_content_version = version
+            stats.word_count, stats.customized_count, stats.pos_distribution = _word_stats(book)
+            changed[book.id] = stats
+        if is_new or plans:
+            plan_books.append(stats)
+            changed[book.id] = stats
+    if not changed:
+        return 0
+
+    if plan_books:
+        counts = _plan_counts([stats.vocabulary_book_id for stats in plan_books])
+        for stats in plan_books:
+            stats.active_plan_count, stats.learner_count = counts.get(stats.vocabulary_book_id, (0, 0))
+
+    VocabularyBookStats.objects.bulk_create(
+        list(changed.values()),
+        update_conflicts=True,
+        unique_fields=['vocabulary_book'],
+        update_fields=_STATS_FIELDS,
+    )
+    # 词汇书上的词汇量字段与统计保持一致（接口排序和学习计划天数仍使用该字段）
+    for book in books:
+        stats = changed.get(book.id)
+        if stats is not None and book.word_count != stats.word_count:
+            VocabularyBook.objects.filter(pk=book.id).update(word_count=stats.word_count)
+    return len(changed)
+
+
+def _refresh_in_thread(key):
+    # 开始统计前移出队列：统计期间的新写入会再次排队
+    with _pending_lock:
+        _pending.discard(key)
+    book_id, words, plans = key
+    try:
+        refresh_book_stats([book_id], words=words, plans=plans)
+    except Exception as e:
+        logger.error(f"词汇书 {book_id} 统计失败: {e}")
+    finally:
+        # 后台线程使用独立的数据库连接，结束时关闭
+        connection.close()
+
+
+def _submit_refresh(book_id, words, plans):
+    if not getattr(settings, 'VOCABULARY_BOOK_STATS_ASYNC', True):
+        refresh_book_stats([book_id], words=words, plans=plans)
+        return
+    key = (book_id, words, plans)
+    with _pending_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    _stats_executor.submit(_refresh_in_thread, key)
+
+
+def schedule_stats_refresh(book_id, words=True, plans=False):
+    """
+    在当前事务提交后刷新词书统计（默认在后台线程中执行，大词书的单词修改不必等待统计），
+    回滚时不刷新；统计失败只记录日志，不影响已经提交的写入
+    """
+    if book_id:
+        transaction.on_commit(lambda: _submit_refresh(book_id, words, plans), robust=True)
+
+
+def refresh_stale_book_stats(batch_size=STALE_BATCH_SIZE):
+    """
+    补上丢失的统计刷新（定时任务）：统计缺失或内容版本落后的词书全部重新统计，
+    计划数与实际不一致的词书只刷新计划数；统计是最新的词书不做任何写入
+
+    Returns:
+        list: 刷新过的词书ID
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_STALE_WORD_STATS_SQL)
+        word_book_ids = [row[0] for row in cursor.fetchall()]
+    for offset in range(0, len(word_book_ids), batch_size):
+        refresh_book_stats(word_book_ids[offset:offset + batch_size], words=True, plans=True)
+
+    with connection.cursor() as cursor:
+        cursor.execute(_STALE_PLAN_STATS_SQL)
+        plan_book_ids = [row[0] for row in cursor.fetchall()]
+    for offset in range(0, len(plan_book_ids), batch_size):
+        refresh_book_stats(plan_book_ids[offset:offset + batch_size], words=False, plans=True)
+
+    refreshed = sorted(set(word_book_ids) | set(plan_book_ids))
+    if refreshed:
+        logger.info(f"补充刷新 {len(refreshed)} 本词书的统计")
+    return refreshed
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+修复缺少词汇书或单词的书籍单词（book_words）
+
+book_words.vocabulary_book / word_basic 加 NOT NULL 约束之前（迁移 0020）需要先清理历史数据：
+1. 覆盖词书中缺少单词的行：从基础词书对应的行取回 word_basic
+2. 缺少单词但有自定义拼写的行：按拼写补建或关联 word_basics（词书中已有该单词时视为重复行）
+3. 其余无法修复的行（没有词汇书、无从确定单词或与已有单词重复）：连同学习阶段、释义词条一起删除
+
+每一步每批最多处理 batch_size 行并立即提交，批次之间暂停，避免长事务锁住热点表；
+可以中断后重复执行，已修复的行不会再出现。
+"""
+
+import logging
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import BookWord
+from .word_forms import bump_book_version, sync_word_forms
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAUSE = 0.05
+
+_COUNT_SQL = """
+    SELECT count(*) FILTER (WHERE vocabulary_book_id IS NULL),
+           count(*) FILTER (WHERE vocabulary_book_id IS NOT NULL AND word_basic_id IS NULL)
+    FROM book_words
+    WHERE vocabulary_book_id IS NULL OR word_basic_id IS NULL
+"""
+
+# 覆盖词书的行：单词与基础词书中的行相同
+_REPAIR_FROM_BASE_SQL = """
+    UPDATE book_words bw
+    SET word_basic_id = base.word_basic_id, updated_at = %(now)s
+    FROM book_words base
+    WHERE bw.id IN (
+            SELECT b.id FROM book_words b
+            JOIN book_words base_row ON base_row.id = b.base_word_id
+            WHERE b.word_basic_id IS NULL AND b.vocabulary_book_id IS NOT NULL
+              AND base_row.word_basic_id IS NOT NULL
+            ORDER BY b.id
+            LIMIT %(limit)s
+        )
+      AND base.id = bw.base_word_id
+    RETURNING bw.id, bw.vocabulary_book_id
+"""
+
+# 按自定义拼写修复的候选行；词书中已有同一拼写的单词时不修复（留给删除步骤）
+_CUSTOM_WORD_CANDIDATES_SQL = """
+    SELECT bw.id, bw.vocabulary_book_id, btrim(bw.custom_word)
+    FROM book_words bw
+    WHERE bw.word_basic_id IS NULL AND bw.vocabulary_book_id IS NOT NULL
+      AND bw.id > %(after)s
+      AND btrim(COALESCE(bw.custom_word, '')) <> ''
+      AND length(btrim(bw.custom_word)) <= 100
+      AND NOT EXISTS (
+          SELECT 1 FROM book_words other
+          JOIN word_basics wb ON wb.id = other.word_basic_id
+          WHERE other.vocabulary_book_id = bw.vocabulary_book_id AND wb.word = btrim(bw.custom_word)
+      )
+    ORDER BY bw.id
+    LIMIT %(limit)s
+"""
+
+_INSERT_WORD_BASICS_SQL = """
+    INSERT INTO word_basics (word, created_at, updated_at)
+    SELECT DISTINCT w, %(now)s, %(now)s FROM unnest(%(words)s::varchar[]) AS w
+    ON CONFLICT (word) DO NOTHING
+    RETURNING id
+"""
+
+_REPAIR_FROM_CUSTOM_WORD_SQL = """
+    UPDATE book_words bw
+    SET word_basic_id = wb.id, updated_at = %(now)s
+    FROM word_basics wb
+    WHERE bw.id = ANY(%(ids)s) AND bw.word_basic_id IS NULL AND wb.word = btrim(bw.custom_word)
+    RETURNING bw.id, bw.vocabulary_book_id
+"""
+
+
+class RepairResult:
+    """一次修复的结果"""
+
+    def __init__(self):
+        self.from_base = 0
+        self.from_custom_word = 0
+        self.new_word_basics = 0
+        self.deleted = 0
+        self.book_ids = set()
+
+    def as_dict(self):
+        return {
+            'from_base': self.from_base,
+            'from_custom_word': self.from_custom_word,
+            'new_word_basics': self.new_word_basics,
+            'deleted': self.deleted,
+            'books': len(self.book_ids),
+        }
+
+
+def count_orphans():
+    """
+    Returns:
+        (没有词汇书的行数, 有词汇书但没有单词的行数)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_COUNT_SQL)
+        return cursor.fetchone()
+
+
+def _touch_books(book_ids):
+    # 词书内容变化：使词形映射缓存失效，提交后刷新统计
+    for book_id in sorted(book_ids):
+        bump_book_version(book_id)
+
+
+def _run_batches(step, pause, progress, name):
+    """重复执行 step（每次一个短事务）直到没有可处理的行"""
+    done = 0
+    while True:
+        with transaction.atomic():
+            count = step()
+        if not count:
+            return done
+        done += count
+        if progress is not None:
+            progress(name, done)
+        if pause:
+            time.sleep(pause)
+
+
+def repair_book_words(batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_PAUSE, progress=None):
+    """
+    分批修复或删除缺少词汇书/单词的书籍单词
+
+    Args:
+        progress: progress(步骤名, 已处理行数) 每批之后调用
+
+    Returns:
+        RepairResult
+    """
+    result = RepairResult()
+
+    def from_base():
+        with connection.cursor() as cursor:
+            cursor.execute(_REPAIR_FROM_BASE_SQL, {'now': timezone.now(), 'limit': batch_size})
+            rows = cursor.fetchall()
+        book_ids = {book_id for _, book_id in rows}
+        _touch_books(book_ids)
+        result.book_ids |= book_ids
+        return len(rows)
+
+    # 按id推进，跳过本批中因拼写过长等原因没有修复的行，避免重复处理
+    last_id = [0]
+
+    def from_custom_word():
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(_CUSTOM_WORD_CANDIDATES_SQL, {'after': last_id[0], 'limit': batch_size})
+            candidates = cursor.fetchall()
+            if not candidates:
+                return 0
+            last_id[0] = candidates[-1][0]
+            # 同一词书中同一拼写的多行只修复第一行，其余作为重复行删除
+            chosen = {}
+            for row_id, book_id, word in candidates:
+                chosen.setdefault((book_id, word), row_id)
+            cursor.execute(_INSERT_WORD_BASICS_SQL, {'now': now, 'words': sorted({word for _, word in chosen})})
+            new_word_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(_REPAIR_FROM_CUSTOM_WORD_SQL, {'now': now, 'ids': list(chosen.values())})
+            rows = cursor.fetchall()
+        sync_word_forms(new_word_ids)
+        book_ids = {book_id for _, book_id in rows}
+        _touch_books(book_ids)
+        result.new_word_basics += len(new_word_ids)
+        result.from_custom_word += len(rows)
+        result.book_ids |= book_ids
+        return len(candidates)
+
+    def delete_rest():
+        # 通过ORM删除，级联删除学习阶段、释义词条等引用
+        orphans = BookWord.objects.filter(vocabulary_book__isnull=True) | BookWord.objects.filter(
+            word_basic__isnull=True
+        )
+        batch = list(orphans.order_by('id').values_list('id', 'vocabulary_book_id')[:batch_size])
+        if not batch:
+            return 0
+        BookWord.objects.filter(id__in=[row_id for row_id, _ in batch]).delete()
+        book_ids = {book_id for _, book_id in batch} - {None}
+        _touch_books(book_ids)
+        result.book_ids |= book_ids
+        result.deleted += len(batch)
+        return len(batch)
+
+    result.from_base = _run_batches(from_base, pause, progress, 'from_base')
+    _run_batches(from_custom_word, pause, progress, 'from_custom_word')
+    _run_batches(delete_rest, pause, progress, 'delete')
+    logger.info(f"书籍单词修复完成: {result.as_dict()}")
+    return result
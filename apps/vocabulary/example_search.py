@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+例句全文检索
+
+book_words.example_tsv 是 to_tsvector('english', example_sentence) 的生成列（见迁移 0014），
+写入例句时由数据库自动维护，GIN 索引 idx_book_word_example_tsv 支持 @@ 匹配。
+查询使用 websearch_to_tsquery（支持 "短语"、OR、-排除），按 ts_rank_cd 排序，
+只对当前页的结果计算 ts_headline 高亮片段。
+"""
+
+from django.db import connection
+
+from .models import BookWord
+
+SEARCH_CONFIG = 'english'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_OFFSET = 1000
+
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5'
+
+_SEARCH_SQL = """
+    WITH q AS (SELECT websearch_to_tsquery(%(config)s::regconfig, %(query)s) AS query),
+    matched AS (
+        SELECT bw.id, bw.vocabulary_book_id, bw.word_basic_id, bw.custom_word, bw.example_sentence,
+               ts_rank_cd(bw.example_tsv, q.query) AS rank
+        FROM book_words bw
+        CROSS JOIN q
+        JOIN vocabulary_books vb ON vb.id = bw.vocabulary_book_id AND vb.deleted_at IS NULL
+        WHERE bw.example_tsv @@ q.query
+          AND NOT bw.is_removed
+          {visibility}
+          {book_filter}
+        ORDER BY rank DESC, bw.id
+        LIMIT %(limit)s OFFSET %(offset)s
+    )
+    SELECT m.id, m.vocabulary_book_id, vb.name, COALESCE(NULLIF(m.custom_word, ''), wb.word),
+           m.example_sentence,
+           ts_headline(%(config)s::regconfig, m.example_sentence, q.query, %(headline)s),
+           m.rank
+    FROM matched m
+    CROSS JOIN q
+    JOIN vocabulary_books vb ON vb.id = m.vocabulary_book_id
+    LEFT JOIN word_basics wb ON wb.id = m.word_basic_id
+    ORDER BY m.rank DESC, m.id
+"""
+
+_COLUMNS = ('book_word_id', 'book_id', 'book_name', 'word', 'example_sentence', 'snippet', 'rank')
+
+
+def book_filter_sql(book, params):
+    """
+    生成 "AND bw.id IN (词书全部单词)" 条件，参数以命名参数写入 params
+
+    for_book 的SQL使用位置参数，这里转成 %(book_N)s 拼入命名参数的SQL
+    """
+    book_sql, book_params = BookWord.objects.for_book(book).values('id').query.sql_with_params()
+    parts = book_sql.split('%s')
+    book_sql = parts[0]
+    for index, value in enumerate(book_params):
+        params[f'book_{index}'] = value
+        book_sql += f'%(book_{index})s' + parts[index + 1]
+    return f'AND bw.id IN ({book_sql})'
+
+
+def search_examples(query, user=None, book=None, limit=DEFAULT_LIMIT, offset=0):
+    """
+    全文检索例句
+
+    Args:
+        user: 只检索系统预设词书和该用户创建的词书（与词汇书列表一致），为空时不限制
+        book: 只在该词书中检索（覆盖词书按合并后的单词检索）
+
+    Returns:
+        list[dict]: 按相关度排序的结果，snippet 中匹配词用 <mark> 标出
+    """
+    params = {
+        'config': SEARCH_CONFIG,
+        'query': query,
+        'headline': HEADLINE_OPTIONS,
+        'limit': max(1, min(int(limit), MAX_LIMIT)),
+        'offset': max(0, min(int(offset), MAX_OFFSET)),
+    }
+
+    visibility = ''
+    if user is not None:
+        visibility = 'AND (vb.is_system_preset OR vb.created_by_id = %(user_id)s)'
+        params['user_id'] = user.id
+
+    book_filter = book_filter_sql(book, params) if book is not None else ''
+
+    sql = _SEARCH_SQL.format(visibility=visibility, book_filter=book_filter)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [dict(zip(_COLUMNS, row)) for row in rows]
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+词汇书流式导出
+
+- 按 (word_order, id) 键集分页分块查询，只取需要的列（一次JOIN word_basics），
+  不持有长事务或服务器端游标，内存占用与词汇书大小无关
+- 导出生效值（自定义优先）
+- word_order 导出为书中的位置（1, 2, 3...），而不是存储的带间隔顺序值：
+  导入时会再按 ORDER_GAP 放大，导出的文件重新导入后顺序不变
+- 支持 CSV / JSONL / XLSX，XLSX 用 zipfile 流式写出，不依赖第三方库
+"""
+
+import csv
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+
+from .models import BookWord
+
+# 每次查询的行数
+EXPORT_CHUNK_SIZE = 2000
+
+# CSV/XLSX 的列，与导入格式一致，导出的文件可以直接重新导入
+EXPORT_COLUMNS = ['word', 'phonetic_symbol', 'part_of_speech', 'chinese_meaning', 'example_sentence', 'word_order']
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+_VALUE_FIELDS = (
+    'id', 'word_order', 'custom_word', 'custom_phonetic', 'custom_meanings', 'meaning_set__meanings',
+    'example_sentence', 'word_basic__word', 'word_basic__phonetic_symbol',
+    'word_basic__uk_pronunciation', 'word_basic__us_pronunciation',
+)
+
+
+def iter_book_word_values(book_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """按 (word_order, id) 键集分页，逐块返回 values() 字典"""
+    queryset = BookWord.objects.for_book(book_id).order_by('word_order', 'id')
+    last = None
+    while True:
+        chunk_queryset = queryset
+        if last is not None:
+            chunk_queryset = queryset.filter(
+                Q(word_order__gt=last[0]) | Q(word_order=last[0], id__gt=last[1])
+            )
+        rows = list(chunk_queryset.values(*_VALUE_FIELDS)[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1]['word_order'], rows[-1]['id'])
+
+
+def effective_entry(row, position):
+    """
+    将values()行转换为生效值（与 BookWord.effective_* 属性一致）
+
+    Args:
+        position: 该行在书中的位置（从1开始），作为导出的 word_order
+    """
+    meanings = row['custom_meanings'] or row['meaning_set__meanings'] or []
+    return {
+        'word': row['custom_word'] or row['word_basic__word'] or '',
+        'phonetic_symbol': row['custom_phonetic'] or row['word_basic__phonetic_symbol'] or '',
+        'uk_pronunciation': row['word_basic__uk_pronunciation'] or '',
+        'us_pronunciation': row['word_basic__us_pronunciation'] or '',
+        'meanings': [meaning for meaning in meanings if isinstance(meaning, dict)],
+        'example_sentence': row['example_sentence'] or '',
+        'word_order': position,
+    }
+
+
+def format_meanings(meanings):
+    """
+    meanings JSON 转为导入格式的 (part_of_speech, chinese_meaning)
+
+    多个词性用分号分隔；某个词性下含多个释义时写成 "[释义1,释义2]" 复合释义
+    """
+    if not meanings:
+        return '', ''
+    if len(meanings) == 1:
+        return meanings[0].get('pos', '') or '', meanings[0].get('meaning', '') or ''
+
+    pos_list = [meaning.get('pos', '') or '' for meaning in meanings]
+    meaning_list = []
+    for meaning in meanings:
+        text = meaning.get('meaning', '') or ''
+        parts = [part.strip() for part in text.split(';') if part.strip()]
+        meaning_list.append(f"[{','.join(parts)}]" if len(parts) > 1 else text)
+    return ';'.join(pos_list), ';'.join(meaning_list)
+
+
+def _table_rows(entries):
+    for entry in entries:
+        part_of_speech, chinese_meaning = format_meanings(entry['meanings'])
+        yield [
+            entry['word'],
+            entry['phonetic_symbol'],
+            part_of_speech,
+            chinese_meaning,
+            entry['example_sentence'],
+            entry['word_order'],
+        ]
+
+
+class _Echo:
+    """csv.writer 的写入目标，直接返回写入的字符串"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(entries):
+    """逐行生成CSV（带BOM，Excel可直接打开中文）"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(EXPORT_COLUMNS)
+    for row in _table_rows(entries):
+        yield writer.writerow(row)
+
+
+def stream_jsonl(entries):
+    """每行一个JSON对象，保留完整meanings结构"""
+    for entry in entries:
+        yield json.dumps(entry, ensure_ascii=False) + '\n'
+
+
+# XML 1.0 不允许的控制字符
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="words" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+class _ChunkBuffer:
+    """不可seek的zip写入目标，zipfile写入的数据由生成器取走"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _xlsx_cell(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = _ILLEGAL_XML_CHARS.sub('', str(value or ''))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(entries, flush_rows=500):
+    """流式生成只有一个工作表的XLSX（内联字符串，无共享字符串表）"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', mode='w') as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>' + _xlsx_row(EXPORT_COLUMNS)
+            ).encode('utf-8'))
+            pending = []
+            for row in _table_rows(entries):
+                pending.append(_xlsx_row(row))
+                if len(pending) >= flush_rows:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write((''.join(pending) + '</sheetData></worksheet>').encode('utf-8'))
+    yield buffer.drain()
+
+
+def export_book_words(book_id, file_format='csv'):
+    """
+    返回导出内容的生成器
+
+    Raises:
+        ValueError: 不支持的导出格式
+    """
+    entries = (
+        effective_entry(row, position)
+        for position, row in enumerate(iter_book_word_values(book_id), start=1)
+    )
+    if file_format == 'csv':
+        return stream_csv(entries)
+    if file_format == 'jsonl':
+        return stream_jsonl(entries)
+    if file_format == 'xlsx':
+        return stream_xlsx(entries)
+    raise ValueError(f"不支持的导出格式: {file_format}")
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+单词拼写纠错（SymSpell 删除索引）
+
+对 WordBasic.word（小写）的前 PREFIX_LENGTH 个字符生成最多删除 MAX_EDIT_DISTANCE 个字符的全部变体，
+查询时对输入做同样的删除，变体相同的单词即为候选，再用编辑距离（含相邻交换）校验并排序。
+
+为控制内存，不保存变体字符串：每个 (变体, 单词) 对打包成一个64位整数
+（变体哈希的高位 << WORD_INDEX_BITS | 单词下标），分桶排序后存入一个 array('q')，
+查询时二分查找。哈希冲突只会多出候选，校验编辑距离时会被过滤。
+
+索引在每个工作进程内于首次使用时在后台线程构建（约50万单词需要半分钟、占用约170MB），
+之后每隔 CHECK_INTERVAL 秒比较单词表的最大ID，有新单词或超过 REBUILD_INTERVAL 时
+在后台重建并整体替换，查询不等待构建。
+"""
+
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.db.models import Max
+
+from .models import WordBasic
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+DEFAULT_LIMIT = 10
+
+# 单词下标占用的位数（最多约200万个单词），其余位存变体哈希
+WORD_INDEX_BITS = 21
+_HASH_BITS = 63 - WORD_INDEX_BITS
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_INDEX_MASK = (1 << WORD_INDEX_BITS) - 1
+
+# 构建时按哈希高位分桶排序，避免一次性把全部条目转成Python整数
+_BUCKET_BITS = 8
+
+# 检查单词表变化的间隔，以及无论是否变化都重建的间隔（秒）
+CHECK_INTERVAL = 60
+REBUILD_INTERVAL = 3600
+
+_rebuild_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def normalize_word(text):
+    return ' '.join((text or '').split()).lower()
+
+
+def _delete_levels(text, max_distance):
+    """
+    text 删除字符得到的变体，按删除个数分层：[{text}, {删1个}, {删2个}, ...]
+
+    可以删到空字符串：不超过 max_distance 个字符的短单词与任意同样短的查询都可能在编辑距离之内
+    """
+    levels = [{text}]
+    seen = {text}
+    for _ in range(max_distance):
+        next_level = set()
+        for item in levels[-1]:
+            if not item:
+                continue
+            for index in range(len(item)):
+                variant = item[:index] + item[index + 1:]
+                if variant not in seen:
+                    next_level.add(variant)
+        seen |= next_level
+        levels.append(next_level)
+    return levels
+
+
+def _key(variant, length):
+    """
+    变体哈希，混入单词全长：查询时只取长度相差不超过编辑距离的单词，
+    长度不符的候选不会被取出校验（同一进程内 str 哈希稳定，索引只在本进程内使用）
+    """
+    return (hash(variant) + length * 0x9E3779B1) & _HASH_MASK
+
+
+def letter_signature(word):
+    """
+    字母计数签名：每个字母两位（出现至少1次 / 至少2次），其他字符共用两位。
+    一次插入或删除最多改变1位，替换最多2位，相邻交换不改变，
+    因此两个单词签名异或后的位数超过 2 * 编辑距离 时可以直接排除
+    """
+    signature = 0
+    seen = set()
+    for char in word:
+        offset = ord(char) - 97
+        if not 0 <= offset < 26:
+            offset = 26
+        if offset in seen:
+            signature |= 1 << (offset * 2 + 1)
+        else:
+            seen.add(offset)
+            signature |= 1 << (offset * 2)
+    return signature
+
+
+def bigram_signature(word):
+    """
+    相邻字母对签名：每个字母对映射到63位中的一位。
+    一次编辑最多去掉2个、加入2个字母对（相邻交换为3个），异或位数超过 6 * 编辑距离 时可以直接排除
+    """
+    signature = 0
+    for index in range(len(word) - 1):
+        signature |= 1 << ((ord(word[index]) * 31 + ord(word[index + 1])) % 63)
+    return signature
+
+
+def edit_distance(source, target, max_distance):
+    """
+    编辑距离（插入、删除、替换、相邻交换），超过 max_distance 时返回 max_distance + 1
+
+    先去掉相同的前缀和后缀，再只计算对角线两侧 max_distance 宽的带状区域，某一行全部超过时提前返回
+    """
+    if source == target:
+        return 0
+    over = max_distance + 1
+    if abs(len(source) - len(target)) > max_distance:
+        return over
+
+    start = 0
+    shortest = min(len(source), len(target))
+    while start < shortest and source[start] == target[start]:
+        start += 1
+    end = 0
+    while end < shortest - start and source[-1 - end] == target[-1 - end]:
+        end += 1
+    source = source[start:len(source) - end]
+    target = target[start:len(target) - end]
+    if not source or not target:
+        return min(len(source) + len(target), over)
+
+    width = len(target)
+    previous_previous = None
+    previous = [column if column <= max_distance else over for column in range(width + 1)]
+    for row in range(1, len(source) + 1):
+        current = [over] * (width + 1)
+        if row <= max_distance:
+            current[0] = row
+        row_min = current[0]
+        char = source[row - 1]
+        for column in range(max(1, row - max_distance), min(width, row + max_distance) + 1):
+            other = target[column - 1]
+            value = previous[column - 1] + (char != other)
+            if previous[column] + 1 < value:
+                value = previous[column] + 1
+            if current[column - 1] + 1 < value:
+                value = current[column - 1] + 1
+            if (
+                previous_previous is not None and column > 1
+                and char == target[column - 2] and source[row - 2] == other
+                and previous_previous[column - 2] + 1 < value
+            ):
+                value = previous_previous[column - 2] + 1
+            current[column] = value if value < over else over
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        previous_previous, previous = previous, current
+    return previous[width]
+
+
+class FuzzyWordIndex:
+    """一次构建、只读的删除索引，重建时整体替换"""
+
+    def __init__(self, rows, max_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+        """
+        Args:
+            rows: [(WordBasic ID, 单词), ...]
+        """
+        started = time.monotonic()
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.ids = array('q')
+        self.signatures = array('q')
+        self.bigram_signatures = array('q')
+        self.words = []
+        buckets = [array('q') for _ in range(1 << _BUCKET_BITS)]
+        bucket_shift = 63 - _BUCKET_BITS
+
+        for word_id, word in rows:
+            word = normalize_word(word)
+            if not word:
+                continue
+            index = len(self.words)
+            if index > _INDEX_MASK:
+                logger.warning(f"拼写纠错索引单词数量超过上限 {_INDEX_MASK + 1}，其余单词未加入")
+                break
+            self.ids.append(word_id)
+            self.signatures.append(letter_signature(word))
+            self.bigram_signatures.append(bigram_signature(word))
+            self.words.append(word)
+            length = len(word)
+            for level in _delete_levels(word[:prefix_length], max_distance):
+                for variant in level:
+                    packed = (_key(variant, length) << WORD_INDEX_BITS) | index
+                    buckets[packed >> bucket_shift].append(packed)
+
+        self.entries = array('q')
+        for bucket in buckets:
+            self.entries.extend(sorted(bucket))
+        del buckets
+
+        self.max_word_id = max(self.ids) if self.ids else 0
+        self.built_at = time.monotonic()
+        self.build_seconds = self.built_at - started
+        self._memory_bytes = None
+
+    def _candidates(self, variant, length):
+        low = _key(variant, length) << WORD_INDEX_BITS
+        start = bisect_left(self.entries, low)
+        end = bisect_right(self.entries, low | _INDEX_MASK, start)
+        return self.entries[start:end]
+
+    def lookup(self, text, limit=DEFAULT_LIMIT, max_distance=None):
+        """
+        Returns:
+            list[(WordBasic ID, 单词, 编辑距离)]: 按编辑距离、长度差、单词排序
+        """
+        text = normalize_word(text)
+        if not text:
+            return []
+        bound = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        lengths = range(max(1, len(text) - bound), len(text) + bound + 1)
+
+        words = self.words
+        signatures = self.signatures
+        bigram_signatures = self.bigram_signatures
+        signature = letter_signature(text)
+        bigrams = bigram_signature(text)
+        matches = {}
+        checked = set()
+        # 各编辑距离已找到的单词数；已有 limit 个不超过 d 的结果后，只需再找距离不超过 d 的单词
+        found = [0] * (bound + 1)
+        for deleted, level in enumerate(_delete_levels(text[:self.prefix_length], bound)):
+            # 距离不超过 k 的单词，都能通过删除不超过 k 个字符的变体找到
+            if deleted > bound:
+                break
+            for variant in level:
+                for length in lengths:
+                    for packed in self._candidates(variant, length):
+                        index = packed & _INDEX_MASK
+                        if index in checked:
+                            continue
+                        checked.add(index)
+                        if (
+                            (signatures[index] ^ signature).bit_count() > 2 * bound
+                            or (bigram_signatures[index] ^ bigrams).bit_count() > 6 * bound
+                        ):
+                            continue
+                        distance = edit_distance(text, words[index], bound)
+                        if distance > bound:
+                            continue
+                        matches[index] = distance
+                        found[distance] += 1
+                        total = 0
+                        for candidate_bound in range(bound + 1):
+                            total += found[candidate_bound]
+                            if total >= limit:
+                                bound = candidate_bound
+                                break
+
+        ranked = sorted(
+            ((index, distance) for index, distance in matches.items() if distance <= bound),
+            key=lambda item: (item[1], abs(len(words[item[0]]) - len(text)), words[item[0]])
+        )
+        return [(self.ids[index], words[index], distance) for index, distance in ranked[:limit]]
+
+    def memory_bytes(self):
+        """索引占用的内存（近似值，首次调用时计算）"""
+        if self._memory_bytes is None:
+            self._memory_bytes = (
+                sys.getsizeof(self.entries)
+                + sys.getsizeof(self.ids)
+                + sys.getsizeof(self.signatures)
+                + sys.getsizeof(self.bigram_signatures)
+                + sys.getsizeof(self.words)
+                + sum(sys.getsizeof(word) for word in self.words)
+            )
+        return self._memory_bytes
+
+    def stats(self):
+        return {
+            'words': len(self.words),
+            'entries': len(self.entries),
+            'memory_bytes': self.memory_bytes(),
+            'build_seconds': round(self.build_seconds, 3),
+            'max_edit_distance': self.max_distance,
+            'prefix_length': self.prefix_length,
+        }
+
+
+def build_index():
+    rows = WordBasic.objects.order_by('id').values_list('id', 'word').iterator(chunk_size=5000)
+    index = FuzzyWordIndex(rows)
+    stats = index.stats()
+    logger.info(
+        f"拼写纠错索引构建完成: {stats['words']} 个单词, {stats['entries']} 个条目, "
+        f"约 {stats['memory_bytes'] / 1024 / 1024:.1f} MB, 耗时 {stats['build_seconds']}s"
+    )
+    return index
+
+
+class _IndexHolder:
+    """当前进程的索引；首次使用和过期时都在后台线程构建，构建完成前 get() 返回None"""
+
+    def __init__(self):
+        self.index = None
+        self.checked_at = 0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def get(self):
+        if self.index is None:
+            self._schedule_rebuild()
+            return None
+
+        now = time.monotonic()
+        if now - self.checked_at >= CHECK_INTERVAL:
+            self.checked_at = now
+            if self._is_stale(now):
+                self._schedule_rebuild()
+        return self.index
+
+    def _is_stale(self, now):
+        if now - self.index.built_at >= REBUILD_INTERVAL:
+            return True
+        max_id = WordBasic.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        return max_id != self.index.max_word_id
+
+    def _schedule_rebuild(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        _rebuild_executor.submit(self._rebuild)
+
+    def _rebuild(self):
+        try:
+            self.index = build_index()
+            self.checked_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"拼写纠错索引构建失败: {e}")
+        finally:
+            self._rebuilding = False
+            # 后台线程使用独立的数据库连接，结束时关闭
+            connection.close()
+
+
+_holder = _IndexHolder()
+
+
+def get_index():
+    """当前进程的索引，尚未构建完成时返回None（同时触发后台构建）"""
+    return _holder.get()
+
+
+def suggest_words(text, limit=DEFAULT_LIMIT, max_distance=None):
+    """
+    拼写纠错候选
+
+    Returns:
+        list[(WordBasic ID, 单词, 编辑距离)] | None: 索引尚未构建完成时返回None
+    """
+    index = get_index()
+    if index is None:
+        return None
+    return index.lookup(text, limit=limit, max_distance=max_distance)
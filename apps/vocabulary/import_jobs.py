@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+后台导入任务
+
+上传文件先保存为 ImportJob，然后在请求之外按分块事务导入。
+每个分块提交时在同一事务里写入断点（rows_done），进程崩溃后从断点继续，
+不会重复或遗漏行。执行期间由独立线程定时刷新心跳；心跳超时的任务和进程重启时
+还在等待的任务由定时任务（django_crontab，见 settings.CRONJOBS）接管。
+
+PDF上传（admin）同样作为导入任务：单词表提取（多进程、可能OCR）在后台执行，
+提取结果交给同一个 BookWordImporter 写入；提取结果是确定的，续传时重新提取后跳过已提交的行。
+admin上传的CSV先写入暂存表预览（import_staging），确认后同样作为导入任务：由 apply_batch
+在一个事务中从暂存表集合写入并同时记录结果，进程中断后重新执行整批，已提交的批次不会重复写入。
+"""
+
+import csv
+import io
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .import_staging import apply_batch
+from .importing import (
+    BookWordImporter, ImportFormatError, ImportSummary, MAX_REPORTED_ERRORS, csv_dict_reader, detect_encoding,
+    open_csv_reader
+)
+from .models import ImportJob
+from .pdf_extraction import extract_word_rows
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 后台导入线程池
+_import_executor = ThreadPoolExecutor(max_workers=2)
+
+# 心跳超过这个时间没有更新的运行中任务视为已崩溃，可以被重新接管
+STALE_AFTER = timedelta(minutes=5)
+
+# 执行期间刷新心跳的间隔，与分块耗时无关
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+
+
+def sync_import_max_bytes():
+    """小于该大小的上传直接在请求内导入，超过则转为后台任务"""
+    return getattr(settings, 'VOCABULARY_IMPORT_SYNC_MAX_BYTES', 256 * 1024)
+
+
+def create_import_job(book, uploaded_file, user=None, source='api', mode='upsert',
+                      merge_existing_meanings=False, require_meaning=False, file_format='csv'):
+    """
+    保存上传文件并创建导入任务，事务提交后提交到后台线程执行
+
+    Args:
+        uploaded_file: UploadedFile 或 ContentFile
+        file_format: 'csv' 或 'pdf'
+    """
+    job = ImportJob(
+        vocabulary_book=book,
+        created_by=user if user is not None and user.is_authenticated else None,
+        source=source,
+        mode=mode,
+        merge_existing_meanings=merge_existing_meanings,
+        require_meaning=require_meaning,
+        file_format=file_format,
+        original_filename=(getattr(uploaded_file, 'name', '') or '')[:255],
+    )
+    job.upload.save(f"book_{book.id}.{file_format}", uploaded_file, save=False)
+    job.save()
+    transaction.on_commit(lambda: enqueue_import_job(job.id))
+    return job
+
+
+def create_staged_import_job(batch, user=None):
+    """admin预览确认后，把暂存批次的写入作为后台导入任务（全部新建）"""
+    job = ImportJob.objects.create(
+        vocabulary_book=batch.vocabulary_book,
+        created_by=user if user is not None and user.is_authenticated else None,
+        source='admin',
+        mode='append',
+        file_format='staged',
+        staging_batch=batch,
+        original_filename=batch.original_filename,
+        total_rows=batch.total_rows,
+    )
+    transaction.on_commit(lambda: enqueue_import_job(job.id))
+    return job
+
+
+def enqueue_import_job(job_id):
+    """提交到后台线程池"""
+    return _import_executor.submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_import_job(job_id)
+    except Exception as e:
+        logger.error(f"导入任务 {job_id} 执行异常: {e}")
+    finally:
+        # 后台线程使用独立的数据库连接，结束时关闭
+        connection.close()
+
+
+def _claim_job(job_id):
+    """
+    将任务标记为运行中；已被其他进程执行且心跳正常的任务不会被重复接管
+
+    Returns:
+        ImportJob或None
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status='pending') | Q(status='running', heartbeat_at__lt=now - STALE_AFTER) |
+            Q(status='running', heartbeat_at__isnull=True),
+            pk=job_id,
+        ).select_related('vocabulary_book').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = now
+        job.rows_at_start = job.rows_done
+        job.heartbeat_at = now
+        job.save(update_fields=['status', 'started_at', 'rows_at_start', 'heartbeat_at', 'updated_at'])
+    return job
+
+
+class _Heartbeat:
+    """
+    任务执行期间在独立线程中定时刷新心跳，单个分块耗时再长也不会被其他进程当作已崩溃而重复接管
+    """
+
+    def __init__(self, job_id, interval=None):
+        self.job_id = job_id
+        self.interval = (interval or HEARTBEAT_INTERVAL).total_seconds()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'import-job-{job_id}-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+    def beat(self):
+        ImportJob.objects.filter(pk=self.job_id, status='running').update(heartbeat_at=timezone.now())
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    self.beat()
+                except Exception as e:
+                    logger.error(f"导入任务 {self.job_id} 心跳更新失败: {e}")
+        finally:
+            # 心跳线程使用独立的数据库连接，结束时关闭
+            connection.close()
+
+
+def _count_rows(upload):
+    """预先数一遍数据行数，用于计算进度和剩余时间；与导入使用同一个解析器（空行不计）"""
+    with upload.open('rb') as raw:
+        encoding = detect_encoding(raw.read(64 * 1024))
+        raw.seek(0)
+        text_stream = io.TextIOWrapper(raw, encoding=encoding, newline='')
+        total = sum(1 for _ in csv_dict_reader(text_stream))
+        text_stream.detach()
+    return total
+
+
+def _import_csv(job, importer):
+    if job.total_rows is None:
+        job.total_rows = _count_rows(job.upload)
+        job.save(update_fields=['total_rows', 'updated_at'])
+
+    with job.upload.open('rb') as upload:
+        reader = open_csv_reader(
+            upload,
+            required_columns=('word', 'chinese_meaning') if job.require_meaning else ('word',)
+        )
+        # 跳过已提交的行
+        rows = itertools.islice(reader, job.rows_done, None)
+        return importer.run(rows, start_row=job.rows_done)
+
+
+def _import_pdf(job, importer):
+    # 提取完成前没有可写入的行，进度从提取结果的行数开始计算
+    rows, _ = extract_word_rows(job.upload.path)
+    if job.total_rows is None:
+        job.total_rows = len(rows)
+        job.save(update_fields=['total_rows', 'updated_at'])
+    return importer.run(rows[job.rows_done:], start_row=job.rows_done)
+
+
+def _import_staged(job, on_chunk):
+    batch = job.staging_batch
+    if batch is None:
+        # 暂存批次在写入的同一事务中删除：没有批次而断点已到末尾，说明上次已经写入完成
+        if job.rows_done < (job.total_rows or 0):
+            raise ImportFormatError("暂存批次已过期，请重新上传文件")
+        summary = ImportSummary()
+        summary.word_count = job.vocabulary_book.word_count
+        return summary
+    # 批次在写入事务中删除（外键随之置空），任务对象不再引用它
+    job.staging_batch = None
+    return apply_batch(batch, on_applied=on_chunk)
+
+
+def run_import_job(job_id, chunk_size=None):
+    """
+    执行（或从断点继续执行）一个导入任务
+
+    Returns:
+        ImportJob或None（任务不存在或正被其他进程执行）
+    """
+    job = _claim_job(job_id)
+    if job is None:
+        return None
+
+    base_counts = {
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'skipped': job.skipped_count,
+        'errors': job.error_count,
+    }
+    base_errors = list(job.errors or [])
+
+    def on_chunk(last_row_number, summary):
+        # 与分块写入在同一事务中保存断点
+        job.rows_done = last_row_number
+        job.created_count = base_counts['created'] + summary.created
+        job.updated_count = base_counts['updated'] + summary.updated
+        job.skipped_count = base_counts['skipped'] + summary.skipped
+        job.error_count = base_counts['errors'] + summary.error_count
+        job.errors = (base_errors + summary.errors)[:MAX_REPORTED_ERRORS]
+        job.heartbeat_at = timezone.now()
+        job.save(update_fields=[
+            'rows_done', 'created_count', 'updated_count', 'skipped_count',
+            'error_count', 'errors', 'heartbeat_at', 'updated_at'
+        ])
+
+    try:
+        # 统计行数（或提取PDF）和分块导入期间由独立线程定时刷新心跳
+        with _Heartbeat(job.id):
+            importer_kwargs = {'chunk_size': chunk_size} if chunk_size else {}
+            importer = BookWordImporter(
+                job.vocabulary_book,
+                mode=job.mode,
+                merge_existing_meanings=job.merge_existing_meanings,
+                require_meaning=job.require_meaning,
+                on_chunk=on_chunk,
+                **importer_kwargs
+            )
+            if job.file_format == 'staged':
+                summary = _import_staged(job, on_chunk)
+            elif job.file_format == 'pdf':
+                summary = _import_pdf(job, importer)
+            else:
+                summary = _import_csv(job, importer)
+
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.message = (
+            f"成功导入 {job.created_count + job.updated_count} 个单词到词汇书 "
+            f"'{job.vocabulary_book.name}'，当前词汇量 {summary.word_count}"
+        )
+        job.save(update_fields=['status', 'finished_at', 'message', 'updated_at'])
+        logger.info(f"导入任务 {job.id} 完成: {job.message}")
+    except (ImportFormatError, csv.Error) as e:
+        _mark_failed(job, f"文件格式错误: {e}")
+    except Exception as e:
+        _mark_failed(job, f"导入失败: {e}")
+        logger.error(f"导入任务 {job.id} 失败: {e}")
+    return job
+
+
+def _mark_failed(job, message):
+    job.status = 'failed'
+    job.finished_at = timezone.now()
+    job.message = message
+    job.save(update_fields=['status', 'finished_at', 'message', 'updated_at'])
+
+
+def pending_import_job_ids():
+    """等待执行的任务，以及心跳超时（进程崩溃）的运行中任务"""
+    stale_before = timezone.now() - STALE_AFTER
+    return list(
+        ImportJob.objects.filter(
+            Q(status='pending') |
+            Q(status='running', heartbeat_at__lt=stale_before) |
+            Q(status='running', heartbeat_at__isnull=True)
+        ).order_by('created_at').values_list('id', flat=True)
+    )
+
+
+def resume_import_jobs():
+    """
+    执行所有等待中或中断的导入任务（定时任务/管理命令使用）
+
+    Returns:
+        int: 执行的任务数量
+    """
+    count = 0
+    for job_id in pending_import_job_ids():
+        if run_import_job(job_id) is not None:
+            count += 1
+    return count
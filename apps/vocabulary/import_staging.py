@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+admin导入暂存
+
+上传的CSV只解析一次，写入 vocabulary_import_staging_rows，之后：
+- 预览（文件内重复、书中已存在、新单词、差异表）直接在暂存表上用集合查询计算
+- 确认导入由后台导入任务执行（import_jobs.create_staged_import_job），直接从暂存表用固定数量的
+  INSERT ... SELECT 写入，不把行读回Python；word_order、释义去重、词形和释义词条与CSV导入规则一致
+session 中只保存导入令牌，不再保存整个CSV内容
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .importing import DEFAULT_CHUNK_SIZE, ImportSummary, RowError, prepare_row
+from .meaning_sets import normalize_meanings
+from .meaning_terms import sync_meaning_terms
+from .models import BookWord, ImportStagingBatch, ImportStagingRow, VocabularyBook, WordBasic
+from .ordering import ORDER_GAP
+from .word_forms import bump_book_version, sync_word_forms
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 预览差异表最多显示的行数（统计数字不受限制）
+PREVIEW_MAX_DIFF_ROWS = 300
+
+# 警告信息中列出的单词数量
+WARNING_WORD_LIMIT = 50
+
+# 未确认的暂存批次保留时间
+STAGING_TTL = timedelta(days=1)
+
+
+def _meanings_text(meanings):
+    """meanings JSON 显示为 "n. 释义; v. 释义" """
+    return '; '.join(
+        f"{meaning.get('pos', '')} {meaning.get('meaning', '')}".strip()
+        for meaning in (meanings or []) if isinstance(meaning, dict)
+    )
+
+
+def purge_stale_batches():
+    """删除过期未确认的暂存批次（等待后台导入任务执行的批次保留）"""
+    deleted, _ = ImportStagingBatch.objects.filter(created_at__lt=timezone.now() - STAGING_TTL).exclude(
+        import_jobs__status__in=['pending', 'running']
+    ).delete()
+    return deleted
+
+
+def stage_rows(book, rows, user=None, filename='', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    解析CSV行并写入暂存表，同时计算预览
+
+    Args:
+        rows: CSV行（DictReader或dict列表）
+
+    Returns:
+        ImportStagingBatch
+    """
+    purge_stale_batches()
+    batch = ImportStagingBatch.objects.create(
+        vocabulary_book=book,
+        created_by=user if user is not None and user.is_authenticated else None,
+        original_filename=(filename or '')[:255],
+    )
+
+    summary = ImportSummary()
+    pending = []
+    for row_number, row in enumerate(rows, start=1):
+        summary.total_rows += 1
+        try:
+            data = prepare_row(row)
+        except RowError as e:
+            summary.add_error(row_number, str(e))
+            continue
+        if data is None:
+            summary.skipped += 1
+            continue
+        pending.append(ImportStagingRow(
+            batch=batch,
+            row_number=row_number,
+            word=data['word'],
+            phonetic_symbol=data['phonetic_symbol'][:100],
+            uk_pronunciation=data['uk_pronunciation'][:200],
+            us_pronunciation=data['us_pronunciation'][:200],
+            # 与 meaning_sets 相同的规范化，写入时在数据库中按 md5(jsonb) 取释义集
+            meanings=normalize_meanings(data['meanings']),
+            example_sentence=data['example_sentence'],
+            word_order=data['word_order'],
+        ))
+        if len(pending) >= chunk_size:
+            ImportStagingRow.objects.bulk_create(pending)
+            batch.staged_rows += len(pending)
+            pending = []
+    if pending:
+        ImportStagingRow.objects.bulk_create(pending)
+        batch.staged_rows += len(pending)
+
+    batch.total_rows = summary.total_rows
+    batch.error_count = summary.error_count
+    batch.errors = summary.errors
+    batch.preview = build_preview(batch)
+    batch.save(update_fields=['total_rows', 'staged_rows', 'error_count', 'errors', 'preview'])
+    return batch
+
+
+def build_preview(batch, max_diff_rows=PREVIEW_MAX_DIFF_ROWS):
+    """
+    在暂存表上计算导入预览，查询数量固定，与行数无关
+
+    Returns:
+        dict: 可直接渲染的预览结构
+    """
+    staged = ImportStagingRow.objects.filter(batch=batch)
+    # 覆盖词书合并基础词书判断是否已在书中
+    in_book = BookWord.objects.for_book(batch.vocabulary_book).filter(word_basic__word=OuterRef('word'))
+    has_basic = WordBasic.objects.filter(word=OuterRef('word'))
+
+    duplicates = dict(
+        staged.order_by().values('word').annotate(count=Count('id')).filter(count__gt=1).values_list('word', 'count')
+    )
+    existing_words = list(
+        staged.filter(Exists(in_book)).order_by('word').values_list('word', flat=True).distinct()
+    )
+    distinct_words = staged.aggregate(count=Count('word', distinct=True))['count']
+    new_word_basic_count = staged.exclude(Exists(has_basic)).aggregate(count=Count('word', distinct=True))['count']
+
+    # 差异表：书中已存在或文件内重复的行优先显示
+    duplicate_count = staged.filter(word=OuterRef('word')).order_by().values('word').annotate(
+        count=Count('id')
+    ).values('count')
+    current_meanings = in_book.order_by('word_order', 'id').annotate(
+        effective=Coalesce('custom_meanings', 'meaning_set__meanings')
+    ).values('effective')[:1]
+    diff_queryset = staged.annotate(
+        in_book=Exists(in_book),
+        has_basic=Exists(has_basic),
+        duplicate_count=Subquery(duplicate_count, output_field=IntegerField()),
+        current_meanings=Subquery(current_meanings),
+    ).annotate(
+        priority=Case(
+            When(Q(in_book=True) | Q(duplicate_count__gt=1), then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('priority', 'row_number')
+
+    diff_rows = [
+        {
+            'row': error['row'],
+            'word': '',
+            'status': 'error',
+            'duplicate_count': 0,
+            'current': '',
+            'incoming': '',
+            'error': error['error'],
+        }
+        for error in batch.errors
+    ][:max_diff_rows]
+    limit = max_diff_rows - len(diff_rows)
+    for row in diff_queryset[:limit] if limit > 0 else []:
+        if row.in_book:
+            status = 'existing'
+        elif row.has_basic:
+            status = 'new_in_book'
+        else:
+            status = 'new_word'
+        diff_rows.append({
+            'row': row.row_number,
+            'word': row.word,
+            'status': status,
+            'duplicate_count': row.duplicate_count if row.duplicate_count > 1 else 0,
+            'current': _meanings_text(row.current_meanings),
+            'incoming': _meanings_text(row.meanings),
+            'error': '',
+        })
+
+    return {
+        'total_rows': batch.total_rows,
+        'staged_rows': batch.staged_rows,
+        'duplicates': dict(list(duplicates.items())[:WARNING_WORD_LIMIT]),
+        'duplicate_count': len(duplicates),
+        'existing_words': existing_words[:WARNING_WORD_LIMIT],
+        'existing_count': len(existing_words),
+        'new_in_book_count': distinct_words - len(existing_words),
+        'new_word_basic_count': new_word_basic_count,
+        'error_count': batch.error_count,
+        'diff_rows': diff_rows,
+        'diff_truncated': batch.staged_rows + len(batch.errors) > len(diff_rows),
+    }
+
+
+def has_warnings(preview):
+    """文件内有重复或书中已存在时需要用户确认"""
+    return bool(preview.get('duplicate_count') or preview.get('existing_count'))
+
+
+def duplicate_warning(preview):
+    duplicates = preview.get('duplicates') or {}
+    if not duplicates:
+        return None
+    words = ', '.join(f"{word}(×{count})" for word, count in duplicates.items())
+    total = preview.get('duplicate_count', 0)
+    more = f" 等{total}个" if total > len(duplicates) else ''
+    return f"CSV文件中存在重复单词: {words}{more}。这些单词将作为独立记录导入。"
+
+
+def existing_warning(preview):
+    existing_words = preview.get('existing_words') or []
+    if not existing_words:
+        return None
+    words = ', '.join(existing_words)
+    total = preview.get('existing_count', 0)
+    more = f" 等{total}个" if total > len(existing_words) else ''
+    return f"以下单词已存在于词汇书中: {words}{more}。这些单词将作为新记录导入。"
+
+
+_INSERT_WORD_BASICS_SQL = """
+    INSERT INTO word_basics (word, phonetic_symbol, uk_pronunciation, us_pronunciation, created_at, updated_at)
+    SELECT DISTINCT ON (s.word) s.word, s.phonetic_symbol, s.uk_pronunciation, s.us_pronunciation, %(now)s, %(now)s
+    FROM vocabulary_import_staging_rows s
+    WHERE s.batch_id = %(batch_id)s
+    ORDER BY s.word, s.row_number
+    ON CONFLICT (word) DO NOTHING
+    RETURNING id
+"""
+
+# 与 meaning_sets 模块的哈希一致：md5(jsonb 文本)，空释义不建行
+_INSERT_MEANING_SETS_SQL = """
+    INSERT INTO meaning_sets (content_hash, meanings, created_at)
+    SELECT DISTINCT ON (md5(s.meanings::text)) md5(s.meanings::text), s.meanings, %(now)s
+    FROM vocabulary_import_staging_rows s
+    WHERE s.batch_id = %(batch_id)s AND s.meanings <> '[]'::jsonb
+    ORDER BY md5(s.meanings::text)
+    ON CONFLICT (content_hash) DO NOTHING
+"""
+
+# 每一行都新建；CSV中的word_order按 ORDER_GAP 放大（与 BookWordImporter 一致），
+# 未指定的行按CSV顺序排在书中现有单词和文件中指定的顺序之后
+_INSERT_BOOK_WORDS_SQL = """
+    INSERT INTO book_words (vocabulary_book_id, word_basic_id, word_order, meaning_set_id, example_sentence,
+                            is_removed, created_at, updated_at)
+    SELECT %(book_id)s, wb.id,
+           COALESCE(
+               s.word_order * %(gap)s,
+               GREATEST(
+                   %(max_order)s,
+                   (SELECT COALESCE(MAX(word_order), 0) FROM vocabulary_import_staging_rows
+                    WHERE batch_id = %(batch_id)s) * %(gap)s
+               ) + ROW_NUMBER() OVER (PARTITION BY s.word_order IS NULL ORDER BY s.row_number) * %(gap)s
+           ),
+           ms.id, s.example_sentence, FALSE, %(now)s, %(now)s
+    FROM vocabulary_import_staging_rows s
+    JOIN word_basics wb ON wb.word = s.word
+    LEFT JOIN meaning_sets ms ON ms.content_hash = md5(s.meanings::text) AND s.meanings <> '[]'::jsonb
+    WHERE s.batch_id = %(batch_id)s
+    ORDER BY s.row_number
+    RETURNING id
+"""
+
+
+def apply_batch(batch, on_applied=None):
+    """
+    将暂存行写入词汇书：每一行都作为独立记录新建
+
+    在一个事务中执行固定数量的 INSERT ... SELECT，不把暂存行读回Python；
+    写入完成后删除暂存批次
+
+    Args:
+        on_applied: on_applied(total_rows, summary) 在写入事务内调用（后台导入任务同事务记录结果）
+
+    Returns:
+        ImportSummary
+    """
+    summary = ImportSummary()
+    summary.total_rows = batch.total_rows
+    summary.error_count = batch.error_count
+    summary.errors = batch.errors
+    summary.skipped = batch.total_rows - batch.staged_rows - batch.error_count
+
+    with transaction.atomic():
+        # 锁定词汇书，避免并发导入计算出相同的word_order
+        book = VocabularyBook.objects.select_for_update().get(pk=batch.vocabulary_book_id)
+        params = {
+            'batch_id': batch.id,
+            'book_id': book.id,
+            'now': timezone.now(),
+            'gap': ORDER_GAP,
+            # 覆盖词书的新行排在合并后的最后
+            'max_order': BookWord.objects.for_book(book).aggregate(
+                models.Max('word_order')
+            ).get('word_order__max') or 0,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(_INSERT_WORD_BASICS_SQL, params)
+            new_word_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(_INSERT_MEANING_SETS_SQL, params)
+            cursor.execute(_INSERT_BOOK_WORDS_SQL, params)
+            created_ids = [row[0] for row in cursor.fetchall()]
+        summary.new_word_basics = len(new_word_ids)
+        summary.created = len(created_ids)
+
+        sync_word_forms(new_word_ids)
+        sync_meaning_terms(created_ids)
+        if created_ids:
+            bump_book_version(book.id)
+            VocabularyBook.objects.filter(pk=book.pk).update(
+                word_count=F('word_count') + len(created_ids), updated_at=timezone.now()
+            )
+        summary.word_count = VocabularyBook.objects.values_list('word_count', flat=True).get(pk=book.pk)
+        batch.delete()
+        if on_applied is not None:
+            on_applied(batch.total_rows, summary)
+
+    logger.info(f"暂存导入完成: 词汇书 {book.id}, 新建 {summary.created} 条, 新单词 {summary.new_word_basics} 个")
+    return summary
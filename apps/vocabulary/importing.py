@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+词汇批量导入引擎
+
+ImportWordsView、后台导入任务和 admin 导入共用：
+- CSV 按流读取，不整体载入内存
+- 每个分块内：WordBasic 用 INSERT ... ON CONFLICT DO NOTHING 批量写入，
+  再一次查询取回ID；BookWord 一次查询已有记录，然后 bulk_update / bulk_create
+- 返回导入汇总，而不是逐个单词回显
+"""
+
+import codecs
+import csv
+import io
+import logging
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .meaning_sets import intern_meanings_many, load_meanings
+from .meaning_terms import sync_meaning_terms
+from .models import BookWord, WordBasic
+from .ordering import ORDER_GAP, next_order
+from .overlays import move_plan_stages
+from .word_forms import bump_book_version, sync_word_forms
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 尝试的编码列表（utf-8-sig 放在最前，避免BOM混入表头）
+CSV_ENCODINGS = ['utf-8-sig', 'gbk', 'gb2312', 'latin1']
+
+# 每个事务处理的行数
+DEFAULT_CHUNK_SIZE = 1000
+
+# 汇总中最多保留的错误条数
+MAX_REPORTED_ERRORS = 100
+
+# CSV中word_order的上限：按 ORDER_GAP 放大后不能超出整数列范围
+MAX_CSV_WORD_ORDER = (2 ** 31 - 1) // ORDER_GAP
+
+
+class ImportFormatError(Exception):
+    """导入文件无法解析（编码、表头等问题）"""
+
+
+class RowError(Exception):
+    """单行数据无效，该行会被跳过并记录到汇总中"""
+
+
+def detect_encoding(sample):
+    """
+    根据文件开头的样本判断编码，样本末尾被截断的多字节字符不视为错误
+
+    Raises:
+        ImportFormatError: 所有编码都无法解析
+    """
+    for encoding in CSV_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ImportFormatError("无法解析文件编码，请确保文件是UTF-8、GBK或GB2312编码")
+
+
+def open_csv_reader(fileobj, required_columns=('word',)):
+    """
+    以流的方式打开上传的CSV文件
+
+    Args:
+        fileobj: 二进制文件对象（UploadedFile 或普通文件）
+        required_columns: 必须包含的列
+
+    Returns:
+        csv.DictReader
+    """
+    raw = getattr(fileobj, 'file', fileobj)
+    raw.seek(0)
+    sample = raw.read(64 * 1024)
+    raw.seek(0)
+    if not sample.strip():
+        raise ImportFormatError("文件为空")
+
+    text_stream = io.TextIOWrapper(raw, encoding=detect_encoding(sample), newline='')
+    reader = csv_dict_reader(text_stream)
+    validate_columns(reader.fieldnames, required_columns)
+    return reader
+
+
+def csv_dict_reader(text_stream):
+    """统一的CSV解析选项"""
+    return csv.DictReader(
+        text_stream,
+        delimiter=',',
+        quotechar='"',
+        skipinitialspace=True,
+        quoting=csv.QUOTE_MINIMAL
+    )
+
+
+def validate_columns(fieldnames, required_columns=('word',)):
+    """校验CSV表头"""
+    fieldnames = [name.strip() for name in (fieldnames or [])]
+    missing = [column for column in required_columns if column not in fieldnames]
+    if missing:
+        columns = '、'.join(f"'{column}'" for column in required_columns)
+        raise ImportFormatError(f"CSV文件格式错误。必须包含{columns}列")
+
+
+def _split_complex_meanings(chinese_meaning):
+    """
+    解析带方括号复合释义的格式: "普通释义;[复合释义1,复合释义2];普通释义"
+    方括号内的逗号不作为分隔符
+    """
+    raw_meanings = []
+    in_brackets = False
+    temp_meaning = ""
+    for char in chinese_meaning:
+        if char == '[':
+            in_brackets = True
+            temp_meaning += char
+        elif char == ']':
+            in_brackets = False
+            temp_meaning += char
+        elif char == ';' and not in_brackets:
+            raw_meanings.append(temp_meaning.strip())
+            temp_meaning = ""
+        else:
+            temp_meaning += char
+    if temp_meaning:
+        raw_meanings.append(temp_meaning.strip())
+    return raw_meanings
+
+
+def parse_meanings(part_of_speech, chinese_meaning):
+    """
+    将CSV中的词性和释义转换为meanings JSON结构 [{"pos": "...", "meaning": "..."}]
+
+    规则与admin导入页面的说明一致：
+    1. 词性数量和释义数量相等时一一对应
+    2. 多个词性但只有一个释义时，释义应用到所有词性
+    3. 只有一个词性但有多个释义时，释义合并
+    4. "[释义1,释义2]" 为复合释义，对应同一个词性
+
+    Raises:
+        RowError: 复合释义数量与词性数量不匹配
+    """
+    part_of_speech = (part_of_speech or '').strip()
+    chinese_meaning = (chinese_meaning or '').strip()
+    if not chinese_meaning:
+        return []
+    if not part_of_speech:
+        return [{'pos': '', 'meaning': chinese_meaning}]
+
+    pos_list = [pos.strip() for pos in part_of_speech.split(';') if pos.strip()]
+
+    if '[' in chinese_meaning and ']' in chinese_meaning:
+        raw_meanings = _split_complex_meanings(chinese_meaning)
+        if len(raw_meanings) != len(pos_list):
+            raise RowError(f"词性数量({len(pos_list)})与解析后的释义数量({len(raw_meanings)})不匹配")
+        meanings = []
+        for pos, raw_meaning in zip(pos_list, raw_meanings):
+            if raw_meaning.startswith('[') and raw_meaning.endswith(']'):
+                # 提取方括号中的多个释义
+                raw_meaning = '; '.join(m.strip() for m in raw_meaning[1:-1].split(','))
+            meanings.append({'pos': pos, 'meaning': raw_meaning})
+        return meanings
+
+    meaning_list = [mean.strip() for mean in chinese_meaning.split(';') if mean.strip()]
+    if len(pos_list) == len(meaning_list):
+        return [{'pos': pos, 'meaning': meaning} for pos, meaning in zip(pos_list, meaning_list)]
+    if len(pos_list) > 1 and len(meaning_list) == 1:
+        return [{'pos': pos, 'meaning': meaning_list[0]} for pos in pos_list]
+    if len(pos_list) == 1 and meaning_list:
+        return [{'pos': pos_list[0], 'meaning': '; '.join(meaning_list)}]
+    return [{'pos': part_of_speech, 'meaning': chinese_meaning}]
+
+
+def merge_meanings(existing, new_meanings):
+    """按词性合并释义：相同词性覆盖释义，新词性追加"""
+    merged = [dict(meaning) for meaning in (existing or []) if isinstance(meaning, dict)]
+    for new_meaning in new_meanings:
+        for meaning in merged:
+            if meaning.get('pos') == new_meaning['pos']:
+                meaning['meaning'] = new_meaning['meaning']
+                break
+        else:
+            merged.append(dict(new_meaning))
+    return merged
+
+
+def prepare_row(row, require_meaning=False):
+    """
+    清洗一行CSV数据
+
+    Returns:
+        dict或None（空行返回None）
+
+    Raises:
+        RowError: 数据无效
+    """
+    row = {(key or '').strip(): (value or '').strip() if isinstance(value, str) else value
+           for key, value in row.items()}
+    word = row.get('word') or ''
+    if not word:
+        return None
+    if len(word) > 100:
+        raise RowError(f"单词 '{word[:20]}...' 超过100个字符")
+    if require_meaning and not row.get('chinese_meaning'):
+        return None
+
+    word_order = row.get('word_order') or ''
+    if word_order:
+        try:
+            word_order = int(word_order)
+        except ValueError:
+            raise RowError(f"word_order '{word_order}' 不是整数")
+        if abs(word_order) > MAX_CSV_WORD_ORDER:
+            raise RowError(f"word_order '{word_order}' 超出范围（最大 {MAX_CSV_WORD_ORDER}）")
+    else:
+        word_order = None
+
+    return {
+        'word': word,
+        'phonetic_symbol': row.get('phonetic_symbol') or '',
+        'uk_pronunciation': row.get('uk_pronunciation') or '',
+        'us_pronunciation': row.get('us_pronunciation') or '',
+        'meanings': parse_meanings(row.get('part_of_speech'), row.get('chinese_meaning')),
+        'example_sentence': row.get('example_sentence') or '',
+        'word_order': word_order,
+    }
+
+
+class ImportSummary:
+    """导入结果汇总"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+        self.new_word_basics = 0
+        self.word_count = None
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def as_dict(self):
+        return {
+            'total_rows': self.total_rows,
+            'imported': self.imported,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'new_word_basics': self.new_word_basics,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'word_count': self.word_count,
+        }
+
+
+class BookWordImporter:
+    """
+    将CSV行批量导入到指定词汇书
+
+    mode:
+        'upsert' - 书中已有该单词时更新记录（ImportWordsView、后台导入任务）
+        'append' - 总是新建记录，即使书中已存在该单词（admin暂存导入确认）
+    """
+
+    def __init__(self, book, mode='upsert', merge_existing_meanings=False,
+                 require_meaning=False, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+        if mode not in ('upsert', 'append'):
+            raise ValueError(f"未知的导入模式: {mode}")
+        self.book = book
+        self.mode = mode
+        self.merge_existing_meanings = merge_existing_meanings
+        self.require_meaning = require_meaning
+        self.chunk_size = chunk_size
+        # on_chunk(last_row_number, summary) 在分块事务内调用，用于同事务记录断点
+        self.on_chunk = on_chunk
+        self.summary = ImportSummary()
+        self._max_order = None
+
+    def run(self, rows, update_word_count=True, start_row=0):
+        """
+        导入全部行，返回ImportSummary
+
+        Args:
+            start_row: rows之前已处理的行数（断点续传时行号从这里继续）
+        """
+        chunk = []
+        for row_number, row in enumerate(rows, start=start_row + 1):
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+
+        if update_word_count:
+            self.update_word_count()
+        return self.summary
+
+    def update_word_count(self):
+        """导入结束后刷新词汇书的词汇量"""
+        self.book.word_count = BookWord.objects.for_book(self.book).count()
+        self.book.save(update_fields=['word_count', 'updated_at'])
+        self.summary.word_count = self.book.word_count
+
+    def import_chunk(self, numbered_rows):
+        """
+        在一个事务中导入一个分块
+
+        Args:
+            numbered_rows: [(行号, 原始行dict), ...]
+        """
+        prepared = []
+        for row_number, row in numbered_rows:
+            self.summary.total_rows += 1
+            try:
+                data = prepare_row(row, require_meaning=self.require_meaning)
+            except RowError as e:
+                self.summary.add_error(row_number, str(e))
+                continue
+            if data is None:
+                self.summary.skipped += 1
+                continue
+            prepared.append(data)
+        self.import_prepared(prepared, numbered_rows[-1][0])
+
+    def import_prepared(self, prepared, last_row_number=None):
+        """
+        在一个事务中写入已清洗的行（prepare_row 的结果）
+
+        admin 暂存导入确认时直接传入暂存行，与CSV导入共用同一套写入规则
+        """
+        if not prepared and self.on_chunk is None:
+            return
+
+        with transaction.atomic():
+            if prepared:
+                if self._max_order is None:
+                    # 覆盖词书的新行排在合并后的最后
+                    self._max_order = BookWord.objects.for_book(self.book).aggregate(
+                        models.Max('word_order')
+                    ).get('word_order__max') or 0
+
+                word_ids = self._upsert_word_basics(prepared)
+                sync_word_forms(word_ids.values())
+                if self.mode == 'append':
+                    book_word_ids = self._append_book_words(prepared, word_ids)
+                else:
+                    book_word_ids = self._upsert_book_words(prepared, word_ids)
+                sync_meaning_terms(book_word_ids)
+                bump_book_version(self.book.id)
+
+            if self.on_chunk is not None:
+                self.on_chunk(last_row_number, self.summary)
+
+    def _next_order(self, data):
+        """
+        CSV中的word_order（1, 2, 3...）按 ORDER_GAP 放大，保留插入/移动所需的间隔；
+        未指定时在当前最大值后按 ORDER_GAP 间隔递增
+        """
+        if data['word_order'] is not None:
+            order = data['word_order'] * ORDER_GAP
+            self._max_order = max(self._max_order, order)
+            return order
+        self._max_order = next_order(self._max_order)
+        return self._max_order
+
+    def _upsert_word_basics(self, prepared):
+        """INSERT ... ON CONFLICT (word) DO NOTHING，再一次查询取回所有ID"""
+        first_rows = {}
+        for data in prepared:
+            first_rows.setdefault(data['word'], data)
+
+        words = list(first_rows)
+        existing_count = WordBasic.objects.filter(word__in=words).count()
+        WordBasic.objects.bulk_create(
+            [
+                WordBasic(
+                    word=word,
+                    phonetic_symbol=data['phonetic_symbol'],
+                    uk_pronunciation=data['uk_pronunciation'],
+                    us_pronunciation=data['us_pronunciation'],
+                )
+                for word, data in first_rows.items()
+            ],
+            ignore_conflicts=True,
+        )
+        word_ids = dict(WordBasic.objects.filter(word__in=words).values_list('word', 'id'))
+        self.summary.new_word_basics += len(word_ids) - existing_count
+        return word_ids
+
+    def _append_book_words(self, prepared, word_ids):
+        """追加新行，返回新建的 BookWord ID"""
+        meaning_set_ids = intern_meanings_many([data['meanings'] for data in prepared])
+        created = BookWord.objects.bulk_create([
+            BookWord(
+                vocabulary_book=self.book,
+                word_basic_id=word_ids[data['word']],
+                word_order=self._next_order(data),
+                meaning_set_id=meaning_set_id,
+                example_sentence=data['example_sentence'],
+            )
+            for data, meaning_set_id in zip(prepared, meaning_set_ids)
+        ])
+        self.summary.created += len(prepared)
+        return [book_word.pk for book_word in created]
+
+    def _override_row(self, base_word):
+        """覆盖词书中基础词书的行：与 overlays.editable_word 相同，复制为 base_word 指向基础行的覆盖行"""
+        return BookWord(
+            vocabulary_book=self.book,
+            base_word_id=base_word.id,
+            word_basic_id=base_word.word_basic_id,
+            word_order=base_word.word_order,
+            meaning_set_id=base_word.meaning_set_id,
+            example_sentence=base_word.example_sentence,
+            custom_word=base_word.custom_word,
+            custom_phonetic=base_word.custom_phonetic,
+            custom_meanings=base_word.custom_meanings,
+        )
+
+    def _upsert_book_words(self, prepared, word_ids):
+        """
+        按单词更新已有行或新建，返回涉及的 BookWord ID
+
+        已有行按合并后的词书查找（BookWord.objects.for_book）：覆盖词书中继承自基础词书的单词
+        写时复制为覆盖行后更新，基础词书不变；覆盖行的顺序跟随基础行，不按文件重排
+        """
+        existing = {}
+        for book_word in BookWord.objects.for_book(self.book).filter(
+            word_basic_id__in=set(word_ids.values())
+        ).order_by('id'):
+            existing.setdefault(book_word.word_basic_id, book_word)
+
+        if self.merge_existing_meanings:
+            # 一次查询预先取出已有行的释义
+            load_meanings(book_word.meaning_set_id for book_word in existing.values())
+
+        now = timezone.now()
+        to_update = {}
+        to_create = {}
+        overridden = {}
+        meanings = {}
+        for data in prepared:
+            word_basic_id = word_ids[data['word']]
+            book_word = to_create.get(word_basic_id) or existing.get(word_basic_id)
+            if book_word is None:
+                book_word = BookWord(vocabulary_book=self.book, word_basic_id=word_basic_id)
+                to_create[word_basic_id] = book_word
+            elif book_word.vocabulary_book_id != self.book.id:
+                overridden[word_basic_id] = book_word.id
+                book_word = self._override_row(book_word)
+                to_create[word_basic_id] = book_word
+            elif book_word.pk is not None:
+                to_update[word_basic_id] = book_word
+
+            if self.merge_existing_meanings:
+                current = meanings[word_basic_id] if word_basic_id in meanings else book_word.meanings
+                meanings[word_basic_id] = merge_meanings(current, data['meanings'])
+            else:
+                meanings[word_basic_id] = data['meanings']
+            if book_word.base_word_id is None:
+                book_word.word_order = self._next_order(data)
+            book_word.example_sentence = data['example_sentence']
+            book_word.updated_at = now
+
+        # 释义按内容去重，整个分块一次取得 meaning_set_id
+        for word_basic_id, meaning_set_id in zip(meanings, intern_meanings_many(meanings.values())):
+            (to_update.get(word_basic_id) or to_create[word_basic_id]).meaning_set_id = meaning_set_id
+
+        if to_update:
+            BookWord.objects.bulk_update(
+                list(to_update.values()),
+                ['word_order', 'meaning_set', 'example_sentence', 'updated_at'],
+                batch_size=500,
+            )
+        if to_create:
+            BookWord.objects.bulk_create(list(to_create.values()))
+        if overridden:
+            # 覆盖行替换了基础行，学习进度跟到覆盖行上
+            move_plan_stages(self.book, {
+                base_word_id: to_create[word_basic_id].pk for word_basic_id, base_word_id in overridden.items()
+            })
+        self.summary.updated += len(to_update) + len(overridden)
+        self.summary.created += len(to_create) - len(overridden)
+        return [book_word.pk for book_word in to_update.values()] + [
+            book_word.pk for book_word in to_create.values()
+        ]
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+学生已认识单词：批量标记/取消标记与增量同步
+
+- 批量写入用一条 CTE 语句完成：INSERT ... SELECT ... ON CONFLICT DO NOTHING / DELETE ... USING，
+  选择范围可以是ID列表、词汇书中的位置区间或学习阶段（WordSelection），
+  实际变化的行同时写入 vocabulary_known_word_changes
+- 同步接口返回有序ID的差分编码数组和版本令牌，客户端带令牌时只返回之后的新增/移除
+"""
+
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .models import StudentKnownWord, StudentKnownWordChange
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 同一学生的批量写入串行执行，保证变更日志ID按提交顺序递增
+_LOCK_NAMESPACE = 3401
+
+
+def _lock_student(cursor, student_id):
+    cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [_LOCK_NAMESPACE, student_id])
+
+
+class WordSelection:
+    """
+    批量操作选中的单词（WordBasic ID集合），表示为一段返回 word_id 列的SQL
+
+    使用类方法构造：by_ids / by_book_range / by_stage，intersection 取多个选择的交集
+    """
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = list(params)
+
+    @classmethod
+    def by_ids(cls, word_ids):
+        """单词ID列表，不存在的ID会被忽略"""
+        word_ids = sorted({int(word_id) for word_id in word_ids})
+        return cls("SELECT wb.id AS word_id FROM word_basics wb WHERE wb.id = ANY(%s)", [word_ids])
+
+    @classmethod
+    def by_book_range(cls, book_id, order_from=None, order_to=None):
+        """
+        词汇书中第 order_from 到第 order_to 个单词（按 (word_order, id) 排序的位置，从1开始，两端可省略）；
+        覆盖词书与基础词书合并（同 BookWord.objects.for_book）
+
+        word_order 是带间隔的顺序值，不能直接作为范围，按 ROW_NUMBER 计算位置
+        """
+        book_rows = (
+            "FROM book_words bw "
+            "WHERE ("
+            "(bw.vocabulary_book_id = %s AND NOT bw.is_removed) OR "
+            "(bw.vocabulary_book_id = (SELECT base_book_id FROM vocabulary_books WHERE id = %s) "
+            "AND NOT EXISTS (SELECT 1 FROM book_words o WHERE o.vocabulary_book_id = %s AND o.base_word_id = bw.id)))"
+        )
+        params = [book_id, book_id, book_id]
+        if order_from is None and order_to is None:
+            return cls("SELECT DISTINCT bw.word_basic_id AS word_id " + book_rows, params)
+
+        sql = (
+            "SELECT DISTINCT ranked.word_id FROM ("
+            "SELECT bw.word_basic_id AS word_id, ROW_NUMBER() OVER (ORDER BY bw.word_order, bw.id) AS position "
+            + book_rows + ") ranked WHERE TRUE"
+        )
+        if order_from is not None:
+            sql += " AND ranked.position >= %s"
+            params.append(order_from)
+        if order_to is not None:
+            sql += " AND ranked.position <= %s"
+            params.append(order_to)
+        return cls(sql, params)
+
+    @classmethod
+    def by_stage(cls, student_id, stages, plan_id=None, book_id=None):
+        """学生学习计划中处于指定学习阶段的单词，可限定学习计划或词汇书"""
+        sql = (
+            "SELECT DISTINCT bw.word_basic_id AS word_id "
+            "FROM word_learning_stages ws "
+            "JOIN learning_plans lp ON lp.id = ws.learning_plan_id "
+            "JOIN book_words bw ON bw.id = ws.book_word_id "
+            "WHERE lp.student_id = %s AND ws.current_stage = ANY(%s)"
+        )
+        params = [student_id, sorted({int(stage) for stage in stages})]
+        if plan_id is not None:
+            sql += " AND lp.id = %s"
+            params.append(plan_id)
+        if book_id is not None:
+            sql += " AND lp.vocabulary_book_id = %s"
+            params.append(book_id)
+        return cls(sql, params)
+
+    @classmethod
+    def intersection(cls, first, *others):
+        """同时出现在所有选择中的单词"""
+        conditions = [f"s.word_id IN ({other.sql})" for other in others]
+        sql = f"SELECT s.word_id FROM ({first.sql}) s"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        params = list(first.params)
+        for other in others:
+            params += other.params
+        return cls(sql, params)
+
+
+def bulk_mark(student_id, selection):
+    """
+    将选中的单词全部标记为已认识：一条 INSERT ... SELECT ... ON CONFLICT DO NOTHING
+
+    Returns:
+        dict: {"matched": 选中的单词数, "changed": 新标记的单词数}
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_student(cursor, student_id)
+        cursor.execute(
+            f"""
+            WITH selected AS ({selection.sql}),
+            inserted AS (
+                INSERT INTO vocabulary_studentknownword (student_id, word_id, marked_at)
+                SELECT %s, word_id, now() FROM selected
+                ON CONFLICT (student_id, word_id) DO NOTHING
+                RETURNING word_id
+            ),
+            logged AS (
+                INSERT INTO vocabulary_known_word_changes (student_id, word_id, op, created_at)
+                SELECT %s, word_id, 'add', now() FROM inserted
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM selected), (SELECT count(*) FROM logged)
+            """,
+            selection.params + [student_id, student_id]
+        )
+        matched, changed = cursor.fetchone()
+    return {'matched': matched, 'changed': changed}
+
+
+def bulk_unmark(student_id, selection):
+    """
+    取消标记选中的单词：一条 DELETE ... USING
+
+    Returns:
+        dict: {"matched": 选中的单词数, "changed": 实际取消标记的单词数}
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_student(cursor, student_id)
+        cursor.execute(
+            f"""
+            WITH selected AS ({selection.sql}),
+            deleted AS (
+                DELETE FROM vocabulary_studentknownword k
+                USING selected
+                WHERE k.student_id = %s AND k.word_id = selected.word_id
+                RETURNING k.word_id
+            ),
+            logged AS (
+                INSERT INTO vocabulary_known_word_changes (student_id, word_id, op, created_at)
+                SELECT %s, word_id, 'remove', now() FROM deleted
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM selected), (SELECT count(*) FROM logged)
+            """,
+            selection.params + [student_id, student_id]
+        )
+        matched, changed = cursor.fetchone()
+    return {'matched': matched, 'changed': changed}
+
+
+def record_change(student_id, word_id, op):
+    """
+    单条标记/取消标记（ORM保存、admin）写入变更日志，与批量写入持有同一个学生锁，
+    保证变更日志ID按提交顺序递增
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_student(cursor, student_id)
+        StudentKnownWordChange.objects.create(student_id=student_id, word_id=word_id, op=op)
+
+
+def mark_known(student_id, word_ids):
+    """
+    将单词ID列表标记为已认识，不存在的单词ID会被忽略
+
+    Returns:
+        (新标记的单词ID列表（已标记过的不计入）, 不存在的单词ID列表)
+    """
+    selection = WordSelection.by_ids(word_ids)
+    if not selection.params[0]:
+        return [], []
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_student(cursor, student_id)
+        cursor.execute(selection.sql, selection.params)
+        missing = sorted(set(selection.params[0]) - {row[0] for row in cursor.fetchall()})
+        cursor.execute(
+            f"""
+            WITH inserted AS (
+                INSERT INTO vocabulary_studentknownword (student_id, word_id, marked_at)
+                SELECT %s, word_id, now() FROM ({selection.sql}) selected
+                ON CONFLICT (student_id, word_id) DO NOTHING
+                RETURNING word_id
+            )
+            INSERT INTO vocabulary_known_word_changes (student_id, word_id, op, created_at)
+            SELECT %s, word_id, 'add', now() FROM inserted
+            RETURNING word_id
+            """,
+            [student_id] + selection.params + [student_id]
+        )
+        return [row[0] for row in cursor.fetchall()], missing
+
+
+def unmark_known(student_id, word_ids):
+    """
+    取消标记单词ID列表
+
+    Returns:
+        int: 实际取消标记的单词数
+    """
+    selection = WordSelection.by_ids(word_ids)
+    if not selection.params[0]:
+        return 0
+    return bulk_unmark(student_id, selection)['changed']
+
+
+def delta_encode(sorted_ids):
+    """[3, 5, 9] -> [3, 2, 4]"""
+    encoded = []
+    previous = 0
+    for value in sorted_ids:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def delta_decode(encoded):
+    """[3, 2, 4] -> [3, 5, 9]"""
+    ids = []
+    current = 0
+    for delta in encoded:
+        current += delta
+        ids.append(current)
+    return ids
+
+
+def current_version(student_id):
+    """学生已认识单词的当前版本号（最新变更日志ID）"""
+    return StudentKnownWordChange.objects.filter(student_id=student_id).aggregate(
+        version=Max('id')
+    )['version'] or 0
+
+
+def _parse_token(token):
+    try:
+        version = int(token)
+    except (TypeError, ValueError):
+        return None
+    return version if version >= 0 else None
+
+
+def known_ids_payload(student_id, since=None):
+    """
+    同步接口的返回内容
+
+    Args:
+        since: 客户端上次拿到的令牌；为空或无效时返回全量
+
+    Returns:
+        dict: 全量 {"full": true, "token", "ids"}
+              增量 {"full": false, "token", "added", "removed"}
+              ID数组均为升序差分编码
+    """
+    # 先取版本号再读数据：读到的数据可能比令牌新，下次增量会重复应用，但不会遗漏
+    version = current_version(student_id)
+    since_version = _parse_token(since)
+
+    if since_version is None or since_version > version:
+        ids = list(StudentKnownWord.objects.filter(student_id=student_id).order_by('word_id').values_list(
+            'word_id', flat=True
+        ))
+        return {
+            'full': True,
+            'token': str(version),
+            'count': len(ids),
+            'ids': delta_encode(ids),
+        }
+
+    # 同一单词多次变更只保留最后一次的结果
+    final_ops = {}
+    for word_id, op in StudentKnownWordChange.objects.filter(
+        student_id=student_id, id__gt=since_version, id__lte=version
+    ).order_by('id').values_list('word_id', 'op'):
+        final_ops[word_id] = op
+
+    added = sorted(word_id for word_id, op in final_ops.items() if op == 'add')
+    removed = sorted(word_id for word_id, op in final_ops.items() if op == 'remove')
+    return {
+        'full': False,
+        'token': str(version),
+        'added': delta_encode(added),
+        'removed': delta_encode(removed),
+    }
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.fuzzy_lookup import build_index
+
+
+class Command(BaseCommand):
+    help = '构建拼写纠错索引并报告规模、内存占用和查询耗时（索引只在当前进程内有效，用于评估）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('words', nargs='*', help='用于测试查询耗时的单词')
+
+    def handle(self, *args, **options):
+        index = build_index()
+        stats = index.stats()
+        self.stdout.write(
+            f"单词 {stats['words']}，条目 {stats['entries']}，"
+            f"内存约 {stats['memory_bytes'] / 1024 / 1024:.1f} MB，构建耗时 {stats['build_seconds']}s"
+        )
+        for word in options['words']:
+            started = time.perf_counter()
+            suggestions = index.lookup(word)
+            elapsed = (time.perf_counter() - started) * 1000
+            summary = ', '.join(f"{text}({distance})" for _, text, distance in suggestions)
+            self.stdout.write(f"{word}: {elapsed:.2f} ms -> {summary or '无'}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.meaning_terms import rebuild_meaning_terms
+
+
+class Command(BaseCommand):
+    help = '生成书籍单词的释义词条索引（中文反查），默认只补全还没有词条的单词'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重建全部单词的词条（修改拆分规则后使用）')
+
+    def handle(self, *args, **options):
+        processed = rebuild_meaning_terms(missing_only=not options['all'])
+        self.stdout.write(self.style.SUCCESS(f"已处理 {processed} 个书籍单词的释义词条"))
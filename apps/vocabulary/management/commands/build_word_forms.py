@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.word_forms import rebuild_word_forms
+
+
+class Command(BaseCommand):
+    help = '生成单词词形索引（小写原形与屈折形式），默认只补全还没有词形的单词'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重建全部单词的词形（修改生成规则后使用）')
+
+    def handle(self, *args, **options):
+        processed = rebuild_word_forms(missing_only=not options['all'])
+        self.stdout.write(self.style.SUCCESS(f"已生成 {processed} 个单词的词形"))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.vocabulary.import_staging import apply_batch
+from apps.vocabulary.models import VocabularyBook
+from apps.vocabulary.pdf_extraction import (
+    LAYOUTS, OCR_MODES, PdfExtractionError, extract_word_rows, stage_pdf
+)
+
+
+class Command(BaseCommand):
+    help = '从PDF/扫描件中提取单词表，写入导入暂存表（或直接导入），并报告每秒处理页数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='PDF文件路径')
+        parser.add_argument('--book', type=int, help='目标词汇书ID（不指定时只提取并报告）')
+        parser.add_argument('--layout', choices=LAYOUTS, default='auto', help='词汇表行或普通单词表')
+        parser.add_argument('--ocr', choices=OCR_MODES, default='auto')
+        parser.add_argument('--workers', type=int, help='提取进程数，默认 VOCABULARY_PDF_WORKERS 或CPU核数(最多4)')
+        parser.add_argument('--apply', action='store_true', help='暂存后直接导入到词汇书')
+
+    def handle(self, *args, **options):
+        kwargs = {'layout': options['layout'], 'workers': options['workers'], 'ocr': options['ocr']}
+        try:
+            if options['book'] is None:
+                rows, stats = extract_word_rows(options['path'], **kwargs)
+                batch = None
+            else:
+                book = VocabularyBook.objects.filter(pk=options['book']).first()
+                if book is None:
+                    raise CommandError(f"词汇书 {options['book']} 不存在")
+                batch, stats = stage_pdf(book, options['path'], **kwargs)
+        except PdfExtractionError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{stats['pages']} 页（文本 {stats['text_pages']}，OCR {stats['ocr_pages']}，空白 {stats['empty_pages']}），"
+            f"{stats['workers']} 个进程，耗时 {stats['seconds']}s，{stats['pages_per_second']} 页/秒"
+        )
+        self.stdout.write(
+            f"{stats['layout']} 模式：候选 {stats['candidates']}，单词 {stats['rows']}"
+            f"（匹配已有单词 {stats['matched_words']}），重复 {stats['duplicates']}，未匹配 {stats['unmatched_count']}"
+        )
+        if stats['unmatched']:
+            self.stdout.write(f"未匹配: {', '.join(stats['unmatched'])}")
+
+        if batch is None:
+            return
+        if options['apply']:
+            summary = apply_batch(batch)
+            self.stdout.write(self.style.SUCCESS(f"已导入 {summary.created} 个单词，当前词汇量 {summary.word_count}"))
+        else:
+            preview = batch.preview
+            self.stdout.write(
+                f"已暂存 {batch.staged_rows} 行：书中已存在 {preview['existing_count']}，"
+                f"新单词 {preview['new_word_basic_count']}，使用 --apply 导入"
+            )
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.vocabulary.preset_loading import PresetLoadError, load_preset_file, preset_files
+
+
+class Command(BaseCommand):
+    help = '用COPY快速加载系统预设词书（CSV/JSONL），文件内容未变化时跳过，可在部署时重复执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='预设文件或目录（目录中的 .csv/.jsonl 文件全部加载）')
+        parser.add_argument('--name', help='词书名（只加载一个文件时可用），默认为文件名')
+        parser.add_argument('--force', action='store_true', help='内容未变化也重新合并')
+        parser.add_argument('--prune', action='store_true', help='删除文件中已经没有的单词（保留有学习记录的行）')
+
+    def handle(self, *args, **options):
+        files = preset_files(options['paths'])
+        if not files:
+            raise CommandError("没有找到预设文件")
+        if options['name'] and len(files) > 1:
+            raise CommandError("--name 只能用于单个文件")
+
+        started = time.perf_counter()
+        loaded = unchanged = failed = rows = 0
+        for path in files:
+            try:
+                result = load_preset_file(path, name=options['name'], force=options['force'], prune=options['prune'])
+            except PresetLoadError as e:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f"{path.name}: {e}"))
+                continue
+
+            summary = result.summary
+            if result.status == 'unchanged':
+                unchanged += 1
+                self.stdout.write(f"{result.source_name}: 内容未变化，跳过（词汇书 {result.book_id}）")
+                continue
+            loaded += 1
+            rows += summary.total_rows
+            self.stdout.write(
+                f"{result.source_name} -> 词汇书 {result.book_id}: {summary.total_rows} 行，"
+                f"新建 {summary.created}，更新 {summary.updated}，未变化 {result.unchanged_rows}，"
+                f"新单词 {summary.new_word_basics}，词汇量 {summary.word_count}，{result.seconds}s"
+            )
+            if result.duplicates or summary.error_count:
+                self.stdout.write(f"  文件内重复 {result.duplicates} 行（保留最后一行），无效 {summary.error_count} 行")
+                for error in summary.errors[:10]:
+                    self.stdout.write(f"  第{error['row']}行: {error['error']}")
+            if result.stale:
+                action = f"已删除 {result.removed}" if options['prune'] else "使用 --prune 删除"
+                self.stdout.write(f"  词书中有 {result.stale} 个单词不在文件中，{action}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"共 {len(files)} 个文件：加载 {loaded}，未变化 {unchanged}，失败 {failed}；"
+            f"{rows} 行，耗时 {elapsed:.1f}s"
+        ))
+        if failed:
+            raise CommandError(f"{failed} 个文件加载失败")
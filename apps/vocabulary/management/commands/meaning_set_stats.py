@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.meaning_sets import cache_stats, load_meanings, storage_report
+from apps.vocabulary.models import BookWord
+
+
+def _megabytes(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = '报告释义去重存储节省的空间，并可选读取一本书的释义两遍以测量进程内缓存命中'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--book', type=int, help='读取该词书全部单词的释义（第二遍应全部命中缓存）')
+
+    def handle(self, *args, **options):
+        report = storage_report()
+        self.stdout.write(
+            f"书籍单词 {report['book_words']}（有释义 {report['with_meanings']}），"
+            f"释义集 {report['meaning_sets']}，平均每个释义集被 {report['rows_per_set']} 行引用"
+        )
+        self.stdout.write(
+            f"释义JSON：每行各存一份 {_megabytes(report['inline_bytes'])}，"
+            f"去重后 {_megabytes(report['interned_bytes'])}，节省 {_megabytes(report['saved_bytes'])}"
+        )
+        self.stdout.write(
+            f"表大小：book_words {_megabytes(report['book_words_table_bytes'])}，"
+            f"meaning_sets {_megabytes(report['meaning_sets_table_bytes'])}"
+        )
+
+        if options['book'] is None:
+            return
+        ids = list(BookWord.objects.for_book(options['book']).values_list('meaning_set_id', flat=True))
+        for attempt in ('首次', '再次'):
+            started = time.perf_counter()
+            load_meanings(ids)
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(f"{attempt}读取 {len(ids)} 行释义: {elapsed:.1f} ms")
+        self.stdout.write(f"缓存: {cache_stats()['meanings']}")
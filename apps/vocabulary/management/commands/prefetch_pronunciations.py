@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.vocabulary.models import VocabularyBook
+from apps.vocabulary.pronunciation_prefetch import prefetch_book_pronunciations
+
+
+class Command(BaseCommand):
+    help = '预取词汇书中所有单词的发音音频到本地缓存'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_ids', nargs='+', type=int, help='词汇书ID，可传多个')
+        parser.add_argument('--concurrency', type=int, default=8, help='并发下载线程数（默认8）')
+        parser.add_argument('--rate', type=float, default=10.0, help='每秒最多请求数，<=0 不限速（默认10）')
+        parser.add_argument('--retries', type=int, default=3, help='临时错误重试次数（默认3）')
+        parser.add_argument('--upstream-url', default=None, help='上游发音地址，默认使用settings配置')
+
+    def handle(self, *args, **options):
+        books = VocabularyBook.objects.filter(id__in=options['book_ids']).order_by('id')
+        found_ids = {book.id for book in books}
+        missing_ids = set(options['book_ids']) - found_ids
+        if missing_ids:
+            raise CommandError(f"词汇书不存在: {sorted(missing_ids)}")
+
+        for book in books:
+            self.stdout.write(f"开始预取词汇书 '{book.name}' (ID:{book.id}) 的发音...")
+
+            def progress(done, total):
+                self.stdout.write(f"  进度: {done}/{total}")
+
+            summary = prefetch_book_pronunciations(
+                book.id,
+                concurrency=options['concurrency'],
+                rate=options['rate'],
+                retries=options['retries'],
+                upstream_url=options['upstream_url'],
+                progress=progress,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"完成: 共 {summary['total']} 个单词, 已有缓存 {summary['already_cached']}, "
+                f"新缓存 {summary['cached']}, 无发音 {summary['not_found']}, "
+                f"失败 {summary['failed']}, 耗时 {summary['elapsed']} 秒"
+            ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.models import VocabularyBook
+from apps.vocabulary.ordering import ORDER_GAP, rebalance_book
+
+
+class Command(BaseCommand):
+    help = f'把词汇书的 word_order 按现有顺序重新编号为 {ORDER_GAP} 的倍数，为之后的移动/插入留出间隔'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_ids', nargs='*', type=int, help='只处理指定的词汇书ID，默认处理全部')
+
+    def handle(self, *args, **options):
+        book_ids = options['book_ids'] or list(VocabularyBook.objects.order_by('id').values_list('id', flat=True))
+        for book_id in book_ids:
+            changed = rebalance_book(book_id)
+            self.stdout.write(f"词汇书 {book_id}: 改动 {changed} 行")
+        self.stdout.write(self.style.SUCCESS(f"已处理 {len(book_ids)} 本词汇书"))
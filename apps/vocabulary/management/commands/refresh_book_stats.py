@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.book_stats import refresh_book_stats
+from apps.vocabulary.models import VocabularyBook
+
+
+class Command(BaseCommand):
+    help = '重新统计词书（词汇量、自定义单词数、词性分布、学习计划数），用于首次生成或修复统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_ids', nargs='*', type=int, help='词汇书ID，默认全部')
+        parser.add_argument('--force', action='store_true', help='内容版本未变化也重新统计单词')
+
+    def handle(self, *args, **options):
+        book_ids = options['book_ids'] or list(VocabularyBook.objects.order_by('id').values_list('id', flat=True))
+        started = time.perf_counter()
+        refreshed = 0
+        for book_id in book_ids:
+            refreshed += refresh_book_stats([book_id], force=options['force'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"已统计 {refreshed} 本词书（共 {len(book_ids)} 本），耗时 {elapsed:.1f}s"
+        ))
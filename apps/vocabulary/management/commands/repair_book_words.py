@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.book_word_repair import DEFAULT_BATCH_SIZE, DEFAULT_PAUSE, count_orphans, repair_book_words
+
+
+class Command(BaseCommand):
+    help = '分批修复或删除缺少词汇书/单词的书籍单词（迁移 0020 加 NOT NULL 约束前执行），每批单独提交'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批处理的行数')
+        parser.add_argument('--sleep', type=float, default=DEFAULT_PAUSE, help='批次之间暂停的秒数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计需要处理的行数')
+
+    def handle(self, *args, **options):
+        without_book, without_word = count_orphans()
+        self.stdout.write(f"没有词汇书的行 {without_book}，没有单词的行 {without_word}")
+        if options['dry_run'] or not (without_book or without_word):
+            return
+
+        result = repair_book_words(
+            batch_size=options['batch_size'],
+            pause=options['sleep'],
+            progress=self._report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"修复完成：从基础词书取回 {result.from_base}，按自定义拼写关联 {result.from_custom_word}"
+            f"（新单词 {result.new_word_basics}），删除 {result.deleted}，涉及词汇书 {len(result.book_ids)}"
+        ))
+
+    def _report_progress(self, name, done):
+        self.stdout.write(f"  {name}: {done}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.vocabulary.import_jobs import pending_import_job_ids, run_import_job
+
+
+class Command(BaseCommand):
+    help = '执行等待中的词汇导入任务，并从断点继续中断（进程崩溃/重启）的任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int, help='只执行指定的任务ID，默认执行全部待处理任务')
+
+    def handle(self, *args, **options):
+        job_ids = options['job_ids'] or pending_import_job_ids()
+        if not job_ids:
+            self.stdout.write("没有待处理的导入任务")
+            return
+
+        for job_id in job_ids:
+            job = run_import_job(job_id)
+            if job is None:
+                self.stdout.write(f"任务 {job_id} 不存在或正在其他进程中执行，已跳过")
+                continue
+            style = self.style.SUCCESS if job.status == 'completed' else self.style.ERROR
+            self.stdout.write(style(
+                f"任务 {job.id}: {job.status}, 已处理 {job.rows_done}/{job.total_rows} 行, "
+                f"新建 {job.created_count}, 更新 {job.updated_count}, 错误 {job.error_count}. {job.message}"
+            ))
@@ -1 +1,53 @@
- 
\ No newline at end of file
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.vocabulary.book_deletion import (
+    DEFAULT_BATCH_SIZE, DEFAULT_PAUSE, BookDeletionError, purge_book, soft_delete_book
+)
+from apps.vocabulary.models import VocabularyBook
+
+
+class Command(BaseCommand):
+    help = '安全删除词汇书：先隐藏词汇书，再分批删除学习阶段、学习计划和书籍单词，每批单独提交'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_ids', nargs='*', type=int, help='要删除的词汇书ID')
+        parser.add_argument('--resume', action='store_true', help='继续清理所有已隐藏但未清理完的词汇书')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批删除的行数')
+        parser.add_argument('--sleep', type=float, default=DEFAULT_PAUSE, help='批次之间暂停的秒数')
+
+    def handle(self, *args, **options):
+        book_ids = list(options['book_ids'])
+        if options['resume']:
+            book_ids += list(VocabularyBook.all_objects.filter(deleted_at__isnull=False).exclude(
+                id__in=book_ids
+            ).order_by('deleted_at').values_list('id', flat=True))
+        if not book_ids:
+            raise CommandError("请指定词汇书ID，或使用 --resume 继续清理已隐藏的词汇书")
+
+        for book_id in book_ids:
+            book = VocabularyBook.all_objects.filter(pk=book_id).first()
+            if book is None:
+                self.stdout.write(self.style.WARNING(f"词汇书 {book_id} 不存在，已跳过"))
+                continue
+            if book.deleted_at is None:
+                try:
+                    soft_delete_book(book)
+                except BookDeletionError as e:
+                    self.stdout.write(self.style.ERROR(str(e)))
+                    continue
+                self.stdout.write(f"词汇书 {book_id} '{book.name}' 已隐藏，开始分批清理")
+
+            deleted = purge_book(
+                book_id,
+                batch_size=options['batch_size'],
+                pause=options['sleep'],
+                progress=self._report_progress,
+            )
+            if deleted is None:
+                self.stdout.write(self.style.WARNING(f"词汇书 {book_id} 正在由其他进程清理，已跳过"))
+                continue
+            summary = ', '.join(f"{name} {count}" for name, count in deleted.items())
+            self.stdout.write(self.style.SUCCESS(f"词汇书 {book_id} 删除完成: {summary}"))
+
+    def _report_progress(self, name, done, total):
+        self.stdout.write(f"  {name}: {done}/{total}")
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+释义去重存储
+
+同一个单词在每本词书中的 meanings JSON 几乎相同，原来每行 BookWord 各存一份（大多进入TOAST）。
+现在释义按内容去重写入 meaning_sets，BookWord 只保存 meaning_set_id：
+- 内容哈希为 md5(jsonb 文本)，在数据库中计算：jsonb 输出的键顺序和空白是规范化的，
+  Python 写入与导入SQL（INSERT ... SELECT）得到相同的哈希
+- Python 写入前去掉释义字符串首尾空白；空释义不建行，meaning_set 为空
+- 释义集写入后不再修改，按ID缓存的内容永远不会过期；按内容缓存的ID让批量导入中
+  重复的释义不用查库
+自定义释义仍保存在 BookWord.custom_meanings 中，优先于基础释义。
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from django.db import connection, transaction
+
+from .models import MeaningSet
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 进程内缓存的释义集数量（按ID）和释义内容数量（按内容取ID）
+MEANING_CACHE_SIZE = 50000
+INTERN_CACHE_SIZE = 50000
+
+# 单条语句写入的释义数量
+INTERN_BATCH_SIZE = 1000
+
+# 并发写入相同内容时，ON CONFLICT 之后可能还看不到对方刚提交的行，重试的次数
+INTERN_RETRIES = 3
+
+_INTERN_SQL = """
+    WITH input AS (
+        SELECT value, md5(value::jsonb::text) AS content_hash
+        FROM unnest(%s::text[]) AS value
+    ),
+    inserted AS (
+        INSERT INTO meaning_sets (content_hash, meanings, created_at)
+        SELECT DISTINCT ON (content_hash) content_hash, value::jsonb, now()
+        FROM input
+        ON CONFLICT (content_hash) DO NOTHING
+        RETURNING id, content_hash
+    )
+    SELECT input.value, COALESCE(inserted.id, ms.id)
+    FROM input
+    LEFT JOIN inserted ON inserted.content_hash = input.content_hash
+    LEFT JOIN meaning_sets ms ON ms.content_hash = input.content_hash
+"""
+
+_STORAGE_SQL = """
+    SELECT count(*), count(bw.meaning_set_id), count(DISTINCT bw.meaning_set_id),
+           COALESCE(sum(pg_column_size(ms.meanings)), 0)
+    FROM book_words bw
+    LEFT JOIN meaning_sets ms ON ms.id = bw.meaning_set_id
+"""
+
+_SETS_SQL = """
+    SELECT count(*), COALESCE(sum(pg_column_size(meanings)), 0),
+           pg_total_relation_size('meaning_sets'), pg_total_relation_size('book_words')
+    FROM meaning_sets
+"""
+
+
+class _LRUCache:
+    """带命中统计的LRU缓存"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# meaning_set_id -> 释义列表
+_meaning_cache = _LRUCache(MEANING_CACHE_SIZE)
+# 释义内容（规范化JSON文本） -> meaning_set_id
+_intern_cache = _LRUCache(INTERN_CACHE_SIZE)
+
+
+def normalize_meanings(meanings):
+    """
+    写入前的规范化：JSON文本先解析，释义字符串去掉首尾空白
+
+    Returns:
+        list（空列表表示没有释义）
+    """
+    if isinstance(meanings, str):
+        try:
+            meanings = json.loads(meanings)
+        except ValueError:
+            return []
+    if not meanings:
+        return []
+    if not isinstance(meanings, list):
+        meanings = [meanings]
+    return [
+        {key: value.strip() if isinstance(value, str) else value for key, value in meaning.items()}
+        if isinstance(meaning, dict) else meaning
+        for meaning in meanings
+    ]
+
+
+def _content_key(meanings):
+    return json.dumps(meanings, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def copy_meanings(meanings):
+    """缓存中的释义被多处共享，返回给调用方的是副本（调用方可能就地修改）"""
+    if not isinstance(meanings, list):
+        return meanings
+    return [dict(meaning) if isinstance(meaning, dict) else meaning for meaning in meanings]
+
+
+def intern_meanings_many(meanings_list):
+    """
+    批量取得释义对应的 meaning_set_id，不存在的内容一条语句写入
+
+    Returns:
+        list: 与输入一一对应的ID，空释义为 None
+    """
+    keys = []
+    resolved = {}
+    for meanings in meanings_list:
+        meanings = normalize_meanings(meanings)
+        key = _content_key(meanings) if meanings else None
+        keys.append(key)
+        if key is not None and key not in resolved:
+            resolved[key] = _intern_cache.get(key)
+
+    missing = sorted(key for key, meaning_set_id in resolved.items() if meaning_set_id is None)
+    created = []
+    for attempt in range(INTERN_RETRIES):
+        if not missing:
+            break
+        unresolved = []
+        with connection.cursor() as cursor:
+            for offset in range(0, len(missing), INTERN_BATCH_SIZE):
+                cursor.execute(_INTERN_SQL, [missing[offset:offset + INTERN_BATCH_SIZE]])
+                for key, meaning_set_id in cursor.fetchall():
+                    if meaning_set_id is None:
+                        unresolved.append(key)
+                    else:
+                        resolved[key] = meaning_set_id
+                        created.append((key, meaning_set_id))
+        missing = unresolved
+    if missing:
+        raise RuntimeError(f"{len(missing)} 条释义写入 meaning_sets 失败")
+
+    if created:
+        # 事务回滚后新写入的行不存在，只在提交后才缓存
+        transaction.on_commit(lambda: _remember(created))
+
+    return [None if key is None else resolved[key] for key in keys]
+
+
+def _remember(pairs):
+    for key, meaning_set_id in pairs:
+        _intern_cache.set(key, meaning_set_id)
+
+
+def intern_meanings(meanings):
+    """单条释义的 meaning_set_id，空释义为 None"""
+    return intern_meanings_many([meanings])[0]
+
+
+def load_meanings(meaning_set_ids):
+    """
+    批量取得释义内容，未缓存的一次查询补齐
+
+    Returns:
+        dict: {meaning_set_id: 释义列表（副本）}
+    """
+    result = {}
+    missing = []
+    for meaning_set_id in set(meaning_set_ids) - {None}:
+        meanings = _meaning_cache.get(meaning_set_id)
+        if meanings is None:
+            missing.append(meaning_set_id)
+        else:
+            result[meaning_set_id] = meanings
+    if missing:
+        for meaning_set_id, meanings in MeaningSet.objects.filter(id__in=missing).values_list('id', 'meanings'):
+            _meaning_cache.set(meaning_set_id, meanings)
+            result[meaning_set_id] = meanings
+    return {meaning_set_id: copy_meanings(meanings) for meaning_set_id, meanings in result.items()}
+
+
+def get_meanings(meaning_set_id):
+    """单个释义集的内容（副本），不存在时返回空列表"""
+    if meaning_set_id is None:
+        return []
+    return load_meanings([meaning_set_id]).get(meaning_set_id, [])
+
+
+def cache_stats():
+    return {'meanings': _meaning_cache.stats(), 'intern': _intern_cache.stats()}
+
+
+def storage_report():
+    """
+    去重前后的释义存储量对比：inline_bytes 为每行各存一份时的JSON大小，
+    interned_bytes 为 meaning_sets 中的JSON大小加上每行8字节的外键
+
+    Returns:
+        dict
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_STORAGE_SQL)
+        book_words, with_meanings, referenced_sets, inline_bytes = cursor.fetchone()
+        cursor.execute(_SETS_SQL)
+        meaning_sets, set_bytes, meaning_sets_table_bytes, book_words_table_bytes = cursor.fetchone()
+    interned_bytes = set_bytes + 8 * with_meanings
+    return {
+        'book_words': book_words,
+        'with_meanings': with_meanings,
+        'meaning_sets': meaning_sets,
+        'referenced_sets': referenced_sets,
+        'rows_per_set': round(with_meanings / referenced_sets, 2) if referenced_sets else None,
+        'inline_bytes': inline_bytes,
+        'interned_bytes': interned_bytes,
+        'saved_bytes': inline_bytes - interned_bytes,
+        'book_words_table_bytes': book_words_table_bytes,
+        'meaning_sets_table_bytes': meaning_sets_table_bytes,
+        'cache': cache_stats(),
+    }
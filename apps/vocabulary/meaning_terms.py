@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+释义词条索引（中文反查英文单词）
+
+BookWord 的释义保存在 meanings / custom_meanings JSON 中，无法走索引查询。
+这里把有效释义（自定义优先）按 "；,、/" 等分隔符拆成短词条，去掉括号中的补充说明，
+写入 meaning_terms 表；反查时按词条精确匹配或前缀匹配（varchar_pattern_ops 索引），
+只在用户可见的词书中查找。
+"""
+
+import json
+import re
+
+from django.db import connection, transaction
+
+from .example_search import book_filter_sql
+from .models import BookWord, MeaningTerm
+
+# 单个释义词条的最大长度（与 MeaningTerm.term 一致）
+MAX_TERM_LENGTH = 100
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_SEPARATORS = re.compile(r'[;；,，、/|\n]+')
+_BRACKETS = re.compile(r'[(（\[【<《][^)）\]】>》]*[)）\]】>》]')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_term(text):
+    """词条规范化：去掉首尾空白和省略号，合并空白，英文小写"""
+    text = _SPACES.sub(' ', text or '').strip(' .…~～')
+    return text.lower()
+
+
+def _parse_meanings(meanings):
+    if isinstance(meanings, str):
+        try:
+            meanings = json.loads(meanings)
+        except ValueError:
+            return []
+    if not isinstance(meanings, list):
+        return []
+    return [meaning for meaning in meanings if isinstance(meaning, dict)]
+
+
+def terms_for_meanings(meanings):
+    """
+    从释义JSON中拆出词条
+
+    Returns:
+        list[(词条, 词性)]: 去重后的词条
+    """
+    terms = {}
+    for meaning in _parse_meanings(meanings):
+        text = str(meaning.get('meaning') or '')
+        pos = str(meaning.get('pos') or '')[:20]
+        for part in _SEPARATORS.split(_BRACKETS.sub('', text)):
+            term = normalize_term(part)[:MAX_TERM_LENGTH]
+            if term:
+                terms.setdefault(term, pos)
+    return list(terms.items())
+
+
+def rebuild_meaning_terms(book_word_ids=None, missing_only=False, batch_size=2000):
+    """
+    重建 BookWord 的释义词条
+
+    Args:
+        book_word_ids: 只处理这些单词；为None时处理全部单词
+        missing_only: 只补全还没有词条记录的单词
+
+    Returns:
+        int: 处理的单词数量
+    """
+    queryset = BookWord.objects.order_by('id')
+    if book_word_ids is not None:
+        book_word_ids = list(book_word_ids)
+        if not book_word_ids:
+            return 0
+        queryset = queryset.filter(id__in=book_word_ids)
+    if missing_only:
+        queryset = queryset.filter(meaning_terms__isnull=True)
+
+    processed = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list(
+            'id', 'meaning_set__meanings', 'custom_meanings', 'is_removed'
+        )[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids = [book_word_id for book_word_id, _, _, _ in rows]
+        with transaction.atomic():
+            if not missing_only:
+                MeaningTerm.objects.filter(book_word_id__in=ids).delete()
+            MeaningTerm.objects.bulk_create([
+                MeaningTerm(term=term, pos=pos, book_word_id=book_word_id)
+                for book_word_id, meanings, custom_meanings, is_removed in rows
+                if not is_removed
+                for term, pos in terms_for_meanings(custom_meanings or meanings)
+            ])
+        processed += len(rows)
+    return processed
+
+
+def sync_meaning_terms(book_word_ids):
+    """单词新增或释义修改后重建这些单词的释义词条"""
+    return rebuild_meaning_terms(book_word_ids)
+
+
+_REVERSE_LOOKUP_SQL = """
+    SELECT bw.id, bw.vocabulary_book_id, vb.name, COALESCE(NULLIF(bw.custom_word, ''), wb.word),
+           COALESCE(NULLIF(bw.custom_phonetic, ''), wb.phonetic_symbol),
+           COALESCE(bw.custom_meanings, ms.meanings), matched.term, matched.pos, matched.exact
+    FROM (
+        SELECT DISTINCT ON (mt.book_word_id) mt.book_word_id, mt.term, mt.pos, mt.term = %(term)s AS exact
+        FROM meaning_terms mt
+        WHERE mt.term LIKE %(prefix)s
+        ORDER BY mt.book_word_id, mt.term = %(term)s DESC, length(mt.term)
+    ) matched
+    JOIN book_words bw ON bw.id = matched.book_word_id AND NOT bw.is_removed
+    JOIN vocabulary_books vb ON vb.id = bw.vocabulary_book_id AND vb.deleted_at IS NULL
+    LEFT JOIN word_basics wb ON wb.id = bw.word_basic_id
+    LEFT JOIN meaning_sets ms ON ms.id = bw.meaning_set_id
+    WHERE TRUE {visibility} {book_filter}
+    ORDER BY matched.exact DESC, length(matched.term), bw.vocabulary_book_id, bw.word_order, bw.id
+    LIMIT %(limit)s
+"""
+
+_COLUMNS = ('book_word_id', 'book_id', 'book_name', 'word', 'phonetic', 'meanings', 'term', 'pos', 'exact')
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def reverse_lookup(text, user=None, book=None, limit=DEFAULT_LIMIT):
+    """
+    按中文释义反查单词：精确匹配的词条排在前面，其次是以该文本开头的较短词条
+
+    Args:
+        user: 只查系统预设词书和该用户创建的词书，为空时不限制
+        book: 只在该词书中查找（覆盖词书按合并后的单词查找）
+
+    Returns:
+        list[dict]
+    """
+    term = normalize_term(text)[:MAX_TERM_LENGTH]
+    if not term:
+        return []
+    params = {
+        'term': term,
+        'prefix': _escape_like(term) + '%',
+        'limit': max(1, min(int(limit), MAX_LIMIT)),
+    }
+
+    visibility = ''
+    if user is not None:
+        visibility = 'AND (vb.is_system_preset OR vb.created_by_id = %(user_id)s)'
+        params['user_id'] = user.id
+
+    book_filter = book_filter_sql(book, params) if book is not None else ''
+
+    sql = _REVERSE_LOOKUP_SQL.format(visibility=visibility, book_filter=book_filter)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    results = [dict(zip(_COLUMNS, row)) for row in rows]
+    for result in results:
+        result['meanings'] = _parse_meanings(result['meanings'])
+    return results
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0006_vocabularybook_created_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronunciationPrefetchStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100, unique=True, verbose_name='规范化单词')),
+                ('status', models.CharField(choices=[('cached', '已缓存'), ('not_found', '上游无发音'), ('failed', '获取失败')], max_length=20, verbose_name='状态')),
+                ('attempts', models.IntegerField(default=0, verbose_name='尝试次数')),
+                ('last_error', models.CharField(blank=True, default='', max_length=255, verbose_name='最后错误')),
+                ('fetched_at', models.DateTimeField(blank=True, null=True, verbose_name='缓存时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '发音预取状态',
+                'verbose_name_plural': '发音预取状态',
+                'db_table': 'pronunciation_prefetch_status',
+                'indexes': [models.Index(fields=['status'], name='idx_prefetch_status')],
+            },
+        ),
+    ]
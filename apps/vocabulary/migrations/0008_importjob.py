@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0007_pronunciationprefetchstatus'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('api', '接口上传'), ('admin', '后台导入')], default='api', max_length=20, verbose_name='来源')),
+                ('mode', models.CharField(choices=[('upsert', '更新已有单词'), ('append', '全部新建')], default='upsert', max_length=20, verbose_name='导入模式')),
+                ('merge_existing_meanings', models.BooleanField(default=False, verbose_name='合并已有释义')),
+                ('require_meaning', models.BooleanField(default=False, verbose_name='跳过无释义的行')),
+                ('upload', models.FileField(upload_to='imports/%Y/%m/', verbose_name='上传文件')),
+                ('original_filename', models.CharField(blank=True, default='', max_length=255, verbose_name='原始文件名')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '导入中'), ('completed', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('total_rows', models.IntegerField(blank=True, null=True, verbose_name='总行数')),
+                ('rows_done', models.IntegerField(default=0, verbose_name='已处理行数')),
+                ('created_count', models.IntegerField(default=0, verbose_name='新建数')),
+                ('updated_count', models.IntegerField(default=0, verbose_name='更新数')),
+                ('skipped_count', models.IntegerField(default=0, verbose_name='跳过数')),
+                ('error_count', models.IntegerField(default=0, verbose_name='错误数')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='错误明细（最多100条）')),
+                ('message', models.TextField(blank=True, default='', verbose_name='说明')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='本次运行开始时间')),
+                ('rows_at_start', models.IntegerField(default=0, verbose_name='本次运行开始时已处理行数')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='最后心跳时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vocabulary_import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='创建者')),
+                ('vocabulary_book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='vocabulary.vocabularybook', verbose_name='目标词汇书')),
+            ],
+            options={
+                'verbose_name': '导入任务',
+                'verbose_name_plural': '导入任务',
+                'db_table': 'vocabulary_import_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'heartbeat_at'], name='idx_import_job_status')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:38
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0008_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportStagingBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='导入令牌')),
+                ('original_filename', models.CharField(blank=True, default='', max_length=255, verbose_name='原始文件名')),
+                ('total_rows', models.IntegerField(default=0, verbose_name='总行数')),
+                ('staged_rows', models.IntegerField(default=0, verbose_name='有效行数')),
+                ('error_count', models.IntegerField(default=0, verbose_name='错误数')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='错误明细（最多100条）')),
+                ('preview', models.JSONField(blank=True, default=dict, verbose_name='预览结果')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vocabulary_import_staging_batches', to=settings.AUTH_USER_MODEL, verbose_name='创建者')),
+                ('vocabulary_book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_staging_batches', to='vocabulary.vocabularybook', verbose_name='目标词汇书')),
+            ],
+            options={
+                'verbose_name': '导入暂存批次',
+                'verbose_name_plural': '导入暂存批次',
+                'db_table': 'vocabulary_import_staging',
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportStagingRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.IntegerField(verbose_name='CSV行号')),
+                ('word', models.CharField(max_length=100, verbose_name='单词拼写')),
+                ('phonetic_symbol', models.CharField(blank=True, default='', max_length=100, verbose_name='音标')),
+                ('uk_pronunciation', models.CharField(blank=True, default='', max_length=200, verbose_name='英式发音URL')),
+                ('us_pronunciation', models.CharField(blank=True, default='', max_length=200, verbose_name='美式发音URL')),
+                ('meanings', models.JSONField(default=list, verbose_name='词性及中文释义JSON')),
+                ('example_sentence', models.TextField(blank=True, default='', verbose_name='例句')),
+                ('word_order', models.IntegerField(blank=True, null=True, verbose_name='CSV中的顺序')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='vocabulary.importstagingbatch', verbose_name='暂存批次')),
+            ],
+            options={
+                'verbose_name': '导入暂存行',
+                'verbose_name_plural': '导入暂存行',
+                'db_table': 'vocabulary_import_staging_rows',
+                'indexes': [models.Index(fields=['batch', 'word'], name='idx_staging_batch_word'), models.Index(fields=['batch', 'row_number'], name='idx_staging_batch_row')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_emailverificationcode'),
+        ('vocabulary', '0009_import_staging'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentKnownWordChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word_id', models.BigIntegerField(verbose_name='单词ID')),
+                ('op', models.CharField(choices=[('add', '标记'), ('remove', '取消标记')], max_length=6, verbose_name='操作')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='变更时间')),
+                ('student', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='known_word_changes', to='accounts.student', verbose_name='学生')),
+            ],
+            options={
+                'verbose_name': '已认识单词变更',
+                'verbose_name_plural': '已认识单词变更',
+                'db_table': 'vocabulary_known_word_changes',
+                'indexes': [models.Index(fields=['student', 'id'], name='idx_known_change_student')],
+            },
+        ),
+    ]
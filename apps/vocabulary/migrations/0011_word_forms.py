@@ -0,0 +1,243 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:47
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# 以下词形生成规则是本迁移编写时 apps.vocabulary.word_forms 的冻结副本：
+# 迁移不引用运行时模块，之后修改词形规则不会改变本迁移的结果（需要时用 rebuild_word_forms 重建）
+
+VOWELS = set('aeiou')
+
+# 常见不规则变化：原形 -> 变化形式
+IRREGULAR_FORMS = {
+    'be': ['am', 'is', 'are', 'was', 'were', 'been', 'being'],
+    'have': ['has', 'had', 'having'],
+    'do': ['does', 'did', 'done', 'doing'],
+    'go': ['goes', 'went', 'gone', 'going'],
+    'say': ['says', 'said'],
+    'make': ['made'],
+    'take': ['took', 'taken'],
+    'come': ['came'],
+    'see': ['saw', 'seen'],
+    'know': ['knew', 'known'],
+    'get': ['got', 'gotten'],
+    'give': ['gave', 'given'],
+    'find': ['found'],
+    'think': ['thought'],
+    'tell': ['told'],
+    'become': ['became'],
+    'leave': ['left'],
+    'feel': ['felt'],
+    'bring': ['brought'],
+    'begin': ['began', 'begun'],
+    'keep': ['kept'],
+    'hold': ['held'],
+    'write': ['wrote', 'written'],
+    'stand': ['stood'],
+    'hear': ['heard'],
+    'mean': ['meant'],
+    'meet': ['met'],
+    'run': ['ran'],
+    'pay': ['paid'],
+    'sit': ['sat'],
+    'speak': ['spoke', 'spoken'],
+    'lie': ['lay', 'lain', 'lying'],
+    'lead': ['led'],
+    'read': [],
+    'grow': ['grew', 'grown'],
+    'lose': ['lost'],
+    'fall': ['fell', 'fallen'],
+    'send': ['sent'],
+    'build': ['built'],
+    'understand': ['understood'],
+    'draw': ['drew', 'drawn'],
+    'break': ['broke', 'broken'],
+    'spend': ['spent'],
+    'rise': ['rose', 'risen'],
+    'drive': ['drove', 'driven'],
+    'buy': ['bought'],
+    'wear': ['wore', 'worn'],
+    'choose': ['chose', 'chosen'],
+    'seek': ['sought'],
+    'throw': ['threw', 'thrown'],
+    'catch': ['caught'],
+    'deal': ['dealt'],
+    'win': ['won'],
+    'forget': ['forgot', 'forgotten'],
+    'sell': ['sold'],
+    'fight': ['fought'],
+    'teach': ['taught'],
+    'eat': ['ate', 'eaten'],
+    'sing': ['sang', 'sung'],
+    'swim': ['swam', 'swum'],
+    'drink': ['drank', 'drunk'],
+    'fly': ['flew', 'flown', 'flies'],
+    'sleep': ['slept'],
+    'steal': ['stole', 'stolen'],
+    'ride': ['rode', 'ridden'],
+    'hide': ['hid', 'hidden'],
+    'shake': ['shook', 'shaken'],
+    'bite': ['bit', 'bitten'],
+    'freeze': ['froze', 'frozen'],
+    'wake': ['woke', 'woken'],
+    'forgive': ['forgave', 'forgiven'],
+    'good': ['better', 'best'],
+    'well': ['better', 'best'],
+    'bad': ['worse', 'worst'],
+    'many': ['more', 'most'],
+    'much': ['more', 'most'],
+    'little': ['less', 'least'],
+    'far': ['farther', 'further', 'farthest', 'furthest'],
+    'man': ['men'],
+    'woman': ['women'],
+    'child': ['children'],
+    'person': ['people'],
+    'foot': ['feet'],
+    'tooth': ['teeth'],
+    'mouse': ['mice'],
+    'goose': ['geese'],
+    'leaf': ['leaves'],
+    'life': ['lives'],
+    'knife': ['knives'],
+    'wife': ['wives'],
+    'half': ['halves'],
+    'wolf': ['wolves'],
+    'shelf': ['shelves'],
+}
+
+_EDGE_PUNCTUATION = re.compile(r"^[^\w]+|[^\w]+$", re.UNICODE)
+
+
+def normalize_form(text):
+    """
+    规范化用户输入：去掉首尾标点和空白，合并空格并转小写
+
+    Returns:
+        str: 可能为空字符串
+    """
+    text = _EDGE_PUNCTUATION.sub('', (text or '').strip())
+    return re.sub(r'\s+', ' ', text).lower()
+
+
+def _double_final_consonant(word):
+    """短元音+单辅音结尾（如 stop, plan）加后缀时双写末尾辅音"""
+    return (
+        len(word) >= 3
+        and word[-1] not in VOWELS and word[-1] not in 'wxy'
+        and word[-2] in VOWELS
+        and word[-3] not in VOWELS
+    )
+
+
+def generate_forms(word):
+    """
+    生成单词的屈折形式（不包含原形本身），规则生成的非真实词形不会影响查询结果
+
+    Returns:
+        set
+    """
+    word = normalize_form(word)
+    if not word or ' ' in word or not word.isalpha():
+        # 词组只保留原形
+        return set(IRREGULAR_FORMS.get(word, []))
+
+    forms = set(IRREGULAR_FORMS.get(word, []))
+
+    # 复数 / 第三人称单数
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+        forms.add(word + 'es')
+    elif word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        forms.add(word[:-1] + 'ies')
+    else:
+        forms.add(word + 's')
+
+    # 过去式 / 过去分词、比较级 / 最高级
+    if word.endswith('e'):
+        forms.update([word + 'd', word + 'r', word + 'st'])
+    elif word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        forms.update([word[:-1] + 'ied', word[:-1] + 'ier', word[:-1] + 'iest'])
+    elif _double_final_consonant(word):
+        doubled = word + word[-1]
+        forms.update([doubled + 'ed', doubled + 'er', doubled + 'est', word + 'ed'])
+    else:
+        forms.update([word + 'ed', word + 'er', word + 'est'])
+
+    # 现在分词
+    if word.endswith('ie'):
+        forms.add(word[:-2] + 'ying')
+    elif word.endswith('e') and not word.endswith(('ee', 'ye', 'oe')):
+        forms.add(word[:-1] + 'ing')
+    elif _double_final_consonant(word):
+        forms.update([word + word[-1] + 'ing', word + 'ing'])
+    else:
+        forms.add(word + 'ing')
+
+    forms.discard(word)
+    return forms
+
+
+def forms_for_word(word):
+    """
+    原形和全部词形
+
+    Returns:
+        list: [(form, kind)]，kind 为 'exact' 或 'inflection'
+    """
+    normalized = normalize_form(word)
+    if not normalized:
+        return []
+    return [(normalized, 'exact')] + [(form, 'inflection') for form in sorted(generate_forms(normalized))]
+
+
+def populate_word_forms(apps, schema_editor):
+    """为已有单词生成词形索引"""
+    WordBasic = apps.get_model('vocabulary', 'WordBasic')
+    WordForm = apps.get_model('vocabulary', 'WordForm')
+    last_id = 0
+    while True:
+        rows = list(WordBasic.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'word')[:2000])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        WordForm.objects.bulk_create(
+            [
+                WordForm(form=form[:100], kind=kind, word_basic_id=word_id)
+                for word_id, word in rows
+                for form, kind in forms_for_word(word)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0010_known_word_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vocabularybook',
+            name='content_version',
+            field=models.IntegerField(default=0, verbose_name='内容版本'),
+        ),
+        migrations.CreateModel(
+            name='WordForm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form', models.CharField(max_length=100, verbose_name='词形')),
+                ('kind', models.CharField(choices=[('exact', '原形'), ('inflection', '屈折形式')], max_length=10, verbose_name='类型')),
+                ('word_basic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forms', to='vocabulary.wordbasic', verbose_name='单词')),
+            ],
+            options={
+                'verbose_name': '单词词形',
+                'verbose_name_plural': '单词词形',
+                'db_table': 'word_forms',
+                'constraints': [models.UniqueConstraint(fields=('form', 'word_basic'), name='uniq_word_form')],
+            },
+        ),
+        migrations.RunPython(populate_word_forms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0011_word_forms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookword',
+            name='base_word',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='overlay_entries', to='vocabulary.bookword', verbose_name='覆盖的基础单词'),
+        ),
+        migrations.AddField(
+            model_name='bookword',
+            name='is_removed',
+            field=models.BooleanField(default=False, verbose_name='在覆盖词书中删除'),
+        ),
+        migrations.AddField(
+            model_name='vocabularybook',
+            name='base_book',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='overlays', to='vocabulary.vocabularybook', verbose_name='基础词书'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookword',
+            constraint=models.UniqueConstraint(condition=models.Q(('base_word__isnull', False)), fields=('vocabulary_book', 'base_word'), name='uniq_overlay_base_word'),
+        ),
+    ]
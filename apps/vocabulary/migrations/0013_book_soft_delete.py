@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0012_overlay_books'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vocabularybook',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='删除时间'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    例句全文检索：生成列 example_tsv 随例句写入自动维护，GIN 索引支持 @@ 查询。
+    该列不作为模型字段，普通的 BookWord 查询不会读取它，由 example_search 模块用SQL查询。
+    """
+
+    dependencies = [
+        ('vocabulary', '0013_book_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE book_words ADD COLUMN example_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('english'::regconfig, coalesce(example_sentence, ''))) STORED;
+                CREATE INDEX idx_book_word_example_tsv ON book_words USING GIN (example_tsv);
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS idx_book_word_example_tsv;
+                ALTER TABLE book_words DROP COLUMN IF EXISTS example_tsv;
+            """,
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_meaning_terms(apps, schema_editor):
+    """为已有书籍单词生成释义词条"""
+    from apps.vocabulary.meaning_terms import terms_for_meanings
+
+    BookWord = apps.get_model('vocabulary', 'BookWord')
+    MeaningTerm = apps.get_model('vocabulary', 'MeaningTerm')
+    last_id = 0
+    while True:
+        rows = list(BookWord.objects.filter(id__gt=last_id).order_by('id').values_list(
+            'id', 'meanings', 'custom_meanings', 'is_removed'
+        )[:2000])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        MeaningTerm.objects.bulk_create([
+            MeaningTerm(term=term, pos=pos, book_word_id=book_word_id)
+            for book_word_id, meanings, custom_meanings, is_removed in rows
+            if not is_removed
+            for term, pos in terms_for_meanings(custom_meanings or meanings)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0014_example_sentence_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeaningTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='释义词条')),
+                ('pos', models.CharField(blank=True, default='', max_length=20, verbose_name='词性')),
+                ('book_word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meaning_terms', to='vocabulary.bookword', verbose_name='书籍单词')),
+            ],
+            options={
+                'verbose_name': '释义词条',
+                'verbose_name_plural': '释义词条',
+                'db_table': 'meaning_terms',
+                'indexes': [models.Index(fields=['term'], name='idx_meaning_term', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+        migrations.RunPython(populate_meaning_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0015_meaning_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookOverlap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shared_words', models.IntegerField(default=0, verbose_name='共有单词数')),
+                ('book_words', models.IntegerField(default=0, verbose_name='词汇书单词数')),
+                ('other_words', models.IntegerField(default=0, verbose_name='重叠词汇书单词数')),
+                ('book_version', models.IntegerField(default=0, verbose_name='计算时词汇书的内容版本')),
+                ('other_version', models.IntegerField(default=0, verbose_name='计算时重叠词汇书的内容版本')),
+                ('computed_at', models.DateTimeField(verbose_name='计算时间')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overlaps_from', to='vocabulary.vocabularybook', verbose_name='词汇书')),
+                ('other_book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overlaps_to', to='vocabulary.vocabularybook', verbose_name='重叠的词汇书')),
+            ],
+            options={
+                'verbose_name': '词书重叠',
+                'verbose_name_plural': '词书重叠',
+                'db_table': 'vocabulary_book_overlaps',
+                'constraints': [models.UniqueConstraint(fields=('book', 'other_book'), name='uniq_book_overlap')],
+            },
+        ),
+    ]
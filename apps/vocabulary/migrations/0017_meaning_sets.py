@@ -0,0 +1,61 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    释义去重存储：已有的 book_words.meanings 按 md5(jsonb 文本) 去重写入 meaning_sets，
+    再把每行指向对应的释义集，最后删除 meanings 列。
+    删除列后TOAST中的旧数据要在 VACUUM FULL（或 pg_repack）之后才会归还给操作系统。
+    """
+
+    dependencies = [
+        ('vocabulary', '0016_book_overlaps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeaningSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=32, unique=True, verbose_name='内容哈希')),
+                ('meanings', models.JSONField(verbose_name='词性及中文释义JSON')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '释义集',
+                'verbose_name_plural': '释义集',
+                'db_table': 'meaning_sets',
+            },
+        ),
+        migrations.AddField(
+            model_name='bookword',
+            name='meaning_set',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='book_words', to='vocabulary.meaningset', verbose_name='释义'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO meaning_sets (content_hash, meanings, created_at)
+                SELECT DISTINCT ON (md5(meanings::text)) md5(meanings::text), meanings, now()
+                FROM book_words
+                WHERE meanings IS NOT NULL AND meanings NOT IN ('[]'::jsonb, 'null'::jsonb)
+                ON CONFLICT (content_hash) DO NOTHING;
+
+                UPDATE book_words bw SET meaning_set_id = ms.id
+                FROM meaning_sets ms
+                WHERE ms.content_hash = md5(bw.meanings::text)
+                  AND bw.meanings IS NOT NULL AND bw.meanings NOT IN ('[]'::jsonb, 'null'::jsonb);
+            """,
+            reverse_sql="""
+                UPDATE book_words bw SET meanings = ms.meanings
+                FROM meaning_sets ms
+                WHERE ms.id = bw.meaning_set_id;
+            """,
+        ),
+        migrations.RemoveField(
+            model_name='bookword',
+            name='meanings',
+        ),
+    ]
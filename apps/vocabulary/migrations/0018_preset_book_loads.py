@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0017_meaning_sets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PresetBookLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=100, unique=True, verbose_name='预设来源（文件名）')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='文件内容SHA-256')),
+                ('row_count', models.IntegerField(default=0, verbose_name='加载行数')),
+                ('loaded_at', models.DateTimeField(auto_now=True, verbose_name='加载时间')),
+                ('vocabulary_book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='preset_load', to='vocabulary.vocabularybook', verbose_name='词汇书')),
+            ],
+            options={
+                'verbose_name': '预设词书加载记录',
+                'verbose_name_plural': '预设词书加载记录',
+                'db_table': 'preset_book_loads',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0018_preset_book_loads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VocabularyBookStats',
+            fields=[
+                ('vocabulary_book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='vocabulary.vocabularybook', verbose_name='词汇书')),
+                ('word_count', models.IntegerField(default=0, verbose_name='词汇量')),
+                ('customized_count', models.IntegerField(default=0, verbose_name='自定义过的单词数')),
+                ('pos_distribution', models.JSONField(blank=True, default=dict, verbose_name='词性分布（词性: 单词数）')),
+                ('active_plan_count', models.IntegerField(default=0, verbose_name='正在学习的计划数')),
+                ('learner_count', models.IntegerField(default=0, verbose_name='学习该书的学生数')),
+                ('content_version', models.IntegerField(default=-1, verbose_name='统计时的内容版本')),
+                ('base_content_version', models.IntegerField(blank=True, null=True, verbose_name='统计时基础词书的内容版本')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='统计时间')),
+            ],
+            options={
+                'verbose_name': '词书统计',
+                'verbose_name_plural': '词书统计',
+                'db_table': 'vocabulary_book_stats',
+            },
+        ),
+    ]
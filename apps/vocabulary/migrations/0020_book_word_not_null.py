@@ -0,0 +1,130 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:19
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Django 为 vocabulary_book 外键自动创建的单列索引（回滚时按同名重建）
+_BOOK_INDEX = 'book_words_vocabulary_book_id_d82feb41'
+
+_FIND_BOOK_INDEXES_SQL = """
+    SELECT i.relname
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0]
+    WHERE x.indrelid = 'book_words'::regclass AND x.indnatts = 1 AND NOT x.indisunique
+      AND a.attname = 'vocabulary_book_id'
+"""
+
+
+def check_no_orphans(apps, schema_editor):
+    """还有缺少词汇书或单词的行时不能加 NOT NULL，先运行 repair_book_words 分批修复"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM book_words WHERE vocabulary_book_id IS NULL OR word_basic_id IS NULL"
+        )
+        orphans = cursor.fetchone()[0]
+    if orphans:
+        raise RuntimeError(
+            f"book_words 中有 {orphans} 行缺少 vocabulary_book 或 word_basic，"
+            f"请先执行 python manage.py repair_book_words 再迁移"
+        )
+
+
+def drop_book_index(apps, schema_editor):
+    """vocabulary_book 的单列索引是复合索引的前缀，并发删除（名称由 Django 生成，按列查找）"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(_FIND_BOOK_INDEXES_SQL)
+        names = [row[0] for row in cursor.fetchall()]
+    for name in names:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}")
+
+
+def create_book_index(apps, schema_editor):
+    schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {schema_editor.quote_name(_BOOK_INDEX)} "
+        f"ON book_words (vocabulary_book_id)"
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    book_words.vocabulary_book / word_basic 加 NOT NULL，并增加 (vocabulary_book, word_basic) 复合索引。
+
+    迁移不在事务中执行，每条语句单独提交，各自只短暂持锁：
+    1. 复合索引用 CREATE INDEX CONCURRENTLY 创建，不阻塞读写
+    2. 先加 NOT VALID 的 CHECK 约束（只改目录，瞬间完成），再逐个 VALIDATE：
+       验证扫描全表时只持有 SHARE UPDATE EXCLUSIVE 锁，不阻塞读写
+    3. SET NOT NULL 利用已验证的约束跳过全表扫描，ACCESS EXCLUSIVE 锁只持有片刻；
+       只改列的可空性，不像 AlterField 那样删除并重建（重新验证）外键
+    4. vocabulary_book 的单列索引用 DROP INDEX CONCURRENTLY 删除，最后删除临时 CHECK 约束
+    """
+
+    atomic = False
+
+    dependencies = [
+        ('vocabulary', '0019_vocabulary_book_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_orphans, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='bookword',
+            index=models.Index(fields=['vocabulary_book', 'word_basic'], name='idx_book_word_basic'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE book_words ADD CONSTRAINT book_words_vocabulary_book_id_not_null
+                    CHECK (vocabulary_book_id IS NOT NULL) NOT VALID
+            """,
+            reverse_sql="ALTER TABLE book_words DROP CONSTRAINT IF EXISTS book_words_vocabulary_book_id_not_null",
+        ),
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE book_words ADD CONSTRAINT book_words_word_basic_id_not_null
+                    CHECK (word_basic_id IS NOT NULL) NOT VALID
+            """,
+            reverse_sql="ALTER TABLE book_words DROP CONSTRAINT IF EXISTS book_words_word_basic_id_not_null",
+        ),
+        migrations.RunSQL(
+            sql="ALTER TABLE book_words VALIDATE CONSTRAINT book_words_vocabulary_book_id_not_null",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="ALTER TABLE book_words VALIDATE CONSTRAINT book_words_word_basic_id_not_null",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="ALTER TABLE book_words ALTER COLUMN vocabulary_book_id SET NOT NULL",
+                    reverse_sql="ALTER TABLE book_words ALTER COLUMN vocabulary_book_id DROP NOT NULL",
+                ),
+                migrations.RunSQL(
+                    sql="ALTER TABLE book_words ALTER COLUMN word_basic_id SET NOT NULL",
+                    reverse_sql="ALTER TABLE book_words ALTER COLUMN word_basic_id DROP NOT NULL",
+                ),
+                migrations.RunPython(drop_book_index, create_book_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='bookword',
+                    name='vocabulary_book',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='words', to='vocabulary.vocabularybook', verbose_name='关联的词汇书'),
+                ),
+                migrations.AlterField(
+                    model_name='bookword',
+                    name='word_basic',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='book_words', to='vocabulary.wordbasic', verbose_name='关联的单词基本信息'),
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            sql="ALTER TABLE book_words DROP CONSTRAINT IF EXISTS book_words_vocabulary_book_id_not_null",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="ALTER TABLE book_words DROP CONSTRAINT IF EXISTS book_words_word_basic_id_not_null",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0020_book_word_not_null'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pronunciationprefetchstatus',
+            name='word',
+            field=models.TextField(unique=True, verbose_name='规范化单词'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0021_prefetch_status_word_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='file_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('pdf', 'PDF（后台提取单词表）')], default='csv', max_length=10, verbose_name='文件格式'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:05
+
+from django.db import migrations, transaction
+
+# 本迁移编写时的 apps.vocabulary.ordering.ORDER_GAP（冻结副本，之后修改间隔不影响本迁移）
+ORDER_GAP = 1024
+
+_BASE_BOOKS_SQL = "SELECT id FROM vocabulary_books WHERE base_book_id IS NULL ORDER BY id"
+
+# 与 ordering._rebalance_book_sql 相同：按 (word_order, id) 重新编号为 ORDER_GAP 的倍数，已经正确的行不写
+_RESPACE_SQL = """
+    UPDATE book_words bw SET word_order = ranked.position * %s
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY word_order, id) AS position
+        FROM book_words WHERE vocabulary_book_id = %s
+    ) ranked
+    WHERE bw.id = ranked.id AND bw.word_order <> ranked.position * %s
+"""
+
+# 覆盖词书中的覆盖行/删除标记跟随基础词书的顺序值
+_SYNC_OVERLAYS_SQL = """
+    UPDATE book_words o SET word_order = b.word_order
+    FROM book_words b
+    WHERE o.base_word_id = b.id AND b.vocabulary_book_id = %s AND o.word_order <> b.word_order
+"""
+
+
+def respace_books(apps, schema_editor):
+    """
+    间隔排序之前的词书 word_order 是连续的 1..N，书中间的移动/插入找不到可用的间隔。
+    逐本重新编号，每本书一个短事务（只锁这一本书），词书内容版本号随之递增
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute(_BASE_BOOKS_SQL)
+        book_ids = [row[0] for row in cursor.fetchall()]
+
+    for book_id in book_ids:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM vocabulary_books WHERE id = %s FOR UPDATE", [book_id])
+            cursor.execute(_RESPACE_SQL, [ORDER_GAP, book_id, ORDER_GAP])
+            if not cursor.rowcount:
+                continue
+            cursor.execute(_SYNC_OVERLAYS_SQL, [book_id])
+            cursor.execute(
+                "UPDATE vocabulary_books SET content_version = content_version + 1 WHERE id = %s", [book_id]
+            )
+
+
+class Migration(migrations.Migration):
+    """已有词书的 word_order 按 ORDER_GAP 重新编号；重新执行是安全的（已编号的书不会改动）"""
+
+    atomic = False
+
+    dependencies = [
+        ('vocabulary', '0022_import_job_file_format'),
+    ]
+
+    operations = [
+        migrations.RunPython(respace_books, migrations.RunPython.noop),
+    ]
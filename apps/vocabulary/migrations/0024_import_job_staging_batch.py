@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0023_respace_word_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='staging_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to='vocabulary.importstagingbatch', verbose_name='暂存批次（写入后删除）'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='file_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('pdf', 'PDF（后台提取单词表）'), ('staged', 'admin暂存的CSV（预览确认后写入）')], default='csv', max_length=10, verbose_name='文件格式'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='upload',
+            field=models.FileField(blank=True, upload_to='imports/%Y/%m/', verbose_name='上传文件'),
+        ),
+    ]
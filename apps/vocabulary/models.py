@@ -1,12 +1,34 @@
+import uuid
+
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from apps.accounts.models import Student
 
+class VocabularyBookManager(models.Manager):
+    """默认只返回未删除的词汇书"""
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class VocabularyBook(models.Model):
     """词汇书籍表"""
     name = models.CharField(max_length=100, default='新词汇书', verbose_name='书名')
     word_count = models.IntegerField(default=0, verbose_name='词汇量')
     is_system_preset = models.BooleanField(default=False, verbose_name='是否为系统预设书籍')
+    # 词书单词增删改时递增，用于让进程内缓存（如词形映射）失效
+    content_version = models.IntegerField(default=0, verbose_name='内容版本')
+    # 覆盖词书：只保存相对基础词书新增、删除和修改的单词，读取时与基础词书合并
+    base_book = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        related_name='overlays',
+        verbose_name='基础词书',
+        null=True,
+        blank=True
+    )
     created_by = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -15,8 +37,13 @@ class VocabularyBook(models.Model):
         null=True,  # 允许为空，以便迁移现有数据
         blank=True
     )
+    # 已删除（隐藏）的词汇书，数据由 book_deletion 分批清理
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name='删除时间')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    objects = VocabularyBookManager()
+    all_objects = models.Manager()
     
     class Meta:
         verbose_name = '书籍'
@@ -26,6 +53,36 @@ class VocabularyBook(models.Model):
     def __str__(self):
         return self.name
 
+class VocabularyBookStats(models.Model):
+    """
+    词书统计（物化）：单词写入路径递增内容版本时在事务提交后重新统计，
+    学习计划增删改时刷新计划数；词书列表直接读取，不在请求中聚合
+    """
+    vocabulary_book = models.OneToOneField(
+        VocabularyBook,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='词汇书'
+    )
+    word_count = models.IntegerField(default=0, verbose_name='词汇量')
+    customized_count = models.IntegerField(default=0, verbose_name='自定义过的单词数')
+    pos_distribution = models.JSONField(default=dict, blank=True, verbose_name='词性分布（词性: 单词数）')
+    active_plan_count = models.IntegerField(default=0, verbose_name='正在学习的计划数')
+    learner_count = models.IntegerField(default=0, verbose_name='学习该书的学生数')
+    # 统计单词时词书（及基础词书）的内容版本，版本未变化时不重复统计
+    content_version = models.IntegerField(default=-1, verbose_name='统计时的内容版本')
+    base_content_version = models.IntegerField(null=True, blank=True, verbose_name='统计时基础词书的内容版本')
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name='统计时间')
+
+    class Meta:
+        verbose_name = '词书统计'
+        verbose_name_plural = '词书统计'
+        db_table = 'vocabulary_book_stats'
+
+    def __str__(self):
+        return f"{self.vocabulary_book_id}: {self.word_count}"
+
 class WordBasic(models.Model):
     """单词基本信息表"""
     word = models.CharField(max_length=100, unique=True, verbose_name='单词拼写')
@@ -46,26 +103,106 @@ class WordBasic(models.Model):
     def __str__(self):
         return self.word
 
+class WordForm(models.Model):
+    """
+    单词词形索引：小写原形和屈折形式（复数、过去式、现在分词等）-> WordBasic
+
+    由 word_forms 模块生成，批量按文本查询单词时使用
+    """
+    KIND_CHOICES = [
+        ('exact', '原形'),
+        ('inflection', '屈折形式'),
+    ]
+
+    form = models.CharField(max_length=100, verbose_name='词形')
+    word_basic = models.ForeignKey(
+        WordBasic,
+        on_delete=models.CASCADE,
+        related_name='forms',
+        verbose_name='单词'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='类型')
+
+    class Meta:
+        verbose_name = '单词词形'
+        verbose_name_plural = '单词词形'
+        db_table = 'word_forms'
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'word_basic'], name='uniq_word_form'),
+        ]
+
+    def __str__(self):
+        return f"{self.form} -> {self.word_basic_id}"
+
+class MeaningSet(models.Model):
+    """
+    去重存储的释义JSON：内容相同的释义（jsonb 规范化文本的md5）只保存一份，BookWord 引用它
+
+    行写入后内容不再修改，由 meaning_sets 模块写入和缓存
+    """
+    content_hash = models.CharField(max_length=32, unique=True, verbose_name='内容哈希')
+    meanings = models.JSONField(verbose_name='词性及中文释义JSON')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '释义集'
+        verbose_name_plural = '释义集'
+        db_table = 'meaning_sets'
+
+    def __str__(self):
+        return self.content_hash
+
+
+class BookWordQuerySet(models.QuerySet):
+    def for_book(self, book):
+        """
+        词书中的全部单词；覆盖词书合并基础词书：
+        自己的行（去掉删除标记）+ 基础词书中没有被覆盖/删除的行，一条查询完成
+
+        Args:
+            book: VocabularyBook 或词书ID（传ID时基础词书用子查询取得）
+        """
+        if isinstance(book, VocabularyBook):
+            book_id, base_book_id = book.pk, book.base_book_id
+            if base_book_id is None:
+                return self.filter(vocabulary_book_id=book_id)
+        else:
+            book_id = book
+            base_book_id = Subquery(VocabularyBook.objects.filter(pk=book_id).values('base_book_id')[:1])
+
+        overlaid = BookWord.objects.filter(vocabulary_book_id=book_id, base_word_id=OuterRef('pk'))
+        return self.filter(
+            Q(vocabulary_book_id=book_id, is_removed=False)
+            | (Q(vocabulary_book_id=base_book_id) & ~Exists(overlaid))
+        )
+
+
 class BookWord(models.Model):
     """书籍单词表"""
+    # 单列索引由 (vocabulary_book, word_order) / (vocabulary_book, word_basic) 复合索引的前缀代替
     vocabulary_book = models.ForeignKey(
         VocabularyBook, 
         on_delete=models.CASCADE, 
         related_name='words',
         verbose_name='关联的词汇书',
-        null=True,  # 允许为空，以便迁移
-        blank=True  # 允许为空，以便迁移
+        db_index=False
     )
     word_basic = models.ForeignKey(
         WordBasic,
         on_delete=models.CASCADE,
         related_name='book_words',
-        verbose_name='关联的单词基本信息',
-        null=True,  # 允许为空，以便迁移
-        blank=True  # 允许为空，以便迁移
+        verbose_name='关联的单词基本信息'
     )
     word_order = models.IntegerField(default=0, verbose_name='单词在书中的顺序')
-    meanings = models.JSONField(verbose_name='词性及中文释义JSON', default=list)
+    # 基础释义去重存储在 meaning_sets 中，通过 meanings 属性读写；空释义时为空
+    meaning_set = models.ForeignKey(
+        MeaningSet,
+        on_delete=models.PROTECT,
+        related_name='book_words',
+        verbose_name='释义',
+        null=True,
+        blank=True
+    )
     example_sentence = models.TextField(blank=True, null=True, verbose_name='例句')
     
     # 新增自定义字段：用于词汇书特定的单词修改
@@ -87,27 +224,63 @@ class BookWord(models.Model):
         verbose_name='自定义释义（覆盖基础释义）'
     )
     
+    # 覆盖词书中的行：覆盖/删除了基础词书的哪一行（新增的单词为空）
+    base_word = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='overlay_entries',
+        verbose_name='覆盖的基础单词',
+        null=True,
+        blank=True
+    )
+    is_removed = models.BooleanField(default=False, verbose_name='在覆盖词书中删除')
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    objects = BookWordQuerySet.as_manager()
     
     class Meta:
         verbose_name = '书籍单词'
         verbose_name_plural = '书籍单词'
         db_table = 'book_words'
         indexes = [
-            models.Index(fields=['vocabulary_book', 'word_order'], name='idx_book_order')
+            models.Index(fields=['vocabulary_book', 'word_order'], name='idx_book_order'),
+            models.Index(fields=['vocabulary_book', 'word_basic'], name='idx_book_word_basic'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vocabulary_book', 'base_word'],
+                condition=Q(base_word__isnull=False),
+                name='uniq_overlay_base_word'
+            ),
         ]
     
+    @property
+    def meanings(self):
+        """基础释义：已通过 select_related 取出时直接使用，否则走进程内缓存"""
+        if self.meaning_set_id is None:
+            return []
+        from .meaning_sets import copy_meanings, get_meanings
+        if BookWord.meaning_set.is_cached(self):
+            return copy_meanings(self.meaning_set.meanings)
+        return get_meanings(self.meaning_set_id)
+
+    @meanings.setter
+    def meanings(self, value):
+        from .meaning_sets import intern_meanings
+        self.meaning_set_id = intern_meanings(value)
+
     # 优先级属性：自定义字段优先于基础字段
     @property
     def effective_word(self):
         """获取有效的单词拼写：自定义 > 基础"""
-        return self.custom_word or (self.word_basic.word if self.word_basic else "Unknown Word")
+        return self.custom_word or self.word_basic.word
     
     @property  
     def effective_phonetic(self):
         """获取有效的音标：自定义 > 基础"""
-        return self.custom_phonetic or (self.word_basic.phonetic_symbol if self.word_basic else None)
+        return self.custom_phonetic or self.word_basic.phonetic_symbol
     
     @property
     def effective_meanings(self):
@@ -124,6 +297,71 @@ class BookWord(models.Model):
 
 
 
+class MeaningTerm(models.Model):
+    """
+    释义词条索引：BookWord 有效释义（自定义优先）按分隔符拆分后的中文词条
+
+    由 meaning_terms 模块在导入和编辑单词时维护，中文反查英文单词时使用
+    """
+    term = models.CharField(max_length=100, verbose_name='释义词条')
+    pos = models.CharField(max_length=20, blank=True, default='', verbose_name='词性')
+    book_word = models.ForeignKey(
+        BookWord,
+        on_delete=models.CASCADE,
+        related_name='meaning_terms',
+        verbose_name='书籍单词'
+    )
+
+    class Meta:
+        verbose_name = '释义词条'
+        verbose_name_plural = '释义词条'
+        db_table = 'meaning_terms'
+        indexes = [
+            # 支持 term = %s 与 term LIKE '前缀%%'
+            models.Index(fields=['term'], name='idx_meaning_term', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.book_word_id}"
+
+
+class BookOverlap(models.Model):
+    """
+    词书重叠索引：book 与 other_book 共有的单词（按 word_basic_id 去重）数量
+
+    由 book_overlap 模块按词书计算，记录计算时双方的内容版本，版本变化后重新计算
+    """
+    book = models.ForeignKey(
+        VocabularyBook,
+        on_delete=models.CASCADE,
+        related_name='overlaps_from',
+        verbose_name='词汇书'
+    )
+    other_book = models.ForeignKey(
+        VocabularyBook,
+        on_delete=models.CASCADE,
+        related_name='overlaps_to',
+        verbose_name='重叠的词汇书'
+    )
+    shared_words = models.IntegerField(default=0, verbose_name='共有单词数')
+    book_words = models.IntegerField(default=0, verbose_name='词汇书单词数')
+    other_words = models.IntegerField(default=0, verbose_name='重叠词汇书单词数')
+    book_version = models.IntegerField(default=0, verbose_name='计算时词汇书的内容版本')
+    other_version = models.IntegerField(default=0, verbose_name='计算时重叠词汇书的内容版本')
+    computed_at = models.DateTimeField(verbose_name='计算时间')
+
+    class Meta:
+        verbose_name = '词书重叠'
+        verbose_name_plural = '词书重叠'
+        db_table = 'vocabulary_book_overlaps'
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'other_book'], name='uniq_book_overlap'),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} & {self.other_book_id}: {self.shared_words}"
+
+
 class StudentKnownWord(models.Model):
     """学生已认识单词表"""
     student = models.ForeignKey(
@@ -151,4 +389,312 @@ class StudentKnownWord(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.student.user.username} knows {self.word.word}"
\ No newline at end of file
+        return f"{self.student.user.username} knows {self.word.word}"
+
+
+class StudentKnownWordChange(models.Model):
+    """
+    学生已认识单词变更日志
+
+    自增ID即版本号，客户端持有版本令牌，只拉取之后的新增/移除。
+    word_id 不设外键，单词被删除后日志仍然保留
+    """
+    OP_CHOICES = [
+        ('add', '标记'),
+        ('remove', '取消标记'),
+    ]
+
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='known_word_changes',
+        verbose_name="学生",
+        db_index=False
+    )
+    word_id = models.BigIntegerField(verbose_name="单词ID")
+    op = models.CharField(max_length=6, choices=OP_CHOICES, verbose_name="操作")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="变更时间")
+
+    class Meta:
+        verbose_name = "已认识单词变更"
+        verbose_name_plural = verbose_name
+        db_table = 'vocabulary_known_word_changes'
+        indexes = [
+            models.Index(fields=['student', 'id'], name='idx_known_change_student'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.op} {self.word_id}"
+
+
+@receiver(post_save, sender=StudentKnownWord)
+def log_known_word_added(sender, instance, created, **kwargs):
+    """单条标记（接口单条POST、admin）写入变更日志；批量操作由 known_words 模块自行记录"""
+    if created:
+        from .known_words import record_change
+        record_change(instance.student_id, instance.word_id, 'add')
+
+
+@receiver(post_delete, sender=StudentKnownWord)
+def log_known_word_removed(sender, instance, origin=None, **kwargs):
+    """
+    直接删除已认识单词时写入变更日志；
+    由学生/单词删除级联触发时不记录（学生已不存在，被删除的单词也不会再出现在卡片中）
+    """
+    if not (isinstance(origin, StudentKnownWord) or getattr(origin, 'model', None) is StudentKnownWord):
+        return
+    from .known_words import record_change
+    record_change(instance.student_id, instance.word_id, 'remove')
+
+
+def _bump_content_version(book_id):
+    if book_id:
+        VocabularyBook.objects.filter(pk=book_id).update(content_version=F('content_version') + 1)
+        from .book_stats import schedule_stats_refresh
+        schedule_stats_refresh(book_id)
+
+
+@receiver(post_save, sender=VocabularyBook)
+def create_book_stats(sender, instance, created, **kwargs):
+    """新建词汇书（包括覆盖词书）后生成统计记录"""
+    if created:
+        from .book_stats import schedule_stats_refresh
+        schedule_stats_refresh(instance.pk)
+
+
+@receiver(post_save, sender=BookWord)
+def bump_book_version_on_save(sender, instance, **kwargs):
+    """单个单词新增/修改后递增词书内容版本；批量导入由导入流程自行递增"""
+    _bump_content_version(instance.vocabulary_book_id)
+
+
+@receiver(post_save, sender=BookWord)
+def sync_meaning_terms_on_save(sender, instance, update_fields=None, **kwargs):
+    """单个单词新增/修改释义后重建释义词条；批量导入由导入流程自行同步"""
+    if update_fields is not None and not {'meaning_set', 'custom_meanings', 'is_removed'} & set(update_fields):
+        return
+    from .meaning_terms import sync_meaning_terms
+    sync_meaning_terms([instance.pk])
+
+
+@receiver(post_delete, sender=BookWord)
+def bump_book_version_on_delete(sender, instance, origin=None, **kwargs):
+    """删除单词后递增词书内容版本；整本书删除时不处理"""
+    if isinstance(origin, VocabularyBook) or getattr(origin, 'model', None) is VocabularyBook:
+        return
+    _bump_content_version(instance.vocabulary_book_id)
+
+
+class PronunciationPrefetchStatus(models.Model):
+    """单词发音预取状态表（按规范化单词记录）"""
+    STATUS_CHOICES = [
+        ('cached', '已缓存'),
+        ('not_found', '上游无发音'),
+        ('failed', '获取失败'),
+    ]
+
+    # 与发音缓存一致，规范化单词不限长度
+    word = models.TextField(unique=True, verbose_name='规范化单词')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name='状态')
+    attempts = models.IntegerField(default=0, verbose_name='尝试次数')
+    last_error = models.CharField(max_length=255, blank=True, default='', verbose_name='最后错误')
+    fetched_at = models.DateTimeField(null=True, blank=True, verbose_name='缓存时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '发音预取状态'
+        verbose_name_plural = verbose_name
+        db_table = 'pronunciation_prefetch_status'
+        indexes = [
+            models.Index(fields=['status'], name='idx_prefetch_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.word} ({self.status})"
+
+
+class ImportJob(models.Model):
+    """词汇导入任务表：上传的文件先落盘，再在请求之外分块导入"""
+    STATUS_CHOICES = [
+        ('pending', '等待中'),
+        ('running', '导入中'),
+        ('completed', '已完成'),
+        ('failed', '失败'),
+    ]
+    SOURCE_CHOICES = [
+        ('api', '接口上传'),
+        ('admin', '后台导入'),
+    ]
+    MODE_CHOICES = [
+        ('upsert', '更新已有单词'),
+        ('append', '全部新建'),
+    ]
+    FILE_FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('pdf', 'PDF（后台提取单词表）'),
+        ('staged', 'admin暂存的CSV（预览确认后写入）'),
+    ]
+
+    vocabulary_book = models.ForeignKey(
+        VocabularyBook,
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name='目标词汇书'
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='vocabulary_import_jobs',
+        verbose_name='创建者',
+        null=True,
+        blank=True
+    )
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='api', verbose_name='来源')
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default='upsert', verbose_name='导入模式')
+    merge_existing_meanings = models.BooleanField(default=False, verbose_name='合并已有释义')
+    require_meaning = models.BooleanField(default=False, verbose_name='跳过无释义的行')
+    upload = models.FileField(upload_to='imports/%Y/%m/', blank=True, verbose_name='上传文件')
+    file_format = models.CharField(max_length=10, choices=FILE_FORMAT_CHOICES, default='csv', verbose_name='文件格式')
+    staging_batch = models.ForeignKey(
+        'ImportStagingBatch',
+        on_delete=models.SET_NULL,
+        related_name='import_jobs',
+        verbose_name='暂存批次（写入后删除）',
+        null=True,
+        blank=True
+    )
+    original_filename = models.CharField(max_length=255, blank=True, default='', verbose_name='原始文件名')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    total_rows = models.IntegerField(null=True, blank=True, verbose_name='总行数')
+    rows_done = models.IntegerField(default=0, verbose_name='已处理行数')
+    created_count = models.IntegerField(default=0, verbose_name='新建数')
+    updated_count = models.IntegerField(default=0, verbose_name='更新数')
+    skipped_count = models.IntegerField(default=0, verbose_name='跳过数')
+    error_count = models.IntegerField(default=0, verbose_name='错误数')
+    errors = models.JSONField(default=list, blank=True, verbose_name='错误明细（最多100条）')
+    message = models.TextField(blank=True, default='', verbose_name='说明')
+
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='本次运行开始时间')
+    rows_at_start = models.IntegerField(default=0, verbose_name='本次运行开始时已处理行数')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最后心跳时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '导入任务'
+        verbose_name_plural = '导入任务'
+        db_table = 'vocabulary_import_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'heartbeat_at'], name='idx_import_job_status'),
+        ]
+
+    def __str__(self):
+        return f"导入任务#{self.pk} -> {self.vocabulary_book_id} ({self.status})"
+
+    @property
+    def progress(self):
+        """进度百分比"""
+        if self.status == 'completed':
+            return 100.0
+        if not self.total_rows:
+            return 0.0
+        return round(min(self.rows_done / self.total_rows, 1) * 100, 2)
+
+    @property
+    def eta_seconds(self):
+        """按本次运行的处理速度估算剩余秒数"""
+        if self.status != 'running' or not self.total_rows or not self.started_at:
+            return None
+        from django.utils import timezone
+        elapsed = (timezone.now() - self.started_at).total_seconds()
+        processed = self.rows_done - self.rows_at_start
+        if elapsed <= 0 or processed <= 0:
+            return None
+        return round(max(self.total_rows - self.rows_done, 0) / (processed / elapsed), 1)
+
+
+
+class ImportStagingBatch(models.Model):
+    """admin导入暂存批次：上传的CSV解析一次后写入暂存表，预览和确认都基于暂存行"""
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name='导入令牌')
+    vocabulary_book = models.ForeignKey(
+        VocabularyBook,
+        on_delete=models.CASCADE,
+        related_name='import_staging_batches',
+        verbose_name='目标词汇书'
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='vocabulary_import_staging_batches',
+        verbose_name='创建者',
+        null=True,
+        blank=True
+    )
+    original_filename = models.CharField(max_length=255, blank=True, default='', verbose_name='原始文件名')
+    total_rows = models.IntegerField(default=0, verbose_name='总行数')
+    staged_rows = models.IntegerField(default=0, verbose_name='有效行数')
+    error_count = models.IntegerField(default=0, verbose_name='错误数')
+    errors = models.JSONField(default=list, blank=True, verbose_name='错误明细（最多100条）')
+    preview = models.JSONField(default=dict, blank=True, verbose_name='预览结果')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '导入暂存批次'
+        verbose_name_plural = '导入暂存批次'
+        db_table = 'vocabulary_import_staging'
+
+    def __str__(self):
+        return f"暂存批次 {self.token} -> {self.vocabulary_book_id}"
+
+
+class ImportStagingRow(models.Model):
+    """暂存的已解析CSV行"""
+    batch = models.ForeignKey(
+        ImportStagingBatch,
+        on_delete=models.CASCADE,
+        related_name='rows',
+        verbose_name='暂存批次'
+    )
+    row_number = models.IntegerField(verbose_name='CSV行号')
+    word = models.CharField(max_length=100, verbose_name='单词拼写')
+    phonetic_symbol = models.CharField(max_length=100, blank=True, default='', verbose_name='音标')
+    uk_pronunciation = models.CharField(max_length=200, blank=True, default='', verbose_name='英式发音URL')
+    us_pronunciation = models.CharField(max_length=200, blank=True, default='', verbose_name='美式发音URL')
+    meanings = models.JSONField(default=list, verbose_name='词性及中文释义JSON')
+    example_sentence = models.TextField(blank=True, default='', verbose_name='例句')
+    word_order = models.IntegerField(null=True, blank=True, verbose_name='CSV中的顺序')
+
+    class Meta:
+        verbose_name = '导入暂存行'
+        verbose_name_plural = '导入暂存行'
+        db_table = 'vocabulary_import_staging_rows'
+        indexes = [
+            models.Index(fields=['batch', 'word'], name='idx_staging_batch_word'),
+            models.Index(fields=['batch', 'row_number'], name='idx_staging_batch_row'),
+        ]
+
+
+class PresetBookLoad(models.Model):
+    """预设词书的加载记录：文件内容哈希未变化时重复加载直接跳过"""
+    source_name = models.CharField(max_length=100, unique=True, verbose_name='预设来源（文件名）')
+    vocabulary_book = models.OneToOneField(
+        VocabularyBook,
+        on_delete=models.CASCADE,
+        related_name='preset_load',
+        verbose_name='词汇书'
+    )
+    content_hash = models.CharField(max_length=64, verbose_name='文件内容SHA-256')
+    row_count = models.IntegerField(default=0, verbose_name='加载行数')
+    loaded_at = models.DateTimeField(auto_now=True, verbose_name='加载时间')
+
+    class Meta:
+        verbose_name = '预设词书加载记录'
+        verbose_name_plural = '预设词书加载记录'
+        db_table = 'preset_book_loads'
+
+    def __str__(self):
+        return f"{self.source_name} ({self.content_hash[:12]})"
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+词书单词顺序（BookWord.word_order）
+
+word_order 使用带间隔的整数（新追加的单词间隔 ORDER_GAP），移动或在书中间插入单词时
+取前后两个单词顺序值的中间值，只写一行；间隔用完时只重排插入点附近的一小段，
+并提交后台任务把整本书重新按 ORDER_GAP 均匀编号。请求中从不整本重排：附近的间隔
+全部用完时本次操作失败（OrderGapExhausted），整本重排交给后台任务，完成后重试即可。
+排序始终按 (word_order, id)，idx_book_order 上的范围查询不受影响。
+间隔排序之前的连续 1..N 词书由迁移 0023_respace_word_order 逐本重新编号。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BookWord, VocabularyBook
+from .word_forms import bump_book_version
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 相邻单词顺序值的间隔
+ORDER_GAP = 1024
+
+# 局部重排的初始窗口（插入点两侧各取的行数）与上限，超过上限直接整本重排
+LOCAL_WINDOW = 8
+MAX_LOCAL_WINDOW = 512
+
+# 后台整本重排线程池，同一本书只排队一次
+_rebalance_executor = ThreadPoolExecutor(max_workers=1)
+_pending_books = set()
+_pending_lock = threading.Lock()
+
+
+class OrderingError(Exception):
+    """锚点单词无效（不存在、不属于该词书或就是被移动的单词）"""
+
+
+class OrderGapExhausted(OrderingError):
+    """插入点附近没有可用的顺序间隔，已提交后台整本重排，稍后重试"""
+
+
+def next_order(max_order):
+    """在当前最大顺序值之后追加"""
+    return (max_order or 0) + ORDER_GAP
+
+
+def _book_rows(book, exclude_id):
+    queryset = BookWord.objects.for_book(book)
+    if exclude_id is not None:
+        queryset = queryset.exclude(pk=exclude_id)
+    return queryset
+
+
+def _at_or_before(row):
+    row_id, word_order = row
+    return Q(word_order__lt=word_order) | Q(word_order=word_order, id__lte=row_id)
+
+
+def _at_or_after(row):
+    row_id, word_order = row
+    return Q(word_order__gt=word_order) | Q(word_order=word_order, id__gte=row_id)
+
+
+def _rows_before(book, exclude_id, row, limit):
+    """(word_order, id) 小于等于 row 的行，倒序"""
+    return list(_book_rows(book, exclude_id).filter(
+        _at_or_before(row)
+    ).order_by('-word_order', '-id').values_list('id', 'word_order')[:limit])
+
+
+def _rows_after(book, exclude_id, row, limit):
+    """(word_order, id) 大于等于 row 的行，正序"""
+    return list(_book_rows(book, exclude_id).filter(
+        _at_or_after(row)
+    ).order_by('word_order', 'id').values_list('id', 'word_order')[:limit])
+
+
+def _neighbours(book, exclude_id, after=None, before=None):
+    """
+    确定目标位置前后相邻的两行 (id, word_order)，不存在时为None
+
+    after/before 都为空时放到最后
+    """
+    if after is not None or before is not None:
+        anchor_id = after if after is not None else before
+        if anchor_id == exclude_id:
+            raise OrderingError("不能以被移动的单词本身作为位置参照")
+        anchor = BookWord.objects.for_book(book).filter(pk=anchor_id).values_list(
+            'id', 'word_order'
+        ).first()
+        if anchor is None:
+            raise OrderingError(f"单词 {anchor_id} 不在该词汇书中")
+        if after is not None:
+            following = _rows_after(book, exclude_id, anchor, 2)
+            return anchor, following[1] if len(following) > 1 else None
+        preceding = _rows_before(book, exclude_id, anchor, 2)
+        return preceding[1] if len(preceding) > 1 else None, anchor
+
+    last = _book_rows(book, exclude_id).order_by('-word_order', '-id').values_list('id', 'word_order').first()
+    return last, None
+
+
+def _between(prev, nxt):
+    """前后两行之间可用的顺序值，没有间隔时返回None（书首的下界为0）"""
+    lo = prev[1] if prev is not None else 0
+    if nxt is None:
+        return lo + ORDER_GAP
+    hi = nxt[1]
+    if hi - lo < 2:
+        return None
+    return lo + (hi - lo) // 2
+
+
+def _rebalance_window(book, exclude_id, prev, nxt):
+    """
+    间隔用完时重排插入点两侧的一小段：窗口从 LOCAL_WINDOW 开始倍增，
+    直到窗口外侧两行之间的空间足够均匀分配
+
+    Returns:
+        (order, ids): 新位置的顺序值和改动过的行ID；窗口超过上限时返回 (None, [])
+    """
+    window = LOCAL_WINDOW
+    while window <= MAX_LOCAL_WINDOW:
+        before_rows = _rows_before(book, exclude_id, prev, window + 1) if prev is not None else []
+        after_rows = _rows_after(book, exclude_id, nxt, window + 1) if nxt is not None else []
+
+        lo = before_rows[window][1] if len(before_rows) > window else 0
+        ids = [row_id for row_id, _ in reversed(before_rows[:window])] + [None] + [
+            row_id for row_id, _ in after_rows[:window]
+        ]
+        if len(after_rows) > window:
+            hi = after_rows[window][1]
+        else:
+            hi = lo + ORDER_GAP * (len(ids) + 1)
+
+        step = (hi - lo) // (len(ids) + 1)
+        if step >= 2:
+            orders = [lo + step * (index + 1) for index in range(len(ids))]
+            changed = [BookWord(pk=row_id, word_order=order) for row_id, order in zip(ids, orders) if row_id is not None]
+            BookWord.objects.bulk_update(changed, ['word_order'])
+            return orders[ids.index(None)], [book_word.pk for book_word in changed]
+        window *= 2
+    return None, []
+
+
+def _rebalance_book_sql(cursor, book_id):
+    cursor.execute(
+        """
+        UPDATE book_words bw SET word_order = ranked.position * %s
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY word_order, id) AS position
+            FROM book_words WHERE vocabulary_book_id = %s
+        ) ranked
+        WHERE bw.id = ranked.id AND bw.word_order <> ranked.position * %s
+        """,
+        [ORDER_GAP, book_id, ORDER_GAP]
+    )
+    changed = cursor.rowcount
+    _sync_overlay_orders(cursor, book_id)
+    return changed
+
+
+def _sync_overlay_orders(cursor, book_id, base_word_ids=None):
+    """基础词书的顺序变化后，同步覆盖词书中覆盖行/删除标记的 word_order（可只同步指定的基础行）"""
+    sql = """
+        UPDATE book_words o SET word_order = b.word_order
+        FROM book_words b
+        WHERE o.base_word_id = b.id AND b.vocabulary_book_id = %s AND o.word_order <> b.word_order
+    """
+    params = [book_id]
+    if base_word_ids is not None:
+        sql += " AND b.id = ANY(%s)"
+        params.append(list(base_word_ids))
+    cursor.execute(sql, params)
+
+
+def rebalance_book(book_id):
+    """
+    整本书按 (word_order, id) 重新编号为 ORDER_GAP 的倍数，顺序不变；
+    覆盖词书的顺序跟随基础词书，不单独重排
+
+    Returns:
+        int: 实际改动的行数
+    """
+    with transaction.atomic():
+        book = VocabularyBook.objects.select_for_update().filter(pk=book_id).first()
+        if book is None or book.base_book_id is not None:
+            return 0
+        with connection.cursor() as cursor:
+            changed = _rebalance_book_sql(cursor, book_id)
+        if changed:
+            bump_book_version(book_id)
+    logger.info(f"词汇书 {book_id} 单词顺序重排完成，改动 {changed} 行")
+    return changed
+
+
+def _rebalance_in_thread(book_id):
+    with _pending_lock:
+        _pending_books.discard(book_id)
+    try:
+        rebalance_book(book_id)
+    except Exception as e:
+        logger.error(f"词汇书 {book_id} 单词顺序重排失败: {e}")
+    finally:
+        # 后台线程使用独立的数据库连接，结束时关闭
+        connection.close()
+
+
+def schedule_rebalance(book_id):
+    """事务提交后在后台整本重排，同一本书已在排队时不重复提交"""
+    def submit():
+        with _pending_lock:
+            if book_id in _pending_books:
+                return
+            _pending_books.add(book_id)
+        _rebalance_executor.submit(_rebalance_in_thread, book_id)
+
+    transaction.on_commit(submit)
+
+
+def _claim_position(book, exclude_id, after=None, before=None):
+    """
+    计算目标位置的顺序值（调用方需持有词书行锁）
+
+    Returns:
+        (order, rebalanced): rebalanced 表示做过局部重排
+
+    Raises:
+        OrderGapExhausted: 附近的间隔全部用完（调用方在事务外提交整本重排）
+    """
+    prev, nxt = _neighbours(book, exclude_id, after, before)
+    order = _between(prev, nxt)
+    if order is not None:
+        return order, False
+
+    if book.base_book_id is not None:
+        # 覆盖词书不能改写基础词书的顺序值
+        raise OrderingError("该位置附近没有可用的顺序间隔，请选择其他位置")
+
+    order, changed_ids = _rebalance_window(book, exclude_id, prev, nxt)
+    if order is None:
+        raise OrderGapExhausted("该位置附近的顺序间隔已用完，已安排后台重排，请稍后重试")
+    with connection.cursor() as cursor:
+        _sync_overlay_orders(cursor, book.id, changed_ids)
+    schedule_rebalance(book.id)
+    return order, True
+
+
+def move_book_word(book_word, after=None, before=None):
+    """
+    把单词移动到 after 之后 / before 之前（都为空时移到最后），通常只更新这一行
+
+    Returns:
+        bool: 是否触发了重排
+    """
+    if book_word.base_word_id is not None:
+        raise OrderingError("覆盖词书中只能移动新增的单词")
+    try:
+        with transaction.atomic():
+            # 锁定词汇书，同一本书的移动/插入串行执行
+            book = VocabularyBook.objects.select_for_update().get(pk=book_word.vocabulary_book_id)
+            order, rebalanced = _claim_position(book, book_word.id, after, before)
+            BookWord.objects.filter(pk=book_word.pk).update(word_order=order)
+            BookWord.objects.filter(base_word_id=book_word.pk).update(word_order=order)
+            bump_book_version(book.id)
+    except OrderGapExhausted:
+        # 事务已回滚，在事务外提交整本重排
+        schedule_rebalance(book_word.vocabulary_book_id)
+        raise
+    book_word.word_order = order
+    return rebalanced
+
+
+def insert_book_word(book, word_basic, after=None, before=None, **fields):
+    """
+    在指定位置新建词书单词，其他单词的顺序值通常不变；词汇量直接加一，不重新统计整本书
+
+    Returns:
+        BookWord
+    """
+    try:
+        with transaction.atomic():
+            book = VocabularyBook.objects.select_for_update().get(pk=book.pk)
+            order, _ = _claim_position(book, None, after, before)
+            book_word = BookWord.objects.create(
+                vocabulary_book=book, word_basic=word_basic, word_order=order, **fields
+            )
+            VocabularyBook.objects.filter(pk=book.pk).update(
+                word_count=F('word_count') + 1, updated_at=timezone.now()
+            )
+    except OrderGapExhausted:
+        # 事务已回滚，在事务外提交整本重排
+        schedule_rebalance(book.pk)
+        raise
+    return book_word
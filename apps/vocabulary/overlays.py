@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+覆盖词书（写时复制）
+
+覆盖词书通过 base_book 引用一本基础词书（通常是系统预设），自己只保存改动：
+- 新增：普通的 BookWord 行（base_word 为空）
+- 修改：base_word 指向基础行的覆盖行，复制基础行的内容后在 custom_* 字段上修改
+- 删除：base_word 指向基础行、is_removed=True 的删除标记
+读取统一使用 BookWord.objects.for_book(book)，一条查询合并基础词书与覆盖行，
+创建覆盖词书不复制任何单词，存储量与改动数量成正比。
+
+覆盖行替换或恢复基础行时，该覆盖词书学习计划中的学习阶段随单词一起迁移到合并后可见的行，
+学生的学习进度不会丢失。
+"""
+
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .models import BookWord, VocabularyBook
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+
+class OverlayError(Exception):
+    """覆盖词书操作不合法（基础词书本身是覆盖词书、单词不属于该词书等）"""
+
+
+def create_overlay(base_book, user=None, name=None):
+    """
+    基于 base_book 创建覆盖词书，不复制单词
+
+    Returns:
+        VocabularyBook
+    """
+    if base_book.base_book_id is not None:
+        raise OverlayError("不能基于覆盖词书再创建覆盖词书")
+    overlay = VocabularyBook.objects.create(
+        name=name or f"{base_book.name}（自定义）",
+        base_book=base_book,
+        created_by=user if user is not None and user.is_authenticated else None,
+        word_count=base_book.word_count,
+    )
+    logger.info(f"创建覆盖词书 {overlay.id}，基础词书 {base_book.id}")
+    return overlay
+
+
+def refresh_word_count(book):
+    """按合并后的单词数刷新词汇量"""
+    book.word_count = BookWord.objects.for_book(book).count()
+    book.save(update_fields=['word_count', 'updated_at'])
+    return book.word_count
+
+
+def _check_member(overlay, book_word):
+    if book_word.vocabulary_book_id == overlay.id:
+        return
+    if overlay.base_book_id is None or book_word.vocabulary_book_id != overlay.base_book_id:
+        raise OverlayError(f"单词 {book_word.id} 不在该词汇书中")
+
+
+# 同一计划中目标行已有学习阶段时，删除目标行上的那条
+_DROP_SHADOWED_STAGES_SQL = """
+    WITH moves AS (SELECT * FROM unnest(%s::bigint[], %s::bigint[]) AS m(from_id, to_id))
+    DELETE FROM word_learning_stages t
+    USING moves m, word_learning_stages f, learning_plans lp
+    WHERE t.book_word_id = m.to_id AND f.book_word_id = m.from_id
+      AND f.learning_plan_id = t.learning_plan_id
+      AND lp.id = t.learning_plan_id AND lp.vocabulary_book_id = %s
+"""
+
+_MOVE_STAGES_SQL = """
+    WITH moves AS (SELECT * FROM unnest(%s::bigint[], %s::bigint[]) AS m(from_id, to_id))
+    UPDATE word_learning_stages s SET book_word_id = m.to_id
+    FROM moves m, learning_plans lp
+    WHERE s.book_word_id = m.from_id AND lp.id = s.learning_plan_id AND lp.vocabulary_book_id = %s
+"""
+
+
+def move_plan_stages(overlay, moves):
+    """
+    覆盖词书学习计划中的学习阶段按 {原行ID: 新行ID} 批量迁移，两条语句完成；
+    目标行在同一计划中已有学习阶段时，保留被迁移的那条（学生最近使用的行）
+
+    Returns:
+        int: 迁移的学习阶段数
+    """
+    if not moves:
+        return 0
+    params = [list(moves), list(moves.values()), overlay.id]
+    with connection.cursor() as cursor:
+        cursor.execute(_DROP_SHADOWED_STAGES_SQL, params)
+        cursor.execute(_MOVE_STAGES_SQL, params)
+        return cursor.rowcount
+
+
+def _move_plan_stages(overlay, from_id, to_id):
+    return move_plan_stages(overlay, {from_id: to_id})
+
+
+def editable_word(overlay, book_word):
+    """
+    返回覆盖词书中可以直接修改的行：自己的行原样返回，基础词书的行复制为覆盖行
+
+    Returns:
+        BookWord
+    """
+    _check_member(overlay, book_word)
+    if book_word.vocabulary_book_id == overlay.id:
+        if book_word.is_removed:
+            raise OverlayError("该单词已从词汇书中删除")
+        return book_word
+
+    with transaction.atomic():
+        entry, created = BookWord.objects.get_or_create(
+            vocabulary_book=overlay,
+            base_word=book_word,
+            defaults={
+                'word_basic_id': book_word.word_basic_id,
+                'word_order': book_word.word_order,
+                'meaning_set_id': book_word.meaning_set_id,
+                'example_sentence': book_word.example_sentence,
+                'custom_word': book_word.custom_word,
+                'custom_phonetic': book_word.custom_phonetic,
+                'custom_meanings': book_word.custom_meanings,
+            },
+        )
+        if created:
+            # 覆盖行替换了基础行，学习进度跟到覆盖行上
+            _move_plan_stages(overlay, book_word.id, entry.id)
+    if not created and entry.is_removed:
+        raise OverlayError("该单词已从词汇书中删除")
+    return entry
+
+
+def remove_word(overlay, book_word):
+    """从覆盖词书中删除单词：新增的行直接删除，基础词书的行写入删除标记"""
+    _check_member(overlay, book_word)
+    with transaction.atomic():
+        if book_word.vocabulary_book_id == overlay.id and book_word.base_word_id is None:
+            book_word.delete()
+        else:
+            base_word_id = book_word.base_word_id or book_word.id
+            base_word = BookWord.objects.get(pk=base_word_id)
+            entry, created = BookWord.objects.get_or_create(
+                vocabulary_book=overlay,
+                base_word=base_word,
+                defaults={
+                    'word_basic_id': base_word.word_basic_id,
+                    'word_order': base_word.word_order,
+                    'is_removed': True,
+                },
+            )
+            if not created and not entry.is_removed:
+                entry.is_removed = True
+                entry.save(update_fields=['is_removed', 'updated_at'])
+        refresh_word_count(overlay)
+
+
+def restore_word(overlay, book_word):
+    """撤销覆盖词书对基础单词的修改或删除，恢复为基础词书中的内容"""
+    _check_member(overlay, book_word)
+    base_word_id = book_word.base_word_id or book_word.id
+    if book_word.vocabulary_book_id == overlay.id and book_word.base_word_id is None:
+        raise OverlayError("新增的单词没有可恢复的基础内容")
+    with transaction.atomic():
+        for entry in BookWord.objects.filter(vocabulary_book=overlay, base_word_id=base_word_id):
+            # 删除覆盖行前把学习进度迁回基础行，避免被级联删除
+            _move_plan_stages(overlay, entry.id, base_word_id)
+            entry.delete()
+        refresh_word_count(overlay)
+
+
+def overlay_summary(overlay):
+    """覆盖词书的改动统计"""
+    counts = BookWord.objects.filter(vocabulary_book=overlay).aggregate(
+        added=Count('id', filter=Q(base_word__isnull=True)),
+        overridden=Count('id', filter=Q(base_word__isnull=False, is_removed=False)),
+        removed=Count('id', filter=Q(is_removed=True)),
+    )
+    counts['base_book_id'] = overlay.base_book_id
+    return counts
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+"""
+PDF/扫描件单词表提取
+
+教师提供的教材词汇表多为PDF或扫描件，处理分三步：
+1. 逐页提取文本：进程池并行，每个任务处理一段连续页面（只打开一次文档）。
+   优先使用 PyMuPDF 读取文本层，文本过少的页面视为扫描页，渲染后用 tesseract 识别；
+   没有安装 PyMuPDF 时退回 pdfminer.six（只能读取文本层）
+2. 分词：识别 "apple /ˈæpl/ n. 苹果" 形式的词汇表行；页面中没有词汇表行时按普通单词表处理
+3. 匹配 WordBasic：通过 word_forms 词形索引把大小写/屈折形式映射回已有单词，
+   单词表模式下未匹配的文本（页眉、页码、识别噪声）丢弃
+
+结果写入导入暂存表（import_staging.stage_rows），之后与CSV导入一样预览、确认导入。
+"""
+
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .importing import ImportFormatError
+from .import_staging import stage_rows
+from .models import WordForm
+from .word_forms import normalize_form
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+    from pdfminer.pdfpage import PDFPage
+except ImportError:
+    pdfminer_extract_text = None
+    PDFPage = None
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 文本层少于该字符数的页面视为扫描页，需要OCR
+MIN_TEXT_CHARS = 20
+
+# 每个进程任务处理的页数
+PAGES_PER_TASK = 8
+
+# OCR 渲染分辨率
+OCR_DPI = 300
+
+# 自动判断版式时，词汇表行占含英文行的比例达到该值即按词汇表处理
+GLOSSARY_LINE_RATIO = 0.3
+
+# 汇总中保留的未匹配单词数量
+MAX_REPORTED_UNMATCHED = 50
+
+# 单次词形查询的单词数量
+MATCH_BATCH_SIZE = 2000
+
+OCR_MODES = ('auto', 'always', 'never')
+LAYOUTS = ('auto', 'glossary', 'words')
+
+_CJK = re.compile(r'[㐀-鿿豈-﫿]')
+_NUMBERING = re.compile(r'^\s*(?:\d+\s*[.、)）]|[•·●■□\-*])\s*')
+_PHONETIC = re.compile(r'[/\[［][^/\]］]{1,60}[/\]］]')
+_POS = re.compile(
+    r'\b(n|v|vt|vi|adj|adv|prep|pron|conj|num|art|int|interj|aux|modal|abbr|phr)\.\s*(?:[&/,]\s*)?$',
+    re.IGNORECASE
+)
+_HEADWORD = re.compile(r"^[A-Za-z][A-Za-z'’\-. ]{0,98}[A-Za-z.]$|^[A-Za-z]$")
+_PAGE_REFERENCE = re.compile(r'\s*[(（]?\s*P\.?\s*\d+\s*[)）]?\s*$', re.IGNORECASE)
+_TOKEN = re.compile(r"[A-Za-z][A-Za-z'’\-]*[A-Za-z]")
+
+
+class PdfExtractionError(ImportFormatError):
+    """PDF无法读取，或服务器缺少所需的依赖"""
+
+
+def ocr_available():
+    """是否可以进行OCR（需要 pytesseract 和 tesseract 程序）"""
+    if pytesseract is None or fitz is None:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def default_workers():
+    return getattr(settings, 'VOCABULARY_PDF_WORKERS', None) or min(os.cpu_count() or 1, 4)
+
+
+def _ocr_lang():
+    return getattr(settings, 'VOCABULARY_PDF_OCR_LANG', 'eng+chi_sim')
+
+
+# ---------------------------------------------------------------------------
+# 第一步：逐页提取（在子进程中执行，不访问数据库）
+# ---------------------------------------------------------------------------
+
+def _init_worker():
+    # tesseract 自身会开多线程，进程池中每个进程限制为单线程，避免CPU超额竞争
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _ocr_page(page, dpi, lang):
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def _extract_page_range(path, start, stop, ocr, dpi, lang):
+    """
+    提取 [start, stop) 页的文本
+
+    Returns:
+        list[(页码, 文本, 方式)]：方式为 'text'、'ocr' 或 'empty'
+    """
+    results = []
+    if fitz is None:
+        for page_number in range(start, stop):
+            text = pdfminer_extract_text(path, page_numbers=[page_number]) or ''
+            results.append((page_number + 1, text, 'text' if text.strip() else 'empty'))
+        return results
+
+    with fitz.open(path) as document:
+        for page_number in range(start, stop):
+            page = document.load_page(page_number)
+            text = '' if ocr == 'always' else page.get_text('text', sort=True)
+            method = 'text'
+            if ocr != 'never' and len(text.strip()) < MIN_TEXT_CHARS:
+                text = _ocr_page(page, dpi, lang)
+                method = 'ocr'
+            if not text.strip():
+                method = 'empty'
+            results.append((page_number + 1, text, method))
+    return results
+
+
+def _page_count(path):
+    if fitz is not None:
+        with fitz.open(path) as document:
+            return document.page_count
+    with open(path, 'rb') as fp:
+        return sum(1 for _ in PDFPage.get_pages(fp))
+
+
+def extract_pages(path, workers=None, ocr='auto', dpi=OCR_DPI, lang=None):
+    """
+    并行提取PDF每一页的文本
+
+    Args:
+        path: PDF文件路径（子进程按路径各自打开，不在进程间传递文件内容）
+        workers: 进程数，1 时在当前进程中执行
+        ocr: 'auto' 文本层过少时OCR，'always' 全部OCR，'never' 不OCR
+
+    Returns:
+        (pages, stats): pages 为按页码排序的 [(页码, 文本, 方式)]
+
+    Raises:
+        PdfExtractionError
+    """
+    if ocr not in OCR_MODES:
+        raise PdfExtractionError(f"不支持的OCR方式，可选: {', '.join(OCR_MODES)}")
+    if fitz is None and pdfminer_extract_text is None:
+        raise PdfExtractionError("服务器未安装 PyMuPDF 或 pdfminer.six，无法读取PDF")
+    if ocr != 'never' and not ocr_available():
+        if ocr == 'always':
+            raise PdfExtractionError("服务器未安装 PyMuPDF、pytesseract 或 tesseract，无法进行OCR")
+        ocr = 'never'
+
+    started = time.perf_counter()
+    try:
+        page_count = _page_count(path)
+    except Exception as e:
+        raise PdfExtractionError(f"无法读取PDF文件: {e}")
+
+    lang = lang or _ocr_lang()
+    workers = max(1, min(workers or default_workers(), -(-page_count // PAGES_PER_TASK) or 1))
+    ranges = [
+        (start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+
+    pages = []
+    try:
+        if workers == 1:
+            for start, stop in ranges:
+                pages.extend(_extract_page_range(path, start, stop, ocr, dpi, lang))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                futures = [
+                    executor.submit(_extract_page_range, path, start, stop, ocr, dpi, lang)
+                    for start, stop in ranges
+                ]
+                for future in futures:
+                    pages.extend(future.result())
+    except PdfExtractionError:
+        raise
+    except Exception as e:
+        raise PdfExtractionError(f"PDF提取失败: {e}")
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'pages': page_count,
+        'text_pages': sum(1 for _, _, method in pages if method == 'text'),
+        'ocr_pages': sum(1 for _, _, method in pages if method == 'ocr'),
+        'empty_pages': sum(1 for _, _, method in pages if method == 'empty'),
+        'workers': workers,
+        'ocr': ocr,
+        'seconds': round(seconds, 3),
+        'pages_per_second': round(page_count / seconds, 2) if seconds else None,
+    }
+    return pages, stats
+
+
+# ---------------------------------------------------------------------------
+# 第二步：分词
+# ---------------------------------------------------------------------------
+
+def parse_glossary_line(line):
+    """
+    解析一行词汇表："apple /ˈæpl/ n. 苹果"、"3. look after 照顾 P12"
+
+    Returns:
+        dict或None: CSV导入格式的行（word, phonetic_symbol, part_of_speech, chinese_meaning）
+    """
+    line = _NUMBERING.sub('', line.strip())
+    match = _CJK.search(line)
+    if match is None:
+        return None
+    head, meaning = line[:match.start()], _PAGE_REFERENCE.sub('', line[match.start():]).strip()
+
+    phonetic = ''
+    phonetic_match = _PHONETIC.search(head)
+    if phonetic_match is not None:
+        phonetic = phonetic_match.group(0)
+        head = head[:phonetic_match.start()] + ' ' + head[phonetic_match.end():]
+
+    pos_list = []
+    head = head.strip()
+    while True:
+        pos_match = _POS.search(head)
+        if pos_match is None:
+            break
+        pos_list.insert(0, pos_match.group(1).lower() + '.')
+        head = head[:pos_match.start()].rstrip()
+
+    word = re.sub(r'\s+', ' ', head).strip(' .')
+    if not word or not _HEADWORD.match(word):
+        return None
+    return {
+        'word': word,
+        'phonetic_symbol': phonetic,
+        'part_of_speech': ';'.join(pos_list),
+        'chinese_meaning': meaning,
+    }
+
+
+def tokenize_pages(pages, layout='auto'):
+    """
+    将各页文本拆成候选单词
+
+    Args:
+        layout: 'glossary' 只取词汇表行，'words' 取全部英文单词，'auto' 按词汇表行的比例判断
+
+    Returns:
+        (layout, entries): entries 为 [(页码, 行dict)]；words 模式下行dict只有 word
+    """
+    if layout not in LAYOUTS:
+        raise PdfExtractionError(f"不支持的版式，可选: {', '.join(LAYOUTS)}")
+
+    glossary = []
+    english_lines = 0
+    for page_number, text, _ in pages:
+        for line in text.splitlines():
+            if not _TOKEN.search(line):
+                continue
+            english_lines += 1
+            row = parse_glossary_line(line)
+            if row is not None:
+                glossary.append((page_number, row))
+
+    if layout == 'auto':
+        layout = 'glossary' if english_lines and len(glossary) >= english_lines * GLOSSARY_LINE_RATIO else 'words'
+    if layout == 'glossary':
+        return layout, glossary
+
+    tokens = []
+    for page_number, text, _ in pages:
+        for token in _TOKEN.findall(text):
+            tokens.append((page_number, {'word': token.replace('’', "'")}))
+    return layout, tokens
+
+
+# ---------------------------------------------------------------------------
+# 第三步：匹配 WordBasic
+# ---------------------------------------------------------------------------
+
+def _match_forms(forms):
+    """
+    词形 -> WordBasic 单词，原形优先于屈折形式
+
+    Returns:
+        dict: {form: (word, kind)}
+    """
+    matched = {}
+    forms = list(forms)
+    for offset in range(0, len(forms), MATCH_BATCH_SIZE):
+        for form, kind, word in WordForm.objects.filter(
+            form__in=forms[offset:offset + MATCH_BATCH_SIZE]
+        ).order_by('form', 'word_basic_id').values_list('form', 'kind', 'word_basic__word'):
+            if form not in matched or (kind == 'exact' and matched[form][1] != 'exact'):
+                matched[form] = (word, kind)
+    return matched
+
+
+def match_entries(layout, entries):
+    """
+    把候选单词对应到 WordBasic，并按单词去重（保留第一次出现）
+
+    - 词汇表模式：原形与已有单词相同（忽略大小写）时使用已有拼写，否则作为新单词保留
+    - 单词表模式：原形或屈折形式匹配的单词替换为原形，未匹配的丢弃
+
+    Returns:
+        (rows, stats)
+    """
+    matched = _match_forms({normalize_form(row['word']) for _, row in entries} - {''})
+
+    rows = {}
+    unmatched = {}
+    duplicates = 0
+    matched_words = 0
+    for page_number, row in entries:
+        form = normalize_form(row['word'])
+        hit = matched.get(form)
+        if layout == 'glossary':
+            if hit is not None and hit[1] == 'exact':
+                row = dict(row, word=hit[0])
+        elif hit is None:
+            if form:
+                unmatched.setdefault(form, page_number)
+            continue
+        else:
+            row = dict(row, word=hit[0])
+        if row['word'] in rows:
+            duplicates += 1
+            continue
+        rows[row['word']] = row
+        if hit is not None:
+            matched_words += 1
+
+    stats = {
+        'layout': layout,
+        'candidates': len(entries),
+        'rows': len(rows),
+        'matched_words': matched_words,
+        'duplicates': duplicates,
+        'unmatched_count': len(unmatched),
+        'unmatched': sorted(unmatched)[:MAX_REPORTED_UNMATCHED],
+    }
+    return list(rows.values()), stats
+
+
+# ---------------------------------------------------------------------------
+# 完整流程
+# ---------------------------------------------------------------------------
+
+def extract_word_rows(path, layout='auto', workers=None, ocr='auto'):
+    """
+    PDF -> CSV导入格式的行
+
+    Returns:
+        (rows, stats)
+    """
+    pages, stats = extract_pages(path, workers=workers, ocr=ocr)
+    layout, entries = tokenize_pages(pages, layout=layout)
+    rows, match_stats = match_entries(layout, entries)
+    stats.update(match_stats)
+    logger.info(
+        f"PDF提取完成: {stats['pages']} 页（OCR {stats['ocr_pages']} 页），"
+        f"{stats['pages_per_second']} 页/秒，{layout} 模式得到 {stats['rows']} 个单词"
+    )
+    return rows, stats
+
+
+def _write_temp_file(uploaded_file):
+    """上传文件在内存中时先写入临时文件，子进程按路径读取"""
+    uploaded_file.seek(0)
+    handle = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    with handle:
+        for chunk in uploaded_file.chunks() if hasattr(uploaded_file, 'chunks') else iter(
+            lambda: uploaded_file.read(1024 * 1024), b''
+        ):
+            handle.write(chunk)
+    return handle.name
+
+
+def stage_pdf(book, uploaded_file, user=None, filename='', layout='auto', workers=None, ocr='auto'):
+    """
+    提取上传的PDF并写入导入暂存表
+
+    Args:
+        uploaded_file: UploadedFile、文件对象或文件路径
+
+    Returns:
+        (ImportStagingBatch, stats)
+    """
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        path, temporary = os.fspath(uploaded_file), False
+    elif hasattr(uploaded_file, 'temporary_file_path'):
+        path, temporary = uploaded_file.temporary_file_path(), False
+    else:
+        path, temporary = _write_temp_file(uploaded_file), True
+
+    try:
+        rows, stats = extract_word_rows(path, layout=layout, workers=workers, ocr=ocr)
+    finally:
+        if temporary:
+            os.unlink(path)
+
+    filename = filename or getattr(uploaded_file, 'name', '') or os.path.basename(path)
+    batch = stage_rows(book, rows, user=user, filename=filename)
+    return batch, stats
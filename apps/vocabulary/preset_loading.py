@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""
+系统预设词书快速加载
+
+部署时按文件重新加载预设词书（如 utils/沪教牛津版(七下).csv），不经过逐行导入：
+- 文件内容的 SHA-256 记录在 preset_book_loads 中，内容未变化时直接跳过，重复执行是幂等的
+- 行在Python中只做清洗（与CSV导入相同的 prepare_row / 释义解析），边解析边用
+  COPY 写入临时暂存表，不在内存中保留整个文件
+- 之后用固定数量的集合语句合并：新单词、释义集、词书中已有单词的更新（只更新实际变化的行）、
+  新增单词；文件中已经没有的单词默认保留，指定 prune 时删除没有学习记录和覆盖引用的行
+- 词书以文件名（不含扩展名）作为预设来源名，首次加载时沿用同名的系统预设词书
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .importing import (
+    ImportFormatError, ImportSummary, RowError, csv_dict_reader, detect_encoding, prepare_row, validate_columns
+)
+from .meaning_sets import normalize_meanings
+from .meaning_terms import sync_meaning_terms
+from .models import BookWord, PresetBookLoad, VocabularyBook
+from .ordering import ORDER_GAP
+from .word_forms import bump_book_version, sync_word_forms
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 同一预设来源的加载串行执行（多个部署进程同时加载时不会重复建书）
+_LOCK_NAMESPACE = 3403
+
+PRESET_SUFFIXES = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# 计算文件哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_STAGING_COLUMNS = (
+    'row_number', 'word', 'phonetic_symbol', 'uk_pronunciation', 'us_pronunciation',
+    'meanings', 'example_sentence', 'word_order',
+)
+
+_CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE preset_staging_rows (
+        row_number integer PRIMARY KEY,
+        word varchar(100) NOT NULL,
+        phonetic_symbol text NOT NULL,
+        uk_pronunciation text NOT NULL,
+        us_pronunciation text NOT NULL,
+        meanings jsonb,
+        example_sentence text NOT NULL,
+        word_order integer
+    ) ON COMMIT DROP
+"""
+
+# CSV格式中未加引号的空字段为NULL：释义和顺序为空时写入NULL，文本列写入空字符串
+_COPY_SQL = f"""
+    COPY preset_staging_rows ({', '.join(_STAGING_COLUMNS)}) FROM STDIN
+    WITH (FORMAT csv, FORCE_NOT_NULL (word, phonetic_symbol, uk_pronunciation, us_pronunciation, example_sentence))
+"""
+
+# 文件内重复的单词只保留最后一行（与导入接口的 upsert 结果一致）
+_DEDUPE_SQL = """
+    DELETE FROM preset_staging_rows s
+    USING preset_staging_rows f
+    WHERE f.word = s.word AND f.row_number > s.row_number
+"""
+
+_INSERT_WORD_BASICS_SQL = """
+    INSERT INTO word_basics (word, phonetic_symbol, uk_pronunciation, us_pronunciation, created_at, updated_at)
+    SELECT s.word, s.phonetic_symbol, s.uk_pronunciation, s.us_pronunciation, %(now)s, %(now)s
+    FROM preset_staging_rows s
+    ORDER BY s.row_number
+    ON CONFLICT (word) DO NOTHING
+    RETURNING id
+"""
+
+# 与 meaning_sets 模块的哈希一致：md5(jsonb 文本)
+_INSERT_MEANING_SETS_SQL = """
+    INSERT INTO meaning_sets (content_hash, meanings, created_at)
+    SELECT DISTINCT ON (md5(s.meanings::text)) md5(s.meanings::text), s.meanings, %(now)s
+    FROM preset_staging_rows s
+    WHERE s.meanings IS NOT NULL
+    ORDER BY md5(s.meanings::text)
+    ON CONFLICT (content_hash) DO NOTHING
+"""
+
+# 文件中的每个单词在词书中的目标值；文件中的 word_order 是位置（1, 2, 3...，导出文件也是如此），
+# 按 ORDER_GAP 放大（与 BookWordImporter 一致），未指定时按文件顺序以 ORDER_GAP 为间隔，
+# 重复加载同一文件得到相同的顺序，不会产生无意义的更新
+_INCOMING_CTE = """
+    WITH incoming AS (
+        SELECT wb.id AS word_basic_id,
+               COALESCE(s.word_order * %(gap)s, s.row_number * %(gap)s) AS word_order,
+               ms.id AS meaning_set_id,
+               s.example_sentence
+        FROM preset_staging_rows s
+        JOIN word_basics wb ON wb.word = s.word
+        LEFT JOIN meaning_sets ms ON ms.content_hash = md5(s.meanings::text)
+    )
+"""
+
+_UPDATE_BOOK_WORDS_SQL = _INCOMING_CTE + """
+    UPDATE book_words bw
+    SET word_order = i.word_order, meaning_set_id = i.meaning_set_id,
+        example_sentence = i.example_sentence, updated_at = %(now)s
+    FROM incoming i
+    WHERE bw.vocabulary_book_id = %(book_id)s AND bw.word_basic_id = i.word_basic_id
+      AND (bw.word_order, bw.meaning_set_id, bw.example_sentence)
+          IS DISTINCT FROM (i.word_order, i.meaning_set_id, i.example_sentence)
+    RETURNING bw.id
+"""
+
+_INSERT_BOOK_WORDS_SQL = _INCOMING_CTE + """
+    INSERT INTO book_words (vocabulary_book_id, word_basic_id, word_order, meaning_set_id, example_sentence,
+                            is_removed, created_at, updated_at)
+    SELECT %(book_id)s, i.word_basic_id, i.word_order, i.meaning_set_id, i.example_sentence,
+           FALSE, %(now)s, %(now)s
+    FROM incoming i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM book_words bw
+        WHERE bw.vocabulary_book_id = %(book_id)s AND bw.word_basic_id = i.word_basic_id
+    )
+    ORDER BY i.word_order
+    RETURNING id
+"""
+
+# 词书中有、文件中已经没有的单词
+_STALE_WHERE = """
+    bw.vocabulary_book_id = %(book_id)s
+    AND NOT EXISTS (
+        SELECT 1 FROM preset_staging_rows s JOIN word_basics wb ON wb.word = s.word
+        WHERE wb.id = bw.word_basic_id
+    )
+"""
+
+_COUNT_STALE_SQL = "SELECT count(*) FROM book_words bw WHERE" + _STALE_WHERE
+
+# 有学习记录或被覆盖词书引用的行（删除会级联）保留
+_PRUNABLE_SQL = "SELECT bw.id FROM book_words bw WHERE" + _STALE_WHERE + """
+    AND NOT EXISTS (SELECT 1 FROM word_learning_stages ls WHERE ls.book_word_id = bw.id)
+    AND NOT EXISTS (SELECT 1 FROM book_words o WHERE o.base_word_id = bw.id)
+"""
+
+
+class PresetLoadError(ImportFormatError):
+    """预设文件无法加载（格式不支持、表头错误等）"""
+
+
+class PresetLoadResult:
+    """单个预设文件的加载结果"""
+
+    def __init__(self, source_name, content_hash):
+        self.source_name = source_name
+        self.content_hash = content_hash
+        self.book_id = None
+        # loaded：已合并；unchanged：内容哈希未变化，已跳过
+        self.status = 'unchanged'
+        self.summary = ImportSummary()
+        self.duplicates = 0
+        self.unchanged_rows = 0
+        self.stale = 0
+        self.removed = 0
+        self.seconds = 0.0
+
+    @property
+    def changed(self):
+        return bool(self.summary.created or self.summary.updated or self.removed)
+
+    def as_dict(self):
+        return {
+            'source_name': self.source_name,
+            'book_id': self.book_id,
+            'status': self.status,
+            'content_hash': self.content_hash,
+            'duplicates': self.duplicates,
+            'unchanged_rows': self.unchanged_rows,
+            'stale': self.stale,
+            'removed': self.removed,
+            'seconds': self.seconds,
+            **self.summary.as_dict(),
+        }
+
+
+class _CopyStream:
+    """把行生成器包装成 copy_expert 读取的文件对象，按需序列化为CSV"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._done = False
+        self.error = None
+
+    def read(self, size=-1):
+        writer = csv.writer(self._buffer, lineterminator='\n')
+        while not self._done and (size < 0 or self._buffer.tell() < size):
+            try:
+                row = next(self._rows, None)
+            except Exception as e:
+                # psycopg2 把 read() 中的异常转换为 QueryCanceled，保留原异常供调用方报告
+                self.error = e
+                raise
+            if row is None:
+                self._done = True
+            else:
+                writer.writerow(row)
+        data = self._buffer.getvalue()
+        rest = ''
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+        self._buffer = io.StringIO()
+        self._buffer.write(rest)
+        return data
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def preset_files(paths):
+    """展开命令行参数：目录中按文件名顺序取所有支持的预设文件"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in PRESET_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def _read_rows(path, file_format):
+    """
+    逐行读取原始行（dict）
+
+    JSONL 每行一个对象，与导出格式相同：有 meanings 列表时直接使用，
+    否则与CSV一样从 part_of_speech / chinese_meaning 解析
+    """
+    with open(path, 'rb') as raw:
+        sample = raw.read(64 * 1024)
+        raw.seek(0)
+        if not sample.strip():
+            raise PresetLoadError("文件为空")
+        text_stream = io.TextIOWrapper(raw, encoding=detect_encoding(sample), newline='')
+        if file_format == 'csv':
+            reader = csv_dict_reader(text_stream)
+            try:
+                validate_columns(reader.fieldnames)
+            except ImportFormatError as e:
+                raise PresetLoadError(str(e))
+            yield from reader
+            return
+        for line in text_stream:
+            if not line.strip():
+                yield {}
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            # 无效的行返回None，记为该行的错误
+            yield row if isinstance(row, dict) else None
+
+
+def _staging_rows(path, file_format, summary):
+    """清洗后的暂存行（COPY的列顺序），无效行记入汇总"""
+    for row_number, row in enumerate(_read_rows(path, file_format), start=1):
+        summary.total_rows += 1
+        if row is None:
+            summary.add_error(row_number, "不是有效的JSON对象")
+            continue
+        try:
+            data = prepare_row(row)
+        except RowError as e:
+            summary.add_error(row_number, str(e))
+            continue
+        if data is None:
+            summary.skipped += 1
+            continue
+        meanings = data['meanings']
+        if isinstance(row.get('meanings'), list):
+            meanings = normalize_meanings(row['meanings'])
+        yield (
+            row_number,
+            data['word'],
+            data['phonetic_symbol'][:100],
+            data['uk_pronunciation'][:200],
+            data['us_pronunciation'][:200],
+            json.dumps(meanings, ensure_ascii=False) if meanings else None,
+            data['example_sentence'],
+            data['word_order'],
+        )
+
+
+def _preset_book(source_name, record):
+    """加载记录对应的词书；没有记录（或词书已删除）时沿用同名系统预设词书，否则新建"""
+    if record is not None and record.vocabulary_book.deleted_at is None:
+        book_id = record.vocabulary_book_id
+    else:
+        book = VocabularyBook.objects.filter(
+            name=source_name, is_system_preset=True, base_book__isnull=True, preset_load__isnull=True
+        ).order_by('id').first()
+        if book is None:
+            book = VocabularyBook.objects.create(name=source_name, is_system_preset=True)
+        book_id = book.id
+    return VocabularyBook.objects.select_for_update().get(pk=book_id)
+
+
+def load_preset_file(path, name=None, force=False, prune=False):
+    """
+    加载一个预设词书文件
+
+    Args:
+        name: 预设来源名（词书名），默认为文件名（不含扩展名）
+        force: 内容哈希未变化也重新合并（如释义解析规则修改后）
+        prune: 删除词书中文件里已经没有的单词（有学习记录或覆盖引用的行保留）
+
+    Returns:
+        PresetLoadResult
+
+    Raises:
+        PresetLoadError
+    """
+    started = time.perf_counter()
+    path = Path(path)
+    file_format = PRESET_SUFFIXES.get(path.suffix.lower())
+    if file_format is None:
+        raise PresetLoadError(f"不支持的文件类型: {path.name}（支持 {', '.join(PRESET_SUFFIXES)}）")
+    if not path.is_file():
+        raise PresetLoadError(f"文件不存在: {path}")
+    source_name = (name or path.stem).strip()[:100]
+    result = PresetLoadResult(source_name, file_sha256(path))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [_LOCK_NAMESPACE, source_name])
+        record = PresetBookLoad.objects.select_related('vocabulary_book').filter(source_name=source_name).first()
+        if (record is not None and not force and record.content_hash == result.content_hash
+                and record.vocabulary_book.deleted_at is None):
+            result.book_id = record.vocabulary_book_id
+            result.summary.word_count = record.vocabulary_book.word_count
+            result.seconds = round(time.perf_counter() - started, 3)
+            return result
+
+        book = _preset_book(source_name, record)
+        result.book_id = book.id
+        result.status = 'loaded'
+        summary = result.summary
+        params = {'book_id': book.id, 'now': timezone.now(), 'gap': ORDER_GAP}
+        with connection.cursor() as cursor:
+            cursor.execute(_CREATE_STAGING_SQL)
+            stream = _CopyStream(_staging_rows(path, file_format, summary))
+            try:
+                cursor.copy_expert(_COPY_SQL, stream)
+            except Exception:
+                if stream.error is None:
+                    raise
+                if isinstance(stream.error, PresetLoadError):
+                    raise stream.error
+                raise PresetLoadError(f"读取文件失败: {stream.error}") from stream.error
+            cursor.execute(_DEDUPE_SQL)
+            result.duplicates = cursor.rowcount
+            # 临时表不会被autovacuum分析，合并前手动收集统计信息
+            cursor.execute("ANALYZE preset_staging_rows")
+
+            cursor.execute(_INSERT_WORD_BASICS_SQL, params)
+            new_word_ids = [row[0] for row in cursor.fetchall()]
+            summary.new_word_basics = len(new_word_ids)
+            cursor.execute(_INSERT_MEANING_SETS_SQL, params)
+            cursor.execute(_UPDATE_BOOK_WORDS_SQL, params)
+            updated_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(_INSERT_BOOK_WORDS_SQL, params)
+            created_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(_COUNT_STALE_SQL, params)
+            result.stale = cursor.fetchone()[0]
+            prunable_ids = []
+            if prune and result.stale:
+                cursor.execute(_PRUNABLE_SQL, params)
+                prunable_ids = [row[0] for row in cursor.fetchall()]
+            # 合并完即删除暂存表：外层还有事务时（如在同一事务中加载多个文件）ON COMMIT DROP 不会立即生效
+            cursor.execute("DROP TABLE preset_staging_rows")
+        if prunable_ids:
+            # 通过ORM删除，释义词条等关联数据随之级联删除
+            BookWord.objects.filter(id__in=prunable_ids).delete()
+            result.removed = len(prunable_ids)
+
+        summary.created = len(created_ids)
+        summary.updated = len(updated_ids)
+        staged = summary.total_rows - summary.skipped - summary.error_count - result.duplicates
+        result.unchanged_rows = staged - summary.created - summary.updated
+        if not staged:
+            raise PresetLoadError(f"{source_name}: 没有可加载的有效行（错误 {summary.error_count} 行）")
+
+        sync_word_forms(new_word_ids)
+        sync_meaning_terms(created_ids + updated_ids)
+        if result.changed:
+            bump_book_version(book.id)
+        book.word_count = BookWord.objects.for_book(book).count()
+        book.save(update_fields=['word_count', 'updated_at'])
+        summary.word_count = book.word_count
+        PresetBookLoad.objects.update_or_create(
+            source_name=source_name,
+            defaults={'vocabulary_book': book, 'content_hash': result.content_hash, 'row_count': staged},
+        )
+
+    result.seconds = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"预设词书加载完成: {source_name} -> 词汇书 {book.id}, 新建 {summary.created}, 更新 {summary.updated}, "
+        f"未变化 {result.unchanged_rows}, 删除 {result.removed}, 耗时 {result.seconds}s"
+    )
+    return result
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+发音音频磁盘缓存
+
+- 以规范化后的单词做 sha1，作为缓存文件的内容寻址键
+- 同一单词的并发未命中只会向上游请求一次（进程内锁 + 跨进程文件锁）
+- 缓存总大小超过上限时按最近访问时间（LRU）淘汰
+"""
+
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+DEFAULT_UPSTREAM_URL = 'https://dict.youdao.com/dictvoice'
+AUDIO_SUFFIX = '.mp3'
+
+
+class PronunciationFetchError(Exception):
+    """上游发音获取失败"""
+
+    def __init__(self, message, status_code=502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def normalize_word(word):
+    """
+    规范化单词：非字母字符替换为空格，合并多余空格并转为小写
+
+    Returns:
+        str: 规范化后的单词，可能为空字符串
+    """
+    word = re.sub(r'[^a-zA-Z\s]', ' ', word or '')
+    return re.sub(r'\s+', ' ', word).strip().lower()
+
+
+class CachedAudio:
+    """缓存中的一个音频文件"""
+
+    content_type = 'audio/mpeg'
+
+    def __init__(self, key, path, size, mtime):
+        self.key = key
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+    @property
+    def etag(self):
+        """由缓存键、文件大小和写入时间组成的强ETag"""
+        return f'"{self.key[:16]}-{self.size:x}-{int(self.mtime):x}"'
+
+
+class PronunciationCache:
+    """基于本地磁盘的发音音频缓存"""
+
+    def __init__(self, root, max_bytes, upstream_url=DEFAULT_UPSTREAM_URL,
+                 timeout=(3, 10), evict_interval=60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.upstream_url = upstream_url
+        self.timeout = timeout
+        self.evict_interval = evict_interval
+        self._session = requests.Session()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._last_evict_check = 0.0
+
+    # ---- 路径与查找 ----
+
+    def key_for(self, word):
+        """规范化单词对应的缓存键"""
+        return hashlib.sha1(word.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        """两级目录分片，避免单个目录下文件过多"""
+        return os.path.join(self.root, key[:2], key[2:4], key + AUDIO_SUFFIX)
+
+    def lookup(self, word):
+        """
+        查找已缓存的音频，命中时刷新访问时间（用于LRU淘汰）
+
+        Args:
+            word: 已规范化的单词
+
+        Returns:
+            CachedAudio或None
+        """
+        key = self.key_for(word)
+        path = self.path_for(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        try:
+            # 只更新atime，保留mtime作为Last-Modified
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+        return CachedAudio(key, path, stat.st_size, stat.st_mtime)
+
+    def get(self, word):
+        """获取音频：先查缓存，未命中再从上游下载"""
+        return self.lookup(word) or self.fetch(word)
+
+    # ---- 上游下载 ----
+
+    def fetch(self, word, upstream_url=None):
+        """
+        从上游下载音频并写入缓存，同一单词的并发请求只下载一次
+
+        Raises:
+            PronunciationFetchError: 上游返回错误或网络异常
+        """
+        key = self.key_for(word)
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._process_lock(key):
+            with open(self._lock_path_for(key), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    # 等锁期间可能已被其他线程/进程写入
+                    cached = self.lookup(word)
+                    if cached is not None:
+                        return cached
+                    self._download(word, path, upstream_url or self.upstream_url)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._maybe_evict()
+        stat = os.stat(path)
+        return CachedAudio(key, path, stat.st_size, stat.st_mtime)
+
+    def _download(self, word, path, upstream_url):
+        """流式下载到临时文件，完成后原子替换"""
+        try:
+            response = self._session.get(
+                upstream_url, params={'audio': word}, timeout=self.timeout, stream=True
+            )
+        except requests.exceptions.Timeout:
+            raise PronunciationFetchError('Request timeout', status_code=504)
+        except requests.exceptions.RequestException as e:
+            raise PronunciationFetchError(str(e), status_code=502)
+
+        with response:
+            if response.status_code != 200:
+                raise PronunciationFetchError(
+                    f'Failed to fetch pronunciation: {response.status_code}',
+                    status_code=response.status_code
+                )
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+            try:
+                size = 0
+                with os.fdopen(fd, 'wb') as tmp_file:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        tmp_file.write(chunk)
+                        size += len(chunk)
+                if size == 0:
+                    raise PronunciationFetchError('Empty pronunciation audio', status_code=502)
+                os.replace(tmp_path, path)
+            except requests.exceptions.RequestException as e:
+                raise PronunciationFetchError(str(e), status_code=502)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _lock_path_for(self, key):
+        """跨进程文件锁按键前缀分成256个条带，避免每个单词一个锁文件"""
+        lock_dir = os.path.join(self.root, '.locks')
+        os.makedirs(lock_dir, exist_ok=True)
+        return os.path.join(lock_dir, key[:2] + '.lock')
+
+    def _process_lock(self, key):
+        """同一进程内按缓存键加锁"""
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+        return _KeyLock(self, key, lock)
+
+    # ---- LRU淘汰 ----
+
+    def _maybe_evict(self):
+        """写入后按间隔检查一次缓存大小，避免每次写入都扫描目录"""
+        now = time.time()
+        if now - self._last_evict_check < self.evict_interval:
+            return
+        self._last_evict_check = now
+        try:
+            self.evict()
+        except Exception as e:
+            logger.error(f"发音缓存淘汰失败: {e}")
+
+    def evict(self):
+        """
+        缓存超过上限时，按访问时间从旧到新删除，直到降到上限的90%
+
+        Returns:
+            int: 删除的文件数量
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, '.evict.lock'), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EACCES):
+                    # 其他进程正在淘汰
+                    return 0
+                raise
+
+            entries = []
+            total = 0
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if not name.endswith(AUDIO_SUFFIX):
+                        continue
+                    file_path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, file_path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return 0
+
+            target = int(self.max_bytes * 0.9)
+            removed = 0
+            entries.sort()
+            for _, size, file_path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                removed += 1
+
+            logger.info(f"发音缓存淘汰完成: 删除 {removed} 个文件, 当前大小 {total} 字节")
+            return removed
+
+
+class _KeyLock:
+    """进程内按键加锁的上下文管理器，释放后清理不再使用的锁"""
+
+    def __init__(self, cache, key, lock):
+        self.cache = cache
+        self.key = key
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.lock.release()
+        with self.cache._locks_guard:
+            if not self.lock.locked():
+                self.cache._locks.pop(self.key, None)
+        return False
+
+
+_cache_instance = None
+_cache_instance_guard = threading.Lock()
+
+
+def get_pronunciation_cache():
+    """获取进程级的发音缓存单例"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_instance_guard:
+            if _cache_instance is None:
+                _cache_instance = PronunciationCache(
+                    root=getattr(settings, 'PRONUNCIATION_CACHE_DIR',
+                                 os.path.join(settings.BASE_DIR, 'cache', 'pronunciation')),
+                    max_bytes=getattr(settings, 'PRONUNCIATION_CACHE_MAX_BYTES', 1024 * 1024 * 1024),
+                    upstream_url=getattr(settings, 'PRONUNCIATION_UPSTREAM_URL', DEFAULT_UPSTREAM_URL),
+                    timeout=getattr(settings, 'PRONUNCIATION_UPSTREAM_TIMEOUT', (3, 10)),
+                )
+    return _cache_instance
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+整本词汇书的发音预取
+
+线程池并发下载 + 令牌桶限速 + 失败重试，结果按单词写入 PronunciationPrefetchStatus。
+下载线程只操作磁盘缓存，数据库写入全部在调用线程中批量完成。
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import BookWord, PronunciationPrefetchStatus
+from .pronunciation_cache import (
+    get_pronunciation_cache, normalize_word, PronunciationFetchError
+)
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 后台预取线程池（供admin操作使用），同一时间只跑一本书
+_prefetch_executor = ThreadPoolExecutor(max_workers=1)
+
+# 这些上游状态码视为临时错误，可以重试
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """线程安全的令牌桶限速器"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """阻塞直到拿到一个令牌；rate<=0 表示不限速"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def collect_book_words(book_id):
+    """获取词汇书中所有单词的规范化拼写（去重，保持书中顺序）"""
+    rows = BookWord.objects.for_book(book_id).order_by('word_order', 'id').values_list(
+        'custom_word', 'word_basic__word'
+    )
+    words = {}
+    for custom_word, basic_word in rows:
+        word = normalize_word(custom_word or basic_word)
+        if word:
+            words[word] = None
+    return list(words)
+
+
+def _fetch_with_retry(cache, limiter, word, retries, upstream_url):
+    """
+    单个单词的下载任务（在线程池中执行）
+
+    Returns:
+        (word, status, attempts, error)
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        limiter.acquire()
+        try:
+            cache.fetch(word, upstream_url=upstream_url)
+            return word, 'cached', attempts, ''
+        except PronunciationFetchError as e:
+            if e.status_code == 404:
+                return word, 'not_found', attempts, str(e)
+            if e.status_code not in RETRYABLE_STATUS_CODES or attempts > retries:
+                return word, 'failed', attempts, str(e)
+        except Exception as e:
+            if attempts > retries:
+                return word, 'failed', attempts, str(e)
+        # 指数退避：0.5s, 1s, 2s ...
+        time.sleep(0.5 * (2 ** (attempts - 1)))
+
+
+def _save_statuses(results):
+    """
+    批量写入预取状态（按单词 upsert）
+    失败时不覆盖 fetched_at，保留上一次成功缓存的时间
+    """
+    if not results:
+        return
+    now = timezone.now()
+    succeeded = [result for result in results if result[1] == 'cached']
+    failed = [result for result in results if result[1] != 'cached']
+    for group, update_fields in (
+        (succeeded, ['status', 'attempts', 'last_error', 'fetched_at', 'updated_at']),
+        (failed, ['status', 'attempts', 'last_error', 'updated_at']),
+    ):
+        if not group:
+            continue
+        PronunciationPrefetchStatus.objects.bulk_create(
+            [
+                PronunciationPrefetchStatus(
+                    word=word,
+                    status=status,
+                    attempts=attempts,
+                    last_error=error[:255],
+                    fetched_at=now if status == 'cached' else None,
+                    updated_at=now,
+                )
+                for word, status, attempts, error in group
+            ],
+            update_conflicts=True,
+            unique_fields=['word'],
+            update_fields=update_fields,
+        )
+
+
+def prefetch_book_pronunciations(book_id, concurrency=8, rate=10.0, retries=3,
+                                 upstream_url=None, progress=None, flush_every=200):
+    """
+    预取词汇书中缺失的发音音频
+
+    Args:
+        book_id: 词汇书ID
+        concurrency: 并发下载线程数
+        rate: 每秒最多发起的上游请求数（<=0 不限速）
+        retries: 临时错误的最大重试次数
+        upstream_url: 上游地址，默认使用settings中的配置（测试时可指向本地服务）
+        progress: 回调 progress(done, total)，每批写库后调用
+
+    Returns:
+        dict: 预取统计
+    """
+    start_time = time.time()
+    cache = get_pronunciation_cache()
+    words = collect_book_words(book_id)
+
+    # 已在磁盘缓存中的单词直接跳过，不产生上游请求
+    missing = [word for word in words if not os.path.exists(cache.path_for(cache.key_for(word)))]
+    summary = {
+        'total': len(words),
+        'already_cached': len(words) - len(missing),
+        'cached': 0,
+        'not_found': 0,
+        'failed': 0,
+    }
+
+    limiter = RateLimiter(rate, burst=concurrency)
+    pending_results = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [
+            executor.submit(_fetch_with_retry, cache, limiter, word, retries, upstream_url)
+            for word in missing
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            summary[result[1]] += 1
+            pending_results.append(result)
+            done += 1
+            if len(pending_results) >= flush_every:
+                _save_statuses(pending_results)
+                pending_results = []
+                if progress:
+                    progress(done, len(missing))
+
+    _save_statuses(pending_results)
+    if progress:
+        progress(done, len(missing))
+
+    summary['elapsed'] = round(time.time() - start_time, 2)
+    logger.info(f"词汇书 {book_id} 发音预取完成: {summary}")
+    return summary
+
+
+def prefetch_books_in_background(book_ids, **kwargs):
+    """提交后台预取任务（admin操作使用），按书顺序依次执行；一本书失败只记录日志，继续下一本"""
+    def _run():
+        try:
+            for book_id in book_ids:
+                try:
+                    prefetch_book_pronunciations(book_id, **kwargs)
+                except Exception as e:
+                    logger.error(f"词汇书 {book_id} 后台发音预取失败: {e}")
+        finally:
+            # 后台线程使用独立的数据库连接，结束时关闭
+            connection.close()
+
+    return _prefetch_executor.submit(_run)
@@ -1,17 +1,33 @@
 from rest_framework import serializers
-from .models import VocabularyBook, BookWord, WordBasic, StudentKnownWord
+from .models import VocabularyBook, VocabularyBookStats, BookWord, WordBasic, StudentKnownWord, ImportJob
 import json # Import json for parsing meanings
 from apps.accounts.models import Student
 
 class VocabularyBookSerializer(serializers.ModelSerializer):
     word_count = serializers.IntegerField(read_only=True)
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    base_book = serializers.PrimaryKeyRelatedField(read_only=True)
     
     class Meta:
         model = VocabularyBook
-        fields = ['id', 'name', 'word_count', 'is_system_preset', 'created_by', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'word_count', 'is_system_preset', 'base_book', 'created_by', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at', 'created_by']
 
+class VocabularyBookStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VocabularyBookStats
+        fields = [
+            'word_count', 'customized_count', 'pos_distribution', 'active_plan_count', 'learner_count',
+            'refreshed_at'
+        ]
+
+class VocabularyBookWithStatsSerializer(VocabularyBookSerializer):
+    """词书列表/详情：附带物化的词书统计（查询集需 select_related('stats')，还没有统计时为null）"""
+    stats = VocabularyBookStatsSerializer(read_only=True, allow_null=True)
+
+    class Meta(VocabularyBookSerializer.Meta):
+        fields = VocabularyBookSerializer.Meta.fields + ['stats']
+
 class WordBasicSerializer(serializers.ModelSerializer):
     class Meta:
         model = WordBasic
@@ -28,7 +44,7 @@ class BookWordSerializer(serializers.ModelSerializer):
     part_of_speech = serializers.SerializerMethodField()
     example = serializers.CharField(source='example_sentence', read_only=True, allow_null=True)
     book_id = serializers.IntegerField(source='vocabulary_book_id', read_only=True)
-    word_basic_id = serializers.IntegerField(source='word_basic.id', read_only=True)
+    word_basic_id = serializers.IntegerField(read_only=True)
     # 新增字段：表示是否被自定义过
     is_customized = serializers.ReadOnlyField()
 
@@ -225,94 +241,67 @@ class StudentKnownWordSerializer(serializers.ModelSerializer):
         instance, created = StudentKnownWord.objects.get_or_create(**validated_data)
         return instance
 
-class StudentKnownWordDetailSerializer(serializers.ModelSerializer):
-    """返回已知单词详细信息的序列化器"""
-    word_text = serializers.CharField(source='word.word', read_only=True)
-    phonetic = serializers.CharField(source='word.phonetic_symbol', read_only=True)
-    uk_pronunciation = serializers.CharField(source='word.uk_pronunciation', read_only=True)
-    us_pronunciation = serializers.CharField(source='word.us_pronunciation', read_only=True)
-    
-    # 从对应词书中获取释义信息
+class StudentKnownWordDetailSerializer(serializers.Serializer):
+    """
+    返回已知单词详细信息的序列化器
+
+    基于 StudentKnownWordViewSet.get_detail_queryset 的 values() 扁平行序列化，
+    词书中的释义/例句已由查询一次性带出（book_word 字段），不再逐条查询BookWord
+    """
+    id = serializers.IntegerField(read_only=True)
+    student = serializers.IntegerField(source='student_id', read_only=True)
+    word = serializers.IntegerField(source='word_id', read_only=True)
+    word_text = serializers.CharField(source='word__word', read_only=True)
+    phonetic = serializers.CharField(source='word__phonetic_symbol', read_only=True, allow_null=True)
+    uk_pronunciation = serializers.CharField(source='word__uk_pronunciation', read_only=True, allow_null=True)
+    us_pronunciation = serializers.CharField(source='word__us_pronunciation', read_only=True, allow_null=True)
     meaning = serializers.SerializerMethodField()
     part_of_speech = serializers.SerializerMethodField()
     example_sentence = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = StudentKnownWord
-        fields = ['id', 'student', 'word', 'word_text', 'phonetic', 'uk_pronunciation', 
-                 'us_pronunciation', 'meaning', 'part_of_speech', 'example_sentence', 'marked_at']
-        read_only_fields = ['marked_at']
-    
-    def get_meaning(self, obj):
+    marked_at = serializers.DateTimeField(read_only=True)
+
+    def get_meaning(self, row):
         """从词书中获取释义"""
-        book_id = self.context.get('book_id')
-        if book_id:
-            try:
-                book_word = BookWord.objects.filter(
-                    vocabulary_book_id=book_id,
-                    word_basic=obj.word
-                ).first()
-                if book_word:
-                    meaning_obj = self._get_first_meaning_obj(book_word)
-                    if meaning_obj and 'meaning' in meaning_obj:
-                        return meaning_obj['meaning']
-            except Exception:
-                pass
-        return None
-    
-    def get_part_of_speech(self, obj):
+        meaning_obj = self._get_first_meaning_obj(row)
+        return meaning_obj.get('meaning') if meaning_obj else None
+
+    def get_part_of_speech(self, row):
         """从词书中获取词性"""
-        book_id = self.context.get('book_id')
-        if book_id:
-            try:
-                book_word = BookWord.objects.filter(
-                    vocabulary_book_id=book_id,
-                    word_basic=obj.word
-                ).first()
-                if book_word:
-                    meaning_obj = self._get_first_meaning_obj(book_word)
-                    if meaning_obj and 'pos' in meaning_obj:
-                        return meaning_obj['pos']
-            except:
-                pass
-        return None
-    
-    def get_example_sentence(self, obj):
+        meaning_obj = self._get_first_meaning_obj(row)
+        return meaning_obj.get('pos') if meaning_obj else None
+
+    def get_example_sentence(self, row):
         """从词书中获取例句"""
-        book_id = self.context.get('book_id')
-        if book_id:
+        book_word = row.get('book_word') or {}
+        return book_word.get('example_sentence')
+
+    def _get_first_meaning_obj(self, row):
+        """获取第一个meaning对象的辅助方法"""
+        book_word = row.get('book_word') or {}
+        # 与 BookWord.effective_meanings 一致：自定义释义优先
+        effective_meanings = book_word.get('custom_meanings') or book_word.get('meanings')
+        # 确保我们处理的是Python对象，而不是JSON字符串
+        if isinstance(effective_meanings, str):
             try:
-                book_word = BookWord.objects.filter(
-                    vocabulary_book_id=book_id,
-                    word_basic=obj.word
-                ).first()
-                if book_word:
-                    return book_word.example_sentence
-            except:
-                pass
+                effective_meanings = json.loads(effective_meanings)
+            except json.JSONDecodeError:
+                return None
+        # 检查是否是有效的列表格式
+        if isinstance(effective_meanings, list) and effective_meanings:
+            first_meaning_obj = effective_meanings[0]
+            if isinstance(first_meaning_obj, dict):
+                return first_meaning_obj
         return None
-    
-    def _get_first_meaning_obj(self, book_word):
-        """获取第一个meaning对象的辅助方法"""
-        effective_meanings = book_word.effective_meanings
-        if not effective_meanings:
-            return None
-        try:
-            # 确保我们处理的是Python对象，而不是JSON字符串
-            if isinstance(effective_meanings, str):
-                try:
-                    data_to_parse = json.loads(effective_meanings)
-                except json.JSONDecodeError:
-                    # 如果解析失败，返回None
-                    return None
-            else:
-                data_to_parse = effective_meanings
 
-            # 检查是否是有效的列表格式
-            if isinstance(data_to_parse, list) and len(data_to_parse) > 0:
-                first_meaning_obj = data_to_parse[0]
-                if isinstance(first_meaning_obj, dict):
-                    return first_meaning_obj
-            return None
-        except (TypeError, IndexError, AttributeError):
-            return None
\ No newline at end of file
+class ImportJobSerializer(serializers.ModelSerializer):
+    """后台导入任务的状态与进度"""
+    book_id = serializers.IntegerField(source='vocabulary_book_id', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    eta_seconds = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'book_id', 'status', 'mode', 'file_format', 'original_filename', 'total_rows', 'rows_done',
+                  'progress', 'eta_seconds', 'created_count', 'updated_count', 'skipped_count',
+                  'error_count', 'errors', 'message', 'started_at', 'finished_at', 'created_at']
+        read_only_fields = fields
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""测试数据构造"""
+
+from django.contrib.auth.models import User
+
+from apps.accounts.models import Student
+from apps.vocabulary.models import BookWord, VocabularyBook, WordBasic
+from apps.vocabulary.ordering import ORDER_GAP
+
+
+def make_book(words=(), name='测试词汇书', **kwargs):
+    """
+    创建词汇书，并按顺序以 ORDER_GAP 为间隔加入单词
+
+    Returns:
+        (book, [BookWord, ...])
+    """
+    book = VocabularyBook.objects.create(name=name, **kwargs)
+    book_words = [
+        BookWord.objects.create(
+            vocabulary_book=book,
+            word_basic=WordBasic.objects.get_or_create(word=word)[0],
+            word_order=index * ORDER_GAP,
+        )
+        for index, word in enumerate(words, start=1)
+    ]
+    if book_words:
+        VocabularyBook.objects.filter(pk=book.pk).update(word_count=len(book_words))
+        book.word_count = len(book_words)
+    return book, book_words
+
+
+def make_student(username='student'):
+    """创建用户及其学生资料"""
+    user = User.objects.create(username=username)
+    return user, Student.objects.create(user=user)
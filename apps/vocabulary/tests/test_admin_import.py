@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.vocabulary.import_jobs import run_import_job
+from apps.vocabulary.models import BookWord, ImportJob, ImportStagingBatch
+from apps.vocabulary.ordering import ORDER_GAP
+
+from .factories import make_book
+
+
+class AdminImportTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.book, _ = make_book(['apple'], name='后台导入')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def upload(self, name, content):
+        return self.client.post(reverse('admin:vocabulary_bookword_import-book-words'), {
+            'vocabulary_book': self.book.id,
+            'csv_file': SimpleUploadedFile(name, content),
+        })
+
+    def book_words(self):
+        return list(
+            BookWord.objects.for_book(self.book).order_by('word_order').values_list('word_basic__word', 'word_order')
+        )
+
+    def run_admin_job(self, response):
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('admin:vocabulary_importjob_change', args=[job.id]))
+        self.assertEqual((job.source, job.file_format, job.mode, job.status), ('admin', 'staged', 'append', 'pending'))
+        return run_import_job(job.id)
+
+    def test_csv_without_warnings_is_applied_by_a_background_job(self):
+        content = 'word,part_of_speech,chinese_meaning\nbanana,n.,香蕉\ncherry,n.,樱桃\n,,\n'.encode('gbk')
+
+        response = self.upload('words.csv', content)
+        self.assertEqual(len(self.book_words()), 1)
+        job = self.run_admin_job(response)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(
+            (job.total_rows, job.rows_done, job.created_count, job.skipped_count), (3, 3, 2, 1)
+        )
+        self.assertIsNone(job.staging_batch_id)
+        self.assertEqual(self.book_words(), [
+            ('apple', ORDER_GAP), ('banana', 2 * ORDER_GAP), ('cherry', 3 * ORDER_GAP)
+        ])
+        banana = BookWord.objects.get(vocabulary_book=self.book, word_basic__word='banana')
+        self.assertEqual(banana.meanings, [{'pos': 'n.', 'meaning': '香蕉'}])
+        self.assertEqual(banana.meaning_terms.count(), 1)
+        self.assertFalse(ImportStagingBatch.objects.exists())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.word_count, 3)
+
+        # 重新执行已完成写入的任务（进程在写入提交后中断）不会重复写入
+        ImportJob.objects.filter(pk=job.id).update(status='pending')
+        self.assertEqual(run_import_job(job.id).status, 'completed')
+        self.assertEqual(len(self.book_words()), 3)
+
+    def test_csv_with_existing_words_waits_for_confirmation_then_appends(self):
+        response = self.upload('words.csv', b'word,chinese_meaning\napple,\xe8\x8b\xb9\xe6\x9e\x9c\n')
+
+        self.assertRedirects(response, reverse('admin:vocabulary_bookword_confirm-import'))
+        self.assertFalse(ImportJob.objects.exists())
+
+        job = self.run_admin_job(self.client.post(reverse('admin:vocabulary_bookword_process-import')))
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(self.book_words(), [('apple', ORDER_GAP), ('apple', 2 * ORDER_GAP)])
+        self.assertFalse(ImportStagingBatch.objects.exists())
+
+    def test_csv_missing_word_column_is_rejected_like_the_api(self):
+        self.upload('words.csv', b'name,chinese_meaning\nbanana,x\n')
+
+        self.assertEqual(len(self.book_words()), 1)
+        self.assertFalse(ImportStagingBatch.objects.exists())
+
+    def test_pdf_is_extracted_by_a_background_job_not_the_request(self):
+        with mock.patch('apps.vocabulary.import_jobs.extract_word_rows') as extract:
+            response = self.upload('glossary.pdf', b'%PDF-1.4 stand-in')
+            extract.assert_not_called()
+
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('admin:vocabulary_importjob_change', args=[job.id]))
+        self.assertEqual((job.source, job.file_format, job.mode, job.status), ('admin', 'pdf', 'append', 'pending'))
+
+        rows = [{'word': 'banana', 'part_of_speech': 'n.', 'chinese_meaning': '香蕉'}, {'word': 'cherry'}]
+        with mock.patch('apps.vocabulary.import_jobs.extract_word_rows', return_value=(rows, {})) as extract:
+            job = run_import_job(job.id)
+        extract.assert_called_once_with(job.upload.path)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.total_rows, job.rows_done, job.created_count), (2, 2, 2))
+        self.assertEqual([word for word, _ in self.book_words()], ['apple', 'banana', 'cherry'])
@@ -0,0 +1,70 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+
+from apps.learning.models import LearningPlan, WordLearningStage
+from apps.vocabulary.book_deletion import (
+    BookDeletionError, purge_book, purge_deleted_books, soft_delete_book
+)
+from apps.vocabulary.models import BookWord, MeaningTerm, VocabularyBook, WordBasic
+from apps.vocabulary.overlays import create_overlay
+
+from .factories import make_book, make_student
+
+
+class PurgeBookTests(TestCase):
+    def setUp(self):
+        # 外键约束默认在提交时检查，测试事务不会提交：改为立即检查，与每批提交的实际情况一致
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        self.book, book_words = make_book(['apple', 'banana'], name='待删除')
+        for book_word in book_words:
+            book_word.meanings = [{'pos': 'n.', 'meaning': '水果'}, {'pos': 'v.', 'meaning': '吃'}]
+            book_word.save()
+        _, student = make_student()
+        plan = LearningPlan.objects.create(
+            student=student, vocabulary_book=self.book, start_date=date.today(), is_active=True
+        )
+        other_book, _ = make_book(['cherry'], name='其他')
+        other_plan = LearningPlan.objects.create(student=student, vocabulary_book=other_book, start_date=date.today())
+        WordLearningStage.objects.create(learning_plan=plan, book_word=book_words[0], start_date=date.today())
+        # 其他学习计划中引用了本书单词的学习阶段
+        WordLearningStage.objects.create(learning_plan=other_plan, book_word=book_words[1], start_date=date.today())
+        self.other_book = other_book
+
+    def test_soft_delete_hides_book_and_deactivates_plans(self):
+        soft_delete_book(self.book)
+
+        self.assertFalse(VocabularyBook.objects.filter(pk=self.book.pk).exists())
+        self.assertTrue(VocabularyBook.all_objects.filter(pk=self.book.pk).exists())
+        self.assertFalse(LearningPlan.objects.filter(vocabulary_book=self.book, is_active=True).exists())
+
+    def test_purge_deletes_meaning_terms_in_batches_before_book_words(self):
+        self.assertEqual(MeaningTerm.objects.filter(book_word__vocabulary_book=self.book).count(), 4)
+        soft_delete_book(self.book)
+
+        deleted = purge_book(self.book.id, batch_size=1, pause=0)
+
+        self.assertEqual(deleted, {
+            'word_learning_stages': 2, 'learning_plans': 1, 'meaning_terms': 4, 'book_words': 2
+        })
+        self.assertFalse(VocabularyBook.all_objects.filter(pk=self.book.pk).exists())
+        self.assertFalse(BookWord.objects.filter(vocabulary_book_id=self.book.id).exists())
+        self.assertEqual(WordLearningStage.objects.count(), 0)
+        self.assertTrue(BookWord.objects.filter(vocabulary_book=self.other_book).exists())
+        self.assertTrue(WordBasic.objects.filter(word='apple').exists())
+
+    def test_only_hidden_books_are_purged(self):
+        self.assertIsNone(purge_book(self.book.id))
+        soft_delete_book(self.book)
+
+        self.assertEqual(purge_deleted_books(), [self.book.id])
+        self.assertFalse(VocabularyBook.all_objects.filter(pk=self.book.pk).exists())
+
+    def test_base_book_of_an_overlay_cannot_be_deleted(self):
+        create_overlay(self.book)
+
+        with self.assertRaises(BookDeletionError):
+            soft_delete_book(self.book)
@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.utils.module_loading import import_string
+
+from apps.learning.carryover import find_source_plan
+from apps.learning.models import LearningPlan
+from apps.vocabulary.book_overlap import get_overlaps, refresh_preset_overlaps
+from apps.vocabulary.models import BookOverlap, BookWord, WordBasic
+
+from .factories import make_book, make_student
+
+
+class CronWiringTests(SimpleTestCase):
+    def test_cron_jobs_are_installed_and_importable(self):
+        self.assertIn('django_crontab', settings.INSTALLED_APPS)
+        jobs = {job[1] for job in settings.CRONJOBS}
+        self.assertTrue({
+            'apps.vocabulary.import_jobs.resume_import_jobs',
+            'apps.vocabulary.book_deletion.purge_deleted_books',
+            'apps.vocabulary.book_overlap.refresh_preset_overlaps',
+            'apps.vocabulary.book_stats.refresh_stale_book_stats',
+        } <= jobs)
+        for path in jobs:
+            self.assertTrue(callable(import_string(path)), path)
+
+
+class BookOverlapTests(TestCase):
+    def setUp(self):
+        self.grade7a, _ = make_book(['apple', 'banana', 'cherry', 'date'], name='七上', is_system_preset=True)
+        self.grade7b, _ = make_book(['apple', 'banana', 'cherry', 'egg'], name='七下', is_system_preset=True)
+        self.other, _ = make_book(['apple', 'fig'], name='其他')
+
+    def shared(self, book):
+        return {overlap['book_id']: overlap['shared_words'] for overlap in get_overlaps(book)}
+
+    def test_overlaps_are_computed_on_read_without_the_cron_job(self):
+        self.assertFalse(BookOverlap.objects.exists())
+
+        self.assertEqual(self.shared(self.grade7b), {self.grade7a.id: 3, self.other.id: 1})
+
+    def test_stale_rows_are_recomputed_when_the_other_book_changes(self):
+        self.shared(self.grade7b)
+        BookWord.objects.create(
+            vocabulary_book=self.other, word_basic=WordBasic.objects.get(word='egg'), word_order=99999
+        )
+
+        self.assertEqual(self.shared(self.grade7b), {self.grade7a.id: 3, self.other.id: 2})
+
+    def test_cron_job_precomputes_preset_books(self):
+        self.assertEqual(refresh_preset_overlaps(), [self.grade7a.id, self.grade7b.id])
+
+        self.assertTrue(BookOverlap.objects.filter(book_id=self.grade7a.id, other_book_id=self.grade7b.id).exists())
+        self.assertFalse(BookOverlap.objects.filter(book_id=self.other.id).exists())
+
+    def test_carryover_picks_the_plan_with_the_most_shared_words(self):
+        _, student = make_student()
+        LearningPlan.objects.create(student=student, vocabulary_book=self.other, start_date=date.today())
+        previous = LearningPlan.objects.create(student=student, vocabulary_book=self.grade7a, start_date=date.today())
+        plan = LearningPlan.objects.create(student=student, vocabulary_book=self.grade7b, start_date=date.today())
+
+        self.assertEqual(find_source_plan(plan), previous)
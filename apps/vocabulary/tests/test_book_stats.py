@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.learning.models import LearningPlan
+from apps.vocabulary.book_stats import refresh_book_stats, refresh_stale_book_stats
+from apps.vocabulary.models import VocabularyBook, VocabularyBookStats
+
+from .factories import make_book, make_student
+
+
+class StaleStatsRefreshTests(TestCase):
+    def setUp(self):
+        self.book, _ = make_book(['apple', 'banana'], name='统计')
+        self.fresh, _ = make_book(['cherry'], name='最新')
+        refresh_book_stats([self.fresh.id])
+
+    def stats(self, book):
+        return VocabularyBookStats.objects.get(vocabulary_book=book)
+
+    def test_missing_and_outdated_stats_are_refreshed(self):
+        self.assertEqual(refresh_stale_book_stats(), [self.book.id])
+        self.assertEqual(self.stats(self.book).word_count, 2)
+        self.assertEqual(refresh_stale_book_stats(), [])
+
+        # 内容版本变化后的刷新丢失（例如进程重启）
+        VocabularyBook.objects.filter(pk=self.book.pk).update(content_version=F('content_version') + 1)
+        self.assertEqual(refresh_stale_book_stats(), [self.book.id])
+        self.book.refresh_from_db()
+        self.assertEqual(self.stats(self.book).content_version, self.book.content_version)
+
+    def test_plan_counts_that_drifted_are_refreshed(self):
+        refresh_book_stats([self.book.id])
+        _, student = make_student()
+        # TestCase 中不提交事务，保存计划时排队的刷新不会执行
+        LearningPlan.objects.create(student=student, vocabulary_book=self.book, start_date=date.today())
+
+        self.assertEqual(refresh_stale_book_stats(), [self.book.id])
+        stats = self.stats(self.book)
+        self.assertEqual((stats.active_plan_count, stats.learner_count), (0, 1))
+        self.assertEqual(refresh_stale_book_stats(), [])
+
+    def test_deleted_books_are_skipped(self):
+        VocabularyBook.all_objects.filter(pk=self.book.pk).update(deleted_at=timezone.now())
+        self.assertEqual(refresh_stale_book_stats(), [])
+
+
+@override_settings(VOCABULARY_BOOK_STATS_ASYNC=False)
+class PlanSaveStatsTests(TestCase):
+    def setUp(self):
+        self.book, _ = make_book(['apple'], name='七上')
+        self.other, _ = make_book(['banana'], name='七下')
+        _, student = make_student()
+        plan = LearningPlan.objects.create(student=student, vocabulary_book=self.book, start_date=date.today())
+        self.plan = LearningPlan.objects.get(pk=plan.pk)
+
+    def test_saving_other_fields_does_not_query_or_refresh(self):
+        self.plan.start_date -= timedelta(days=1)
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(1):
+            self.plan.save(update_fields=['start_date'])
+        self.assertEqual(callbacks, [])
+
+    def test_loaded_plan_changing_book_refreshes_both_books_without_select(self):
+        self.plan.vocabulary_book = self.other
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertNumQueries(1):
+            self.plan.save()
+        self.assertEqual(len(callbacks), 2)
+        counts = dict(VocabularyBookStats.objects.values_list('vocabulary_book_id', 'learner_count'))
+        self.assertEqual(counts, {self.book.id: 0, self.other.id: 1})
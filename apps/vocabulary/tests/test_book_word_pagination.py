@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.vocabulary.models import BookWord, WordBasic
+from apps.vocabulary.ordering import ORDER_GAP, insert_book_word
+from apps.vocabulary.overlays import create_overlay, remove_word
+
+from .factories import make_book, make_student
+
+
+class BookWordCursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.book, rows = make_book(['apple', 'banana', 'cherry', 'date', 'elder'], name='七上')
+        # 相同顺序值的行按 id 排序，翻页时不会跳过或重复
+        BookWord.objects.filter(pk__in=[rows[1].pk, rows[2].pk]).update(word_order=ORDER_GAP)
+        self.client = APIClient()
+        self.client.force_authenticate(make_student()[0])
+
+    def pages(self, url, **params):
+        response = self.client.get(url, {'page_size': 2, **params})
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def words(self, pages):
+        return [row['word'] for page in pages for row in page['results']]
+
+    def test_book_word_list_pages_in_book_order(self):
+        pages = self.pages(f'/api/v1/vocabulary/books/{self.book.id}/words/', ordering='-word_order')
+
+        self.assertEqual(self.words(pages), ['apple', 'banana', 'cherry', 'date', 'elder'])
+        self.assertEqual({page['count'] for page in pages}, {5})
+
+    def test_by_book_merges_overlays_and_recounts_after_changes(self):
+        overlay = create_overlay(self.book, name='我的')
+        remove_word(overlay, BookWord.objects.get(vocabulary_book=self.book, word_basic__word='date'))
+        url = '/api/v1/vocabulary/book-words/by_book/'
+
+        pages = self.pages(url, book_id=overlay.id)
+        self.assertEqual(self.words(pages), ['apple', 'banana', 'cherry', 'elder'])
+        self.assertEqual(pages[0]['count'], 4)
+
+        insert_book_word(overlay, WordBasic.objects.create(word='fig'))
+        self.assertEqual(self.client.get(url, {'book_id': overlay.id}).data['count'], 5)
+
+    def test_by_book_requires_an_existing_book(self):
+        url = '/api/v1/vocabulary/book-words/by_book/'
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'book_id': self.book.id + 1000}).status_code, 404)
@@ -0,0 +1,53 @@
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test import TestCase
+
+from apps.vocabulary.book_word_repair import count_orphans, repair_book_words
+from apps.vocabulary.models import BookWord, WordBasic
+from apps.vocabulary.overlays import create_overlay, editable_word
+
+from .factories import make_book
+
+migration = import_module('apps.vocabulary.migrations.0020_book_word_not_null')
+
+
+def run_migration_check():
+    migration.check_no_orphans(None, SimpleNamespace(connection=connection))
+
+
+class BookWordRepairTests(TestCase):
+    def setUp(self):
+        # 模拟迁移 0020 之前的历史数据：测试事务中暂时去掉 NOT NULL（回滚时恢复）
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE book_words ALTER COLUMN vocabulary_book_id DROP NOT NULL")
+            cursor.execute("ALTER TABLE book_words ALTER COLUMN word_basic_id DROP NOT NULL")
+        self.base, (apple, self.banana, cherry, date_word) = make_book(['apple', 'banana', 'cherry', 'date'], name='七上')
+        self.overlay = create_overlay(self.base, name='我的')
+        self.override = editable_word(self.overlay, self.banana)
+        self.orphans = {'override': self.override.id, 'custom': cherry.id, 'duplicate': date_word.id, 'bookless': apple.id}
+        BookWord.objects.filter(pk=cherry.pk).update(custom_word=' grape ')
+        BookWord.objects.filter(pk=date_word.pk).update(custom_word='banana')
+        BookWord.objects.filter(pk__in=[self.override.id, cherry.id, date_word.id]).update(word_basic=None)
+        BookWord.objects.filter(pk=apple.pk).update(vocabulary_book=None)
+
+    def test_migration_refuses_to_run_with_orphans(self):
+        self.assertEqual(count_orphans(), (1, 3))
+        with self.assertRaisesMessage(RuntimeError, 'repair_book_words'):
+            run_migration_check()
+
+    def test_repair_fixes_or_deletes_every_orphan(self):
+        result = repair_book_words(batch_size=1, pause=0)
+
+        self.assertEqual(
+            (result.from_base, result.from_custom_word, result.new_word_basics, result.deleted), (1, 1, 1, 2)
+        )
+        self.assertEqual(count_orphans(), (0, 0))
+        run_migration_check()
+        self.assertEqual(BookWord.objects.get(pk=self.orphans['override']).word_basic_id, self.banana.word_basic_id)
+        self.assertEqual(
+            BookWord.objects.get(pk=self.orphans['custom']).word_basic, WordBasic.objects.get(word='grape')
+        )
+        self.assertFalse(BookWord.objects.filter(pk__in=[self.orphans['duplicate'], self.orphans['bookless']]).exists())
+        self.assertEqual(result.book_ids, {self.base.id, self.overlay.id})
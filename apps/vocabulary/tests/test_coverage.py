@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.learning.carryover import MASTERED_STAGE
+from apps.learning.coverage import CoverageError, analyze_coverage, tokenize
+from apps.learning.models import LearningPlan, WordLearningStage
+from apps.vocabulary.models import StudentKnownWord, WordBasic
+from apps.vocabulary.word_forms import sync_word_forms
+
+from .factories import make_book, make_student
+
+
+class TokenizeTests(SimpleTestCase):
+    def test_contractions_and_apostrophes_are_normalized(self):
+        text = "Don’t stop. It's Tom's CAN'T"
+        self.assertEqual([form for _, _, form in tokenize(text)], ['do', 'stop', 'it', 'tom', 'can'])
+        self.assertEqual(tokenize('Hi, you')[1][:2], (4, 7))
+
+
+class AnalyzeCoverageTests(TestCase):
+    def setUp(self):
+        self.user, student = make_student()
+        self.book, rows = make_book(['cat', 'run', 'leaf', 'tree'], name='七上')
+        other_book, other_rows = make_book(['sky'], name='七下')
+        self.extra = WordBasic.objects.create(word='ocean')
+        sync_word_forms(list(WordBasic.objects.values_list('id', flat=True)))
+        self.plan = LearningPlan.objects.create(student=student, vocabulary_book=self.book, start_date=date.today())
+        other_plan = LearningPlan.objects.create(student=student, vocabulary_book=other_book, start_date=date.today())
+        for plan, row, stage in ((self.plan, rows[1], 2), (other_plan, other_rows[0], MASTERED_STAGE)):
+            WordLearningStage.objects.create(
+                learning_plan=plan, book_word=row, current_stage=stage, start_date=date.today()
+            )
+        StudentKnownWord.objects.create(student=student, word=rows[0].word_basic)
+
+    def test_each_word_gets_the_students_status(self):
+        result = analyze_coverage('Cats ran under the leaves, the sky over the ocean. Zorblax!', self.plan)
+
+        statuses = {entry['form']: entry['status'] for entry in result['words']}
+        self.assertEqual(statuses, {
+            'cats': 'known', 'ran': 'learning', 'under': 'unmatched', 'the': 'unmatched', 'leaves': 'in_book',
+            'sky': 'known', 'over': 'unmatched', 'ocean': 'unseen', 'zorblax': 'unmatched',
+        })
+        words = {entry['form']: entry for entry in result['words']}
+        self.assertEqual((words['ran']['word'], words['ran']['stage']), ('run', 2))
+        self.assertEqual(words['the']['count'], 3)
+
+        stats = result['stats']
+        self.assertEqual((stats['total_tokens'], stats['distinct_words']), (11, 9))
+        self.assertEqual(stats['tokens'], {'known': 2, 'learning': 1, 'in_book': 1, 'unseen': 1, 'unmatched': 6})
+        self.assertEqual((stats['known_ratio'], stats['familiar_ratio']), (0.4, 0.6))
+        self.assertEqual(result['tokens'][0], [0, 4, 0])
+
+    def test_rejects_empty_and_oversized_text(self):
+        with self.assertRaises(CoverageError):
+            analyze_coverage('   ', self.plan)
+        with self.assertRaises(CoverageError):
+            analyze_coverage('a' * 100001, self.plan)
+
+    def test_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/v1/learning/plans/{self.plan.id}/coverage/'
+
+        response = client.post(url, {'text': 'The cat'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['plan_id'], self.plan.id)
+        self.assertEqual(response.data['stats']['words']['known'], 1)
+        self.assertEqual(client.post(url, {'text': ['cat']}, format='json').status_code, 400)
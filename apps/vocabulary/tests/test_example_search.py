@@ -0,0 +1,71 @@
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.vocabulary.example_search import search_examples
+from apps.vocabulary.models import BookWord, VocabularyBook
+from apps.vocabulary.overlays import create_overlay, remove_word
+
+from .factories import make_book, make_student
+
+
+def with_examples(book_words, sentences):
+    for book_word, sentence in zip(book_words, sentences):
+        BookWord.objects.filter(pk=book_word.pk).update(example_sentence=sentence)
+
+
+class ExampleSearchTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_student()
+        self.preset, self.rows = make_book(['run', 'walk', 'swim'], name='七上', is_system_preset=True)
+        with_examples(self.rows, [
+            'She runs in the park every morning.',
+            'We walk to school in the morning.',
+            'Fish swim in the river.',
+        ])
+
+    def words(self, query, **kwargs):
+        return [result['word'] for result in search_examples(query, **kwargs)]
+
+    def test_matches_stemmed_words_and_highlights_them(self):
+        results = search_examples('running', user=self.user)
+
+        self.assertEqual([result['word'] for result in results], ['run'])
+        self.assertIn('<mark>runs</mark>', results[0]['snippet'])
+        self.assertEqual(results[0]['book_name'], '七上')
+
+    def test_websearch_syntax(self):
+        self.assertEqual(self.words('"every morning"'), ['run'])
+        self.assertEqual(sorted(self.words('morning -park')), ['walk'])
+        self.assertEqual(sorted(self.words('river or park')), ['run', 'swim'])
+
+    def test_only_visible_books_are_searched(self):
+        _, other_user = make_student('other')
+        private, rows = make_book(['dive'], name='私人', created_by=other_user.user)
+        with_examples(rows, ['They dive into the river.'])
+        deleted, rows = make_book(['float'], name='已删除', is_system_preset=True)
+        with_examples(rows, ['Leaves float down the river.'])
+        VocabularyBook.objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+
+        self.assertEqual(self.words('river', user=self.user), ['swim'])
+        self.assertEqual(sorted(self.words('river', user=other_user.user)), ['dive', 'swim'])
+
+    def test_book_filter_follows_overlay_removals(self):
+        overlay = create_overlay(self.preset, name='我的')
+        remove_word(overlay, self.rows[0])
+
+        self.assertEqual(self.words('morning', book=overlay), ['walk'])
+        self.assertEqual(sorted(self.words('morning', book=self.preset)), ['run', 'walk'])
+
+
+class ExampleSentenceSearchViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_student()[0])
+
+    def test_rejects_missing_query_and_unknown_books(self):
+        url = '/api/v1/vocabulary/examples/search/'
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'run', 'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'run', 'book': 999999}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'q': 'run'}).data['results'], [])
@@ -0,0 +1,115 @@
+import io
+import json
+import zipfile
+from xml.etree import ElementTree
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.vocabulary.exporting import export_book_words, iter_book_word_values
+from apps.vocabulary.importing import MAX_CSV_WORD_ORDER, BookWordImporter, open_csv_reader
+from apps.vocabulary.models import BookWord, WordBasic
+from apps.vocabulary.ordering import ORDER_GAP, insert_book_word
+
+from .factories import make_book, make_student
+
+
+def exported(book, file_format='csv'):
+    content = export_book_words(book.id, file_format)
+    if file_format == 'xlsx':
+        return b''.join(content)
+    return ''.join(content).encode('utf-8')
+
+
+def book_words(book):
+    return list(BookWord.objects.for_book(book).order_by('word_order', 'id').values_list(
+        'word_basic__word', flat=True
+    ))
+
+
+class ExportRoundTripTests(TestCase):
+    def setUp(self):
+        self.book, (apple, _) = make_book(['apple', 'banana'], name='导出')
+        # 插入到中间的单词顺序值不是 ORDER_GAP 的倍数
+        insert_book_word(self.book, WordBasic.objects.create(word='avocado'), after=apple.id)
+        # 很大的存储顺序值（原样导出时会超出导入上限）
+        BookWord.objects.create(
+            vocabulary_book=self.book, word_basic=WordBasic.objects.create(word='zucchini'),
+            word_order=MAX_CSV_WORD_ORDER * ORDER_GAP,
+        )
+
+    def test_word_order_is_exported_as_position(self):
+        lines = exported(self.book).decode('utf-8-sig').splitlines()
+        self.assertEqual([line.rsplit(',', 1)[1] for line in lines[1:]], ['1', '2', '3', '4'])
+
+        entries = [json.loads(line) for line in exported(self.book, 'jsonl').decode('utf-8').splitlines()]
+        self.assertEqual([entry['word_order'] for entry in entries], [1, 2, 3, 4])
+
+    def test_csv_export_reimports_with_the_same_order(self):
+        target, _ = make_book(name='导入')
+
+        summary = BookWordImporter(target).run(open_csv_reader(io.BytesIO(exported(self.book))))
+
+        self.assertEqual((summary.created, summary.error_count), (4, 0))
+        self.assertEqual(book_words(target), ['apple', 'avocado', 'banana', 'zucchini'])
+        self.assertEqual(
+            list(BookWord.objects.filter(vocabulary_book=target).order_by('word_order').values_list(
+                'word_order', flat=True
+            )),
+            [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP, 4 * ORDER_GAP],
+        )
+
+    def test_reimporting_into_the_same_book_keeps_the_order(self):
+        summary = BookWordImporter(self.book).run(open_csv_reader(io.BytesIO(exported(self.book))))
+
+        self.assertEqual((summary.created, summary.updated, summary.error_count), (0, 4, 0))
+        self.assertEqual(book_words(self.book), ['apple', 'avocado', 'banana', 'zucchini'])
+
+
+class ChunkedExportTests(TestCase):
+    def test_chunks_continue_after_rows_with_equal_order(self):
+        book, rows = make_book(['apple', 'banana', 'cherry', 'date'])
+        BookWord.objects.filter(pk__in=[row.pk for row in rows[:3]]).update(word_order=ORDER_GAP)
+
+        words = [row['word_basic__word'] for row in iter_book_word_values(book.id, chunk_size=1)]
+
+        self.assertEqual(words, ['apple', 'banana', 'cherry', 'date'])
+
+
+class ExportWordsViewTests(TestCase):
+    def setUp(self):
+        self.book, (apple, _) = make_book(['apple', 'banana'], name='七上')
+        BookWord.objects.filter(pk=apple.pk).update(custom_word='apples')
+        self.client = APIClient()
+        self.client.force_authenticate(make_student()[0])
+
+    def get(self, **params):
+        return self.client.get(f'/api/v1/vocabulary/books/{self.book.id}/export/', params)
+
+    def test_streams_each_format(self):
+        response = self.get()
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('.csv', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual([line.split(',')[0] for line in lines], ['word', 'apples', 'banana'])
+
+        response = self.get(file_format='jsonl')
+        entries = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([(entry['word'], entry['word_order']) for entry in entries], [('apples', 1), ('banana', 2)])
+
+        response = self.get(file_format='xlsx')
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        namespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        self.assertEqual(len(next(sheet.iter(f'{namespace}row'))), 6)
+        texts = [node.text for node in sheet.iter() if node.tag in (f'{namespace}t', f'{namespace}v')]
+        self.assertIn('apples', texts)
+        self.assertIn('banana', texts)
+
+    def test_rejects_unknown_format_and_empty_books(self):
+        self.assertEqual(self.get(file_format='pdf').status_code, 400)
+        empty, _ = make_book(name='空')
+        response = self.client.get(f'/api/v1/vocabulary/books/{empty.id}/export/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,103 @@
+import random
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.vocabulary import views
+from apps.vocabulary.fuzzy_lookup import FuzzyWordIndex, edit_distance
+
+from .factories import make_student
+
+
+def brute_force(words, text, limit, max_distance=2):
+    matches = [
+        (word_id, word, edit_distance(text, word, max_distance))
+        for word_id, word in words
+    ]
+    matches = [match for match in matches if match[2] <= max_distance]
+    matches.sort(key=lambda match: (match[2], abs(len(match[1]) - len(text)), match[1]))
+    return matches[:limit]
+
+
+def mutate(word, rng):
+    """随机做一到两次插入、删除、替换或相邻交换"""
+    for _ in range(rng.randint(1, 2)):
+        index = rng.randrange(len(word))
+        operation = rng.choice(('insert', 'delete', 'replace', 'swap'))
+        letter = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        if operation == 'insert':
+            word = word[:index] + letter + word[index:]
+        elif operation == 'delete' and len(word) > 1:
+            word = word[:index] + word[index + 1:]
+        elif operation == 'replace':
+            word = word[:index] + letter + word[index + 1:]
+        elif operation == 'swap' and index + 1 < len(word):
+            word = word[:index] + word[index + 1] + word[index] + word[index + 2:]
+    return word
+
+
+class EditDistanceTests(SimpleTestCase):
+    def test_counts_adjacent_swaps_as_one_edit(self):
+        self.assertEqual(edit_distance('receive', 'recieve', 2), 1)
+        self.assertEqual(edit_distance('apple', 'aple', 2), 1)
+        self.assertEqual(edit_distance('apple', 'apply', 2), 1)
+        self.assertEqual(edit_distance('abc', '', 2), 3)
+        self.assertEqual(edit_distance('kitten', 'sitting', 2), 3)
+        self.assertEqual(edit_distance('kitten', 'sitting', 3), 3)
+
+
+class FuzzyWordIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(20261019)
+        # 较短的字母表让相近的单词足够多，长单词覆盖前缀之后的编辑
+        words = {
+            ''.join(rng.choice('abcdeilnorst') for _ in range(rng.randint(2, 12)))
+            for _ in range(3000)
+        }
+        self.words = list(enumerate(sorted(words), start=1))
+        self.index = FuzzyWordIndex(self.words)
+        self.queries = [mutate(word, rng) for _, word in rng.sample(self.words, 100)]
+
+    def test_lookup_matches_brute_force(self):
+        for query in self.queries:
+            with self.subTest(query=query):
+                self.assertEqual(self.index.lookup(query, limit=1000), brute_force(self.words, query, 1000))
+
+    def test_limited_lookup_returns_the_best_matches(self):
+        for query in self.queries:
+            with self.subTest(query=query):
+                self.assertEqual(self.index.lookup(query, limit=3), brute_force(self.words, query, 3))
+
+    def test_max_distance_and_normalization(self):
+        index = FuzzyWordIndex([(1, 'Apple'), (2, 'apply'), (3, 'ample'), (4, 'maple')])
+
+        self.assertEqual(index.lookup('  APPLE '), [(1, 'apple', 0), (3, 'ample', 1), (2, 'apply', 1), (4, 'maple', 2)])
+        self.assertEqual(index.lookup('appel', max_distance=1), [(1, 'apple', 1)])
+        self.assertEqual(index.lookup('appel', limit=1), [(1, 'apple', 1)])
+        self.assertEqual(index.lookup(''), [])
+
+
+class WordSuggestViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_student()[0])
+        self.url = '/api/v1/vocabulary/words/suggest/'
+
+    def test_returns_suggestions_and_index_stats(self):
+        index = FuzzyWordIndex([(1, 'receive'), (2, 'recipe')])
+        with mock.patch.object(views, 'get_fuzzy_index', return_value=index):
+            response = self.client.get(self.url, {'q': 'recieve'})
+
+        self.assertEqual(response.data['suggestions'], [
+            {'id': 1, 'word': 'receive', 'distance': 1}, {'id': 2, 'word': 'recipe', 'distance': 2},
+        ])
+        self.assertEqual(response.data['index']['words'], 2)
+
+    def test_reports_an_index_that_is_still_building(self):
+        with mock.patch.object(views, 'get_fuzzy_index', return_value=None):
+            response = self.client.get(self.url, {'q': 'recieve'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.client.get(self.url).status_code, 400)
@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.vocabulary.import_jobs import (
+    STALE_AFTER, _Heartbeat, create_import_job, pending_import_job_ids, run_import_job
+)
+from apps.vocabulary.models import BookWord, ImportJob
+
+from .factories import make_book
+
+CSV = (
+    'word,part_of_speech,chinese_meaning\n'
+    'apple,n.,苹果\n'
+    '\n'
+    'banana,n.,香蕉\n'
+    'cherry,n.,樱桃\n'
+    '\n'
+    'date,n.,枣\n'
+).encode('utf-8')
+
+
+class ImportJobTestMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.book, _ = make_book(name='后台导入')
+
+    def create_job(self, content=CSV, **kwargs):
+        return create_import_job(self.book, ContentFile(content, name='words.csv'), **kwargs)
+
+
+class RunImportJobTests(ImportJobTestMixin, TestCase):
+    def test_job_imports_all_rows_and_counts_like_the_importer(self):
+        job = run_import_job(self.create_job(require_meaning=True).id, chunk_size=2)
+
+        self.assertEqual(job.status, 'completed')
+        # 空行不计入总行数，进度与实际处理的行数一致
+        self.assertEqual(job.total_rows, 4)
+        self.assertEqual(job.rows_done, 4)
+        self.assertEqual(job.created_count, 4)
+        self.assertEqual(BookWord.objects.for_book(self.book).count(), 4)
+
+    def test_interrupted_job_resumes_from_checkpoint(self):
+        job = self.create_job()
+        run_import_job(job.id, chunk_size=2)
+        BookWord.objects.filter(vocabulary_book=self.book, word_basic__word__in=['cherry', 'date']).delete()
+        # 模拟处理完前两行后进程崩溃
+        ImportJob.objects.filter(pk=job.id).update(
+            status='running', rows_done=2, created_count=2,
+            heartbeat_at=timezone.now() - STALE_AFTER - timedelta(seconds=1),
+        )
+
+        self.assertIn(job.id, pending_import_job_ids())
+        job = run_import_job(job.id, chunk_size=2)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.rows_at_start, 2)
+        self.assertEqual((job.rows_done, job.created_count, job.updated_count), (4, 4, 0))
+        self.assertEqual(BookWord.objects.for_book(self.book).count(), 4)
+
+    def test_running_job_with_recent_heartbeat_is_not_claimed(self):
+        job = self.create_job()
+        ImportJob.objects.filter(pk=job.id).update(status='running', heartbeat_at=timezone.now())
+
+        self.assertNotIn(job.id, pending_import_job_ids())
+        self.assertIsNone(run_import_job(job.id))
+
+    def test_malformed_file_fails_the_job(self):
+        job = run_import_job(self.create_job(b'spelling\napple\n').id)
+        self.assertEqual(job.status, 'failed')
+
+
+class HeartbeatTests(ImportJobTestMixin, TransactionTestCase):
+    def test_heartbeat_is_refreshed_while_job_runs(self):
+        job = self.create_job()
+        old_heartbeat = timezone.now() - timedelta(minutes=4)
+        ImportJob.objects.filter(pk=job.id).update(status='running', heartbeat_at=old_heartbeat)
+
+        with _Heartbeat(job.id, interval=timedelta(milliseconds=20)):
+            time.sleep(0.2)
+
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, old_heartbeat + timedelta(minutes=3))
@@ -0,0 +1,88 @@
+from django.test import TestCase
+
+from apps.vocabulary.import_staging import apply_batch, has_warnings, stage_rows
+from apps.vocabulary.models import BookWord, ImportStagingBatch, ImportStagingRow, MeaningSet, VocabularyBook, WordBasic
+from apps.vocabulary.ordering import ORDER_GAP
+from apps.vocabulary.overlays import create_overlay
+
+from .factories import make_book
+
+
+def row(word, meaning='', pos='n.'):
+    return {'word': word, 'part_of_speech': pos if meaning else '', 'chinese_meaning': meaning}
+
+
+class StagedImportTests(TestCase):
+    def setUp(self):
+        self.book, _ = make_book(['apple', 'banana'], name='暂存导入')
+        WordBasic.objects.create(word='cherry')
+
+    def test_preview_classifies_rows_with_set_queries(self):
+        batch = stage_rows(self.book, [
+            row('apple', '苹果'),
+            row('cherry', '樱桃'),
+            row('date', '枣'),
+            row('date', '海枣'),
+            row('x' * 101),
+            row(''),
+        ])
+
+        preview = batch.preview
+        self.assertEqual((batch.total_rows, batch.staged_rows, batch.error_count), (6, 4, 1))
+        self.assertEqual(preview['existing_words'], ['apple'])
+        self.assertEqual(preview['duplicates'], {'date': 2})
+        self.assertEqual(preview['new_in_book_count'], 2)
+        self.assertEqual(preview['new_word_basic_count'], 1)
+        self.assertTrue(has_warnings(preview))
+        statuses = {diff['word']: diff['status'] for diff in preview['diff_rows']}
+        self.assertEqual(statuses, {'': 'error', 'apple': 'existing', 'cherry': 'new_in_book', 'date': 'new_word'})
+
+    def test_apply_appends_every_staged_row_after_current_words(self):
+        batch = stage_rows(self.book, [row('apple', '苹果'), row('cherry', '樱桃'), row('date', '枣')])
+
+        summary = apply_batch(batch)
+
+        self.assertEqual((summary.created, summary.new_word_basics, summary.word_count), (3, 1, 5))
+        self.assertFalse(ImportStagingBatch.objects.filter(pk=batch.pk).exists())
+        self.assertFalse(ImportStagingRow.objects.exists())
+        rows = list(BookWord.objects.filter(vocabulary_book=self.book).order_by('word_order').values_list(
+            'word_basic__word', 'word_order'
+        ))
+        self.assertEqual([word for word, _ in rows], ['apple', 'banana', 'apple', 'cherry', 'date'])
+        self.assertEqual([order for _, order in rows[2:]], [3 * ORDER_GAP, 4 * ORDER_GAP, 5 * ORDER_GAP])
+        cherry = BookWord.objects.get(vocabulary_book=self.book, word_basic__word='cherry')
+        self.assertEqual(cherry.meanings, [{'pos': 'n.', 'meaning': '樱桃'}])
+
+    def test_apply_is_set_based_and_follows_importer_rules(self):
+        batch = stage_rows(self.book, [
+            dict(row('fig', ' 无花果 '), word_order='5'),
+            row('date', '枣'),
+            row('grape', '无花果'),
+            row('kiwi'),
+        ])
+
+        summary = apply_batch(batch)
+
+        self.assertEqual((summary.created, summary.new_word_basics), (4, 4))
+        rows = list(BookWord.objects.filter(vocabulary_book=self.book).order_by('word_order').values_list(
+            'word_basic__word', 'word_order'
+        ))
+        # 指定的顺序按 ORDER_GAP 放大，未指定的排在书中和文件中已有的顺序之后
+        self.assertEqual(rows[2:], [
+            ('fig', 5 * ORDER_GAP), ('date', 6 * ORDER_GAP), ('grape', 7 * ORDER_GAP), ('kiwi', 8 * ORDER_GAP)
+        ])
+        fig, grape, kiwi = (BookWord.objects.get(word_basic__word=word) for word in ('fig', 'grape', 'kiwi'))
+        self.assertEqual(fig.meaning_set_id, grape.meaning_set_id)
+        self.assertEqual(MeaningSet.objects.get(pk=fig.meaning_set_id).meanings, [{'pos': 'n.', 'meaning': '无花果'}])
+        self.assertIsNone(kiwi.meaning_set_id)
+        self.assertEqual(fig.meaning_terms.count(), 1)
+        self.assertTrue(WordBasic.objects.get(word='date').forms.exists())
+        self.assertGreater(VocabularyBook.objects.get(pk=self.book.pk).content_version, self.book.content_version)
+
+    def test_overlay_preview_counts_inherited_words_as_existing(self):
+        overlay = create_overlay(self.book)
+
+        preview = stage_rows(overlay, [row('banana', '香蕉'), row('cherry', '樱桃')]).preview
+
+        self.assertEqual(preview['existing_words'], ['banana'])
+        self.assertEqual(preview['new_in_book_count'], 1)
@@ -0,0 +1,215 @@
+import csv
+import io
+from datetime import date
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.learning.models import LearningPlan, WordLearningStage
+from apps.vocabulary.importing import (
+    BookWordImporter, ImportFormatError, open_csv_reader, parse_meanings
+)
+from apps.vocabulary.models import BookWord, WordBasic
+from apps.vocabulary.ordering import ORDER_GAP
+from apps.vocabulary.overlays import create_overlay, overlay_summary
+
+from .factories import make_book, make_student
+
+HEADER = ['word', 'phonetic_symbol', 'part_of_speech', 'chinese_meaning', 'example_sentence', 'word_order']
+
+
+def csv_bytes(rows, header=HEADER, encoding='utf-8'):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode(encoding)
+
+
+def reader_for(rows, **kwargs):
+    return open_csv_reader(io.BytesIO(csv_bytes(rows)), **kwargs)
+
+
+def book_rows(book):
+    return list(BookWord.objects.for_book(book).order_by('word_order').values_list(
+        'word_basic__word', 'word_order'
+    ))
+
+
+class ParseMeaningsTests(TestCase):
+    def test_pairs_parts_of_speech_with_meanings(self):
+        self.assertEqual(parse_meanings('n.;v.', '苹果;吃'), [
+            {'pos': 'n.', 'meaning': '苹果'}, {'pos': 'v.', 'meaning': '吃'},
+        ])
+
+    def test_bracketed_meanings_keep_commas(self):
+        meanings = parse_meanings('n.', '[桌子,表格]')
+        self.assertEqual(len(meanings), 1)
+        self.assertEqual(meanings[0]['pos'], 'n.')
+
+
+class BookWordImporterTests(TestCase):
+    def setUp(self):
+        self.book, _ = make_book(name='导入')
+
+    def test_upsert_creates_then_updates_by_word(self):
+        summary = BookWordImporter(self.book).run(reader_for([
+            ['apple', '/ˈæpl/', 'n.', '苹果', 'An apple.', ''],
+            ['banana', '', 'n.', '香蕉', '', ''],
+        ]))
+        self.assertEqual((summary.created, summary.updated, summary.new_word_basics), (2, 0, 2))
+        self.assertEqual(book_rows(self.book), [('apple', ORDER_GAP), ('banana', 2 * ORDER_GAP)])
+
+        summary = BookWordImporter(self.book).run(reader_for([
+            ['apple', '', 'n.', '苹果树', 'Another apple.', ''],
+            ['cherry', '', 'n.', '樱桃', '', ''],
+        ]))
+        self.assertEqual((summary.created, summary.updated, summary.new_word_basics), (1, 1, 1))
+        self.assertEqual(summary.word_count, 3)
+        apple = BookWord.objects.get(vocabulary_book=self.book, word_basic__word='apple')
+        self.assertEqual(apple.meanings, [{'pos': 'n.', 'meaning': '苹果树'}])
+        self.assertEqual(apple.example_sentence, 'Another apple.')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.word_count, 3)
+
+    def test_explicit_word_order_is_scaled_to_keep_gaps(self):
+        summary = BookWordImporter(self.book).run(reader_for([
+            ['banana', '', 'n.', '香蕉', '', '2'],
+            ['apple', '', 'n.', '苹果', '', '1'],
+            ['cherry', '', 'n.', '樱桃', '', ''],
+            ['date', '', 'n.', '枣', '', str(10 ** 9)],
+        ]))
+
+        self.assertEqual(summary.error_count, 1)
+        self.assertEqual(book_rows(self.book), [
+            ('apple', ORDER_GAP), ('banana', 2 * ORDER_GAP), ('cherry', 3 * ORDER_GAP)
+        ])
+
+    def test_merge_existing_meanings(self):
+        BookWordImporter(self.book).run(reader_for([['apple', '', 'n.', '苹果', '', '']]))
+        # 相同词性覆盖释义，新词性追加；同一文件中的重复行依次合并
+        BookWordImporter(self.book, merge_existing_meanings=True).run(reader_for([
+            ['apple', '', 'v.', '摘苹果', '', ''],
+            ['apple', '', 'n.', '苹果树', '', ''],
+        ]))
+        apple = BookWord.objects.get(vocabulary_book=self.book, word_basic__word='apple')
+        self.assertEqual(apple.meanings, [{'pos': 'n.', 'meaning': '苹果树'}, {'pos': 'v.', 'meaning': '摘苹果'}])
+
+    def test_append_mode_always_creates_rows(self):
+        BookWordImporter(self.book).run(reader_for([['apple', '', 'n.', '苹果', '', '']]))
+        summary = BookWordImporter(self.book, mode='append').run(reader_for([['apple', '', 'n.', '苹果', '', '']]))
+        self.assertEqual((summary.created, summary.updated), (1, 0))
+        self.assertEqual(BookWord.objects.filter(vocabulary_book=self.book).count(), 2)
+
+    def test_invalid_and_empty_rows_are_reported(self):
+        summary = BookWordImporter(self.book, require_meaning=True).run(reader_for([
+            ['x' * 101, '', 'n.', '太长', '', ''],
+            ['order', '', 'n.', '顺序', '', 'abc'],
+            ['nomeaning', '', '', '', '', ''],
+            ['', '', '', '', '', ''],
+            ['valid', '', 'adj.', '有效的', '', ''],
+        ]))
+        self.assertEqual(summary.total_rows, 5)
+        self.assertEqual(summary.created, 1)
+        self.assertEqual(summary.skipped, 2)
+        self.assertEqual([error['row'] for error in summary.errors], [1, 2])
+        self.assertFalse(WordBasic.objects.filter(word='nomeaning').exists())
+
+    def test_chunks_report_checkpoints_and_continue_row_numbers(self):
+        checkpoints = []
+        importer = BookWordImporter(
+            self.book, chunk_size=2,
+            on_chunk=lambda last_row, summary: checkpoints.append((last_row, summary.created)),
+        )
+        rows = [[f'word{i}', '', 'n.', f'词{i}', '', ''] for i in range(5)]
+        reader = reader_for(rows)
+        next(reader)  # 前一次已导入第1行
+        summary = importer.run(reader, start_row=1)
+        self.assertEqual(checkpoints, [(3, 2), (5, 4)])
+        self.assertEqual(summary.created, 4)
+        self.assertEqual(
+            [word for word, _ in book_rows(self.book)], ['word1', 'word2', 'word3', 'word4']
+        )
+
+    def test_content_version_is_bumped(self):
+        version = self.book.content_version
+        BookWordImporter(self.book).run(reader_for([['apple', '', 'n.', '苹果', '', '']]))
+        self.book.refresh_from_db()
+        self.assertGreater(self.book.content_version, version)
+
+
+class OverlayImportTests(TestCase):
+    def setUp(self):
+        self.base, (self.apple, self.banana) = make_book(['apple', 'banana'], name='预设')
+        self.overlay = create_overlay(self.base, name='我的')
+
+    def test_inherited_words_are_updated_through_override_rows(self):
+        _, student = make_student()
+        plan = LearningPlan.objects.create(student=student, vocabulary_book=self.overlay, start_date=date.today())
+        WordLearningStage.objects.create(learning_plan=plan, book_word=self.banana, current_stage=2,
+                                         start_date=date.today())
+
+        summary = BookWordImporter(self.overlay).run(reader_for([
+            ['banana', '', 'n.', '香蕉', 'A banana.', '9'],
+            ['cherry', '', 'n.', '樱桃', '', ''],
+        ]))
+
+        self.assertEqual((summary.created, summary.updated, summary.word_count), (1, 1, 3))
+        self.assertEqual(book_rows(self.overlay), [
+            ('apple', ORDER_GAP), ('banana', 2 * ORDER_GAP), ('cherry', 3 * ORDER_GAP)
+        ])
+        entry = BookWord.objects.get(vocabulary_book=self.overlay, word_basic__word='banana')
+        self.assertEqual(entry.base_word_id, self.banana.id)
+        self.assertEqual(entry.meanings, [{'pos': 'n.', 'meaning': '香蕉'}])
+        self.assertEqual(entry.example_sentence, 'A banana.')
+        self.assertEqual(overlay_summary(self.overlay)['overridden'], 1)
+        self.assertEqual(
+            list(WordLearningStage.objects.filter(learning_plan=plan).values_list('book_word_id', flat=True)),
+            [entry.id],
+        )
+        # 基础词书不变
+        self.banana.refresh_from_db()
+        self.assertEqual((self.banana.meanings, self.banana.example_sentence), ([], None))
+
+        summary = BookWordImporter(self.overlay).run(reader_for([['banana', '', 'n.', '香蕉2', '', '']]))
+        self.assertEqual((summary.created, summary.updated), (0, 1))
+        self.assertEqual(BookWord.objects.filter(vocabulary_book=self.overlay).count(), 2)
+
+
+class OpenCsvReaderTests(TestCase):
+    def test_gbk_file_is_decoded(self):
+        reader = open_csv_reader(io.BytesIO(csv_bytes([['apple', '', 'n.', '苹果', '', '']], encoding='gbk')))
+        self.assertEqual(next(reader)['chinese_meaning'], '苹果')
+
+    def test_missing_required_column(self):
+        with self.assertRaises(ImportFormatError):
+            open_csv_reader(io.BytesIO(b'spelling\napple\n'))
+
+    def test_empty_file(self):
+        with self.assertRaises(ImportFormatError):
+            open_csv_reader(io.BytesIO(b''))
+
+
+class ImportWordsViewTests(TestCase):
+    def setUp(self):
+        self.book, _ = make_book(name='接口导入')
+        self.client = APIClient()
+        self.client.force_authenticate(make_student()[0])
+
+    def post(self, content):
+        return self.client.post(
+            f'/api/v1/vocabulary/books/{self.book.id}/import/',
+            {'csv_file': SimpleUploadedFile('words.csv', content, content_type='text/csv')},
+            format='multipart',
+        )
+
+    def test_small_file_is_imported_in_request(self):
+        response = self.post(csv_bytes([['apple', '', 'n.', '苹果', '', ''], ['pear', '', 'n.', '梨', '', '']]))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['summary']['created'], 2)
+        self.assertEqual(response.data['summary']['word_count'], 2)
+
+    def test_missing_meaning_column_is_rejected(self):
+        response = self.post(b'word\napple\n')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,176 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.learning.models import LearningPlan, WordLearningStage
+from apps.vocabulary import known_words
+from apps.vocabulary.known_words import WordSelection, bulk_mark, bulk_unmark, known_ids_payload
+from apps.vocabulary.models import BookWord, StudentKnownWord, WordBasic
+from apps.vocabulary.ordering import insert_book_word
+from apps.vocabulary.overlays import create_overlay, remove_word
+
+from .factories import make_book, make_student
+
+
+class KnownWordChangeLogTests(TestCase):
+    def setUp(self):
+        self.user, self.student = make_student()
+        self.apple = WordBasic.objects.create(word='apple')
+
+    def test_single_save_and_delete_log_changes_under_the_student_lock(self):
+        with mock.patch.object(known_words, '_lock_student', wraps=known_words._lock_student) as lock:
+            known = StudentKnownWord.objects.create(student=self.student, word=self.apple)
+            known.delete()
+
+        self.assertEqual([call.args[1] for call in lock.call_args_list], [self.student.id, self.student.id])
+        payload = known_ids_payload(self.student.id, since='0')
+        self.assertEqual((payload['added'], payload['removed']), ([], [self.apple.id]))
+
+    def test_mark_batch_reports_missing_ids_separately_from_already_known(self):
+        banana = WordBasic.objects.create(word='banana')
+        StudentKnownWord.objects.create(student=self.student, word=self.apple)
+        missing_id = banana.id + 1000
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post('/api/v1/vocabulary/known-words/mark-batch/', {
+            'student': self.student.id,
+            'word_ids': [self.apple.id, banana.id, missing_id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created_count'], 1)
+        self.assertEqual(response.data['skipped_existing'], [self.apple.id])
+        self.assertEqual(response.data['not_found'], [missing_id])
+
+
+class BookRangeSelectionTests(TestCase):
+    def setUp(self):
+        _, self.student = make_student()
+        self.book, (self.a, self.b, self.c, self.d) = make_book(['a', 'b', 'c', 'd'], name='范围')
+
+    def known(self):
+        return sorted(StudentKnownWord.objects.filter(student=self.student).values_list('word__word', flat=True))
+
+    def test_range_is_by_position_not_stored_word_order(self):
+        # 中间插入的单词顺序值不是 ORDER_GAP 的倍数
+        insert_book_word(self.book, WordBasic.objects.create(word='ab'), after=self.a.id)
+
+        result = bulk_mark(self.student.id, WordSelection.by_book_range(self.book.id, order_from=1, order_to=3))
+
+        self.assertEqual(result, {'matched': 3, 'changed': 3})
+        self.assertEqual(self.known(), ['a', 'ab', 'b'])
+        self.assertEqual(
+            bulk_mark(self.student.id, WordSelection.by_book_range(self.book.id, order_from=5))['changed'], 1
+        )
+        self.assertEqual(self.known(), ['a', 'ab', 'b', 'd'])
+
+    def test_overlay_positions_follow_the_merged_book(self):
+        overlay = create_overlay(self.book, name='我的')
+        remove_word(overlay, self.b)
+        BookWord.objects.create(
+            vocabulary_book=overlay, word_basic=WordBasic.objects.create(word='cd'),
+            word_order=self.c.word_order + 1,
+        )
+
+        bulk_mark(self.student.id, WordSelection.by_book_range(overlay.id, order_from=2, order_to=3))
+
+        self.assertEqual(self.known(), ['c', 'cd'])
+
+    def test_bulk_mark_and_unmark_log_only_actual_changes(self):
+        StudentKnownWord.objects.create(student=self.student, word=self.a.word_basic)
+        token = known_ids_payload(self.student.id)['token']
+        selection = WordSelection.by_book_range(self.book.id, order_to=2)
+
+        self.assertEqual(bulk_mark(self.student.id, selection), {'matched': 2, 'changed': 1})
+        self.assertEqual(bulk_unmark(self.student.id, WordSelection.by_book_range(self.book.id)), {
+            'matched': 4, 'changed': 2
+        })
+
+        payload = known_ids_payload(self.student.id, since=token)
+        self.assertEqual(payload['added'], [])
+        self.assertEqual(
+            sorted(known_words.delta_decode(payload['removed'])), sorted([self.a.word_basic_id, self.b.word_basic_id])
+        )
+        self.assertEqual(self.known(), [])
+
+
+class BulkSelectionViewTests(TestCase):
+    def setUp(self):
+        self.user, self.student = make_student()
+        self.book, self.rows = make_book(['apple', 'banana', 'cherry', 'date'])
+        self.plan = LearningPlan.objects.create(student=self.student, vocabulary_book=self.book, start_date=date.today())
+        _, other_student = make_student('other')
+        other_plan = LearningPlan.objects.create(student=other_student, vocabulary_book=self.book, start_date=date.today())
+        for plan, row, stage in ((self.plan, self.rows[0], 6), (self.plan, self.rows[1], 6),
+                                 (self.plan, self.rows[2], 2), (other_plan, self.rows[3], 6)):
+            WordLearningStage.objects.create(
+                learning_plan=plan, book_word=row, current_stage=stage, start_date=date.today()
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, action, **data):
+        return self.client.post(
+            f'/api/v1/vocabulary/known-words/{action}/', {'student': self.student.id, **data}, format='json'
+        )
+
+    def known_words(self):
+        return set(StudentKnownWord.objects.filter(student=self.student).values_list('word__word', flat=True))
+
+    def test_stage_selection_only_uses_the_students_own_plans(self):
+        response = self.post('bulk-mark', stages=[6], plan=self.plan.id)
+
+        self.assertEqual((response.data['matched'], response.data['changed']), (2, 2))
+        self.assertEqual(self.known_words(), {'apple', 'banana'})
+
+    def test_id_selection_unmarks_only_known_words(self):
+        self.post('bulk-mark', book=self.book.id)
+        word_ids = [self.rows[0].word_basic_id, self.rows[1].word_basic_id, self.rows[1].word_basic_id + 1000]
+
+        response = self.post('bulk-unmark', word_ids=word_ids)
+
+        self.assertEqual((response.data['matched'], response.data['changed']), (2, 2))
+        self.assertEqual(self.known_words(), {'cherry', 'date'})
+
+    def test_requests_without_a_valid_selection_are_rejected(self):
+        self.assertEqual(self.post('bulk-mark').status_code, 400)
+        self.assertEqual(self.post('bulk-mark', word_ids=[]).status_code, 400)
+        self.assertEqual(self.post('bulk-mark', book=self.book.id, order_from='x').status_code, 400)
+        self.assertEqual(self.known_words(), set())
+
+
+class KnownWordDetailListTests(TestCase):
+    def setUp(self):
+        self.user, self.student = make_student()
+        self.book, (apple, banana, cherry) = make_book(['apple', 'banana', 'cherry'])
+        apple.meanings = [{'pos': 'n.', 'meaning': '苹果'}]
+        apple.example_sentence = 'An apple a day.'
+        apple.save()
+        BookWord.objects.filter(pk=banana.pk).update(custom_meanings=[{'pos': 'n.', 'meaning': '香蕉'}])
+        outside = WordBasic.objects.create(word='durian')
+        for word_id in (apple.word_basic_id, banana.word_basic_id, cherry.word_basic_id, outside.id):
+            StudentKnownWord.objects.create(student=self.student, word_id=word_id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_book_details_are_paged_by_cursor_with_one_query_per_page(self):
+        with self.assertNumQueries(2):
+            first = self.client.get('/api/v1/vocabulary/known-words/', {
+                'student': self.student.id, 'book': self.book.id, 'page_size': 2,
+            })
+        self.assertEqual(first.data['count'], 3)
+        self.assertEqual([row['word_text'] for row in first.data['results']], ['cherry', 'banana'])
+        self.assertEqual(first.data['results'][1]['meaning'], '香蕉')
+
+        with self.assertNumQueries(1):
+            second = self.client.get(first.data['next'])
+        self.assertNotIn('count', second.data)
+        self.assertIsNone(second.data['next'])
+        row = second.data['results'][0]
+        self.assertEqual(
+            (row['word_text'], row['part_of_speech'], row['meaning'], row['example_sentence']),
+            ('apple', 'n.', '苹果', 'An apple a day.'),
+        )
@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.test import TestCase
+
+from apps.vocabulary import meaning_sets
+from apps.vocabulary.meaning_sets import get_meanings, intern_meanings, intern_meanings_many, load_meanings
+from apps.vocabulary.models import BookWord, MeaningSet
+from apps.vocabulary.preset_loading import load_preset_file
+
+from .factories import make_book
+from .test_preset_loading import PresetFileTestCase
+
+
+class MeaningSetTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        for cache in (meaning_sets._meaning_cache, meaning_sets._intern_cache):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+
+class InternMeaningsTests(MeaningSetTestCase):
+    def test_equal_content_is_stored_once(self):
+        ids = intern_meanings_many([
+            [{'pos': 'n.', 'meaning': '苹果'}],
+            [{'meaning': ' 苹果 ', 'pos': 'n.'}],
+            '[{"pos": "n.", "meaning": "苹果"}]',
+            [],
+            None,
+        ])
+
+        self.assertEqual(ids[0], ids[1])
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(ids[3:], [None, None])
+        self.assertEqual(MeaningSet.objects.count(), 1)
+        self.assertEqual(intern_meanings([{'pos': 'n.', 'meaning': '苹果'}]), ids[0])
+
+    def test_book_words_share_a_meaning_set(self):
+        _, (first, second) = make_book(['apple', 'banana'])
+        first.meanings = second.meanings = [{'pos': 'n.', 'meaning': '水果'}]
+        first.save()
+        second.save()
+
+        self.assertEqual(first.meaning_set_id, second.meaning_set_id)
+        self.assertEqual(BookWord.objects.get(pk=first.pk).meanings, [{'pos': 'n.', 'meaning': '水果'}])
+
+    def test_loaded_meanings_are_copies(self):
+        meaning_set_id = intern_meanings([{'pos': 'v.', 'meaning': '跑'}])
+        get_meanings(meaning_set_id)[0]['meaning'] = '改掉'
+
+        with self.assertNumQueries(0):
+            self.assertEqual(load_meanings([meaning_set_id, None]), {meaning_set_id: [{'pos': 'v.', 'meaning': '跑'}]})
+
+    def test_ids_from_a_rolled_back_transaction_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    rolled_back = intern_meanings([{'pos': 'adj.', 'meaning': '快的'}])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        meaning_set_id = intern_meanings([{'pos': 'adj.', 'meaning': '快的'}])
+
+        self.assertFalse(MeaningSet.objects.filter(pk=rolled_back).exists())
+        self.assertTrue(MeaningSet.objects.filter(pk=meaning_set_id).exists())
+
+
+class SqlContentHashTests(MeaningSetTestCase, PresetFileTestCase):
+    def test_sql_loader_reuses_meaning_sets_interned_in_python(self):
+        meaning_set_id = intern_meanings([{'pos': 'n.', 'meaning': '建议'}])
+        path = self.write('预设.csv', 'word,part_of_speech,chinese_meaning\nadvice,n.,建议\n')
+
+        result = load_preset_file(path)
+
+        book_word = BookWord.objects.get(vocabulary_book_id=result.book_id)
+        self.assertEqual(book_word.meaning_set_id, meaning_set_id)
+        self.assertEqual(MeaningSet.objects.count(), 1)
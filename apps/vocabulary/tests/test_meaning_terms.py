@@ -0,0 +1,68 @@
+import io
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.vocabulary.importing import BookWordImporter, open_csv_reader
+from apps.vocabulary.meaning_terms import reverse_lookup, sync_meaning_terms, terms_for_meanings
+from apps.vocabulary.models import BookWord
+
+from .factories import make_book, make_student
+
+
+class TermsForMeaningsTests(TestCase):
+    def test_meanings_are_split_into_normalized_terms(self):
+        terms = terms_for_meanings([
+            {'pos': 'v.', 'meaning': '退休；退役（指军人）'},
+            {'pos': 'n.', 'meaning': '建议, 忠告…'},
+            {'pos': 'n.', 'meaning': '建议'},
+        ])
+
+        self.assertEqual(terms, [('退休', 'v.'), ('退役', 'v.'), ('建议', 'n.'), ('忠告', 'n.')])
+        self.assertEqual(terms_for_meanings('not json'), [])
+
+
+class ReverseLookupTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_student()
+        self.book, rows = make_book(['advice', 'advise', 'suggestion'], name='七上', is_system_preset=True)
+        for book_word, meanings in zip(rows, [
+            [{'pos': 'n.', 'meaning': '建议；忠告'}],
+            [{'pos': 'v.', 'meaning': '建议做'}],
+            [{'pos': 'n.', 'meaning': '提议'}],
+        ]):
+            book_word.meanings = meanings
+            book_word.save()
+        BookWord.objects.filter(pk=rows[2].pk).update(custom_meanings=[{'pos': 'n.', 'meaning': '建议'}])
+        sync_meaning_terms([row.pk for row in rows])
+
+    def words(self, text, **kwargs):
+        return [(result['word'], result['exact']) for result in reverse_lookup(text, **kwargs)]
+
+    def test_exact_terms_rank_before_prefix_matches(self):
+        self.assertEqual(self.words('建议', user=self.user), [
+            ('advice', True), ('suggestion', True), ('advise', False),
+        ])
+
+    def test_custom_meanings_replace_base_terms(self):
+        self.assertEqual(self.words('提议'), [])
+
+    def test_like_wildcards_are_literal(self):
+        self.assertEqual(self.words('%'), [])
+        self.assertEqual(self.words('建_'), [])
+
+    def test_imported_words_are_indexed(self):
+        content = 'word,part_of_speech,chinese_meaning\nretire,v.,退休；退役\n'.encode('utf-8')
+        BookWordImporter(self.book).run(open_csv_reader(io.BytesIO(content)))
+
+        self.assertEqual(self.words('退役', book=self.book), [('retire', True)])
+
+    def test_view_returns_results_for_visible_books(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/api/v1/vocabulary/words/reverse/'
+
+        response = client.get(url, {'q': '忠告'})
+
+        self.assertEqual([result['word'] for result in response.data['results']], ['advice'])
+        self.assertEqual(client.get(url).status_code, 400)
@@ -0,0 +1,145 @@
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from apps.vocabulary import ordering
+from apps.vocabulary.models import BookWord, VocabularyBook, WordBasic
+from apps.vocabulary.ordering import (
+    ORDER_GAP, OrderGapExhausted, OrderingError, insert_book_word, move_book_word, rebalance_book
+)
+from apps.vocabulary.overlays import create_overlay
+
+from .factories import make_book
+
+
+def words_in_order(book):
+    return list(BookWord.objects.for_book(book).order_by('word_order', 'id').values_list(
+        'word_basic__word', flat=True
+    ))
+
+
+class GapOrderingTests(TestCase):
+    def setUp(self):
+        self.book, self.book_words = make_book(['a', 'b', 'c', 'd'], name='排序')
+        self.a, self.b, self.c, self.d = self.book_words
+
+    def test_move_takes_the_midpoint_and_writes_one_row(self):
+        rebalanced = move_book_word(self.d, after=self.a.id)
+
+        self.assertFalse(rebalanced)
+        self.assertEqual(self.d.word_order, ORDER_GAP + ORDER_GAP // 2)
+        self.assertEqual(words_in_order(self.book), ['a', 'd', 'b', 'c'])
+        self.assertEqual(
+            list(BookWord.objects.filter(pk__in=[self.a.id, self.b.id, self.c.id]).order_by('id').values_list(
+                'word_order', flat=True
+            )),
+            [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP],
+        )
+
+    def test_move_before_first_and_to_end(self):
+        move_book_word(self.c, before=self.a.id)
+        move_book_word(self.a)
+
+        self.assertEqual(words_in_order(self.book), ['c', 'b', 'd', 'a'])
+
+    def test_anchor_must_be_in_the_book(self):
+        _, (other,) = make_book(['x'], name='其他')
+
+        with self.assertRaises(OrderingError):
+            move_book_word(self.a, after=other.id)
+        with self.assertRaises(OrderingError):
+            move_book_word(self.a, after=self.a.id)
+
+    def test_insert_uses_neighbours_and_increments_word_count(self):
+        word = WordBasic.objects.create(word='bb')
+
+        book_word = insert_book_word(self.book, word, before=self.c.id)
+
+        self.assertEqual(book_word.word_order, 2 * ORDER_GAP + ORDER_GAP // 2)
+        self.assertEqual(words_in_order(self.book), ['a', 'b', 'bb', 'c', 'd'])
+        self.assertEqual(VocabularyBook.objects.get(pk=self.book.pk).word_count, 5)
+
+
+class GapExhaustionTests(TestCase):
+    def setUp(self):
+        self.book = VocabularyBook.objects.create(name='紧凑顺序')
+        # 旧数据：顺序值连续，没有间隔
+        self.book_words = [
+            BookWord.objects.create(
+                vocabulary_book=self.book, word_basic=WordBasic.objects.create(word=f'w{i:02d}'), word_order=i
+            )
+            for i in range(1, 21)
+        ]
+
+    def test_local_window_is_respaced_and_full_rebalance_is_deferred(self):
+        with mock.patch.object(ordering, 'schedule_rebalance') as schedule:
+            rebalanced = move_book_word(self.book_words[-1], after=self.book_words[9].id)
+
+        self.assertTrue(rebalanced)
+        schedule.assert_called_once_with(self.book.id)
+        expected = [f'w{i:02d}' for i in range(1, 11)] + ['w20'] + [f'w{i:02d}' for i in range(11, 20)]
+        self.assertEqual(words_in_order(self.book), expected)
+
+    def test_exhausted_neighbourhood_fails_without_renumbering_the_book(self):
+        with mock.patch.object(ordering, 'LOCAL_WINDOW', 2), mock.patch.object(ordering, 'MAX_LOCAL_WINDOW', 2), \
+                mock.patch.object(ordering, 'schedule_rebalance') as schedule:
+            with self.assertRaises(OrderGapExhausted):
+                insert_book_word(self.book, WordBasic.objects.create(word='new'), after=self.book_words[9].id)
+
+        schedule.assert_called_once_with(self.book.id)
+        self.assertEqual(
+            list(BookWord.objects.filter(vocabulary_book=self.book).order_by('id').values_list('word_order', flat=True)),
+            list(range(1, 21)),
+        )
+        self.assertFalse(BookWord.objects.filter(word_basic__word='new').exists())
+
+    def test_rebalance_book_restores_gaps_and_overlay_orders(self):
+        overlay = create_overlay(self.book, name='覆盖')
+        removed = BookWord.objects.create(
+            vocabulary_book=overlay, word_basic=self.book_words[0].word_basic,
+            base_word=self.book_words[0], word_order=1, is_removed=True,
+        )
+
+        self.assertEqual(rebalance_book(self.book.id), 20)
+
+        self.assertEqual(
+            list(BookWord.objects.filter(vocabulary_book=self.book).order_by('id').values_list('word_order', flat=True)),
+            [i * ORDER_GAP for i in range(1, 21)],
+        )
+        removed.refresh_from_db()
+        self.assertEqual(removed.word_order, ORDER_GAP)
+        self.assertEqual(rebalance_book(overlay.id), 0)
+
+
+class RespaceMigrationTests(TestCase):
+    def test_dense_books_are_respaced_so_mid_book_moves_work_without_the_background_job(self):
+        book = VocabularyBook.objects.create(name='旧词书')
+        book_words = [
+            BookWord.objects.create(vocabulary_book=book, word_basic=WordBasic.objects.create(word=w), word_order=i)
+            for i, w in enumerate(['a', 'b', 'c'], start=1)
+        ]
+        overlay = create_overlay(book, name='覆盖')
+        override = BookWord.objects.create(
+            vocabulary_book=overlay, word_basic=book_words[1].word_basic, base_word=book_words[1], word_order=2
+        )
+        spaced, _ = make_book(['x', 'y'], name='已有间隔')
+        version = VocabularyBook.objects.get(pk=spaced.pk).content_version
+
+        migration = import_module('apps.vocabulary.migrations.0023_respace_word_order')
+        migration.respace_books(None, SimpleNamespace(connection=connection))
+
+        self.assertEqual(
+            [BookWord.objects.get(pk=bw.pk).word_order for bw in book_words],
+            [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP],
+        )
+        override.refresh_from_db()
+        self.assertEqual(override.word_order, 2 * ORDER_GAP)
+        self.assertEqual(VocabularyBook.objects.get(pk=spaced.pk).content_version, version)
+
+        with mock.patch.object(ordering, 'schedule_rebalance') as schedule:
+            self.assertFalse(move_book_word(book_words[2], after=book_words[0].id))
+        schedule.assert_not_called()
+        self.assertEqual(words_in_order(book), ['a', 'c', 'b'])
@@ -0,0 +1,89 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.learning.models import LearningPlan, WordLearningStage
+from apps.vocabulary.models import BookWord, WordBasic
+from apps.vocabulary.overlays import (
+    OverlayError, create_overlay, editable_word, overlay_summary, remove_word, restore_word
+)
+
+from .factories import make_book, make_student
+
+
+class OverlayForBookTests(TestCase):
+    def setUp(self):
+        self.base, (self.apple, self.banana, self.cherry) = make_book(['apple', 'banana', 'cherry'], name='预设')
+        self.overlay = create_overlay(self.base, name='我的')
+
+    def merged(self, book):
+        return list(BookWord.objects.for_book(book).order_by('word_order', 'id').values_list('id', flat=True))
+
+    def test_new_overlay_reads_base_words_without_copying(self):
+        self.assertEqual(self.merged(self.overlay), [self.apple.id, self.banana.id, self.cherry.id])
+        self.assertFalse(BookWord.objects.filter(vocabulary_book=self.overlay).exists())
+        self.assertEqual(self.overlay.word_count, 3)
+
+    def test_override_remove_and_add_are_merged_in_order(self):
+        entry = editable_word(self.overlay, self.banana)
+        entry.custom_meanings = [{'pos': 'n.', 'meaning': '香蕉'}]
+        entry.save()
+        remove_word(self.overlay, self.cherry)
+        added = BookWord.objects.create(
+            vocabulary_book=self.overlay, word_basic=WordBasic.objects.create(word='date'),
+            word_order=self.apple.word_order + 1,
+        )
+
+        self.assertEqual(self.merged(self.overlay), [self.apple.id, added.id, entry.id])
+        self.assertEqual(self.merged(self.base), [self.apple.id, self.banana.id, self.cherry.id])
+        self.assertEqual(overlay_summary(self.overlay), {
+            'added': 1, 'overridden': 1, 'removed': 1, 'base_book_id': self.base.id
+        })
+
+        restore_word(self.overlay, entry)
+        restore_word(self.overlay, self.cherry)
+        self.assertEqual(
+            self.merged(self.overlay), [self.apple.id, added.id, self.banana.id, self.cherry.id]
+        )
+
+    def test_words_of_other_books_are_rejected(self):
+        _, (other,) = make_book(['x'], name='其他')
+
+        with self.assertRaises(OverlayError):
+            editable_word(self.overlay, other)
+
+
+class OverlayLearningStageTests(TestCase):
+    def setUp(self):
+        self.base, (self.apple, self.banana) = make_book(['apple', 'banana'], name='预设')
+        self.overlay = create_overlay(self.base, name='我的')
+        _, student = make_student()
+        self.plan = LearningPlan.objects.create(student=student, vocabulary_book=self.overlay, start_date=date.today())
+        self.base_plan = LearningPlan.objects.create(student=student, vocabulary_book=self.base, start_date=date.today())
+        for plan in (self.plan, self.base_plan):
+            WordLearningStage.objects.create(
+                learning_plan=plan, book_word=self.banana, current_stage=3, start_date=date.today()
+            )
+
+    def stage_rows(self, plan):
+        return list(WordLearningStage.objects.filter(learning_plan=plan).values_list('book_word_id', 'current_stage'))
+
+    def test_copy_on_write_moves_the_plan_stages_to_the_overlay_row(self):
+        entry = editable_word(self.overlay, self.banana)
+
+        self.assertEqual(self.stage_rows(self.plan), [(entry.id, 3)])
+        # 基础词书自己的学习计划不受影响
+        self.assertEqual(self.stage_rows(self.base_plan), [(self.banana.id, 3)])
+        # 已有覆盖行时不重复迁移
+        self.assertEqual(editable_word(self.overlay, self.banana).id, entry.id)
+        self.assertEqual(self.stage_rows(self.plan), [(entry.id, 3)])
+
+    def test_restore_moves_stages_back_instead_of_cascading(self):
+        entry = editable_word(self.overlay, self.banana)
+        WordLearningStage.objects.filter(learning_plan=self.plan).update(current_stage=4)
+
+        restore_word(self.overlay, entry)
+
+        self.assertFalse(BookWord.objects.filter(pk=entry.id).exists())
+        self.assertEqual(self.stage_rows(self.plan), [(self.banana.id, 4)])
+        self.assertEqual(self.stage_rows(self.base_plan), [(self.banana.id, 3)])
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from unittest import skipIf
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.vocabulary import pdf_extraction
+from apps.vocabulary.models import WordBasic
+from apps.vocabulary.pdf_extraction import (
+    extract_pages, match_entries, parse_glossary_line, stage_pdf, tokenize_pages
+)
+from apps.vocabulary.word_forms import sync_word_forms
+
+from .factories import make_book
+
+
+def write_pdf(pages):
+    """每页按行写入文本（内置中文字体），返回临时文件路径"""
+    document = pdf_extraction.fitz.open()
+    for lines in pages:
+        page = document.new_page()
+        for index, line in enumerate(lines):
+            page.insert_text((50, 72 + index * 20), line, fontname='china-s', fontsize=11)
+    handle = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    handle.close()
+    document.save(handle.name)
+    document.close()
+    return handle.name
+
+
+class GlossaryParsingTests(SimpleTestCase):
+    def test_glossary_lines(self):
+        self.assertEqual(parse_glossary_line('1. apple /ˈæpl/ n. 苹果'), {
+            'word': 'apple', 'phonetic_symbol': '/ˈæpl/', 'part_of_speech': 'n.', 'chinese_meaning': '苹果',
+        })
+        self.assertEqual(parse_glossary_line('• look after v. 照顾 P12'), {
+            'word': 'look after', 'phonetic_symbol': '', 'part_of_speech': 'v.', 'chinese_meaning': '照顾',
+        })
+        self.assertEqual(parse_glossary_line('present adj. & n. 现在的；礼物')['part_of_speech'], 'adj.;n.')
+        self.assertIsNone(parse_glossary_line('Unit 1 My family'))
+        self.assertIsNone(parse_glossary_line('第一单元 词汇表'))
+
+    def test_layout_detection(self):
+        glossary_page = [(1, 'Unit 1\napple n. 苹果\nbanana n. 香蕉\n', 'text')]
+        self.assertEqual(tokenize_pages(glossary_page)[0], 'glossary')
+
+        layout, entries = tokenize_pages([(1, 'The children’s apples were red.', 'text')])
+        self.assertEqual(layout, 'words')
+        self.assertEqual([row['word'] for _, row in entries], ['The', "children's", 'apples', 'were', 'red'])
+
+
+class MatchEntriesTests(TestCase):
+    def setUp(self):
+        words = [WordBasic.objects.create(word=word) for word in ('apple', 'child', 'red')]
+        sync_word_forms([word.id for word in words])
+
+    def test_word_lists_keep_only_known_words_as_base_forms(self):
+        _, entries = tokenize_pages([(1, 'Apples for the children. Page 3 apple RED', 'text')], layout='words')
+
+        rows, stats = match_entries('words', entries)
+
+        self.assertEqual([row['word'] for row in rows], ['apple', 'child', 'red'])
+        self.assertEqual((stats['duplicates'], stats['unmatched']), (1, ['for', 'page', 'the']))
+
+    def test_glossaries_keep_new_words_and_reuse_known_spellings(self):
+        _, entries = tokenize_pages([(1, 'Apple n. 苹果\ngrape n. 葡萄', 'text')], layout='glossary')
+
+        rows, stats = match_entries('glossary', entries)
+
+        self.assertEqual([row['word'] for row in rows], ['apple', 'grape'])
+        self.assertEqual(stats['matched_words'], 1)
+
+
+@skipIf(pdf_extraction.fitz is None, 'PyMuPDF 未安装')
+class PdfStagingTests(TestCase):
+    def setUp(self):
+        self.path = write_pdf([
+            ['Unit 1', '1. apple /apl/ n. 苹果', '2. look after v. 照顾 P12'],
+            [],
+            ['3. banana n. 香蕉'],
+        ] + [[f'{index}. word{chr(97 + index % 26)}x n. 单词'] for index in range(4, 20)])
+        self.addCleanup(os.unlink, self.path)
+
+    def test_pages_are_extracted_in_order_by_several_workers(self):
+        pages, stats = extract_pages(self.path, workers=2, ocr='never')
+
+        self.assertEqual([page_number for page_number, _, _ in pages], list(range(1, 20)))
+        self.assertEqual((stats['pages'], stats['workers'], stats['empty_pages']), (19, 2, 1))
+        self.assertIn('apple', pages[0][1])
+
+    def test_stage_pdf_writes_an_import_staging_batch(self):
+        book, _ = make_book(name='七上')
+
+        batch, stats = stage_pdf(book, self.path, workers=1, ocr='never')
+
+        self.assertEqual(stats['layout'], 'glossary')
+        rows = list(batch.rows.order_by('row_number').values_list('word', 'meanings'))
+        self.assertEqual(rows[:3], [
+            ('apple', [{'pos': 'n.', 'meaning': '苹果'}]),
+            ('look after', [{'pos': 'v.', 'meaning': '照顾'}]),
+            ('banana', [{'pos': 'n.', 'meaning': '香蕉'}]),
+        ])
+        self.assertEqual(batch.original_filename, os.path.basename(self.path))
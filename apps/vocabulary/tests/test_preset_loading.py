@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.test import TestCase
+
+from apps.learning.models import LearningPlan, WordLearningStage
+from apps.vocabulary.exporting import export_book_words
+from apps.vocabulary.models import BookWord, VocabularyBook
+from apps.vocabulary.ordering import ORDER_GAP
+from apps.vocabulary.preset_loading import load_preset_file
+
+from .factories import make_book, make_student
+
+
+def book_rows(book_id):
+    return list(BookWord.objects.filter(vocabulary_book_id=book_id).order_by('word_order').values_list(
+        'word_basic__word', 'word_order'
+    ))
+
+
+class PresetFileTestCase(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+
+class PresetExportRoundTripTests(PresetFileTestCase):
+    def test_exported_jsonl_loads_with_the_same_order(self):
+        book, (apple, banana) = make_book(['apple', 'banana'], name='导出')
+        BookWord.objects.filter(pk=banana.pk).update(word_order=apple.word_order + 1)
+        path = self.write('七上.jsonl', ''.join(export_book_words(book.id, 'jsonl')))
+
+        result = load_preset_file(path)
+
+        self.assertEqual(result.summary.error_count, 0)
+        self.assertEqual(book_rows(result.book_id), [('apple', ORDER_GAP), ('banana', 2 * ORDER_GAP)])
+
+
+PRESET_CSV = """word,phonetic_symbol,part_of_speech,chinese_meaning,example_sentence
+advice,/ədˈvaɪs/,n.,建议,She gave me some good advice.
+encourage,/ɪnˈkʌrɪdʒ/,v.,鼓励；激励,My parents always encourage me.
+retire,/rɪˈtaɪə(r)/,v.,退休,He plans to retire next year.
+"""
+
+
+class PresetReloadTests(PresetFileTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write('七下.csv', PRESET_CSV)
+        self.first = load_preset_file(self.path)
+        self.book = VocabularyBook.objects.get(pk=self.first.book_id)
+
+    def test_first_load_creates_the_preset_book(self):
+        self.assertEqual((self.first.status, self.first.summary.created), ('loaded', 3))
+        self.assertEqual((self.book.name, self.book.is_system_preset, self.book.word_count), ('七下', True, 3))
+        self.assertEqual(book_rows(self.book.id), [
+            ('advice', ORDER_GAP), ('encourage', 2 * ORDER_GAP), ('retire', 3 * ORDER_GAP),
+        ])
+
+    def test_unchanged_file_is_skipped(self):
+        result = load_preset_file(self.path)
+
+        self.assertEqual((result.status, result.book_id, result.changed), ('unchanged', self.book.id, False))
+        self.assertEqual(VocabularyBook.objects.get(pk=self.book.id).content_version, self.book.content_version)
+
+    def test_forced_reload_writes_nothing(self):
+        result = load_preset_file(self.path, force=True)
+
+        self.assertEqual(result.status, 'loaded')
+        self.assertEqual((result.summary.created, result.summary.updated, result.unchanged_rows), (0, 0, 3))
+        self.assertEqual(VocabularyBook.objects.get(pk=self.book.id).content_version, self.book.content_version)
+
+    def test_changed_file_updates_only_changed_rows(self):
+        self.write('七下.csv', PRESET_CSV.replace('退休', '退休；退役') + 'cheerful,,adj.,快乐的,\n')
+
+        result = load_preset_file(self.path)
+
+        self.assertEqual((result.summary.created, result.summary.updated, result.unchanged_rows), (1, 1, 2))
+        retire = BookWord.objects.get(vocabulary_book=self.book, word_basic__word='retire')
+        self.assertEqual(retire.meanings, [{'pos': 'v.', 'meaning': '退休；退役'}])
+        self.assertGreater(VocabularyBook.objects.get(pk=self.book.id).content_version, self.book.content_version)
+
+    def test_prune_keeps_words_with_learning_records(self):
+        _, student = make_student()
+        plan = LearningPlan.objects.create(student=student, vocabulary_book=self.book, start_date=date.today())
+        advice = BookWord.objects.get(vocabulary_book=self.book, word_basic__word='advice')
+        WordLearningStage.objects.create(learning_plan=plan, book_word=advice, start_date=date.today())
+        self.write('七下.csv', PRESET_CSV.splitlines()[0] + '\nretire,,v.,退休,He plans to retire next year.\n')
+
+        result = load_preset_file(self.path, prune=True)
+
+        self.assertEqual((result.stale, result.removed), (2, 1))
+        self.assertEqual([word for word, _ in book_rows(self.book.id)], ['advice', 'retire'])
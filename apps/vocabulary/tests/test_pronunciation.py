@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.vocabulary import pronunciation_cache
+from apps.vocabulary.pronunciation_cache import PronunciationCache
+
+from .upstream import StubUpstream, audio_body
+
+PROXY_URL = '/api/v1/vocabulary/pronunciation/proxy/'
+
+
+class PronunciationProxyTests(TestCase):
+    def setUp(self):
+        self.upstream = StubUpstream().__enter__()
+        self.addCleanup(self.upstream.__exit__, None, None, None)
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.cache = PronunciationCache(self.cache_dir, 10 * 1024 * 1024, upstream_url=self.upstream.url)
+        patcher = mock.patch.object(pronunciation_cache, '_cache_instance', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='listener'))
+
+    def get_audio(self, word, **headers):
+        response = self.client.get(PROXY_URL, {'word': word}, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_second_request_is_served_from_disk(self):
+        response, body = self.get_audio('Hello!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, audio_body('hello'))
+
+        response, body = self.get_audio('hello', HTTP_RANGE='bytes=0-2')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, b'ID3')
+        self.assertEqual(self.upstream.hits['hello'], 1)
+
+    def test_upstream_error_status_is_passed_through(self):
+        response, _ = self.get_audio('missing')
+        self.assertEqual(response.status_code, 404)
+
+    def test_file_evicted_after_lookup_is_fetched_again(self):
+        self.get_audio('apple')
+        original_lookup = self.cache.lookup
+        evicted = []
+
+        def lookup_then_evict(word):
+            # 查找命中后、视图打开文件之前，文件被其他进程淘汰
+            audio = original_lookup(word)
+            if audio is not None and not evicted:
+                os.remove(audio.path)
+                evicted.append(audio.path)
+            return audio
+
+        with mock.patch.object(self.cache, 'lookup', side_effect=lookup_then_evict):
+            response, body = self.get_audio('apple')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, audio_body('apple'))
+        self.assertEqual(self.upstream.hits['apple'], 2)
+        self.assertTrue(os.path.exists(evicted[0]))
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.vocabulary import pronunciation_cache, pronunciation_prefetch
+from apps.vocabulary.models import PronunciationPrefetchStatus
+from apps.vocabulary.pronunciation_cache import PronunciationCache
+from apps.vocabulary.pronunciation_prefetch import prefetch_book_pronunciations, prefetch_books_in_background
+
+from .factories import make_book
+from .upstream import StubUpstream
+
+
+class PrefetchBookPronunciationsTests(TestCase):
+    def setUp(self):
+        self.upstream = StubUpstream().__enter__()
+        self.addCleanup(self.upstream.__exit__, None, None, None)
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.cache = PronunciationCache(self.cache_dir, 10 * 1024 * 1024, upstream_url=self.upstream.url)
+        patcher = mock.patch.object(pronunciation_cache, '_cache_instance', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.book, _ = make_book(['apple', 'banana', 'missing', 'cherry'])
+
+    def prefetch(self, **kwargs):
+        return prefetch_book_pronunciations(self.book.id, concurrency=2, rate=0, **kwargs)
+
+    def test_prefetch_downloads_missing_words_once(self):
+        self.cache.fetch('banana')
+
+        summary = self.prefetch()
+
+        self.assertEqual(summary['total'], 4)
+        self.assertEqual(summary['already_cached'], 1)
+        self.assertEqual(summary['cached'], 2)
+        self.assertEqual(summary['not_found'], 1)
+        self.assertEqual(self.upstream.hits['banana'], 1)
+        statuses = dict(PronunciationPrefetchStatus.objects.values_list('word', 'status'))
+        self.assertEqual(statuses, {'apple': 'cached', 'cherry': 'cached', 'missing': 'not_found'})
+
+        again = self.prefetch()
+        self.assertEqual(again['already_cached'], 3)
+        self.assertEqual(self.upstream.hits['apple'], 1)
+
+    def test_retryable_errors_are_retried(self):
+        self.upstream.statuses['cherry'] = 503
+
+        with mock.patch('apps.vocabulary.pronunciation_prefetch.time.sleep'):
+            summary = self.prefetch(retries=2)
+
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(self.upstream.hits['cherry'], 3)
+        status = PronunciationPrefetchStatus.objects.get(word='cherry')
+        self.assertEqual((status.status, status.attempts), ('failed', 3))
+
+    def test_failed_fetch_keeps_last_successful_fetch_time(self):
+        self.prefetch()
+        fetched_at = PronunciationPrefetchStatus.objects.get(word='apple').fetched_at
+        self.assertIsNotNone(fetched_at)
+
+        # 缓存文件被淘汰后再次预取时上游出错
+        shutil.rmtree(self.cache_dir)
+        self.upstream.statuses['apple'] = 500
+        self.prefetch(retries=0)
+
+        status = PronunciationPrefetchStatus.objects.get(word='apple')
+        self.assertEqual(status.status, 'failed')
+        self.assertEqual(status.fetched_at, fetched_at)
+
+    def test_status_word_length_is_not_limited(self):
+        self.assertTrue(PronunciationPrefetchStatus.objects.create(word='a' * 150, status='cached').pk)
+
+
+class PrefetchBooksInBackgroundTests(TestCase):
+    def test_failure_on_one_book_does_not_stop_the_batch(self):
+        def prefetch(book_id, **kwargs):
+            if book_id == 1:
+                raise RuntimeError('磁盘已满')
+            return {}
+
+        with mock.patch.object(pronunciation_prefetch, 'prefetch_book_pronunciations', side_effect=prefetch) as mocked, \
+                mock.patch.object(pronunciation_prefetch, 'connection'), \
+                self.assertLogs('django', level='ERROR') as logs:
+            prefetch_books_in_background([1, 2, 3], rate=0).result()
+
+        self.assertEqual([call.args[0] for call in mocked.call_args_list], [1, 2, 3])
+        self.assertIn('词汇书 1 后台发音预取失败: 磁盘已满', logs.output[0])
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.vocabulary import word_forms
+from apps.vocabulary.word_forms import get_book_form_map, lookup_book_words, rebuild_word_forms
+
+from .factories import make_book
+
+
+class BookFormMapTests(TestCase):
+    def setUp(self):
+        word_forms._book_form_cache.clear()
+        self.addCleanup(word_forms._book_form_cache.clear)
+        self.book, self.book_words = make_book(['encourage', 'stop'], name='词形')
+        rebuild_word_forms()
+
+    def test_small_book_map_is_built_once_and_cached(self):
+        form_map = get_book_form_map(self.book)
+
+        self.assertIn('encouraging', form_map)
+        with mock.patch.object(word_forms, '_build_book_form_map') as build:
+            self.assertIs(get_book_form_map(self.book), form_map)
+        build.assert_not_called()
+
+    def test_large_book_is_detected_before_building_and_falls_back_to_queries(self):
+        with mock.patch.object(word_forms, 'BOOK_FORM_CACHE_MAX_FORMS', 3), \
+                mock.patch.object(word_forms, '_build_book_form_map') as build:
+            self.assertIsNone(get_book_form_map(self.book))
+            matches, not_found = lookup_book_words(self.book, ['Encouraged', 'stopping', 'zebra'])
+            # 判断结果按版本缓存，不会每次重新计数
+            with mock.patch.object(word_forms, '_count_book_forms') as count:
+                self.assertIsNone(get_book_form_map(self.book))
+            count.assert_not_called()
+
+        build.assert_not_called()
+        self.assertEqual(matches, {
+            'Encouraged': [self.book_words[0].id],
+            'stopping': [self.book_words[1].id],
+        })
+        self.assertEqual(not_found, ['zebra'])
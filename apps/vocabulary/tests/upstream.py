@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+测试用的发音上游替身：本地线程中的HTTP服务，按 ?audio=<word> 返回假的音频内容
+
+- statuses 中的单词返回对应的错误状态码（默认 missing 返回404），测试中可随时修改
+- hits 记录每个单词被请求的次数
+"""
+
+import http.server
+import threading
+import urllib.parse
+from collections import Counter
+
+
+class StubUpstream:
+    """在随机端口启动的发音上游替身，用作上下文管理器"""
+
+    def __init__(self):
+        self.hits = Counter()
+        self.statuses = {'missing': 404}
+        hits, statuses = self.hits, self.statuses
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                word = query.get('audio', [''])[0]
+                hits[word] += 1
+                if word in statuses:
+                    self.send_response(statuses[word])
+                    self.end_headers()
+                    return
+                body = audio_body(word)
+                self.send_response(200)
+                self.send_header('Content-Type', 'audio/mpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/dictvoice"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def audio_body(word):
+    """替身返回的音频内容"""
+    return b'ID3' + word.encode('utf-8') * 20
@@ -25,7 +25,10 @@ urlpatterns = [
     # 单词相关
     path('words/<int:pk>/', views.BookWordDetailView.as_view(), name='book-word-detail'),
     path('words/search/', views.WordSearchView.as_view(), name='word-search'),
+    path('words/suggest/', views.WordSuggestView.as_view(), name='word-suggest'),
     path('words/basic/', views.WordBasicListView.as_view(), name='word-basic-list'),
+    path('examples/search/', views.ExampleSentenceSearchView.as_view(), name='example-sentence-search'),
+    path('words/reverse/', views.ReverseLookupView.as_view(), name='word-reverse-lookup'),
 
 
     
@@ -35,6 +38,7 @@ urlpatterns = [
     # 导入/导出
     path('books/<int:book_id>/import/', views.ImportWordsView.as_view(), name='import-words'),
     path('books/<int:book_id>/export/', views.ExportWordsView.as_view(), name='export-words'),
+    path('imports/<int:pk>/', views.ImportJobDetailView.as_view(), name='import-job-detail'),
     # iciba suggest
     path('iciba_suggest/', views.iciba_suggest, name='iciba-suggest'),
     
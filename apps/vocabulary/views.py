@@ -4,18 +4,46 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import models
-from django.http import HttpResponse, JsonResponse
-from .models import VocabularyBook, BookWord, WordBasic, StudentKnownWord
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import JSONObject
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse, FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+from .models import VocabularyBook, BookWord, WordBasic, StudentKnownWord, ImportJob
 from .serializers import (
-    VocabularyBookSerializer, BookWordSerializer,
+    VocabularyBookSerializer, VocabularyBookWithStatsSerializer, BookWordSerializer,
     WordBasicSerializer, StudentKnownWordSerializer,
-    BookWordUpdateSerializer
+    BookWordUpdateSerializer, ImportJobSerializer
+)
+from .importing import BookWordImporter, ImportFormatError, open_csv_reader
+from .import_jobs import create_import_job, sync_import_max_bytes
+from .book_overlap import get_overlaps
+from .book_deletion import BookDeletionError, schedule_purge, soft_delete_book
+from .example_search import MAX_LIMIT as MAX_EXAMPLE_SEARCH_LIMIT, search_examples
+from .exporting import EXPORT_FORMATS, export_book_words
+from .fuzzy_lookup import (
+    DEFAULT_LIMIT as FUZZY_DEFAULT_LIMIT, MAX_EDIT_DISTANCE, get_index as get_fuzzy_index, suggest_words
+)
+from .meaning_terms import MAX_LIMIT as MAX_REVERSE_LOOKUP_LIMIT, reverse_lookup
+from .ordering import OrderingError, insert_book_word, move_book_word
+from .overlays import (
+    OverlayError, create_overlay, editable_word, overlay_summary, remove_word, restore_word
+)
+from .word_forms import MAX_LOOKUP_TEXTS, book_content_version, lookup_book_words, sync_word_forms
+from .known_words import (
+    WordSelection, bulk_mark, bulk_unmark, known_ids_payload, mark_known, unmark_known
+)
+from .pronunciation_cache import (
+    get_pronunciation_cache, PronunciationFetchError,
+    normalize_word as normalize_pronunciation_word
 )
 import csv
 import io
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from django.contrib.auth.models import User
 from apps.accounts.models import Student
 import requests
@@ -46,12 +74,16 @@ def get_student_or_none(user):
     except Student.DoesNotExist:
         return None
 
+def request_user_can_edit(user, book):
+    """词汇书的创建者或管理员可以修改"""
+    return user.is_staff or book.created_by_id == user.id
+
 # 新增视图集
 class VocabularyBookViewSet(viewsets.ModelViewSet):
     """
     API端点，允许词汇书籍查看或编辑
     """
-    serializer_class = VocabularyBookSerializer
+    serializer_class = VocabularyBookWithStatsSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
@@ -63,16 +95,114 @@ class VocabularyBookViewSet(viewsets.ModelViewSet):
         return VocabularyBook.objects.filter(
             models.Q(is_system_preset=True) |  # 系统预设词库
             models.Q(created_by=user)          # 用户自己创建的词库
-        ).order_by('name')
+        ).select_related('stats').order_by('name')
     
     def perform_create(self, serializer):
         """创建词库时自动设置创建者"""
         serializer.save(created_by=self.request.user)
     
+    def destroy(self, request, *args, **kwargs):
+        """
+        立即隐藏词汇书，单词和学习记录在后台分批删除；
+        被覆盖词书引用的基础词书不能直接删除
+        """
+        book = self.get_object()
+        try:
+            soft_delete_book(book)
+        except BookDeletionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        schedule_purge(book.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _get_editable_overlay(self):
+        """当前词书必须是覆盖词书，且只有创建者或管理员可以修改"""
+        book = self.get_object()
+        if book.base_book_id is None:
+            return book, Response({"error": "该词汇书不是覆盖词书"}, status=status.HTTP_400_BAD_REQUEST)
+        if not request_user_can_edit(self.request.user, book):
+            return book, Response({"error": "没有权限修改该词汇书"}, status=status.HTTP_403_FORBIDDEN)
+        return book, None
+
+    @action(detail=True, methods=['get'])
+    def overlaps(self, request, pk=None):
+        """
+        与该词汇书有共同单词的其他词汇书（按共有单词数排序），来自词书重叠索引
+
+        查询参数 limit（默认20）
+        """
+        book = self.get_object()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 200))
+        except ValueError:
+            return Response({"error": "limit 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+        visible_ids = set(self.get_queryset().values_list('id', flat=True))
+        overlaps = [overlap for overlap in get_overlaps(book) if overlap['book_id'] in visible_ids][:limit]
+        return Response({"book_id": book.id, "overlaps": overlaps})
+
+    @action(detail=True, methods=['post'])
+    def fork(self, request, pk=None):
+        """
+        基于当前词书创建覆盖词书，不复制单词，之后只保存新增/修改/删除的单词
+        POST /api/vocabulary/books/{id}/fork/
+        Body: {"name": "七年级上（我的版本）"}
+        """
+        base_book = self.get_object()
+        try:
+            overlay = create_overlay(base_book, user=request.user, name=request.data.get('name'))
+        except OverlayError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(overlay).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def overlay(self, request, pk=None):
+        """覆盖词书的改动统计：新增、修改、删除的单词数"""
+        book = self.get_object()
+        if book.base_book_id is None:
+            return Response({"error": "该词汇书不是覆盖词书"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(overlay_summary(book))
+
+    @action(detail=True, methods=['patch', 'delete'], url_path=r'overlay-words/(?P<book_word_id>[0-9]+)')
+    def overlay_word(self, request, pk=None, book_word_id=None):
+        """
+        在覆盖词书中修改或删除单词（可以是基础词书中的单词）
+        PATCH /api/vocabulary/books/{id}/overlay-words/{book_word_id}/
+        Body: 与 book-words 更新接口相同（word / phonetic / translation / part_of_speech / example）
+        DELETE 同一路径：从覆盖词书中删除该单词，基础词书不受影响
+        """
+        book, error = self._get_editable_overlay()
+        if error is not None:
+            return error
+        book_word = get_object_or_404(BookWord, pk=book_word_id)
+        try:
+            if request.method == 'DELETE':
+                remove_word(book, book_word)
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            entry = editable_word(book, book_word)
+        except OverlayError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = BookWordUpdateSerializer(entry, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(BookWordSerializer(entry).data)
+
+    @action(detail=True, methods=['post'], url_path=r'overlay-words/(?P<book_word_id>[0-9]+)/restore')
+    def restore_overlay_word(self, request, pk=None, book_word_id=None):
+        """撤销覆盖词书对基础单词的修改或删除"""
+        book, error = self._get_editable_overlay()
+        if error is not None:
+            return error
+        book_word = get_object_or_404(BookWord, pk=book_word_id)
+        try:
+            restore_word(book, book_word)
+        except OverlayError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(overlay_summary(book))
+
     @action(detail=False, methods=['get'])
     def system_presets(self, request):
         """获取系统预设的词汇书籍"""
-        books = VocabularyBook.objects.filter(is_system_preset=True)
+        books = VocabularyBook.objects.filter(is_system_preset=True).select_related('stats')
         serializer = self.get_serializer(books, many=True)
         return Response(serializer.data)
 
@@ -80,12 +210,12 @@ class BookWordViewSet(viewsets.ModelViewSet):
     """
     API端点，允许词汇书中的单词查看或编辑
     """
-    queryset = BookWord.objects.all()
+    queryset = BookWord.objects.select_related('word_basic', 'meaning_set')
     serializer_class = BookWordSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['vocabulary_book']
-    search_fields = ['word_basic__word', 'example_sentence']
+    search_fields = ['word_basic__word']
     ordering_fields = ['word_order', 'word_basic__word', 'created_at']
     
     def get_serializer_class(self):
@@ -102,63 +232,151 @@ class BookWordViewSet(viewsets.ModelViewSet):
             return Response({"error": "请提供book_id参数"}, status=400)
             
         try:
-            words = BookWord.objects.filter(vocabulary_book_id=book_id)
-            page = self.paginate_queryset(words)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-                
-            serializer = self.get_serializer(words, many=True)
-            return Response(serializer.data)
+            book = get_object_or_404(VocabularyBook, id=int(book_id))
+            words = BookWord.objects.for_book(book).select_related('word_basic', 'meaning_set')
+            # 按 (word_order, id) 游标分页，深页与第一页成本相同
+            paginator = BookWordCursorPagination()
+            paginator.total_count = cached_book_word_count(book, words)
+            page = paginator.paginate_queryset(words, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        except Http404:
+            raise
         except Exception as e:
             return Response({"error": f"获取单词失败: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _check_book_editable(self, book):
+        """只有创建者或管理员可以调整词汇书，系统预设词库不允许普通用户修改"""
+        if book.is_system_preset and not self.request.user.is_staff:
+            return Response({"error": "系统预设词库不允许修改"}, status=status.HTTP_403_FORBIDDEN)
+        if not request_user_can_edit(self.request.user, book):
+            return Response({"error": "没有权限修改该词汇书"}, status=status.HTTP_403_FORBIDDEN)
+        return None
+
+    @staticmethod
+    def _parse_position(data):
+        """解析 after / before 参数（BookWord ID），最多只能提供一个"""
+        after = data.get('after')
+        before = data.get('before')
+        if after is not None and before is not None:
+            raise ValueError("after 和 before 只能提供一个")
+        try:
+            return (int(after) if after is not None else None,
+                    int(before) if before is not None else None)
+        except (TypeError, ValueError):
+            raise ValueError("after / before 必须是单词ID")
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        调整单词在词书中的位置，通常只更新这一行
+        POST /api/vocabulary/book-words/{id}/move/
+        Body: {"after": 12} 或 {"before": 12}，都不提供时移到最后
+        """
+        book_word = self.get_object()
+        denied = self._check_book_editable(book_word.vocabulary_book)
+        if denied is not None:
+            return denied
+        try:
+            after, before = self._parse_position(request.data)
+            rebalanced = move_book_word(book_word, after=after, before=before)
+        except (ValueError, OrderingError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = self.get_serializer(book_word).data
+        data['rebalanced'] = rebalanced
+        return Response(data)
+
+    @action(detail=False, methods=['post'])
+    def insert(self, request):
+        """
+        在词书的指定位置插入单词
+        POST /api/vocabulary/book-words/insert/
+        Body: {
+            "book_id": 1,
+            "word": "encourage",
+            "meanings": [{"pos": "v.", "meaning": "鼓励"}],
+            "example_sentence": "...",
+            "after": 12          // 或 "before": 12，都不提供时追加到最后
+        }
+        """
+        book = get_object_or_404(VocabularyBook, id=request.data.get('book_id'))
+        denied = self._check_book_editable(book)
+        if denied is not None:
+            return denied
+
+        word = (request.data.get('word') or '').strip()
+        if not word:
+            return Response({"error": "请提供word参数"}, status=status.HTTP_400_BAD_REQUEST)
+        meanings = request.data.get('meanings') or []
+        if not isinstance(meanings, list):
+            return Response({"error": "meanings必须是数组"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            after, before = self._parse_position(request.data)
+            word_basic, created = WordBasic.objects.get_or_create(word=word)
+            if created:
+                sync_word_forms([word_basic.id])
+            book_word = insert_book_word(
+                book, word_basic, after=after, before=before,
+                meanings=meanings, example_sentence=request.data.get('example_sentence'),
+            )
+        except (ValueError, OrderingError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(self.get_serializer(book_word).data, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['post'], url_path='batch')
     def get_words_by_texts(self, request):
         """
-        通过单词文本批量查询词书中对应的单词详情
+        通过单词文本批量查询词书中对应的单词详情（忽略大小写，支持屈折形式）
         POST /api/vocabulary/book-words/batch/
         Body: {
             "book_id": 1,
-            "word_texts": ["encourage", "retire", "cheerful", ...]
+            "word_texts": ["encourage", "Retired", "cheerful", ...]
         }
         """
         book_id = request.data.get('book_id')
-        word_texts = request.data.get('word_texts', [])
-        
         if not book_id:
             return Response({"error": "请提供book_id参数"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not word_texts or not isinstance(word_texts, list):
-            return Response({"error": "请提供word_texts数组参数"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if len(word_texts) > 100:  # 限制批量查询数量
-            return Response({"error": "单次查询单词数量不能超过100个"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            # 验证词书是否存在
-            vocabulary_book = get_object_or_404(VocabularyBook, id=book_id)
-            
-            # 通过单词文本查询对应的单词详情
-            words = BookWord.objects.filter(
-                vocabulary_book_id=book_id,
-                word_basic__word__in=word_texts,
-                word_basic__isnull=False
-            ).select_related('word_basic', 'vocabulary_book').order_by('word_order')
-            
-            # 序列化返回数据
-            serializer = self.get_serializer(words, many=True)
-            
-            return Response({
-                "words": serializer.data,
-                "total_requested": len(word_texts),
-                "total_found": words.count()
-            }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-                         return Response({
-                 "error": f"批量查询单词失败: {str(e)}"
-             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        vocabulary_book = get_object_or_404(VocabularyBook, id=book_id)
+        return batch_lookup_response(vocabulary_book, request.data.get('word_texts', []), self.get_serializer)
+
+def batch_lookup_response(vocabulary_book, word_texts, get_serializer):
+    """
+    批量文本查询的公共实现：词形索引一次解析全部输入，再一次查询取回单词详情
+
+    返回 words（按书中顺序）、matches（输入 -> BookWord ID列表）和 not_found
+    """
+    if not word_texts or not isinstance(word_texts, list):
+        return Response({"error": "请提供word_texts数组参数"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(word_texts) > MAX_LOOKUP_TEXTS:  # 限制批量查询数量
+        return Response(
+            {"error": f"单次查询单词数量不能超过{MAX_LOOKUP_TEXTS}个"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        matches, not_found = lookup_book_words(vocabulary_book, word_texts)
+        book_word_ids = {book_word_id for ids in matches.values() for book_word_id in ids}
+        words = BookWord.objects.filter(id__in=book_word_ids).select_related(
+            'word_basic', 'vocabulary_book', 'meaning_set'
+        ).order_by('word_order', 'id')
+
+        # 序列化返回数据
+        serializer = get_serializer(words, many=True)
+        return Response({
+            "words": serializer.data,
+            "matches": matches,
+            "not_found": not_found,
+            "total_requested": len(word_texts),
+            "total_found": len(book_word_ids)
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            "error": f"批量查询单词失败: {str(e)}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class BookWordBatchQueryView(APIView):
     """
@@ -169,43 +387,13 @@ class BookWordBatchQueryView(APIView):
     
     def post(self, request, book_id):
         """
-        通过单词文本批量查询词书中对应的单词详情
+        通过单词文本批量查询词书中对应的单词详情（忽略大小写，支持屈折形式）
         Body: {
-            "word_texts": ["encourage", "retire", "cheerful", ...]
+            "word_texts": ["encourage", "Retired", "cheerful", ...]
         }
         """
-        word_texts = request.data.get('word_texts', [])
-        
-        if not word_texts or not isinstance(word_texts, list):
-            return Response({"error": "请提供word_texts数组参数"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if len(word_texts) > 1000:  # 限制批量查询数量
-            return Response({"error": "单次查询单词数量不能超过100个"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            # 验证词书是否存在
-            vocabulary_book = get_object_or_404(VocabularyBook, id=book_id)
-            
-            # 通过单词文本查询对应的单词详情
-            words = BookWord.objects.filter(
-                vocabulary_book_id=book_id,
-                word_basic__word__in=word_texts,
-                word_basic__isnull=False
-            ).select_related('word_basic', 'vocabulary_book').order_by('word_order')
-            
-            # 序列化返回数据
-            serializer = BookWordSerializer(words, many=True)
-            
-            return Response({
-                "words": serializer.data,
-                "total_requested": len(word_texts),
-                "total_found": words.count()
-            }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            return Response({
-                "error": f"批量查询单词失败: {str(e)}"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        vocabulary_book = get_object_or_404(VocabularyBook, id=book_id)
+        return batch_lookup_response(vocabulary_book, request.data.get('word_texts', []), BookWordSerializer)
 
 
 
@@ -216,9 +404,52 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+# 词书单词游标分页：按 (word_order, id) 走 idx_book_order，任意一页的成本与第一页相同
+class BookWordCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('word_order', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        """固定按书中顺序，不受 OrderingFilter 的 ordering 参数影响"""
+        return self.ordering
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if getattr(self, 'total_count', None) is not None:
+            response.data['count'] = self.total_count
+        return response
+
+# 单词总数缓存时间（词书内容变化时版本号递增，缓存键随之变化）
+BOOK_WORD_COUNT_CACHE_TIMEOUT = 60 * 60
+
+def cached_book_word_count(book, queryset, variant='all'):
+    """按词书内容版本缓存单词总数，避免每一页都执行 COUNT(*)"""
+    cache_key = f"book_word_count:{variant}:{book.id}:{book_content_version(book)}"
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, BOOK_WORD_COUNT_CACHE_TIMEOUT)
+    return count
+
+# 已掌握单词游标分页：按标记时间倒序，翻页成本与偏移量无关
+class KnownWordCursorPagination(CursorPagination):
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 2000
+    ordering = ('-marked_at', '-id')
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        # 首页附带总数，兼容原来返回 count 的调用方
+        if getattr(self, 'total_count', None) is not None:
+            response.data['count'] = self.total_count
+        return response
+
 # 词库书籍列表API
 class VocabularyBookListView(generics.ListAPIView):
-    serializer_class = VocabularyBookSerializer
+    serializer_class = VocabularyBookWithStatsSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -227,12 +458,12 @@ class VocabularyBookListView(generics.ListAPIView):
         return VocabularyBook.objects.filter(
             models.Q(is_system_preset=True) |  # 系统预设词库
             models.Q(created_by=user)          # 用户自己创建的词库
-        ).order_by('name')
+        ).select_related('stats').order_by('name')
 
 # 词库书籍详情API
 class VocabularyBookDetailView(generics.RetrieveAPIView):
-    queryset = VocabularyBook.objects.all()
-    serializer_class = VocabularyBookSerializer
+    queryset = VocabularyBook.objects.select_related('stats')
+    serializer_class = VocabularyBookWithStatsSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'pk'
 
@@ -240,15 +471,13 @@ class VocabularyBookDetailView(generics.RetrieveAPIView):
 class BookWordListView(generics.ListAPIView):
     serializer_class = BookWordSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = BookWordCursorPagination
 
     def get_queryset(self):
-        book_id = self.kwargs['book_id']
-        # 确保包含word_basic关联，并过滤掉没有word_basic的记录
-        return BookWord.objects.filter(
-            vocabulary_book_id=book_id,
-            word_basic__isnull=False  # 确保word_basic存在
-        ).order_by('word_order').select_related('word_basic')
+        book = get_object_or_404(VocabularyBook, id=self.kwargs['book_id'])
+        queryset = BookWord.objects.for_book(book).select_related('word_basic', 'meaning_set')
+        self.paginator.total_count = cached_book_word_count(book, queryset)
+        return queryset
 
 # 词库单词详情API
 class BookWordDetailView(generics.RetrieveAPIView):
@@ -257,7 +486,7 @@ class BookWordDetailView(generics.RetrieveAPIView):
     lookup_field = 'pk'
 
     def get_queryset(self):
-        return BookWord.objects.all().select_related('word_basic')
+        return BookWord.objects.all().select_related('word_basic', 'meaning_set')
 
 
 
@@ -277,16 +506,139 @@ class WordSearchView(generics.ListAPIView):
     def get_queryset(self):
         query = self.request.query_params.get('q', '')
         if query:
-            return WordBasic.objects.filter(word__icontains=query)
+            queryset = WordBasic.objects.filter(word__icontains=query)
+            if not queryset.exists():
+                # 没有包含该文本的单词时，按拼写纠错结果返回（编辑距离从小到大）
+                return self._fuzzy_queryset(query) or queryset
+            return queryset
         return WordBasic.objects.none()
 
+    def _fuzzy_queryset(self, query):
+        suggestions = suggest_words(query)
+        if not suggestions:
+            return None
+        ids = [word_id for word_id, _, _ in suggestions]
+        return WordBasic.objects.filter(id__in=ids).order_by(
+            models.Case(*(models.When(id=word_id, then=position) for position, word_id in enumerate(ids)))
+        )
+
+# 拼写纠错候选API
+class WordSuggestView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        按编辑距离返回拼写相近的单词，同时返回当前进程索引的规模和内存占用
+
+        查询参数 q、limit（最大50）、max_distance（0-2）
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "请提供要纠错的单词 q"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', FUZZY_DEFAULT_LIMIT)), 50))
+            max_distance = int(request.query_params.get('max_distance', MAX_EDIT_DISTANCE))
+        except ValueError:
+            return Response({"error": "limit 和 max_distance 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        index = get_fuzzy_index()
+        if index is None:
+            response = Response({"error": "拼写纠错索引正在构建，请稍后重试"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = '30'
+            return response
+
+        suggestions = index.lookup(query, limit=limit, max_distance=max(0, max_distance))
+        return Response({
+            "query": query,
+            "suggestions": [
+                {"id": word_id, "word": word, "distance": distance}
+                for word_id, word, distance in suggestions
+            ],
+            "index": index.stats(),
+        })
+
+# 例句全文检索API
+class ExampleSentenceSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        按相关度检索例句，返回带 <mark> 高亮的片段
+
+        查询参数 q（支持 "短语"、or、-排除）、book（可选，限定词汇书）、limit（最大100）、offset
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "请提供检索关键词 q"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), MAX_EXAMPLE_SEARCH_LIMIT)
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({"error": "limit 和 offset 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        book = None
+        book_id = request.query_params.get('book')
+        if book_id:
+            if not book_id.isdigit():
+                return Response({"error": "book 必须是词汇书ID"}, status=status.HTTP_400_BAD_REQUEST)
+            book = VocabularyBook.objects.filter(
+                models.Q(is_system_preset=True) | models.Q(created_by=request.user), pk=book_id
+            ).first()
+            if book is None:
+                return Response({"error": "词汇书不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+        results = search_examples(query, user=request.user, book=book, limit=limit, offset=offset)
+        return Response({
+            "query": query,
+            "limit": limit,
+            "offset": offset,
+            "results": results,
+        })
+
+# 中文释义反查单词API
+class ReverseLookupView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        按中文释义查找英文单词，精确匹配的释义排在前面，其次是以查询文本开头的释义
+
+        查询参数 q、book（可选，限定词汇书）、limit（最大100）
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "请提供要查找的释义 q"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), MAX_REVERSE_LOOKUP_LIMIT)
+        except ValueError:
+            return Response({"error": "limit 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        book = None
+        book_id = request.query_params.get('book')
+        if book_id:
+            if not book_id.isdigit():
+                return Response({"error": "book 必须是词汇书ID"}, status=status.HTTP_400_BAD_REQUEST)
+            book = VocabularyBook.objects.filter(
+                models.Q(is_system_preset=True) | models.Q(created_by=request.user), pk=book_id
+            ).first()
+            if book is None:
+                return Response({"error": "词汇书不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+        results = reverse_lookup(query, user=request.user, book=book, limit=limit)
+        return Response({"query": query, "results": results})
+
 # 导入单词视图
 class ImportWordsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
     def post(self, request, book_id):
-        """批量导入单词API"""
+        """
+        批量导入单词API，返回导入汇总
+
+        文件超过 VOCABULARY_IMPORT_SYNC_MAX_BYTES 或传入 background=true 时，
+        创建后台导入任务并返回202，通过 imports/<id>/ 查询进度
+        """
         csv_file = request.FILES.get('csv_file')
         
         if not csv_file:
@@ -295,125 +647,37 @@ class ImportWordsView(APIView):
         try:
             book = VocabularyBook.objects.get(id=book_id)
             
-            # 尝试多种编码方式读取文件
-            file_content = csv_file.read()
-            decoded_file = None
-            
-            # 尝试的编码列表
-            encodings = ['utf-8', 'gbk', 'gb2312', 'utf-8-sig', 'latin1']
-            
-            for encoding in encodings:
-                try:
-                    decoded_file = file_content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if decoded_file is None:
-                return Response(
-                    {"error": "无法解析文件编码，请确保文件是UTF-8、GBK或GB2312编码"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # 预处理CSV内容，处理可能的格式问题
-            lines = decoded_file.splitlines()
-            if not lines:
-                return Response(
-                    {"error": "文件为空"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # 使用更强健的CSV解析
+            # 按流读取CSV，自动识别编码并校验表头
             try:
-                io_string = io.StringIO(decoded_file)
-                # 设置更宽松的CSV解析选项
-                reader = csv.DictReader(
-                    io_string, 
-                    delimiter=',', 
-                    quotechar='"', 
-                    skipinitialspace=True,
-                    quoting=csv.QUOTE_MINIMAL
-                )
-                
-                # 验证表头
-                fieldnames = reader.fieldnames
-                if not fieldnames or 'word' not in fieldnames or 'chinese_meaning' not in fieldnames:
-                    return Response(
-                        {"error": "CSV文件格式错误。必须包含'word'和'chinese_meaning'列"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                    
-            except Exception as csv_error:
+                reader = open_csv_reader(csv_file, required_columns=('word', 'chinese_meaning'))
+            except ImportFormatError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except csv.Error as csv_error:
                 return Response(
                     {"error": f"CSV文件格式错误: {str(csv_error)}"}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            word_count = 0
-            imported_words = []
-            
-            # 获取当前词汇书中最大的word_order
-            max_order = BookWord.objects.filter(vocabulary_book=book).aggregate(
-                models.Max('word_order')
-            ).get('word_order__max') or 0
-            
-            for row in reader:
-                # 跳过空行或无效数据
-                if not row.get('word') or not row.get('word').strip():
-                    continue
-                if not row.get('chinese_meaning') or not row.get('chinese_meaning').strip():
-                    continue
-                
-                # 创建或更新单词
-                max_order += 1
-                
-                # 处理词性字段
-                part_of_speech = row.get('part_of_speech', '')
-                chinese_meaning = row['chinese_meaning']
-                
-                # 构建meanings JSON结构
-                meanings = []
-                if part_of_speech and chinese_meaning:
-                    meanings.append({
-                        'pos': part_of_speech,
-                        'meaning': chinese_meaning
-                    })
-                elif chinese_meaning:
-                    meanings.append({
-                        'pos': '',
-                        'meaning': chinese_meaning
-                    })
-                
-                # 创建或更新WordBasic
-                word_basic, _ = WordBasic.objects.get_or_create(
-                    word=row['word'],
-                    defaults={
-                        'phonetic_symbol': row.get('phonetic_symbol', ''),
-                        'uk_pronunciation': row.get('uk_pronunciation', ''),
-                        'us_pronunciation': row.get('us_pronunciation', '')
-                    }
+            background = str(request.data.get('background', '')).lower() in ('1', 'true', 'yes')
+            if background or csv_file.size > sync_import_max_bytes():
+                # 大文件不在请求内导入，避免占满worker直到超时
+                job = create_import_job(
+                    book, csv_file, user=request.user, source='api',
+                    mode='upsert', require_meaning=True
                 )
-                
-                word, created = BookWord.objects.update_or_create(
-                    vocabulary_book=book,
-                    word_basic=word_basic,
-                    defaults={
-                        'word_order': int(row.get('word_order')) if row.get('word_order') and row.get('word_order').strip() else max_order,
-                        'meanings': meanings,
-                        'example_sentence': row.get('example_sentence', ''),
-                    }
+                data = ImportJobSerializer(job).data
+                data['status_url'] = request.build_absolute_uri(
+                    reverse('import-job-detail', kwargs={'pk': job.id})
                 )
-                word_count += 1
-                imported_words.append(BookWordSerializer(word).data)
+                return Response(data, status=status.HTTP_202_ACCEPTED)
             
-            # 更新词汇书的词汇量
-            total_words = BookWord.objects.filter(vocabulary_book=book).count()
-            book.word_count = total_words
-            book.save()
+            # 分块批量写入：已存在的单词更新，不存在的新建
+            importer = BookWordImporter(book, mode='upsert', require_meaning=True)
+            summary = importer.run(reader)
             
             return Response({
-                "message": f"成功导入 {word_count} 个单词到词汇书 '{book.name}'",
-                "imported_words": imported_words
+                "message": f"成功导入 {summary.imported} 个单词到词汇书 '{book.name}'",
+                "summary": summary.as_dict()
             }, status=status.HTTP_201_CREATED)
         
         except VocabularyBook.DoesNotExist:
@@ -421,44 +685,47 @@ class ImportWordsView(APIView):
         except Exception as e:
             return Response({"error": f"导入失败: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# 导入任务进度视图
+class ImportJobDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        """查询后台导入任务的状态、进度、预计剩余时间和错误汇总"""
+        job = ImportJob.objects.filter(pk=pk).first()
+        if job is None or (not request.user.is_staff and job.created_by_id != request.user.id):
+            return Response({"error": "导入任务不存在"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ImportJobSerializer(job).data)
+
 # 导出单词视图
 class ExportWordsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, book_id):
-        """导出词汇书中的单词为CSV文件"""
+        """
+        流式导出词汇书中的单词（生效值，自定义优先）
+
+        查询参数 file_format: csv（默认）/ jsonl / xlsx
+        （不使用 format，该参数被DRF用于内容协商）
+        """
+        file_format = request.query_params.get('file_format', 'csv').lower()
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"不支持的导出格式，可选: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
             book = VocabularyBook.objects.get(id=book_id)
-            words = BookWord.objects.filter(vocabulary_book=book).order_by('word_order')
-            
-            if not words:
+            if not BookWord.objects.for_book(book).exists():
                 return Response({"error": "词汇书中没有单词"}, status=status.HTTP_404_NOT_FOUND)
             
-            # 创建CSV响应
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{book.name}_words.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow(['word', 'phonetic_symbol', 'part_of_speech', 'chinese_meaning', 'example_sentence', 'word_order'])
-            
-            for word in words:
-                # 从meanings JSON中提取词性和释义
-                part_of_speech = ''
-                chinese_meaning = ''
-                if word.meanings and len(word.meanings) > 0:
-                    first_meaning = word.meanings[0]
-                    part_of_speech = first_meaning.get('pos', '')
-                    chinese_meaning = first_meaning.get('meaning', '')
-                
-                writer.writerow([
-                    word.word_basic.word if word.word_basic else '',
-                    word.word_basic.phonetic_symbol if word.word_basic else '',
-                    part_of_speech,
-                    chinese_meaning,
-                    word.example_sentence or '',
-                    word.word_order
-                ])
-            
+            content_type, extension = EXPORT_FORMATS[file_format]
+            response = StreamingHttpResponse(
+                export_book_words(book.id, file_format), content_type=content_type
+            )
+            response['Content-Disposition'] = content_disposition_header(
+                True, f"{book.name}_words.{extension}"
+            )
             return response
         
         except VocabularyBook.DoesNotExist:
@@ -501,11 +768,15 @@ class StudentKnownWordViewSet(viewsets.ModelViewSet):
     - GET /api/vocabulary/known-words/?student=<student_id>&book=<book_id> (List all known words with details for a student in a book)
     - DELETE /api/vocabulary/known-words/unmark/ (Unmark word)
       Body: { "student": <student_id>, "word": <word_basic_id> }
+    - POST /api/vocabulary/known-words/bulk-mark/ , /bulk-unmark/ (Bulk mark/unmark)
+      Body: { "student": <student_id>, "book": <book_id>, "order_from": 1, "order_to": 800 } (positions 1..800 in the book)
+            or { "student": <student_id>, "stages": [6] } or { "student": <student_id>, "word_ids": [...] }
+    - GET /api/vocabulary/known-words/ids/?student=<student_id>&since=<token> (Known id sync)
     """
     queryset = StudentKnownWord.objects.all()
     serializer_class = StudentKnownWordSerializer
     permission_classes = [permissions.IsAuthenticated] # Protect this endpoint
-    pagination_class = None  # 禁用分页，一次性返回所有数据
+    pagination_class = KnownWordCursorPagination
 
     def get_serializer_class(self):
         """根据是否有book参数选择不同的序列化器"""
@@ -515,16 +786,12 @@ class StudentKnownWordViewSet(viewsets.ModelViewSet):
             return StudentKnownWordDetailSerializer
         return self.serializer_class
 
-    def get_serializer_context(self):
-        """传递book_id到序列化器context"""
-        context = super().get_serializer_context()
-        book_id = self.request.query_params.get('book')
-        if book_id:
-            try:
-                context['book_id'] = int(book_id)
-            except (ValueError, TypeError):
-                pass
-        return context
+    def _get_book_id(self):
+        """解析book参数，无效时返回None"""
+        try:
+            return int(self.request.query_params.get('book'))
+        except (ValueError, TypeError):
+            return None
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -543,49 +810,58 @@ class StudentKnownWordViewSet(viewsets.ModelViewSet):
         queryset = queryset.filter(student_id=student_id)
         
         # 按词书筛选（如果提供了book参数）
-        book_id = self.request.query_params.get('book')
-        if book_id:
-            try:
-                book_id = int(book_id)
-                # 性能优化：使用exists子查询而不是values_list + __in
-                queryset = queryset.filter(
-                    word_id__in=BookWord.objects.filter(
-                        vocabulary_book_id=book_id
-                    ).values_list('word_basic_id', flat=True)
-                )
-            except (ValueError, TypeError):
+        if self.request.query_params.get('book'):
+            book_id = self._get_book_id()
+            if book_id is None:
                 return StudentKnownWord.objects.none()
+            if self.action == 'list':
+                return self.get_detail_queryset(queryset, book_id)
+            queryset = queryset.filter(
+                Exists(BookWord.objects.for_book(book_id).filter(word_basic_id=OuterRef('word_id')))
+            )
 
         # 性能优化：预加载相关数据
         return queryset.select_related('student', 'word').order_by('-marked_at')
 
+    def get_detail_queryset(self, queryset, book_id):
+        """
+        带词书释义的扁平行：一个关联子查询取出该书中对应的BookWord（第一条），
+        整页只需一条SQL
+        """
+        book_words = BookWord.objects.for_book(book_id).filter(
+            word_basic_id=OuterRef('word_id')
+        ).order_by('id')
+        book_word = book_words.values(data=JSONObject(
+            meanings='meaning_set__meanings',
+            custom_meanings='custom_meanings',
+            example_sentence='example_sentence',
+        ))[:1]
+        return queryset.filter(Exists(book_words)).annotate(
+            book_word=Subquery(book_word, output_field=models.JSONField())
+        ).values(
+            'id', 'student_id', 'word_id', 'word__word', 'word__phonetic_symbol',
+            'word__uk_pronunciation', 'word__us_pronunciation', 'marked_at', 'book_word'
+        ).order_by('-marked_at', '-id')
+
     def list(self, request, *args, **kwargs):
-        """重写list方法，添加性能监控和数据量检查"""
+        """游标分页返回，替代原来超过1万条直接拒绝的做法"""
         import time
         start_time = time.time()
         
         queryset = self.filter_queryset(self.get_queryset())
         
-        # 数据量检查，防止返回过多数据
-        count = queryset.count()
-        if count > 10000:  # 如果超过1万条记录，建议使用分页
-            return Response({
-                "error": "数据量过大，请联系管理员优化查询条件",
-                "count": count
-            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
-        
-        serializer = self.get_serializer(queryset, many=True)
+        # 首页（没有cursor参数）时统计总数
+        if self.paginator is not None and not request.query_params.get(self.paginator.cursor_query_param):
+            self.paginator.total_count = queryset.count()
         
-        end_time = time.time()
-        response_data = {
-            "count": count,
-            "results": serializer.data
-        }
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
         
         # 添加性能信息到响应头
-        response = Response(response_data)
+        end_time = time.time()
         response['X-Query-Time'] = f"{(end_time - start_time):.3f}s"
-        response['X-Result-Count'] = str(count)
+        response['X-Result-Count'] = str(len(serializer.data))
         
         return response
 
@@ -608,11 +884,10 @@ class StudentKnownWordViewSet(viewsets.ModelViewSet):
             return Response({"error": "Invalid Student ID or Word ID."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            known_word = StudentKnownWord.objects.get(student_id=student_id, word_id=word_id)
-            known_word.delete()
+            # 删除并记录变更日志（供增量同步使用）
+            if not unmark_known(student_id, [word_id]):
+                return Response({"error": "Record not found."}, status=status.HTTP_404_NOT_FOUND)
             return Response(status=status.HTTP_204_NO_CONTENT)
-        except StudentKnownWord.DoesNotExist:
-            return Response({"error": "Record not found."}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -648,62 +923,215 @@ class StudentKnownWordViewSet(viewsets.ModelViewSet):
         if not valid_word_ids:
             return Response({"error": "word_ids 列表中没有有效的整数ID"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 去重
-        valid_word_ids = list(set(valid_word_ids))
-
-        # 查询已存在的记录，避免重复创建
-        existing_ids = set(
-            StudentKnownWord.objects.filter(student_id=student_id, word_id__in=valid_word_ids)
-            .values_list('word_id', flat=True)
-        )
-
-        to_create_ids = [wid for wid in valid_word_ids if wid not in existing_ids]
-
-        created_objects = [
-            StudentKnownWord(student_id=student_id, word_id=wid) for wid in to_create_ids
-        ]
-
-        # 批量创建
-        StudentKnownWord.objects.bulk_create(created_objects, ignore_conflicts=True)
+        # 一条语句批量插入（已存在的自动跳过），并记录变更日志
+        created_ids, missing_ids = mark_known(student_id, valid_word_ids)
 
         return Response({
             "success": True,
             "student": student_id,
-            "created_count": len(created_objects),
-            "skipped_existing": list(existing_ids),
+            "created_count": len(created_ids),
+            "skipped_existing": sorted(set(valid_word_ids) - set(created_ids) - set(missing_ids)),
+            "not_found": missing_ids,
         }, status=status.HTTP_201_CREATED)
 
+    def _parse_bulk_request(self, request):
+        """
+        解析批量标记/取消标记的请求体，三种选择方式任选其一：
+        - {"student": 10, "word_ids": [1, 2, 3]}
+        - {"student": 10, "book": 5, "order_from": 1, "order_to": 800}
+          （书中第1到第800个单词，按位置而不是存储的 word_order，两端可省略）
+        - {"student": 10, "stages": [6], "plan": 3}（plan/book 可选，按学习阶段选择）
+
+        Returns:
+            (student_id, WordSelection) 或 (None, 错误Response)
+        """
+        def error(message):
+            return None, Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
+
+        def optional_int(name):
+            value = request.data.get(name)
+            if value in (None, ''):
+                return None
+            return int(value)
+
+        try:
+            student_id = int(request.data.get('student'))
+        except (ValueError, TypeError):
+            return error("student 参数必须是整数")
+
+        try:
+            word_ids = request.data.get('word_ids')
+            stages = request.data.get('stages')
+            book_id = optional_int('book')
+            if word_ids is not None:
+                if not isinstance(word_ids, (list, tuple)) or not word_ids:
+                    return error("word_ids 必须是非空列表")
+                return student_id, WordSelection.by_ids(word_ids)
+            if stages is not None:
+                if not isinstance(stages, (list, tuple)) or not stages:
+                    stages = [stages]
+                return student_id, WordSelection.by_stage(
+                    student_id, stages, plan_id=optional_int('plan'), book_id=book_id
+                )
+            if book_id is not None:
+                return student_id, WordSelection.by_book_range(
+                    book_id, order_from=optional_int('order_from'), order_to=optional_int('order_to')
+                )
+        except (ValueError, TypeError):
+            return error("参数必须是整数")
+        return error("需要提供 word_ids、book（可带 order_from/order_to）或 stages 之一")
+
+    @action(detail=False, methods=['post'], url_path='bulk-mark')
+    def bulk_mark_words(self, request):
+        """
+        按ID列表、词汇书 word_order 区间或学习阶段批量标记为已认识
+        一条 INSERT ... SELECT ... ON CONFLICT 完成，返回选中数和新标记数
+        """
+        student_id, selection = self._parse_bulk_request(request)
+        if student_id is None:
+            return selection
+        result = bulk_mark(student_id, selection)
+        return Response({"student": student_id, **result})
+
+    @action(detail=False, methods=['post'], url_path='bulk-unmark')
+    def bulk_unmark_words(self, request):
+        """
+        按ID列表、词汇书 word_order 区间或学习阶段批量取消标记
+        一条 DELETE ... USING 完成，返回选中数和实际取消数
+        """
+        student_id, selection = self._parse_bulk_request(request)
+        if student_id is None:
+            return selection
+        result = bulk_unmark(student_id, selection)
+        return Response({"student": student_id, **result})
+
+    @action(detail=False, methods=['get'], url_path='ids')
+    def known_ids(self, request):
+        """
+        已认识单词ID同步（用于前端置灰卡片）
+        GET /api/vocabulary/known-words/ids/?student=<student_id>&since=<token>
+
+        不带since返回全量ID；带上次的token只返回之后新增/移除的ID。
+        ID数组为升序差分编码：[3, 2, 4] 表示 [3, 5, 9]
+        """
+        try:
+            student_id = int(request.query_params.get('student'))
+        except (ValueError, TypeError):
+            return Response({"error": "student 参数必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = known_ids_payload(student_id, request.query_params.get('since'))
+        payload['student'] = student_id
+        return Response(payload)
+
 class ProxyYoudaoPronunciationView(APIView):
-    """代理有道词典发音请求，解决跨域问题"""
+    """代理有道词典发音请求，解决跨域问题；音频缓存到本地磁盘，重复播放不再请求上游"""
     
     def get(self, request):
         word = request.GET.get('word', '')
         if not word:
             return JsonResponse({'error': 'Word parameter is required'}, status=400)
         
-        # 将所有非字母和非空格的字符替换为空格
-        word = re.sub(r'[^a-zA-Z\s]', ' ', word)
-        # 去掉多余的空格（例如多个空格变成一个空格）
-        word = re.sub(r'\s+', ' ', word).strip()
+        # 非字母字符替换为空格、合并空格并转小写，保证同一单词命中同一缓存
+        word = normalize_pronunciation_word(word)
         
         if not word:
             return JsonResponse({'error': 'Word parameter is invalid after formatting'}, status=400)
         
+        cache = get_pronunciation_cache()
         try:
-            youdao_url = f'https://dict.youdao.com/dictvoice?audio={word}'
-            response = requests.get(youdao_url, timeout=10)
-            
-            if response.status_code == 200:
-                return HttpResponse(
-                    response.content,
-                    content_type=response.headers.get('Content-Type', 'audio/mpeg')
-                )
-            else:
-                return JsonResponse(
-                    {'error': f'Failed to fetch pronunciation: {response.status_code}'},
-                    status=response.status_code
-                )
-        except requests.exceptions.Timeout:
-            return JsonResponse({'error': 'Request timeout'}, status=504)
+            audio = cache.get(word)
+            try:
+                return serve_cached_audio(request, audio)
+            except FileNotFoundError:
+                # 查找之后、打开之前文件被LRU淘汰：重新从上游下载
+                return serve_cached_audio(request, cache.fetch(word))
+        except PronunciationFetchError as e:
+            return JsonResponse({'error': str(e)}, status=e.status_code)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500) 
\ No newline at end of file
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+def serve_cached_audio(request, audio):
+    """
+    返回缓存的音频文件，支持ETag/Last-Modified条件请求和单段Range请求
+
+    Raises:
+        FileNotFoundError: 缓存文件在查找之后已被淘汰
+    """
+    last_modified = int(audio.mtime)
+    # If-None-Match / If-Modified-Since 命中时直接返回304
+    conditional_response = get_conditional_response(
+        request, etag=audio.etag, last_modified=last_modified
+    )
+    if conditional_response is not None:
+        return conditional_response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE', '')
+    if_range = request.META.get('HTTP_IF_RANGE', '')
+    if range_header and (not if_range or if_range == audio.etag):
+        byte_range = _parse_byte_range(range_header, audio.size)
+        if byte_range == 'unsatisfiable':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{audio.size}'
+            return response
+
+    # 构造响应前先打开文件，文件已被淘汰时在这里抛出，而不是在流式输出中途失败
+    audio_file = open(audio.path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_file_range(audio_file, start, length),
+            status=206,
+            content_type=audio.content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{audio.size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(audio_file, content_type=audio.content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = audio.etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=604800'
+    return response
+
+
+def _parse_byte_range(range_header, size):
+    """
+    解析 "bytes=start-end" 形式的单段Range头
+
+    Returns:
+        (start, end) 元组；多段或格式错误返回None（按完整文件响应）；越界返回'unsatisfiable'
+    """
+    match = re.fullmatch(r'\s*bytes=(\d*)-(\d*)\s*', range_header)
+    if not match:
+        return None
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+    if not start_text:
+        # 后缀范围：最后N个字节
+        suffix_length = int(end_text)
+        if suffix_length == 0:
+            return 'unsatisfiable'
+        return max(size - suffix_length, 0), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(audio_file, start, length, chunk_size=64 * 1024):
+    """按块读取已打开文件的指定区间，读完后关闭文件"""
+    with audio_file as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+单词词形索引
+
+word_forms 表保存 WordBasic 的规范化形式（小写）和按规则生成的屈折形式
+（复数/三单、过去式、现在分词、比较级，以及常见不规则变化），
+批量查询时把用户粘贴的 "Encouraged"、"encouraging" 等写法映射回词书中的单词。
+
+每本书的 词形 -> BookWord ID 映射在进程内按 (book_id, content_version) 做LRU缓存，
+词书内容变化时版本号递增，旧映射自然失效（覆盖词书同时比较基础词书的版本）。
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import F
+
+from .book_stats import schedule_stats_refresh
+from .models import BookWord, VocabularyBook, WordBasic, WordForm
+
+# 获取日志记录器
+logger = logging.getLogger('django')
+
+# 单次批量查询最多的单词数量
+MAX_LOOKUP_TEXTS = 5000
+
+# 进程内最多缓存的词书映射数量，以及单本书可缓存的最大词形数量（超过则直接查库）
+BOOK_FORM_CACHE_SIZE = 16
+BOOK_FORM_CACHE_MAX_FORMS = 200000
+
+VOWELS = set('aeiou')
+
+# 常见不规则变化：原形 -> 变化形式
+IRREGULAR_FORMS = {
+    'be': ['am', 'is', 'are', 'was', 'were', 'been', 'being'],
+    'have': ['has', 'had', 'having'],
+    'do': ['does', 'did', 'done', 'doing'],
+    'go': ['goes', 'went', 'gone', 'going'],
+    'say': ['says', 'said'],
+    'make': ['made'],
+    'take': ['took', 'taken'],
+    'come': ['came'],
+    'see': ['saw', 'seen'],
+    'know': ['knew', 'known'],
+    'get': ['got', 'gotten'],
+    'give': ['gave', 'given'],
+    'find': ['found'],
+    'think': ['thought'],
+    'tell': ['told'],
+    'become': ['became'],
+    'leave': ['left'],
+    'feel': ['felt'],
+    'bring': ['brought'],
+    'begin': ['began', 'begun'],
+    'keep': ['kept'],
+    'hold': ['held'],
+    'write': ['wrote', 'written'],
+    'stand': ['stood'],
+    'hear': ['heard'],
+    'mean': ['meant'],
+    'meet': ['met'],
+    'run': ['ran'],
+    'pay': ['paid'],
+    'sit': ['sat'],
+    'speak': ['spoke', 'spoken'],
+    'lie': ['lay', 'lain', 'lying'],
+    'lead': ['led'],
+    'read': [],
+    'grow': ['grew', 'grown'],
+    'lose': ['lost'],
+    'fall': ['fell', 'fallen'],
+    'send': ['sent'],
+    'build': ['built'],
+    'understand': ['understood'],
+    'draw': ['drew', 'drawn'],
+    'break': ['broke', 'broken'],
+    'spend': ['spent'],
+    'rise': ['rose', 'risen'],
+    'drive': ['drove', 'driven'],
+    'buy': ['bought'],
+    'wear': ['wore', 'worn'],
+    'choose': ['chose', 'chosen'],
+    'seek': ['sought'],
+    'throw': ['threw', 'thrown'],
+    'catch': ['caught'],
+    'deal': ['dealt'],
+    'win': ['won'],
+    'forget': ['forgot', 'forgotten'],
+    'sell': ['sold'],
+    'fight': ['fought'],
+    'teach': ['taught'],
+    'eat': ['ate', 'eaten'],
+    'sing': ['sang', 'sung'],
+    'swim': ['swam', 'swum'],
+    'drink': ['drank', 'drunk'],
+    'fly': ['flew', 'flown', 'flies'],
+    'sleep': ['slept'],
+    'steal': ['stole', 'stolen'],
+    'ride': ['rode', 'ridden'],
+    'hide': ['hid', 'hidden'],
+    'shake': ['shook', 'shaken'],
+    'bite': ['bit', 'bitten'],
+    'freeze': ['froze', 'frozen'],
+    'wake': ['woke', 'woken'],
+    'forgive': ['forgave', 'forgiven'],
+    'good': ['better', 'best'],
+    'well': ['better', 'best'],
+    'bad': ['worse', 'worst'],
+    'many': ['more', 'most'],
+    'much': ['more', 'most'],
+    'little': ['less', 'least'],
+    'far': ['farther', 'further', 'farthest', 'furthest'],
+    'man': ['men'],
+    'woman': ['women'],
+    'child': ['children'],
+    'person': ['people'],
+    'foot': ['feet'],
+    'tooth': ['teeth'],
+    'mouse': ['mice'],
+    'goose': ['geese'],
+    'leaf': ['leaves'],
+    'life': ['lives'],
+    'knife': ['knives'],
+    'wife': ['wives'],
+    'half': ['halves'],
+    'wolf': ['wolves'],
+    'shelf': ['shelves'],
+}
+
+_EDGE_PUNCTUATION = re.compile(r"^[^\w]+|[^\w]+$", re.UNICODE)
+
+
+def normalize_form(text):
+    """
+    规范化用户输入：去掉首尾标点和空白，合并空格并转小写
+
+    Returns:
+        str: 可能为空字符串
+    """
+    text = _EDGE_PUNCTUATION.sub('', (text or '').strip())
+    return re.sub(r'\s+', ' ', text).lower()
+
+
+def _double_final_consonant(word):
+    """短元音+单辅音结尾（如 stop, plan）加后缀时双写末尾辅音"""
+    return (
+        len(word) >= 3
+        and word[-1] not in VOWELS and word[-1] not in 'wxy'
+        and word[-2] in VOWELS
+        and word[-3] not in VOWELS
+    )
+
+
+def generate_forms(word):
+    """
+    生成单词的屈折形式（不包含原形本身），规则生成的非真实词形不会影响查询结果
+
+    Returns:
+        set
+    """
+    word = normalize_form(word)
+    if not word or ' ' in word or not word.isalpha():
+        # 词组只保留原形
+        return set(IRREGULAR_FORMS.get(word, []))
+
+    forms = set(IRREGULAR_FORMS.get(word, []))
+
+    # 复数 / 第三人称单数
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+        forms.add(word + 'es')
+    elif word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        forms.add(word[:-1] + 'ies')
+    else:
+        forms.add(word + 's')
+
+    # 过去式 / 过去分词、比较级 / 最高级
+    if word.endswith('e'):
+        forms.update([word + 'd', word + 'r', word + 'st'])
+    elif word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        forms.update([word[:-1] + 'ied', word[:-1] + 'ier', word[:-1] + 'iest'])
+    elif _double_final_consonant(word):
+        doubled = word + word[-1]
+        forms.update([doubled + 'ed', doubled + 'er', doubled + 'est', word + 'ed'])
+    else:
+        forms.update([word + 'ed', word + 'er', word + 'est'])
+
+    # 现在分词
+    if word.endswith('ie'):
+        forms.add(word[:-2] + 'ying')
+    elif word.endswith('e') and not word.endswith(('ee', 'ye', 'oe')):
+        forms.add(word[:-1] + 'ing')
+    elif _double_final_consonant(word):
+        forms.update([word + word[-1] + 'ing', word + 'ing'])
+    else:
+        forms.add(word + 'ing')
+
+    forms.discard(word)
+    return forms
+
+
+def forms_for_word(word):
+    """
+    原形和全部词形
+
+    Returns:
+        list: [(form, kind)]，kind 为 'exact' 或 'inflection'
+    """
+    normalized = normalize_form(word)
+    if not normalized:
+        return []
+    return [(normalized, 'exact')] + [(form, 'inflection') for form in sorted(generate_forms(normalized))]
+
+
+def rebuild_word_forms(word_basic_ids=None, missing_only=False, batch_size=2000):
+    """
+    重建 WordBasic 的词形索引
+
+    Args:
+        word_basic_ids: 只处理这些单词；为None时处理全部单词
+        missing_only: 只补全还没有词形记录的单词
+
+    Returns:
+        int: 处理的单词数量
+    """
+    queryset = WordBasic.objects.order_by('id')
+    if word_basic_ids is not None:
+        word_basic_ids = list(word_basic_ids)
+        if not word_basic_ids:
+            return 0
+        queryset = queryset.filter(id__in=word_basic_ids)
+    if missing_only:
+        queryset = queryset.filter(forms__isnull=True)
+
+    processed = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list('id', 'word')[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids = [word_id for word_id, _ in rows]
+        with transaction.atomic():
+            WordForm.objects.filter(word_basic_id__in=ids).delete()
+            WordForm.objects.bulk_create(
+                [
+                    WordForm(form=form[:100], kind=kind, word_basic_id=word_id)
+                    for word_id, word in rows
+                    for form, kind in forms_for_word(word)
+                ],
+                ignore_conflicts=True,
+            )
+        processed += len(rows)
+    return processed
+
+
+def sync_word_forms(word_basic_ids):
+    """导入新单词后补全词形索引（已有词形的单词不重复生成）"""
+    return rebuild_word_forms(word_basic_ids, missing_only=True)
+
+
+def bump_book_version(book_id):
+    """词书内容变化后递增版本号，使缓存的词形映射失效，并在提交后刷新词书统计"""
+    VocabularyBook.objects.filter(pk=book_id).update(content_version=F('content_version') + 1)
+    schedule_stats_refresh(book_id)
+
+
+class _BookFormCache:
+    """(book_id, content_version) -> {form: [(priority, word_order, book_word_id)]} 的LRU缓存"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, book_id, version):
+        with self._lock:
+            entry = self._entries.get(book_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(book_id)
+            return entry[1]
+
+    def set(self, book_id, version, form_map):
+        with self._lock:
+            self._entries[book_id] = (version, form_map)
+            self._entries.move_to_end(book_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_book_form_cache = _BookFormCache(BOOK_FORM_CACHE_SIZE)
+
+# 缓存中表示"词形过多，不缓存映射"的标记
+_TOO_LARGE = object()
+
+# 原形匹配优先于屈折形式；自定义拼写优先于基础拼写
+_PRIORITY = {'custom_exact': 0, 'exact': 1, 'custom_inflection': 2, 'inflection': 3}
+
+
+def _resolve(candidates):
+    """同一词形对应多个单词时，只保留优先级最高的一组，并按书中顺序排列"""
+    best = min(priority for priority, _, _ in candidates)
+    return [book_word_id for priority, _, book_word_id in sorted(candidates) if priority == best]
+
+
+def _custom_rows(book):
+    return BookWord.objects.for_book(book).exclude(custom_word__isnull=True).exclude(custom_word='').values_list(
+        'id', 'custom_word', 'word_order'
+    )
+
+
+def _build_book_form_map(book):
+    """一次JOIN查询构建整本书的词形映射（覆盖词书按合并后的单词构建）"""
+    form_map = {}
+
+    def add(form, kind, word_order, book_word_id):
+        form_map.setdefault(form, []).append((_PRIORITY[kind], word_order, book_word_id))
+
+    for form, kind, book_word_id, word_order in BookWord.objects.for_book(book).filter(
+        word_basic__forms__isnull=False
+    ).values_list('word_basic__forms__form', 'word_basic__forms__kind', 'id', 'word_order'):
+        add(form, kind, word_order, book_word_id)
+
+    # 自定义拼写不在 word_forms 表中，构建时即时生成
+    for book_word_id, custom_word, word_order in _custom_rows(book):
+        for form, kind in forms_for_word(custom_word):
+            add(form, 'custom_' + kind, word_order, book_word_id)
+    return form_map
+
+
+def _query_forms(book, forms):
+    """不使用缓存时：一条按 form 索引的查询解析全部输入"""
+    form_map = {}
+    for form, kind, book_word_id, word_order in BookWord.objects.for_book(book).filter(
+        word_basic__forms__form__in=forms
+    ).values_list('word_basic__forms__form', 'word_basic__forms__kind', 'id', 'word_order'):
+        form_map.setdefault(form, []).append((_PRIORITY[kind], word_order, book_word_id))
+
+    for book_word_id, custom_word, word_order in _custom_rows(book):
+        for form, kind in forms_for_word(custom_word):
+            if form in forms:
+                form_map.setdefault(form, []).append((_PRIORITY['custom_' + kind], word_order, book_word_id))
+    return form_map
+
+
+def book_content_version(book):
+    """词书内容的缓存版本：覆盖词书同时取决于基础词书的版本"""
+    if book.base_book_id is None:
+        return book.content_version
+    base_version = VocabularyBook.objects.filter(pk=book.base_book_id).values_list(
+        'content_version', flat=True
+    ).first()
+    return book.content_version, base_version
+
+
+def _count_book_forms(book):
+    """构建映射前先数一下词形行数（单词数 × 每个单词的词形数），一条COUNT查询"""
+    return BookWord.objects.for_book(book).filter(word_basic__forms__isnull=False).count()
+
+
+def get_book_form_map(book):
+    """
+    获取缓存的词书词形映射，版本变化或未缓存时重建；过大的词书返回None
+
+    是否过大在构建前按词形行数判断，大书不会先整表载入再丢弃；判断结果同样按版本缓存
+    """
+    version = book_content_version(book)
+    form_map = _book_form_cache.get(book.id, version)
+    if form_map is _TOO_LARGE:
+        return None
+    if form_map is None:
+        if _count_book_forms(book) > BOOK_FORM_CACHE_MAX_FORMS:
+            _book_form_cache.set(book.id, version, _TOO_LARGE)
+            return None
+        form_map = _build_book_form_map(book)
+        _book_form_cache.set(book.id, version, form_map)
+    return form_map
+
+
+def lookup_book_words(book, word_texts):
+    """
+    将用户输入的单词（任意大小写/屈折形式）解析为词书中的 BookWord ID
+
+    Returns:
+        (matches, not_found): matches 为 {原始输入: [book_word_id, ...]}，not_found 为未匹配的输入列表
+    """
+    normalized = {}
+    for text in word_texts:
+        if isinstance(text, str):
+            form = normalize_form(text)
+            if form:
+                normalized[text] = form
+
+    form_map = get_book_form_map(book)
+    if form_map is None:
+        form_map = _query_forms(book, set(normalized.values()))
+
+    matches = {}
+    not_found = []
+    for text in word_texts:
+        form = normalized.get(text) if isinstance(text, str) else None
+        candidates = form_map.get(form) if form else None
+        if candidates:
+            matches[text] = _resolve(candidates)
+        else:
+            not_found.append(text)
+    return matches, not_found
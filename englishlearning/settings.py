@@ -80,7 +80,7 @@ INSTALLED_APPS = [
     'django_filters',
     'django_extensions',
     'social_django',  # 添加social-auth-app-django
-    # 'django_crontab',  # 添加crontab支持 - 暂时注释掉
+    'django_crontab',  # 定时任务（CRONJOBS），start.sh 中执行 crontab add 注册
     
     # 自定义应用
     'apps.accounts',
@@ -295,6 +295,22 @@ CACHES = {
     }
 }
 
+# 发音音频缓存配置
+PRONUNCIATION_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'pronunciation')
+PRONUNCIATION_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1GB，超过后按LRU淘汰
+PRONUNCIATION_UPSTREAM_URL = 'https://dict.youdao.com/dictvoice'
+PRONUNCIATION_UPSTREAM_TIMEOUT = (3, 10)  # (连接超时, 读取超时) 秒
+
+# 词汇导入：超过该大小的CSV转为后台任务导入
+VOCABULARY_IMPORT_SYNC_MAX_BYTES = 256 * 1024
+
+# PDF单词表提取：进程数（None 为CPU核数，最多4）和OCR语言
+VOCABULARY_PDF_WORKERS = None
+VOCABULARY_PDF_OCR_LANG = 'eng+chi_sim'
+
+# 词书统计：单词写入提交后在后台线程中重新统计（False 时在提交后同步统计）
+VOCABULARY_BOOK_STATS_ASYNC = True
+
 # 日志配置
 LOGGING = {
     'version': 1,
@@ -345,8 +361,18 @@ LOGGING = {
     },
 }
 
-# Crontab任务配置
+# Crontab任务配置（修改后需重新执行 python manage.py crontab add）
+# 同一任务上一次还没执行完时跳过本次，避免长时间的导入/清理任务重叠执行
+CRONTAB_LOCK_JOBS = True
 CRONJOBS = [
     # 每天凌晨3点执行验证码清理任务
     ('0 3 * * *', 'utils.cleanup_tasks.cleanup_verification_codes', '>> ' + os.path.join(BASE_DIR, 'log', 'verification_cleanup.log') + ' 2>&1'),
+    # 每5分钟接管中断（进程重启/崩溃）的词汇导入任务，从断点继续
+    ('*/5 * * * *', 'apps.vocabulary.import_jobs.resume_import_jobs', '>> ' + os.path.join(BASE_DIR, 'log', 'import_jobs.log') + ' 2>&1'),
+    # 每10分钟继续清理已隐藏但未删除完的词汇书（分批提交，不长时间锁表）
+    ('*/10 * * * *', 'apps.vocabulary.book_deletion.purge_deleted_books', '>> ' + os.path.join(BASE_DIR, 'log', 'book_deletion.log') + ' 2>&1'),
+    # 每天凌晨4点预先计算系统预设词书之间的重叠索引
+    ('0 4 * * *', 'apps.vocabulary.book_overlap.refresh_preset_overlaps', '>> ' + os.path.join(BASE_DIR, 'log', 'book_overlap.log') + ' 2>&1'),
+    # 每15分钟补上进程重启时丢失的词书统计刷新（内容版本落后或计划数不一致的词书）
+    ('*/15 * * * *', 'apps.vocabulary.book_stats.refresh_stale_book_stats', '>> ' + os.path.join(BASE_DIR, 'log', 'book_stats.log') + ' 2>&1'),
 ]
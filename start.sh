@@ -5,6 +5,10 @@ source venv/bin/activate
 # 确保log目录存在
 mkdir -p log
 
+# 注册定时任务（settings.CRONJOBS）：接管中断的导入任务、继续清理已隐藏的词汇书等
+# 重复执行会替换本项目已注册的任务，不会重复添加
+python manage.py crontab add
+
 # 安装Gunicorn(如果尚未安装)
 pip install gunicorn
 